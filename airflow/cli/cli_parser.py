@@ -185,6 +185,13 @@ ARG_YES = Arg(
     help="Do not prompt to confirm reset. Use with care!",
     action="store_true",
     default=False)
+ARG_PROFILE_PARSING = Arg(
+    ("--profile",),
+    help=(
+        "Profile the parsing of the DAG files: the import time of the modules they import, the queries "
+        "sent by their top level code and the time spent constructing DAGs and operators"
+    ),
+    action="store_true")
 ARG_OUTPUT = Arg(
     ("--output",),
     help=(
@@ -801,7 +808,7 @@ DAGS_COMMANDS = (
         name='report',
         help='Show DagBag loading report',
         func=lazy_load_command('airflow.cli.commands.dag_command.dag_report'),
-        args=(ARG_SUBDIR, ARG_OUTPUT),
+        args=(ARG_SUBDIR, ARG_OUTPUT, ARG_PROFILE_PARSING),
     ),
     ActionCommand(
         name='list-runs',
@@ -1339,6 +1346,15 @@ airflow_commands: List[CLICommand] = [
             ARG_STDERR, ARG_LOG_FILE
         ),
     ),
+    ActionCommand(
+        name='dag-processor',
+        help="Start a standalone DAG processor instance",
+        func=lazy_load_command('airflow.cli.commands.dag_processor_command.dag_processor'),
+        args=(
+            ARG_SUBDIR, ARG_NUM_RUNS, ARG_DO_PICKLE, ARG_PID, ARG_DAEMON, ARG_STDOUT, ARG_STDERR,
+            ARG_LOG_FILE
+        ),
+    ),
     ActionCommand(
         name='version',
         help="Show the version",
@@ -34,6 +34,7 @@ from airflow.configuration import conf
 from airflow.executors.celery_executor import app as celery_app
 from airflow.utils import cli as cli_utils
 from airflow.utils.cli import setup_locations, setup_logging
+from airflow.utils.heartbeat_aggregator import serve_heartbeat_aggregator
 from airflow.utils.serve_logs import serve_logs
 
 WORKER_PROCESS_NAME = "worker"
@@ -91,6 +92,15 @@ def _serve_logs(skip_serve_logs: bool = False) -> Optional[Process]:
     return None
 
 
+def _serve_heartbeat_aggregator() -> Optional[Process]:
+    """Starts the heartbeat aggregator sub-process, if the LocalTaskJobs heartbeat through it"""
+    if conf.get('core', 'heartbeat_aggregator_socket', fallback=''):
+        sub_proc = Process(target=serve_heartbeat_aggregator)
+        sub_proc.start()
+        return sub_proc
+    return None
+
+
 @cli_utils.action_logging
 def worker(args):
     """Starts Airflow Celery worker"""
@@ -169,6 +179,7 @@ def worker(args):
         )
         with ctx:
             sub_proc = _serve_logs(skip_serve_logs)
+            heartbeat_aggregator_proc = _serve_heartbeat_aggregator()
             worker_instance.run(**options)
 
         stdout.close()
@@ -176,10 +187,13 @@ def worker(args):
     else:
         # Run Celery worker in the same process
         sub_proc = _serve_logs(skip_serve_logs)
+        heartbeat_aggregator_proc = _serve_heartbeat_aggregator()
         worker_instance.run(**options)
 
     if sub_proc:
         sub_proc.terminate()
+    if heartbeat_aggregator_proc:
+        heartbeat_aggregator_proc.terminate()
 
 
 @cli_utils.action_logging
@@ -311,8 +311,32 @@ def dag_list_dags(args):
 @cli_utils.action_logging
 def dag_report(args):
     """Displays dagbag stats at the command line"""
-    dagbag = DagBag(process_subdir(args.subdir))
-    print(tabulate(dagbag.dagbag_stats, headers="keys", tablefmt=args.output))
+    if not args.profile:
+        dagbag = DagBag(process_subdir(args.subdir))
+        print(tabulate(dagbag.dagbag_stats, headers="keys", tablefmt=args.output))
+        return
+
+    dagbag = DagBag(process_subdir(args.subdir), profile_parsing=True)
+    profiles = sorted(dagbag.parse_profiler.profiles.values(), key=lambda p: p.duration, reverse=True)
+    rows = [
+        {
+            "file": profile.file_path.replace(settings.DAGS_FOLDER, ''),
+            "duration": round(profile.duration, 3),
+            "top_level_code": round(profile.durations['top_level_code'], 3),
+            "imports": round(profile.durations['imports'], 3),
+            "queries": profile.queries,
+            "dags": profile.counts['dag_init'],
+            "dag_init": round(profile.durations['dag_init'], 3),
+            "operators": profile.counts['operator_init'],
+            "operator_init": round(profile.durations['operator_init'], 3),
+            "bag_dag": round(profile.durations['bag_dag'], 3),
+            "slowest_imports": ", ".join(
+                f"{name} ({duration:.3f})" for name, duration in profile.slowest_imports(3)
+            ),
+        }
+        for profile in profiles
+    ]
+    print(tabulate(rows, headers="keys", tablefmt=args.output))
 
 
 @cli_utils.action_logging
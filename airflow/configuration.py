@@ -244,6 +244,39 @@ class AirflowConfigParser(ConfigParser):  # pylint: disable=too-many-ancestors
                     "mp_start_method should not be " + mp_start_method +
                     ". Possible values are " + ", ".join(start_method_options))
 
+        if (
+                self.getboolean('scheduler', 'schedule_from_serialized_dags', fallback=False) and
+                not self.getboolean('core', 'store_serialized_dags', fallback=False)):
+            raise AirflowConfigException(
+                "error: [scheduler] schedule_from_serialized_dags requires "
+                "[core] store_serialized_dags to be True")
+
+        if (
+                self.getboolean('scheduler', 'skip_unchanged_dag_files', fallback=False) and
+                not self.getboolean('scheduler', 'schedule_from_serialized_dags', fallback=False)):
+            raise AirflowConfigException(
+                "error: [scheduler] skip_unchanged_dag_files requires "
+                "[scheduler] schedule_from_serialized_dags to be True")
+
+        if (
+                self.getboolean('scheduler', 'standalone_dag_processor', fallback=False) and
+                not self.getboolean('scheduler', 'schedule_from_serialized_dags', fallback=False)):
+            raise AirflowConfigException(
+                "error: [scheduler] standalone_dag_processor requires "
+                "[scheduler] schedule_from_serialized_dags to be True")
+
+        priorities = self.get('scheduler', 'dag_file_parsing_priorities', fallback='')
+        if priorities:
+            try:
+                priorities = json.loads(priorities)
+            except JSONDecodeError:
+                priorities = None
+            if not isinstance(priorities, dict) or not all(
+                    isinstance(priority, int) for priority in priorities.values()):
+                raise AirflowConfigException(
+                    "error: [scheduler] dag_file_parsing_priorities should be a JSON object "
+                    "mapping file path patterns to integer priorities")
+
     def _using_old_value(self, old, current_value):  # noqa
         return old.search(current_value) is not None
 
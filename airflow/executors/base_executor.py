@@ -17,6 +17,7 @@
 """
 Base executor - this is the base class for all the implemented executors.
 """
+import sys
 from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
@@ -124,6 +125,18 @@ class BaseExecutor(LoggingMixin):
         """
         return task_instance.key in self.queued_tasks or task_instance.key in self.running
 
+    @property
+    def slots_available(self) -> int:
+        """
+        Number of new tasks this executor instance can accept, taking the tasks
+        which are already running or queued into account.
+
+        :return: number of open slots, ``sys.maxsize`` when parallelism is unlimited
+        """
+        if not self.parallelism:
+            return sys.maxsize
+        return self.parallelism - len(self.running) - len(self.queued_tasks)
+
     def sync(self) -> None:
         """
         Sync will get called periodically by the heartbeat method.
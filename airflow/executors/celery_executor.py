@@ -26,11 +26,13 @@ import logging
 import math
 import operator
 import os
+import signal
 import subprocess
+import threading
 import time
 import traceback
 from collections import OrderedDict
-from multiprocessing import Pool, cpu_count
+from multiprocessing import Pool, cpu_count, pool
 from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Set, Tuple, Union
 
 from celery import Celery, Task, states as celery_states
@@ -38,13 +40,16 @@ from celery.backends.base import BaseKeyValueStoreBackend
 from celery.backends.database import DatabaseBackend, Task as TaskDb, session_cleanup
 from celery.result import AsyncResult
 
+from airflow import settings
 from airflow.config_templates.default_celery import DEFAULT_CELERY_CONFIG
 from airflow.configuration import conf
 from airflow.exceptions import AirflowException
 from airflow.executors.base_executor import BaseExecutor, CommandType, EventBufferValueType
 from airflow.models.taskinstance import SimpleTaskInstance, TaskInstance, TaskInstanceKey
+from airflow.utils.helpers import chunks
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.net import get_hostname
+from airflow.utils.process_utils import execute_in_fork
 from airflow.utils.state import State
 from airflow.utils.timeout import timeout
 from airflow.utils.timezone import utcnow
@@ -78,6 +83,19 @@ def execute_command(command_to_exec: CommandType) -> None:
     """Executes command."""
     BaseExecutor.validate_command(command_to_exec)
     log.info("Executing command in Celery: %s", command_to_exec)
+    if settings.EXECUTE_TASKS_NEW_PYTHON_INTERPRETER:
+        _execute_in_subprocess(command_to_exec)
+    else:
+        _execute_in_fork(command_to_exec)
+
+
+def _execute_in_fork(command_to_exec: CommandType) -> None:
+    if execute_in_fork(command_to_exec) != 0:
+        msg = 'Celery command failed on host: ' + get_hostname()
+        raise AirflowException(msg)
+
+
+def _execute_in_subprocess(command_to_exec: CommandType) -> None:
     env = os.environ.copy()
     try:
         # pylint: disable=unexpected-keyword-arg
@@ -111,13 +129,13 @@ class ExceptionWithTraceback:
 TaskInstanceInCelery = Tuple[TaskInstanceKey, SimpleTaskInstance, CommandType, Optional[str], Task]
 
 
-def send_task_to_executor(task_tuple: TaskInstanceInCelery) \
+def send_task_to_executor(task_tuple: TaskInstanceInCelery, producer=None) \
         -> Tuple[TaskInstanceKey, CommandType, Union[AsyncResult, ExceptionWithTraceback]]:
-    """Sends task to executor."""
+    """Sends task to executor, with the given Kombu producer if any."""
     key, _, command, queue, task_to_run = task_tuple
     try:
         with timeout(seconds=OPERATION_TIMEOUT):
-            result = task_to_run.apply_async(args=[command], queue=queue)
+            result = task_to_run.apply_async(args=[command], queue=queue, producer=producer)
     except Exception as e:  # pylint: disable=broad-except
         exception_traceback = "Celery Task ID: {}\n{}".format(key, traceback.format_exc())
         result = ExceptionWithTraceback(e, exception_traceback)
@@ -125,6 +143,32 @@ def send_task_to_executor(task_tuple: TaskInstanceInCelery) \
     return key, command, result
 
 
+def send_tasks_to_executor(task_tuples: List[TaskInstanceInCelery]) \
+        -> List[Tuple[TaskInstanceKey, CommandType, Union[AsyncResult, ExceptionWithTraceback]]]:
+    """
+    Sends a batch of tasks to executor, all published with the same producer taken from the
+    producer pool of the app, so over the same broker connection. The scope of this function
+    is global so that it can be called by subprocesses in the pool.
+    """
+    key_and_async_results = []
+    try:
+        with app.producer_or_acquire() as producer:
+            for task_tuple in task_tuples:
+                key_and_async_results.append(send_task_to_executor(task_tuple, producer=producer))
+    except Exception as e:  # pylint: disable=broad-except
+        # The broker connection could not be established, the tasks left were not sent
+        for key, _, command, _, _ in task_tuples[len(key_and_async_results):]:
+            exception_traceback = "Celery Task ID: {}\n{}".format(key, traceback.format_exc())
+            key_and_async_results.append((key, command, ExceptionWithTraceback(e, exception_traceback)))
+    return key_and_async_results
+
+
+def _init_send_process() -> None:
+    """The processes of the send pool are forked from the scheduler, they must not run its signal handlers"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
 class CeleryExecutor(BaseExecutor):
     """
     CeleryExecutor is recommended for production use of Airflow. It allows
@@ -145,6 +189,18 @@ class CeleryExecutor(BaseExecutor):
         if self._sync_parallelism == 0:
             self._sync_parallelism = max(1, cpu_count() - 1)
         self.bulk_state_fetcher = BulkStateFetcher(self._sync_parallelism)
+        # Processes sending the tasks, created when the executor starts and kept until it
+        # ends, so that their connections to the broker are reused from one heartbeat to the next
+        self._send_pool: Optional[pool.Pool] = None
+        # When the task states are tracked from the task events, the tasks without any event are
+        # polled from the result backend once their monotonic time is past
+        self.task_event_receiver: Optional[TaskEventReceiver] = None
+        self._reconcile_task_state_after: Dict[TaskInstanceKey, float] = {}
+        self._task_events_reconcile_interval = conf.getint(
+            'celery', 'task_events_reconcile_interval', fallback=300
+        )
+        if conf.getboolean('celery', 'use_task_events', fallback=False):
+            self.task_event_receiver = TaskEventReceiver()
         self.tasks = {}
         # Mapping of tasks we've adopted, ordered by the earliest date they timeout
         self.adopted_task_timeouts: Dict[TaskInstanceKey, datetime.datetime] = OrderedDict()
@@ -157,6 +213,15 @@ class CeleryExecutor(BaseExecutor):
             'Starting Celery Executor using %s processes for syncing',
             self._sync_parallelism
         )
+        # The send processes are forked before the task event receiver thread starts, so that
+        # they can't inherit a lock held by that thread
+        self._start_send_pool()
+        if self.task_event_receiver:
+            self.task_event_receiver.start()
+
+    def _start_send_pool(self) -> None:
+        if self._send_pool is None and self._sync_parallelism > 1:
+            self._send_pool = Pool(processes=self._sync_parallelism, initializer=_init_send_process)
 
     def _num_tasks_per_send_process(self, to_send_count: int) -> int:
         """
@@ -207,6 +272,9 @@ class CeleryExecutor(BaseExecutor):
                 result.backend = cached_celery_backend
                 self.running.add(key)
                 self.tasks[key] = result
+                self._reconcile_task_state_after[key] = (
+                    time.monotonic() + self._task_events_reconcile_interval
+                )
 
                 # Store the Celery task_id in the event buffer. This will get "overwritten" if the task
                 # has another event, but that is fine, because the only other events are success/failed at
@@ -219,24 +287,42 @@ class CeleryExecutor(BaseExecutor):
     def _send_tasks_to_celery(self, task_tuples_to_send):
         if len(task_tuples_to_send) == 1 or self._sync_parallelism == 1:
             # One tuple, or max one process -> send it in the main thread.
-            return list(map(send_task_to_executor, task_tuples_to_send))
+            return send_tasks_to_executor(task_tuples_to_send)
 
         # Use chunks instead of a work queue to reduce context switching
         # since tasks are roughly uniform in size
         chunksize = self._num_tasks_per_send_process(len(task_tuples_to_send))
-        num_processes = min(len(task_tuples_to_send), self._sync_parallelism)
-        with Pool(processes=num_processes) as send_pool:
-            key_and_async_results = send_pool.map(
-                send_task_to_executor,
-                task_tuples_to_send,
-                chunksize=chunksize)
-        return key_and_async_results
+        if self._send_pool is None:
+            # Only when the executor was not started
+            self._start_send_pool()
+        key_and_async_results_chunks = self._send_pool.map(
+            send_tasks_to_executor,
+            list(chunks(task_tuples_to_send, chunksize)),
+            chunksize=1)
+        return [
+            key_and_async_result
+            for key_and_async_results in key_and_async_results_chunks
+            for key_and_async_result in key_and_async_results
+        ]
+
+    def _close_send_pool(self, terminate: bool = False) -> None:
+        if self._send_pool is None:
+            return
+        if terminate:
+            self._send_pool.terminate()
+        else:
+            self._send_pool.close()
+        self._send_pool.join()
+        self._send_pool = None
 
     def sync(self) -> None:
         if not self.tasks:
             self.log.debug("No task to query celery, skipping sync")
             return
-        self.update_all_task_states()
+        if self.task_event_receiver:
+            self.update_task_states_from_events()
+        else:
+            self.update_all_task_states()
 
         if self.adopted_task_timeouts:
             self._check_for_stalled_adopted_tasks()
@@ -291,10 +377,40 @@ class CeleryExecutor(BaseExecutor):
             if state:
                 self.update_task_state(key, state, info)
 
+    def update_task_states_from_events(self) -> None:
+        """
+        Updates the states of the tasks from the task events received since the last call, and
+        fetches the states of the tasks without any event for ``task_events_reconcile_interval``
+        seconds from the result backend.
+        """
+        state_and_info_by_celery_task_id = self.task_event_receiver.pop_states()
+        now = time.monotonic()
+        stale_keys = []
+        for key, async_result in list(self.tasks.items()):
+            state_and_info = state_and_info_by_celery_task_id.get(async_result.task_id)
+            if state_and_info:
+                self._reconcile_task_state_after[key] = now + self._task_events_reconcile_interval
+                self.update_task_state(key, *state_and_info)
+            elif self._reconcile_task_state_after.get(key, 0) <= now:
+                stale_keys.append(key)
+
+        if not stale_keys:
+            return
+        self.log.debug("Inquiring about %s celery task(s) without task events", len(stale_keys))
+        state_and_info_by_celery_task_id = self.bulk_state_fetcher.get_many(
+            [self.tasks[key] for key in stale_keys]
+        )
+        for key in stale_keys:
+            self._reconcile_task_state_after[key] = now + self._task_events_reconcile_interval
+            state, info = state_and_info_by_celery_task_id.get(self.tasks[key].task_id, (None, None))
+            if state:
+                self.update_task_state(key, state, info)
+
     def change_state(self, key: TaskInstanceKey, state: str, info=None) -> None:
         super().change_state(key, state, info)
         self.tasks.pop(key, None)
         self.adopted_task_timeouts.pop(key, None)
+        self._reconcile_task_state_after.pop(key, None)
 
     def update_task_state(self, key: TaskInstanceKey, state: str, info: Any) -> None:
         """Updates state of a single task."""
@@ -318,6 +434,9 @@ class CeleryExecutor(BaseExecutor):
             while any(task.state not in celery_states.READY_STATES for task in self.tasks.values()):
                 time.sleep(5)
         self.sync()
+        self._close_send_pool()
+        if self.task_event_receiver:
+            self.task_event_receiver.stop()
 
     def execute_async(self,
                       key: TaskInstanceKey,
@@ -328,7 +447,9 @@ class CeleryExecutor(BaseExecutor):
         raise AirflowException("No Async execution for Celery executor.")
 
     def terminate(self):
-        pass
+        self._close_send_pool(terminate=True)
+        if self.task_event_receiver:
+            self.task_event_receiver.stop()
 
     def try_adopt_task_instances(self, tis: List[TaskInstance]) -> List[TaskInstance]:
         # See which of the TIs are still alive (or have finished even!)
@@ -497,3 +618,86 @@ class BulkStateFetcher(LoggingMixin):
                 else:
                     states_and_info_by_task_id[task_id] = state_or_exception, info
         return states_and_info_by_task_id
+
+
+class TaskEventReceiver(LoggingMixin):
+    """
+    Consumes the task events sent by the Celery workers through the broker in a background
+    thread, and keeps the latest state of each task until it is popped by the executor.
+
+    The events sent while the receiver is not connected to the broker are lost, so the
+    executor still polls the result backend for the tasks it got no event for in a while.
+    """
+
+    STATE_BY_EVENT_TYPE = {
+        'task-started': celery_states.STARTED,
+        'task-succeeded': celery_states.SUCCESS,
+        'task-failed': celery_states.FAILURE,
+        'task-revoked': celery_states.REVOKED,
+    }
+
+    # Seconds to wait before connecting to the broker again
+    RECONNECT_DELAY = 5
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._state_and_info_by_task_id: Dict[str, EventBufferValueType] = {}
+        self._stopped = threading.Event()
+        self._receiver = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start consuming the task events in a background thread"""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="celery-task-events", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop consuming the task events"""
+        self._stopped.set()
+        if self._receiver is not None:
+            self._receiver.should_stop = True
+        if self._thread is not None:
+            self._thread.join(timeout=self.RECONNECT_DELAY)
+            self._thread = None
+
+    def pop_states(self) -> Dict[str, EventBufferValueType]:
+        """The latest state and info of the tasks received since the last call, by Celery task ID"""
+        with self._lock:
+            state_and_info_by_task_id, self._state_and_info_by_task_id = self._state_and_info_by_task_id, {}
+        return state_and_info_by_task_id
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        """Record the state of the task of the event"""
+        state = self.STATE_BY_EVENT_TYPE.get(event.get('type'))
+        task_id = event.get('uuid')
+        if state is None or task_id is None:
+            return
+        info = event.get('exception') if state == celery_states.FAILURE else None
+        with self._lock:
+            previous = self._state_and_info_by_task_id.get(task_id)
+            # The events are not ordered across connections, a task never leaves a ready state
+            if previous and previous[0] in celery_states.READY_STATES \
+                    and state not in celery_states.READY_STATES:
+                return
+            self._state_and_info_by_task_id[task_id] = state, info
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                with app.connection_for_read() as connection:
+                    self._receiver = app.events.Receiver(
+                        connection, handlers={'*': self.on_event}, routing_key='task.#'
+                    )
+                    if self._stopped.is_set():
+                        break
+                    self.log.info("Consuming the Celery task events")
+                    self._receiver.capture(limit=None, timeout=None, wakeup=False)
+            except Exception:  # pylint: disable=broad-except
+                self.log.exception(
+                    "Error consuming the Celery task events, reconnecting in %s seconds", self.RECONNECT_DELAY
+                )
+                self._stopped.wait(self.RECONNECT_DELAY)
+            finally:
+                self._receiver = None
@@ -57,6 +57,11 @@ class CeleryKubernetesExecutor(LoggingMixin):
         """
         return self.celery_executor.running.union(self.kubernetes_executor.running)
 
+    @property
+    def slots_available(self) -> int:
+        """Number of new tasks the celery and kubernetes executors can accept"""
+        return self.celery_executor.slots_available + self.kubernetes_executor.slots_available
+
     def start(self) -> None:
         """Start celery and kubernetes executor"""
         self.celery_executor.start()
@@ -22,17 +22,22 @@ KubernetesExecutor
     :ref:`executor:KubernetesExecutor`
 """
 import base64
+import copy
 import functools
 import json
 import multiprocessing
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from queue import Empty, Queue  # pylint: disable=unused-import
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import kubernetes
+import tenacity
 from dateutil import parser
 from kubernetes import client, watch
-from kubernetes.client import Configuration
+from kubernetes.client import models as k8s
 from kubernetes.client.rest import ApiException
 from urllib3.exceptions import ReadTimeoutError
 
@@ -42,9 +47,10 @@ from airflow.exceptions import AirflowException
 from airflow.executors.base_executor import NOT_STARTED_MESSAGE, BaseExecutor, CommandType
 from airflow.kubernetes import pod_generator
 from airflow.kubernetes.kube_client import get_kube_client
+from airflow.kubernetes.pod_cache import SYNC_EVENT, CachedPod, PodCache, WatchEvent
 from airflow.kubernetes.pod_generator import MAX_POD_ID_LEN, PodGenerator
 from airflow.kubernetes.pod_launcher import PodLauncher
-from airflow.models import KubeResourceVersion, KubeWorkerIdentifier, TaskInstance
+from airflow.models import KubeWorkerIdentifier, TaskInstance
 from airflow.models.taskinstance import TaskInstanceKey
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.session import provide_session
@@ -59,6 +65,14 @@ KubernetesResultsType = Tuple[TaskInstanceKey, Optional[str], str, str, str]
 # pod_id, namespace, state, annotations, resource_version
 KubernetesWatchType = Tuple[str, str, Optional[str], Dict[str, str], str]
 
+# Seconds to wait for the watcher to list the worker pods, when the executor starts
+POD_CACHE_SYNC_TIMEOUT = 60
+
+
+def _is_retryable_api_exception(exception: BaseException) -> bool:
+    """Whether the API server throttled the request or failed to handle it"""
+    return isinstance(exception, ApiException) and (exception.status == 429 or exception.status >= 500)
+
 
 class KubeConfig:  # pylint: disable=too-many-instance-attributes
     """Configuration for Kubernetes"""
@@ -82,6 +96,10 @@ class KubeConfig:  # pylint: disable=too-many-instance-attributes
             self.kubernetes_section, 'delete_worker_pods_on_failure')
         self.worker_pods_creation_batch_size = conf.getint(
             self.kubernetes_section, 'worker_pods_creation_batch_size')
+        self.worker_pods_creation_concurrency = conf.getint(
+            self.kubernetes_section, 'worker_pods_creation_concurrency')
+        self.worker_pods_resync_interval = conf.getint(
+            self.kubernetes_section, 'worker_pods_resync_interval')
 
         self.worker_container_repository = conf.get(
             self.kubernetes_section, 'worker_container_repository')
@@ -127,21 +145,24 @@ class KubeConfig:  # pylint: disable=too-many-instance-attributes
 
 
 class KubernetesJobWatcher(multiprocessing.Process, LoggingMixin):
-    """Watches for Kubernetes jobs"""
+    """
+    Watches the worker pods, and sends their state to the scheduler through the
+    ``watcher_queue``. The pods are listed when the watcher starts, when the resource
+    version of the watch stream expired and every ``worker_pods_resync_interval`` seconds,
+    and watched in between.
+    """
 
     def __init__(self,
                  namespace: Optional[str],
                  multi_namespace_mode: bool,
-                 watcher_queue: 'Queue[KubernetesWatchType]',
-                 resource_version: Optional[str],
+                 watcher_queue: 'Queue[WatchEvent]',
                  worker_uuid: Optional[str],
-                 kube_config: Configuration):
+                 kube_config: Any):
         super().__init__()
         self.namespace = namespace
         self.multi_namespace_mode = multi_namespace_mode
         self.worker_uuid = worker_uuid
         self.watcher_queue = watcher_queue
-        self.resource_version = resource_version
         self.kube_config = kube_config
 
     def run(self) -> None:
@@ -149,10 +170,20 @@ class KubernetesJobWatcher(multiprocessing.Process, LoggingMixin):
         kube_client: client.CoreV1Api = get_kube_client()
         if not self.worker_uuid:
             raise AirflowException(NOT_STARTED_MESSAGE)
+        resource_version: Optional[str] = None
+        listed_at = 0.0
         while True:
             try:
-                self.resource_version = self._run(kube_client, self.resource_version,
-                                                  self.worker_uuid, self.kube_config)
+                resync_interval = self.kube_config.worker_pods_resync_interval
+                if resource_version is None or \
+                        0 < resync_interval <= time.monotonic() - listed_at:
+                    resource_version = self._list_pods(kube_client, self.worker_uuid, self.kube_config)
+                    listed_at = time.monotonic()
+                timeout_seconds = None
+                if resync_interval > 0:
+                    timeout_seconds = max(1, int(listed_at + resync_interval - time.monotonic()))
+                resource_version = self._run(kube_client, resource_version,
+                                             self.worker_uuid, self.kube_config, timeout_seconds)
             except ReadTimeoutError:
                 self.log.warning("There was a timeout error accessing the Kube API. "
                                  "Retrying request.", exc_info=True)
@@ -161,28 +192,56 @@ class KubernetesJobWatcher(multiprocessing.Process, LoggingMixin):
                 self.log.exception('Unknown error in KubernetesJobWatcher. Failing')
                 raise
             else:
-                self.log.warning('Watch died gracefully, starting back up with: '
-                                 'last resource_version: %s', self.resource_version)
+                self.log.info('Watch ended, starting back up with: '
+                              'last resource_version: %s', resource_version)
+
+    def _list_kwargs(self, worker_uuid: str, kube_config: Any) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {'label_selector': 'airflow-worker={}'.format(worker_uuid)}
+        if kube_config.kube_client_request_args:
+            for key, value in kube_config.kube_client_request_args.items():
+                kwargs[key] = value
+        return kwargs
+
+    def _list_pods(self,
+                   kube_client: client.CoreV1Api,
+                   worker_uuid: str,
+                   kube_config: Any) -> str:
+        """Send the state of all the worker pods, and return the resource version to watch from"""
+        kwargs = self._list_kwargs(worker_uuid, kube_config)
+        if self.multi_namespace_mode:
+            pod_list = kube_client.list_pod_for_all_namespaces(**kwargs)
+        else:
+            pod_list = kube_client.list_namespaced_pod(self.namespace, **kwargs)
+        resource_version = pod_list.metadata.resource_version
+        self.log.info('Listed %d pods at resource_version: %s', len(pod_list.items), resource_version)
+        self.watcher_queue.put(WatchEvent(
+            SYNC_EVENT, [CachedPod.from_pod(pod) for pod in pod_list.items], resource_version
+        ))
+        return resource_version
 
     def _run(self,
              kube_client: client.CoreV1Api,
              resource_version: Optional[str],
              worker_uuid: str,
-             kube_config: Any) -> Optional[str]:
+             kube_config: Any,
+             timeout_seconds: Optional[int] = None) -> Optional[str]:
+        """
+        Watch the worker pods from ``resource_version``, and return the resource version
+        to watch from next, or None if the pods must be listed again.
+        """
         self.log.info(
             'Event: and now my watch begins starting at resource_version: %s',
             resource_version
         )
         watcher = watch.Watch()
 
-        kwargs = {'label_selector': 'airflow-worker={}'.format(worker_uuid)}
+        kwargs = self._list_kwargs(worker_uuid, kube_config)
         if resource_version:
             kwargs['resource_version'] = resource_version
-        if kube_config.kube_client_request_args:
-            for key, value in kube_config.kube_client_request_args.items():
-                kwargs[key] = value
+        if timeout_seconds:
+            kwargs['timeout_seconds'] = timeout_seconds
 
-        last_resource_version: Optional[str] = None
+        last_resource_version = resource_version
         if self.multi_namespace_mode:
             list_worker_pods = functools.partial(watcher.stream,
                                                  kube_client.list_pod_for_all_namespaces,
@@ -200,27 +259,14 @@ class KubernetesJobWatcher(multiprocessing.Process, LoggingMixin):
             )
             if event['type'] == 'ERROR':
                 return self.process_error(event)
-            annotations = task.metadata.annotations
-            task_instance_related_annotations = {
-                'dag_id': annotations['dag_id'],
-                'task_id': annotations['task_id'],
-                'execution_date': annotations['execution_date'],
-                'try_number': annotations['try_number'],
-            }
-
-            self.process_status(
-                pod_id=task.metadata.name,
-                namespace=task.metadata.namespace,
-                status=task.status.phase,
-                annotations=task_instance_related_annotations,
-                resource_version=task.metadata.resource_version,
-                event=event,
-            )
             last_resource_version = task.metadata.resource_version
+            self.watcher_queue.put(
+                WatchEvent(event['type'], [CachedPod.from_pod(task)], last_resource_version)
+            )
 
         return last_resource_version
 
-    def process_error(self, event: Any) -> str:
+    def process_error(self, event: Any) -> Optional[str]:
         """Process error response"""
         self.log.error(
             'Encountered Error response from k8s list namespaced pod stream => %s',
@@ -229,45 +275,15 @@ class KubernetesJobWatcher(multiprocessing.Process, LoggingMixin):
         raw_object = event['raw_object']
         if raw_object['code'] == 410:
             self.log.info(
-                'Kubernetes resource version is too old, must reset to 0 => %s',
+                'Kubernetes resource version is too old, must list the pods again => %s',
                 (raw_object['message'],)
             )
-            # Return resource version 0
-            return '0'
+            return None
         raise AirflowException(
             'Kubernetes failure for %s with code %s and message: %s' %
             (raw_object['reason'], raw_object['code'], raw_object['message'])
         )
 
-    def process_status(self, pod_id: str,
-                       namespace: str,
-                       status: str,
-                       annotations: Dict[str, str],
-                       resource_version: str,
-                       event: Any) -> None:
-        """Process status response"""
-        if status == 'Pending':
-            if event['type'] == 'DELETED':
-                self.log.info('Event: Failed to start pod %s, will reschedule', pod_id)
-                self.watcher_queue.put(
-                    (pod_id, namespace, State.UP_FOR_RESCHEDULE, annotations, resource_version)
-                )
-            else:
-                self.log.info('Event: %s Pending', pod_id)
-        elif status == 'Failed':
-            self.log.error('Event: %s Failed', pod_id)
-            self.watcher_queue.put((pod_id, namespace, State.FAILED, annotations, resource_version))
-        elif status == 'Succeeded':
-            self.log.info('Event: %s Succeeded', pod_id)
-            self.watcher_queue.put((pod_id, namespace, None, annotations, resource_version))
-        elif status == 'Running':
-            self.log.info('Event: %s is Running', pod_id)
-        else:
-            self.log.warning(
-                'Event: Invalid state: %s on pod: %s in namespace %s with annotations: %s with '
-                'resource_version: %s', status, pod_id, namespace, annotations, resource_version
-            )
-
 
 class AirflowKubernetesScheduler(LoggingMixin):
     """Airflow Scheduler for Kubernetes"""
@@ -290,14 +306,16 @@ class AirflowKubernetesScheduler(LoggingMixin):
         self._manager = multiprocessing.Manager()
         self.watcher_queue = self._manager.Queue()
         self.worker_uuid = worker_uuid
+        self.pod_cache = PodCache()
         self.kube_watcher = self._make_kube_watcher()
+        # The parsed pod template file, with the modification time and size of the file
+        self._base_worker_pod: Optional[Tuple[Tuple[int, int], k8s.V1Pod]] = None
+        self._base_worker_pod_lock = threading.Lock()
 
     def _make_kube_watcher(self) -> KubernetesJobWatcher:
-        resource_version = KubeResourceVersion.get_current_resource_version()
         watcher = KubernetesJobWatcher(watcher_queue=self.watcher_queue,
                                        namespace=self.kube_config.kube_namespace,
                                        multi_namespace_mode=self.kube_config.multi_namespace_mode,
-                                       resource_version=resource_version,
                                        worker_uuid=self.worker_uuid,
                                        kube_config=self.kube_config)
         watcher.start()
@@ -326,10 +344,7 @@ class AirflowKubernetesScheduler(LoggingMixin):
         if command[0:3] != ["airflow", "tasks", "run"]:
             raise ValueError('The command must start with ["airflow", "tasks", "run"].')
 
-        base_worker_pod = PodGenerator.deserialize_model_file(self.kube_config.pod_template_file)
-        if not base_worker_pod:
-            raise AirflowException("could not find a valid worker template yaml at {}"
-                                   .format(self.kube_config.pod_template_file))
+        base_worker_pod = self._get_base_worker_pod()
 
         pod = PodGenerator.construct_pod(
             namespace=self.namespace,
@@ -350,9 +365,54 @@ class AirflowKubernetesScheduler(LoggingMixin):
         self.log.debug("Kubernetes launching image %s", pod.spec.containers[0].image)
 
         # the watcher will monitor pods, so we do not block.
-        self.launcher.run_pod_async(pod, **self.kube_config.kube_client_request_args)
+        self._create_pod(pod)
         self.log.debug("Kubernetes Job created!")
 
+    def _get_base_worker_pod(self) -> k8s.V1Pod:
+        """
+        Copy of the pod of the pod template file. The file is only parsed again when
+        its modification time or size changed.
+        """
+        pod_template_file = self.kube_config.pod_template_file
+        try:
+            stat = os.stat(pod_template_file)
+            file_version: Optional[Tuple[int, int]] = (stat.st_mtime_ns, stat.st_size)
+        except (OSError, TypeError):
+            # Not a file, the pod is parsed from the setting itself every time
+            file_version = None
+
+        with self._base_worker_pod_lock:
+            if file_version is None or not self._base_worker_pod or \
+                    self._base_worker_pod[0] != file_version:
+                base_worker_pod = PodGenerator.deserialize_model_file(pod_template_file)
+                if not base_worker_pod:
+                    raise AirflowException("could not find a valid worker template yaml at {}"
+                                           .format(pod_template_file))
+                self._base_worker_pod = (file_version, base_worker_pod) if file_version else None
+            else:
+                base_worker_pod = self._base_worker_pod[1]
+
+        # The pods are merged into and mutated by the pod mutation hook, copying the
+        # parsed pod is much cheaper than parsing the file again
+        return copy.deepcopy(base_worker_pod)
+
+    def _create_pod(self, pod: k8s.V1Pod) -> None:
+        """
+        Create the pod, retried with an exponential backoff when the API server
+        throttles the requests or fails to handle them.
+        """
+        def create_pod():
+            # The pod mutation hook changes the pod in place, each attempt gets its own copy
+            self.launcher.run_pod_async(copy.deepcopy(pod), **self.kube_config.kube_client_request_args)
+
+        retrying = tenacity.Retrying(
+            stop=tenacity.stop_after_attempt(3),
+            wait=tenacity.wait_exponential(),
+            retry=tenacity.retry_if_exception(_is_retryable_api_exception),
+            reraise=True,
+        )
+        retrying(create_pod)
+
     def delete_pod(self, pod_id: str, namespace: str) -> None:
         """Deletes POD"""
         try:
@@ -376,14 +436,77 @@ class AirflowKubernetesScheduler(LoggingMixin):
         self._health_check_kube_watcher()
         while True:
             try:
-                task = self.watcher_queue.get_nowait()
+                event = self.watcher_queue.get_nowait()
                 try:
-                    self.process_watcher_task(task)
+                    self.process_watcher_event(event)
                 finally:
                     self.watcher_queue.task_done()
             except Empty:
                 break
 
+    def wait_for_pod_cache(self, timeout: float) -> bool:
+        """
+        Process the events of the watcher until the pods it listed are in the pod cache.
+
+        :return: whether the pods are in the pod cache
+        """
+        deadline = time.monotonic() + timeout
+        while not self.pod_cache.synced:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                event = self.watcher_queue.get(timeout=remaining)
+            except Empty:
+                return False
+            try:
+                self.process_watcher_event(event)
+            finally:
+                self.watcher_queue.task_done()
+        return True
+
+    def process_watcher_event(self, event: WatchEvent) -> None:
+        """Update the pod cache with the event of the watcher, and process the pods which changed"""
+        if event.type == SYNC_EVENT:
+            for previous_pod, pod, deleted in self.pod_cache.replace(event.pods):
+                self.process_pod_change(previous_pod, pod, deleted)
+        elif event.type == 'DELETED':
+            for pod in event.pods:
+                self.process_pod_change(self.pod_cache.delete(pod.namespace, pod.name), pod, True)
+        else:
+            for pod in event.pods:
+                self.process_pod_change(self.pod_cache.update(pod), pod, False)
+
+    def process_pod_change(self, previous_pod: Optional[CachedPod], pod: CachedPod, deleted: bool) -> None:
+        """Process the new state of a pod, ``previous_pod`` is its state in the pod cache"""
+        pod_id = pod.name
+        if deleted and pod.phase == 'Pending':
+            self.log.info('Event: Failed to start pod %s, will reschedule', pod_id)
+            state: Optional[str] = State.UP_FOR_RESCHEDULE
+        elif previous_pod and previous_pod.phase == pod.phase:
+            # The state of the task did not change
+            return
+        elif pod.phase == 'Pending':
+            self.log.info('Event: %s Pending', pod_id)
+            return
+        elif pod.phase == 'Failed':
+            self.log.error('Event: %s Failed', pod_id)
+            state = State.FAILED
+        elif pod.phase == 'Succeeded':
+            self.log.info('Event: %s Succeeded', pod_id)
+            state = None
+        elif pod.phase == 'Running':
+            self.log.info('Event: %s is Running', pod_id)
+            return
+        else:
+            self.log.warning(
+                'Event: Invalid state: %s on pod: %s in namespace %s with annotations: %s with '
+                'resource_version: %s', pod.phase, pod_id, pod.namespace, pod.annotations,
+                pod.resource_version
+            )
+            return
+        self.process_watcher_task((pod_id, pod.namespace, state, pod.annotations, pod.resource_version))
+
     def process_watcher_task(self, task: KubernetesWatchType) -> None:
         """Process the task by watcher."""
         pod_id, namespace, state, annotations, resource_version = task
@@ -481,6 +604,8 @@ class KubernetesExecutor(BaseExecutor, LoggingMixin):
         self.kube_scheduler: Optional[AirflowKubernetesScheduler] = None
         self.kube_client: Optional[client.CoreV1Api] = None
         self.worker_uuid: Optional[str] = None
+        # Creates the pods of a batch concurrently
+        self._pod_creation_pool: Optional[ThreadPoolExecutor] = None
         super().__init__(parallelism=self.kube_config.parallelism)
 
     @provide_session
@@ -502,6 +627,8 @@ class KubernetesExecutor(BaseExecutor, LoggingMixin):
         """
         if not self.kube_client:
             raise AirflowException(NOT_STARTED_MESSAGE)
+        if not self.kube_scheduler:
+            raise AirflowException(NOT_STARTED_MESSAGE)
         queued_tasks = session \
             .query(TaskInstance) \
             .filter(TaskInstance.state == State.QUEUED).all()
@@ -509,27 +636,24 @@ class KubernetesExecutor(BaseExecutor, LoggingMixin):
             'When executor started up, found %s queued task instances',
             len(queued_tasks)
         )
+        if not queued_tasks:
+            return
+
+        # The pods listed by the watcher tell which tasks were launched, rather than
+        # listing the pods of each task
+        use_pod_cache = self.kube_scheduler.wait_for_pod_cache(timeout=POD_CACHE_SYNC_TIMEOUT)
+        if not use_pod_cache:
+            self.log.warning('The worker pods were not listed by the watcher after %s seconds, '
+                             'listing the pods of each queued task', POD_CACHE_SYNC_TIMEOUT)
 
         for task in queued_tasks:
-            # pylint: disable=protected-access
-            dict_string = (
-                "dag_id={},task_id={},execution_date={},airflow-worker={}".format(
-                    pod_generator.make_safe_label_value(task.dag_id),
-                    pod_generator.make_safe_label_value(task.task_id),
-                    pod_generator.datetime_to_label_safe_datestring(
-                        task.execution_date
-                    ),
-                    self.worker_uuid
-                )
-            )
-            # pylint: enable=protected-access
-            kwargs = dict(label_selector=dict_string)
-            if self.kube_config.kube_client_request_args:
-                for key, value in self.kube_config.kube_client_request_args.items():
-                    kwargs[key] = value
-            pod_list = self.kube_client.list_namespaced_pod(
-                self.kube_config.kube_namespace, **kwargs)
-            if not pod_list.items:
+            if use_pod_cache:
+                launched = bool(self.kube_scheduler.pod_cache.get_task_pods(
+                    task.dag_id, task.task_id, task.execution_date
+                ))
+            else:
+                launched = self._is_task_launched(task)
+            if not launched:
                 self.log.info(
                     'TaskInstance: %s found in queued state but was not launched, '
                     'rescheduling', task
@@ -540,6 +664,28 @@ class KubernetesExecutor(BaseExecutor, LoggingMixin):
                     TaskInstance.execution_date == task.execution_date
                 ).update({TaskInstance.state: State.NONE})
 
+    def _is_task_launched(self, task: TaskInstance) -> bool:
+        """Whether there is a pod for the task instance on kubernetes"""
+        if not self.kube_client:
+            raise AirflowException(NOT_STARTED_MESSAGE)
+        dict_string = (
+            "dag_id={},task_id={},execution_date={},airflow-worker={}".format(
+                pod_generator.make_safe_label_value(task.dag_id),
+                pod_generator.make_safe_label_value(task.task_id),
+                pod_generator.datetime_to_label_safe_datestring(
+                    task.execution_date
+                ),
+                self.worker_uuid
+            )
+        )
+        kwargs = dict(label_selector=dict_string)
+        if self.kube_config.kube_client_request_args:
+            for key, value in self.kube_config.kube_client_request_args.items():
+                kwargs[key] = value
+        pod_list = self.kube_client.list_namespaced_pod(
+            self.kube_config.kube_namespace, **kwargs)
+        return bool(pod_list.items)
+
     def _inject_secrets(self) -> None:
         def _create_or_update_secret(secret_name, secret_path):
             try:
@@ -572,16 +718,14 @@ class KubernetesExecutor(BaseExecutor, LoggingMixin):
         if not self.worker_uuid:
             raise AirflowException("Could not get worker uuid")
         self.log.debug('Start with worker_uuid: %s', self.worker_uuid)
-        # always need to reset resource version since we don't know
-        # when we last started, note for behavior below
-        # https://github.com/kubernetes-client/python/blob/master/kubernetes/docs
-        # /CoreV1Api.md#list_namespaced_pod
-        KubeResourceVersion.reset_resource_version()
         self.kube_client = get_kube_client()
         self.kube_scheduler = AirflowKubernetesScheduler(
             self.kube_config, self.task_queue, self.result_queue,
             self.kube_client, self.worker_uuid
         )
+        self._pod_creation_pool = ThreadPoolExecutor(
+            max_workers=max(1, self.kube_config.worker_pods_creation_concurrency)
+        )
         self._inject_secrets()
         self.clear_not_launched_queued_tasks()
 
@@ -619,13 +763,11 @@ class KubernetesExecutor(BaseExecutor, LoggingMixin):
             raise AirflowException(NOT_STARTED_MESSAGE)
         self.kube_scheduler.sync()
 
-        last_resource_version = None
         while True:  # pylint: disable=too-many-nested-blocks
             try:
                 results = self.result_queue.get_nowait()
                 try:
-                    key, state, pod_id, namespace, resource_version = results
-                    last_resource_version = resource_version
+                    key, state, pod_id, namespace, _ = results
                     self.log.info('Changing state of %s to %s', results, state)
                     try:
                         self._change_state(key, state, pod_id, namespace)
@@ -640,28 +782,39 @@ class KubernetesExecutor(BaseExecutor, LoggingMixin):
             except Empty:
                 break
 
-        KubeResourceVersion.checkpoint_resource_version(last_resource_version)
-
-        # pylint: disable=too-many-nested-blocks
+        tasks: List[KubernetesJobType] = []
         for _ in range(self.kube_config.worker_pods_creation_batch_size):
             try:
-                task = self.task_queue.get_nowait()
-                try:
-                    self.kube_scheduler.run_next(task)
-                except ApiException as e:
-                    if e.reason == "BadRequest":
-                        self.log.error("Request was invalid. Failing task")
-                        key, _, _ = task
-                        self.change_state(key, State.FAILED, e)
-                    else:
-                        self.log.warning('ApiException when attempting to run task, re-queueing. '
-                                         'Message: %s', json.loads(e.body)['message'])
-                        self.task_queue.put(task)
-                finally:
-                    self.task_queue.task_done()
+                tasks.append(self.task_queue.get_nowait())
             except Empty:
                 break
-        # pylint: enable=too-many-nested-blocks
+        if tasks:
+            self._run_next_tasks(tasks)
+
+    def _run_next_tasks(self, tasks: List[KubernetesJobType]) -> None:
+        """Create the pods of the tasks concurrently, and re-queue the tasks whose pod was not created"""
+        if not self.kube_scheduler or not self._pod_creation_pool or not self.task_queue:
+            raise AirflowException(NOT_STARTED_MESSAGE)
+        futures = [self._pod_creation_pool.submit(self.kube_scheduler.run_next, task) for task in tasks]
+        for task, future in zip(tasks, futures):
+            try:
+                future.result()
+            except ApiException as e:
+                if e.reason == "BadRequest":
+                    self.log.error("Request was invalid. Failing task")
+                    key, _, _ = task
+                    self.change_state(key, State.FAILED, e)
+                else:
+                    self.log.warning('ApiException when attempting to run task, re-queueing. '
+                                     'Message: %s', json.loads(e.body)['message'])
+                    self.task_queue.put(task)
+            except Exception as e:  # pylint: disable=broad-except
+                # The other pods of the batch are created all the same
+                self.log.exception("Failed to run task %s", task)
+                key, _, _ = task
+                self.change_state(key, State.FAILED, e)
+            finally:
+                self.task_queue.task_done()
 
     def _change_state(self,
                       key: TaskInstanceKey,
@@ -732,6 +885,8 @@ class KubernetesExecutor(BaseExecutor, LoggingMixin):
         # Both queues should be empty...
         self.task_queue.join()
         self.result_queue.join()
+        if self._pod_creation_pool:
+            self._pod_creation_pool.shutdown()
         if self.kube_scheduler:
             self.kube_scheduler.terminate()
         self._manager.shutdown()
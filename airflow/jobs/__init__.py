@@ -18,5 +18,6 @@
 #
 import airflow.jobs.backfill_job  # noqa
 import airflow.jobs.base_job  # noqa
+import airflow.jobs.dag_processor_job  # noqa
 import airflow.jobs.local_task_job  # noqa
 import airflow.jobs.scheduler_job  # noqa
@@ -0,0 +1,145 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Standalone DAG processor, parsing the DAG files apart from the scheduler."""
+import os
+import signal
+import sys
+import time
+from datetime import timedelta
+from typing import Optional
+
+from airflow import settings
+from airflow.configuration import conf
+from airflow.executors.executor_loader import UNPICKLEABLE_EXECUTORS
+from airflow.jobs.base_job import BaseJob
+from airflow.jobs.scheduler_job import SchedulerJob
+from airflow.utils.dag_processing import DagFileProcessorAgent
+
+
+class DagProcessorJob(BaseJob):
+    """
+    Parses the DAG files and writes the serialized DAGs and the import errors to the
+    database, for the schedulers run with ``[scheduler] standalone_dag_processor``.
+
+    Several DagProcessorJobs can run at the same time: the files of the DAG folder
+    are shared between the jobs which heartbeat, and shared again when one of them
+    starts or stops, see :func:`airflow.utils.dag_processing.get_dag_file_shard`.
+
+    :param subdir: directory containing Python files with Airflow DAG
+        definitions, or a specific path to a file
+    :type subdir: str
+    :param num_runs: The number of times to parse each DAG file.
+        -1 for unlimited times.
+    :type num_runs: int
+    :param processor_poll_interval: The number of seconds to wait between
+        polls of running processors
+    :type processor_poll_interval: float
+    :param do_pickle: once a DAG object is obtained by executing the Python
+        file, whether to serialize the DAG object to the DB
+    :type do_pickle: bool
+    """
+
+    __mapper_args__ = {
+        'polymorphic_identity': 'DagProcessorJob'
+    }
+
+    def __init__(
+            self,
+            subdir: str = settings.DAGS_FOLDER,
+            num_runs: int = conf.getint('scheduler', 'num_runs'),
+            processor_poll_interval: float = conf.getfloat('scheduler', 'processor_poll_interval'),
+            do_pickle: bool = False,
+            *args, **kwargs):
+        self.subdir = subdir
+        self.num_runs = num_runs
+        self._processor_poll_interval = processor_poll_interval
+        self.do_pickle = do_pickle
+        super().__init__(*args, **kwargs)
+
+        sql_conn: str = conf.get('core', 'sql_alchemy_conn').lower()
+        self.using_sqlite = sql_conn.startswith('sqlite')
+        self.processor_agent: Optional[DagFileProcessorAgent] = None
+
+    def register_exit_signals(self) -> None:
+        """Register signals that stop child processes"""
+        signal.signal(signal.SIGINT, self._exit_gracefully)
+        signal.signal(signal.SIGTERM, self._exit_gracefully)
+
+    def _exit_gracefully(self, signum, frame) -> None:  # pylint: disable=unused-argument
+        """Helper method to clean up processor_agent to avoid leaving orphan processes."""
+        self.log.info("Exiting gracefully upon receiving signal %s", signum)
+        if self.processor_agent:
+            self.processor_agent.end()
+        sys.exit(os.EX_OK)
+
+    def _execute(self) -> None:
+        self.log.info("Starting the DAG processor")
+        self.log.info("Processing each file at most %s times", self.num_runs)
+
+        processor_timeout = timedelta(seconds=conf.getint('core', 'dag_file_processor_timeout'))
+        self.processor_agent = DagFileProcessorAgent(
+            dag_directory=self.subdir,
+            max_runs=self.num_runs,
+            processor_factory=SchedulerJob._create_dag_file_processor,  # pylint: disable=protected-access
+            processor_timeout=processor_timeout,
+            dag_ids=[],
+            pickle_dags=self.do_pickle and self.executor_class not in UNPICKLEABLE_EXECUTORS,
+            # When using sqlite, the files are parsed one loop at a time from here
+            async_mode=not self.using_sqlite,
+            dag_processor_job_id=self.id,
+        )
+
+        try:
+            self.register_exit_signals()
+            self.processor_agent.start()
+            self._run_processor_loop()
+            self.processor_agent.terminate()
+        except Exception:  # pylint: disable=broad-except
+            self.log.exception("Exception when executing DagProcessorJob._run_processor_loop")
+        finally:
+            self.processor_agent.end()
+            self.log.info("Exited execute loop")
+
+    def _run_processor_loop(self) -> None:
+        """
+        Heartbeat while the DagFileProcessorManager parses the files, and restart
+        it if it dies. The heartbeats tell the other DagProcessorJobs that this one
+        still parses its share of the files.
+        """
+        if not self.processor_agent:
+            raise ValueError("Processor agent is not started.")
+        is_unit_test: bool = conf.getboolean('core', 'unit_test_mode')
+
+        while True:
+            if self.using_sqlite:
+                self.processor_agent.run_single_parsing_loop()
+                self.processor_agent.wait_until_finished()
+
+            # The DAGs are written to the database by the processors, only the
+            # messages of the manager are consumed here
+            self.processor_agent.harvest_serialized_dags()
+
+            self.heartbeat(only_if_necessary=True)
+
+            if self.processor_agent.done:
+                self.log.info("Exiting DAG processor loop as all files have been processed %d times",
+                              self.num_runs)
+                break
+
+            if not is_unit_test:
+                time.sleep(self._processor_poll_interval)
@@ -19,7 +19,8 @@
 
 import os
 import signal
-from typing import Optional
+from time import monotonic, sleep
+from typing import Any, Dict, Optional
 
 from airflow.configuration import conf
 from airflow.exceptions import AirflowException
@@ -28,6 +29,7 @@ from airflow.models.taskinstance import TaskInstance
 from airflow.stats import Stats
 from airflow.task.task_runner import get_task_runner
 from airflow.utils import timezone
+from airflow.utils.heartbeat_aggregator import send_heartbeat
 from airflow.utils.net import get_hostname
 from airflow.utils.session import provide_session
 from airflow.utils.state import State
@@ -68,6 +70,10 @@ class LocalTaskJob(BaseJob):
         # terminate multiple times
         self.terminating = False
 
+        # The heartbeats are sent to the heartbeat aggregator of the host, when there is one
+        self.heartbeat_aggregator_socket = conf.get('core', 'heartbeat_aggregator_socket', fallback='')
+        self._latest_heartbeat_sent: Optional[float] = None
+
         super().__init__(*args, **kwargs)
 
     def _execute(self):
@@ -126,6 +132,64 @@ class LocalTaskJob(BaseJob):
         self.task_runner.terminate()
         self.task_runner.on_finish()
 
+    def heartbeat(self, only_if_necessary: bool = False):
+        """
+        Heartbeats through the heartbeat aggregator of the host if there is one, which writes
+        the heartbeats of all the LocalTaskJobs of the host to the database at once. The job
+        heartbeats to the database itself when the heartbeat aggregator can't be reached.
+        """
+        if not self.heartbeat_aggregator_socket:
+            super().heartbeat(only_if_necessary=only_if_necessary)
+            return
+
+        # The latest heartbeat is when the aggregator last wrote it, the heart rate is kept
+        # from when it was last sent
+        seconds_remaining = 0.0
+        if self._latest_heartbeat_sent:
+            seconds_remaining = self.heartrate - (monotonic() - self._latest_heartbeat_sent)
+        if seconds_remaining > 0 and only_if_necessary:
+            return
+        sleep(max(0.0, seconds_remaining))
+
+        ti = self.task_instance
+        try:
+            status = send_heartbeat(
+                self.heartbeat_aggregator_socket, self.id,
+                ti.dag_id, ti.task_id, ti.execution_date.isoformat(),
+            )
+        except (OSError, ValueError):
+            self.log.warning("Failed to send the heartbeat to the heartbeat aggregator listening on %s",
+                             self.heartbeat_aggregator_socket, exc_info=True)
+            self._latest_heartbeat_sent = monotonic()
+            super().heartbeat(only_if_necessary=only_if_necessary)
+            return
+        self._latest_heartbeat_sent = monotonic()
+
+        # The aggregator did not write the heartbeat of the job yet
+        if not status:
+            return
+        self.latest_heartbeat = max(self.latest_heartbeat, timezone.parse(status['latest_heartbeat']))
+        if status['job_state'] == State.SHUTDOWN:
+            self.kill()
+        self._on_task_instance_status(status['task_instance'])
+        self.log.debug('[heartbeat]')
+
+    def _on_task_instance_status(self, task_instance_status: Optional[Dict[str, Any]]) -> None:
+        """Handle the state of the task instance when the heartbeat aggregator fetched it"""
+        if self.terminating:
+            # ensure termination if processes are created later
+            self.task_runner.terminate()
+            return
+
+        if task_instance_status:
+            self.task_instance.state = task_instance_status['state']
+            self.task_instance.hostname = task_instance_status['hostname']
+            self.task_instance.pid = task_instance_status['pid']
+        else:
+            # The row is gone, e.g. its DagRun was deleted: as refresh_from_db would
+            self.task_instance.state = None
+        self._check_task_instance_state()
+
     @provide_session
     def heartbeat_callback(self, session=None):
         """Self destruct task if state has been moved away from running externally"""
@@ -135,6 +199,10 @@ class LocalTaskJob(BaseJob):
             return
 
         self.task_instance.refresh_from_db()
+        self._check_task_instance_state()
+
+    def _check_task_instance_state(self) -> None:
+        """Self destruct task if state has been moved away from running externally"""
         ti = self.task_instance
 
         if ti.state == State.RUNNING:
@@ -17,7 +17,9 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import copy
 import datetime
+import importlib
 import logging
 import multiprocessing
 import os
@@ -30,10 +32,11 @@ from contextlib import ExitStack, redirect_stderr, redirect_stdout, suppress
 from datetime import timedelta
 from itertools import groupby
 from multiprocessing.connection import Connection as MultiprocessingConnection
-from typing import Any, DefaultDict, Dict, List, Optional, Set, Tuple
+from typing import Any, DefaultDict, Dict, List, Optional, Set, Tuple, Union
 
 from setproctitle import setproctitle
 from sqlalchemy import and_, func, not_, or_
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import load_only
 from sqlalchemy.orm.session import Session, make_transient
 
@@ -45,22 +48,24 @@ from airflow.jobs.base_job import BaseJob
 from airflow.models import DAG, DagModel, SlaMiss, errors
 from airflow.models.dagbag import DagBag
 from airflow.models.dagrun import DagRun
+from airflow.models.serialized_dag import SerializedDagModel
 from airflow.models.taskinstance import SimpleTaskInstance, TaskInstanceKey
-from airflow.operators.dummy_operator import DummyOperator
-from airflow.serialization.serialized_objects import SerializedDAG
+from airflow.serialization.serialized_objects import SerializedBaseOperator, SerializedDAG
 from airflow.stats import Stats
 from airflow.ti_deps.dep_context import DepContext
 from airflow.ti_deps.dependencies_deps import SCHEDULED_DEPS
 from airflow.ti_deps.dependencies_states import EXECUTION_STATES
 from airflow.utils import asciiart, helpers, timezone
 from airflow.utils.dag_processing import (
-    AbstractDagFileProcessorProcess, DagFileProcessorAgent, FailureCallbackRequest, SimpleDagBag,
+    AbstractDagFileProcessorProcess, DagFileProcessorAgent, FailureCallbackRequest, SerializedDagUpdate,
+    SimpleDagBag,
 )
 from airflow.utils.email import get_email_address_list, send_email
 from airflow.utils.log.logging_mixin import LoggingMixin, StreamLogWriter, set_context
 from airflow.utils.mixins import MultiprocessingStartMethodMixin
+from airflow.utils.profiling import LoopProfiler, PhaseStats
 from airflow.utils.session import provide_session
-from airflow.utils.sqlalchemy import skip_locked
+from airflow.utils.sqlalchemy import is_lock_not_available_error, nowait, skip_locked, with_row_locks
 from airflow.utils.state import State
 from airflow.utils.types import DagRunType
 
@@ -69,6 +74,26 @@ DR = models.DagRun
 DM = models.DagModel
 
 
+def _unload_dag_folder_modules(loaded_modules: Set[str]) -> None:
+    """Unload the modules of the DAG folder imported since ``loaded_modules`` were loaded"""
+    dags_folder = os.path.join(os.path.abspath(settings.DAGS_FOLDER), '')
+    for name in set(sys.modules) - loaded_modules:
+        module_file = getattr(sys.modules[name], '__file__', None)
+        if name.startswith('unusual_prefix_') or (
+            module_file and os.path.abspath(module_file).startswith(dags_folder)
+        ):
+            del sys.modules[name]
+
+
+class _DagFileProcessorWorker:
+    """A process parsing the DAG files sent through its channel, reused by several DagFileProcessorProcess"""
+
+    def __init__(self, process: multiprocessing.process.BaseProcess, channel: MultiprocessingConnection):
+        self.process = process
+        self.channel = channel
+        self.num_files = 0
+
+
 class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, MultiprocessingStartMethodMixin):
     """Runs DAG processing in a separate process using DagFileProcessor
 
@@ -84,6 +109,10 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
 
     # Counter that increments every time an instance of this class is created
     class_creation_counter = 0
+    # Processes waiting for a file to parse, when max_files_per_dag_file_processor > 1
+    _idle_workers: List[_DagFileProcessorWorker] = []
+    # Whether the parsing_preload_modules were preloaded in this process
+    _modules_preloaded = False
 
     def __init__(
         self,
@@ -101,7 +130,7 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
         # The process that was launched to process the given .
         self._process: Optional[multiprocessing.process.BaseProcess] = None
         # The result of Scheduler.process_file(file_path).
-        self._result: Optional[Tuple[List[dict], int]] = None
+        self._result: Optional[Tuple[List[Union[dict, SerializedDagUpdate]], int]] = None
         # Whether the process is done running.
         self._done = False
         # When the process started.
@@ -113,6 +142,10 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
         self._parent_channel: Optional[MultiprocessingConnection] = None
         DagFileProcessorProcess.class_creation_counter += 1
 
+        self._max_files_per_process = conf.getint('scheduler', 'max_files_per_dag_file_processor')
+        # The reused process parsing the file, if processes are reused
+        self._worker: Optional[_DagFileProcessorWorker] = None
+
     @property
     def file_path(self) -> str:
         return self._file_path
@@ -147,6 +180,59 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
         :rtype: multiprocessing.Process
         """
         # This helper runs in the newly created process
+        try:
+            # Re-configure the ORM engine as there are issues with multiple processes
+            settings.configure_orm()
+            DagFileProcessorProcess._process_file(
+                result_channel, file_path, pickle_dags, dag_ids, thread_name, failure_callback_requests
+            )
+        finally:
+            result_channel.close()
+            # We re-initialized the ORM within this Process above so we need to
+            # tear it down manually here
+            settings.dispose_orm()
+
+    @staticmethod
+    def _run_file_processors(channel: MultiprocessingConnection, max_files: int) -> None:
+        """
+        Process the files sent through the channel one after the other, up to ``max_files``.
+        The ORM engine and the modules imported from outside of the DAG folder are kept
+        from one file to the next.
+
+        :param channel: the connection the files to process are received from, and
+            the results sent back through
+        :type channel: multiprocessing.Connection
+        :param max_files: the number of files to process before exiting
+        :type max_files: int
+        """
+        # This helper runs in the newly created process
+        try:
+            settings.configure_orm()
+            for _ in range(max_files):
+                try:
+                    request = channel.recv()
+                except EOFError:
+                    break
+                loaded_modules = set(sys.modules)
+                try:
+                    DagFileProcessorProcess._process_file(channel, *request)
+                finally:
+                    # Modules of the DAG folder may change before the next file imports them
+                    _unload_dag_folder_modules(loaded_modules)
+        finally:
+            channel.close()
+            settings.dispose_orm()
+
+    @staticmethod
+    def _process_file(
+        result_channel: MultiprocessingConnection,
+        file_path: str,
+        pickle_dags: bool,
+        dag_ids: Optional[List[str]],
+        thread_name: str,
+        failure_callback_requests: List[FailureCallbackRequest]
+    ) -> None:
+        """Process the given file and send the result through ``result_channel``"""
         log: logging.Logger = logging.getLogger("airflow.processor")
 
         set_context(log, file_path)
@@ -157,8 +243,6 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
             with ExitStack() as exit_stack:
                 exit_stack.enter_context(redirect_stdout(StreamLogWriter(log, logging.INFO)))  # type: ignore
                 exit_stack.enter_context(redirect_stderr(StreamLogWriter(log, logging.WARN)))  # type: ignore
-                # Re-configure the ORM engine as there are issues with multiple processes
-                settings.configure_orm()
 
                 # Change the thread name to differentiate log lines. This is
                 # really a separate process, but changing the name of the
@@ -168,7 +252,7 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
 
                 log.info("Started process (PID=%s) to work on %s", os.getpid(), file_path)
                 dag_file_processor = DagFileProcessor(dag_ids=dag_ids, log=log)
-                result: Tuple[List[dict], int] = dag_file_processor.process_file(
+                result: Tuple[List[Union[dict, SerializedDagUpdate]], int] = dag_file_processor.process_file(
                     file_path=file_path,
                     pickle_dags=pickle_dags,
                     failure_callback_requests=failure_callback_requests,
@@ -182,11 +266,6 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
             # Log exceptions through the logging framework.
             log.exception("Got an exception! Propagating...")
             raise
-        finally:
-            result_channel.close()
-            # We re-initialized the ORM within this Process above so we need to
-            # tear it down manually here
-            settings.dispose_orm()
 
     def start(self) -> None:
         """
@@ -194,6 +273,11 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
         """
         start_method = self._get_multiprocessing_start_method()
         context = multiprocessing.get_context(start_method)
+        self._preload_modules(context)
+
+        if self._max_files_per_process > 1:
+            self._start_in_worker(context)
+            return
 
         self._parent_channel, _child_channel = context.Pipe()
         process = context.Process(
@@ -212,6 +296,84 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
         self._start_time = timezone.utcnow()
         process.start()
 
+    def _start_in_worker(self, context) -> None:
+        """Send the file to an idle process if there is one, else to a new one"""
+        worker = self._get_idle_worker()
+        if worker is None:
+            parent_channel, child_channel = context.Pipe()
+            process = context.Process(
+                target=type(self)._run_file_processors,
+                args=(child_channel, self._max_files_per_process),
+                name="DagFileProcessorWorker{}-Process".format(self._instance_id),
+                daemon=True,
+            )
+            process.start()
+            # Only the worker keeps its end, so that the channel is closed if it exits
+            child_channel.close()
+            worker = _DagFileProcessorWorker(process, parent_channel)
+
+        worker.num_files += 1
+        self._worker = worker
+        self._process = worker.process
+        self._parent_channel = worker.channel
+        self._start_time = timezone.utcnow()
+        worker.channel.send((
+            self.file_path,
+            self._pickle_dags,
+            self._dag_ids,
+            "DagFileProcessor{}".format(self._instance_id),
+            self._failure_callback_requests,
+        ))
+
+    @classmethod
+    def _get_idle_worker(cls) -> Optional[_DagFileProcessorWorker]:
+        while cls._idle_workers:
+            worker = cls._idle_workers.pop()
+            if worker.process.is_alive():
+                return worker
+            worker.process.join()
+            worker.channel.close()
+        return None
+
+    def _release_process(self) -> None:
+        """Keep the process for the next file if it can be reused, else wait for it to exit"""
+        worker = self._worker
+        if (
+            worker is not None and
+            self._result is not None and
+            worker.num_files < self._max_files_per_process and
+            worker.process.is_alive()
+        ):
+            self._idle_workers.append(worker)
+            return
+        self.log.debug("Waiting for %s", self._process)
+        self._process.join()
+        self._parent_channel.close()
+
+    @classmethod
+    def _preload_modules(cls, context) -> None:
+        """
+        Import the parsing_preload_modules once, for the processes forked from this one to
+        inherit them, or have the forkserver import them along with Airflow.
+        """
+        if cls._modules_preloaded:
+            return
+        cls._modules_preloaded = True
+        modules = [
+            module.strip()
+            for module in conf.get('scheduler', 'parsing_preload_modules').split(',')
+            if module.strip()
+        ]
+        start_method = context.get_start_method()
+        if start_method == 'forkserver':
+            context.set_forkserver_preload([__name__] + modules)
+        elif start_method == 'fork':
+            for module in modules:
+                try:
+                    importlib.import_module(module)
+                except Exception:  # pylint: disable=broad-except
+                    logging.getLogger(__name__).exception("Failed to preload module %s", module)
+
     def kill(self) -> None:
         """
         Kill the process launched to process the file, and ensure consistent state.
@@ -288,27 +450,25 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
             try:
                 self._result = self._parent_channel.recv()
                 self._done = True
-                self.log.debug("Waiting for %s", self._process)
-                self._process.join()
-                self._parent_channel.close()
+                self._release_process()
                 return True
             except EOFError:
-                pass
+                if self._worker is not None:
+                    # The reused process exited while parsing the file, closing the channel
+                    self._process.join()
 
         if not self._process.is_alive():
             self._done = True
-            self.log.debug("Waiting for %s", self._process)
-            self._process.join()
-            self._parent_channel.close()
+            self._release_process()
             return True
 
         return False
 
     @property
-    def result(self) -> Optional[Tuple[List[dict], int]]:
+    def result(self) -> Optional[Tuple[List[Union[dict, SerializedDagUpdate]], int]]:
         """
         :return: result of running SchedulerJob.process_file()
-        :rtype: Optional[Tuple[List[dict], int]]
+        :rtype: Optional[Tuple[List[Union[dict, SerializedDagUpdate]], int]]
         """
         if not self.done:
             raise AirflowException("Tried to get the result before it's done!")
@@ -326,6 +486,9 @@ class DagFileProcessorProcess(AbstractDagFileProcessorProcess, LoggingMixin, Mul
 
     @property
     def waitable_handle(self):
+        if self._worker is not None:
+            # The process outlives the file when it is reused, its results are waited for instead
+            return self._parent_channel
         return self._process.sentinel
 
 
@@ -358,6 +521,9 @@ class DagFileProcessor(LoggingMixin):
         super().__init__()
         self.dag_ids = dag_ids
         self._log = log
+        self.schedule_from_serialized_dags: bool = conf.getboolean(
+            'scheduler', 'schedule_from_serialized_dags'
+        )
 
     @provide_session
     def manage_slas(self, dag: DAG, session: Session = None) -> None:
@@ -584,6 +750,17 @@ class DagFileProcessor(LoggingMixin):
         if len(active_runs) - timed_out_runs >= dag.max_active_runs:
             return None
 
+        # Lock the DagModel row until the next commit, so that only one scheduler at a time
+        # creates the next DagRun of the DAG. If another scheduler holds the lock, it is
+        # creating that DagRun.
+        dag_model_query = session.query(DagModel.dag_id).filter(DagModel.dag_id == dag.dag_id)
+        if (
+            with_row_locks(dag_model_query, **skip_locked(session=session)).scalar() is None and
+            dag_model_query.scalar() is not None
+        ):
+            self.log.debug("DagModel row of %s is locked by another scheduler", dag.dag_id)
+            return None
+
         # this query should be replaced by find dagrun
         last_scheduled_run: Optional[datetime.datetime] = (
             session.query(func.max(DagRun.execution_date))
@@ -727,7 +904,9 @@ class DagFileProcessor(LoggingMixin):
         return task_instances_list
 
     @provide_session
-    def _process_dags(self, dags: List[DAG], session: Session = None) -> List[TaskInstanceKey]:
+    def _process_dags(
+        self, dags: List[DAG], check_slas: bool = True, session: Session = None
+    ) -> List[TaskInstanceKey]:
         """
         Iterates over the dags and processes them. Processing includes:
 
@@ -737,10 +916,12 @@ class DagFileProcessor(LoggingMixin):
 
         :param dags: the DAGs from the DagBag to process
         :type dags: List[airflow.models.DAG]
+        :param check_slas: whether to check for missed SLAs, if also enabled in the config
+        :type check_slas: bool
         :rtype: list[TaskInstance]
         :return: A list of generated TaskInstance objects
         """
-        check_slas: bool = conf.getboolean('core', 'CHECK_SLAS', fallback=True)
+        check_slas = check_slas and conf.getboolean('core', 'CHECK_SLAS', fallback=True)
         use_job_schedule: bool = conf.getboolean('scheduler', 'USE_JOB_SCHEDULE')
 
         # pylint: disable=too-many-nested-blocks
@@ -830,7 +1011,7 @@ class DagFileProcessor(LoggingMixin):
         failure_callback_requests: List[FailureCallbackRequest],
         pickle_dags: bool = False,
         session: Session = None
-    ) -> Tuple[List[dict], int]:
+    ) -> Tuple[List[Union[dict, SerializedDagUpdate]], int]:
         """
         Process a Python file containing Airflow DAGs.
 
@@ -839,7 +1020,8 @@ class DagFileProcessor(LoggingMixin):
         1. Execute the file and look for DAG objects in the namespace.
         2. Pickle the DAG and save it to the DB (if necessary).
         3. For each DAG, see what tasks should run and create appropriate task
-        instances in the DB.
+        instances in the DB. This is left to the scheduler when
+        ``[scheduler] schedule_from_serialized_dags`` is enabled.
         4. Record any errors importing the file into ORM
         5. Kill (in ORM) any task instances belonging to the DAGs that haven't
         issued a heartbeat in a while.
@@ -858,12 +1040,17 @@ class DagFileProcessor(LoggingMixin):
         :type session: Session
         :return: a tuple with list of SimpleDags made from the Dags found in the file and
             count of import errors.
-        :rtype: Tuple[List[dict], int]
+        :rtype: Tuple[List[Union[dict, airflow.utils.dag_processing.SerializedDagUpdate]], int]
         """
         self.log.info("Processing file %s for tasks to queue", file_path)
 
         try:
-            dagbag = DagBag(file_path, include_examples=False, include_smart_sensor=False)
+            dagbag = DagBag(
+                file_path,
+                include_examples=False,
+                include_smart_sensor=False,
+                profile_parsing=conf.getboolean('core', 'profile_dag_parsing'),
+            )
         except Exception:  # pylint: disable=broad-except
             self.log.exception("Failed at reloading the DAG file %s", file_path)
             Stats.incr('dag_file_refresh_error', 1, 1)
@@ -881,8 +1068,19 @@ class DagFileProcessor(LoggingMixin):
         except Exception:  # pylint: disable=broad-except
             self.log.exception("Error executing failure callback!")
 
+        # The stored fingerprints are read before the DAGs are written, to tell the DAGs
+        # which changed since they were last stored. Each fingerprint is computed once.
+        stored_fingerprints: Dict[str, Optional[str]] = {}
+        fingerprints: Dict[str, str] = {}
+        if settings.STORE_SERIALIZED_DAGS:
+            stored_fingerprints = SerializedDagModel.get_dag_fingerprints(dagbag.dag_ids, session=session)
+            fingerprints = {
+                dag.dag_id: SerializedDAG.fingerprint(dag)
+                for dag in dagbag.dags.values() if not dag.is_subdag
+            }
+
         # Save individual DAGs in the ORM and update DagModel.last_scheduled_time
-        dagbag.sync_to_db()
+        dagbag.sync_to_db(fingerprints=fingerprints)
 
         paused_dag_ids = DagModel.get_paused_dag_ids(dag_ids=dagbag.dag_ids)
 
@@ -890,13 +1088,22 @@ class DagFileProcessor(LoggingMixin):
             dag for dag_id, dag in dagbag.dags.items() if dag_id not in paused_dag_ids
         ]
 
-        serialized_dags = self._prepare_serialized_dags(unpaused_dags, pickle_dags, session)
+        serialized_dags = self._prepare_serialized_dags(
+            unpaused_dags, pickle_dags, stored_fingerprints, fingerprints, session=session
+        )
 
         dags = self._find_dags_to_process(unpaused_dags)
 
-        ti_keys_to_schedule = self._process_dags(dags, session)
+        if self.schedule_from_serialized_dags:
+            # The scheduler creates the DagRuns and schedules the task instances
+            # from the serialized DAGs, only SLA callbacks need the DAG file.
+            if conf.getboolean('core', 'CHECK_SLAS', fallback=True):
+                for dag in dags:
+                    self.manage_slas(dag)
+        else:
+            ti_keys_to_schedule = self._process_dags(dags, session=session)
 
-        self._schedule_task_instances(dagbag, ti_keys_to_schedule, session)
+            self._schedule_task_instances(dagbag, ti_keys_to_schedule, session)
 
         # Record import errors into the ORM
         try:
@@ -952,9 +1159,7 @@ class DagFileProcessor(LoggingMixin):
                 # scheduled state will be sent to the executor
                 ti.state = State.SCHEDULED
                 # If the task is dummy, then mark it as done automatically
-                if isinstance(ti.task, DummyOperator) \
-                        and not ti.task.on_execute_callback \
-                        and not ti.task.on_success_callback:
+                if SerializedBaseOperator.is_dummy_without_callbacks(ti.task):
                     ti.state = State.SUCCESS
                     ti.start_date = ti.end_date = timezone.utcnow()
                     ti.duration = 0
@@ -967,24 +1172,191 @@ class DagFileProcessor(LoggingMixin):
 
     @provide_session
     def _prepare_serialized_dags(
-        self, dags: List[DAG], pickle_dags: bool, session: Session = None
-    ) -> List[dict]:
+        self,
+        dags: List[DAG],
+        pickle_dags: bool,
+        stored_fingerprints: Dict[str, Optional[str]],
+        fingerprints: Dict[str, str],
+        session: Session = None,
+    ) -> List[Union[dict, SerializedDagUpdate]]:
         """
         Convert DAGS to SimpleDags. If necessary, it also Pickle the DAGs
 
+        When the serialized DAGs are stored in the DB, the DAGs are sent with their
+        fingerprint, and the DAGs whose fingerprint matches the one stored before they
+        were synced are not serialized: the scheduler keeps the copy it has.
+
         :param dags: List of DAGs
+        :param stored_fingerprints: the fingerprints stored before the DAGs were synced
+        :param fingerprints: the fingerprints of the DAGs, SubDAGs are not stored on their
+            own and have none
         :return: List of SimpleDag
-        :rtype: List[dict]
+        :rtype: List[Union[dict, airflow.utils.dag_processing.SerializedDagUpdate]]
         """
-        serialized_dags: List[dict] = []
+        serialized_dags: List[Union[dict, SerializedDagUpdate]] = []
         # Pickle the DAGs (if necessary) and put them into a SimpleDagBag
         for dag in dags:
             if pickle_dags:
                 dag.pickle(session)
-            serialized_dags.append(SerializedDAG.to_dict(dag))
+            if dag.dag_id not in fingerprints:
+                serialized_dags.append(SerializedDAG.to_dict(dag))
+                continue
+            fingerprint = fingerprints[dag.dag_id]
+            if fingerprint == stored_fingerprints.get(dag.dag_id):
+                serialized_dags.append(SerializedDagUpdate(dag.dag_id, fingerprint, None))
+            else:
+                serialized_dags.append(
+                    SerializedDagUpdate(dag.dag_id, fingerprint, SerializedDAG.to_dict(dag))
+                )
         return serialized_dags
 
 
+class SchedulerStateCache(LoggingMixin):
+    """
+    In-memory view of the task instances that occupy concurrency slots, i.e. the
+    ones in one of the ``EXECUTION_STATES``, aggregated per DAG, per task and per pool.
+
+    The cache is loaded from the DB by ``reconcile`` and is afterwards kept up to date
+    from the state transitions made by the scheduler itself and from the events reported
+    by the executor, so the concurrency limits can be checked without recomputing them
+    from the DB on every scheduler loop. Transitions made by other processes (backfills,
+    manual state changes, other schedulers, ...) are picked up by the next reconciliation,
+    which happens every ``reconcile_interval`` seconds or as soon as the cache is marked
+    as stale.
+
+    With a ``reconcile_interval`` of ``0`` the cache is reloaded every time it is used, so
+    only the counts are loaded, with one ``GROUP BY`` query. Otherwise every task instance
+    is loaded with its try number, so that the events of the executor free the slots of
+    the right try.
+
+    :param reconcile_interval: number of seconds after which the cache is reloaded
+        from the DB. With ``0`` it is reloaded every time it is used.
+    :type reconcile_interval: float
+    """
+
+    def __init__(self, reconcile_interval: float = 0):
+        super().__init__()
+        self.reconcile_interval = reconcile_interval
+        # (dag_id, task_id, execution_date) -> (pool, pool_slots, try_number)
+        self._tis: Dict[Tuple[str, str, datetime.datetime], Tuple[str, int, int]] = {}
+        self.dag_map: DefaultDict[str, int] = defaultdict(int)
+        self.task_map: DefaultDict[Tuple[str, str], int] = defaultdict(int)
+        self.pool_map: DefaultDict[str, int] = defaultdict(int)
+        self._last_reconciled: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._tis)
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the cache has to be reloaded from the DB before being used"""
+        return (
+            self._last_reconciled is None or
+            time.monotonic() - self._last_reconciled >= self.reconcile_interval
+        )
+
+    def mark_stale(self) -> None:
+        """Force a reconciliation the next time the cache is used"""
+        self._last_reconciled = None
+
+    @provide_session
+    def refresh_if_stale(self, session: Session = None) -> None:
+        """Reload the cache from the DB if the reconcile interval has elapsed"""
+        if self.is_stale:
+            self.reconcile(session=session)
+
+    @provide_session
+    def reconcile(self, session: Session = None) -> None:
+        """
+        Reload the cache from the task instances currently in the DB.
+
+        :param session: SQLAlchemy ORM Session
+        :type session: Session
+        """
+        previous_keys = set(self._tis)
+
+        self._tis.clear()
+        self.dag_map.clear()
+        self.task_map.clear()
+        self.pool_map.clear()
+        if self.reconcile_interval > 0:
+            rows: List[Tuple[str, str, datetime.datetime, str, int, str, int]] = (
+                session
+                .query(TI.dag_id, TI.task_id, TI.execution_date, TI.pool, TI.pool_slots,
+                       TI.state, TI._try_number)  # pylint: disable=protected-access
+                .filter(TI.state.in_(list(EXECUTION_STATES)))
+                .all()
+            )
+            for dag_id, task_id, execution_date, pool, pool_slots, state, try_number in rows:
+                # Same try number as TaskInstance.key, which the executor reports
+                if state not in State.running():
+                    try_number += 1
+                self.add(TaskInstanceKey(dag_id, task_id, execution_date, try_number), pool, pool_slots)
+        else:
+            counts: List[Tuple[str, str, str, int, int]] = (
+                session
+                .query(TI.dag_id, TI.task_id, TI.pool, func.count('*'), func.sum(TI.pool_slots))
+                .filter(TI.state.in_(list(EXECUTION_STATES)))
+                .group_by(TI.dag_id, TI.task_id, TI.pool)
+                .all()
+            )
+            for dag_id, task_id, pool, num_tis, pool_slots in counts:
+                self.dag_map[dag_id] += num_tis
+                self.task_map[(dag_id, task_id)] += num_tis
+                self.pool_map[pool] += pool_slots or 0
+
+        if self._last_reconciled is not None and self.reconcile_interval > 0:
+            drift = len(previous_keys.symmetric_difference(self._tis))
+            if drift:
+                self.log.debug("Scheduler state cache was off by %d task instances", drift)
+            Stats.gauge('scheduler.state_cache.drift', drift)
+        self._last_reconciled = time.monotonic()
+        Stats.incr('scheduler.state_cache.reconciled')
+
+    def add(self, ti_key: TaskInstanceKey, pool: str, pool_slots: int) -> None:
+        """Record a task instance that moved into one of the ``EXECUTION_STATES``"""
+        entry = self._tis.get(ti_key.primary)
+        if entry is not None:
+            if entry[2] == ti_key.try_number:
+                return
+            # The finished event of the previous try was missed
+            self._remove(ti_key.primary)
+        self._tis[ti_key.primary] = (pool, pool_slots, ti_key.try_number)
+        self.dag_map[ti_key.dag_id] += 1
+        self.task_map[(ti_key.dag_id, ti_key.task_id)] += 1
+        self.pool_map[pool] += pool_slots
+
+    def remove(self, ti_key: TaskInstanceKey) -> None:
+        """
+        Forget a task instance that left the ``EXECUTION_STATES``. Task instances which
+        are not in the cache (e.g. because it was reconciled after they finished), or
+        which are in the cache for another try, are ignored, so the counters are never
+        decremented twice nor for a try that was queued again since.
+        """
+        entry = self._tis.get(ti_key.primary)
+        if entry is None or entry[2] != ti_key.try_number:
+            return
+        self._remove(ti_key.primary)
+
+    def _remove(self, primary_key: Tuple[str, str, datetime.datetime]) -> None:
+        pool, pool_slots, _ = self._tis.pop(primary_key)
+        dag_id, task_id, _ = primary_key
+        self.dag_map[dag_id] -= 1
+        self.task_map[(dag_id, task_id)] -= 1
+        self.pool_map[pool] -= pool_slots
+
+    def open_slots(self, pool: models.Pool) -> float:
+        """
+        Get the number of slots open in the given pool according to the cache.
+
+        :param pool: the pool to check
+        :type pool: airflow.models.Pool
+        """
+        if pool.slots == -1:
+            return float('inf')
+        return pool.slots - self.pool_map[pool.pool]
+
+
 class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
     """
     This SchedulerJob runs for a specific time interval and schedules the jobs
@@ -1050,13 +1422,43 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
 
         self.max_tis_per_query: int = conf.getint('scheduler', 'max_tis_per_query')
         self.processor_agent: Optional[DagFileProcessorAgent] = None
+        # The DAGs harvested from the DAG file processors, updated with the files parsed in each loop
+        self.simple_dag_bag = SimpleDagBag([])
+        self.state_cache = SchedulerStateCache(
+            reconcile_interval=conf.getfloat('scheduler', 'state_cache_reconcile_interval')
+        )
+        # Only used when DagRuns are created from the serialized DAGs in the scheduler loop
+        self.schedule_from_serialized_dags: bool = conf.getboolean(
+            'scheduler', 'schedule_from_serialized_dags'
+        )
+        # The DAG files are parsed by ``airflow dag-processor`` instead of the scheduler
+        self.standalone_dag_processor: bool = conf.getboolean('scheduler', 'standalone_dag_processor')
+        self.dagbag: Optional[DagBag] = None
+        self.dag_run_processor: Optional[DagFileProcessor] = None
+        if self.schedule_from_serialized_dags:
+            self.dagbag = DagBag(dag_folder=self.subdir, read_dags_from_db=True)
+            self.dag_run_processor = DagFileProcessor(dag_ids=self.dag_ids, log=self.log)
+
+        self.loop_stats = PhaseStats('scheduler.loop')
+        self.loop_profiler = LoopProfiler(
+            'scheduler',
+            folder=conf.get('scheduler', 'profile_folder'),
+            num_loops=conf.getint('scheduler', 'profile_num_loops'),
+        )
+        if conf.getboolean('scheduler', 'profile_on_start'):
+            self.loop_profiler.request()
 
     def register_exit_signals(self) -> None:
         """
-        Register signals that stop child processes
+        Register signals that stop child processes, and the one that profiles the scheduler loop
         """
         signal.signal(signal.SIGINT, self._exit_gracefully)
         signal.signal(signal.SIGTERM, self._exit_gracefully)
+        signal.signal(signal.SIGUSR1, self._profile_loops)
+
+    def _profile_loops(self, signum, frame) -> None:  # pylint: disable=unused-argument
+        """Helper method to profile the next iterations of the scheduler loop."""
+        self.loop_profiler.request()
 
     def _exit_gracefully(self, signum, frame) -> None:  # pylint: disable=unused-argument
         """
@@ -1147,35 +1549,10 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
                 "Set %s task instances to state=%s as their associated DagRun was not in RUNNING state",
                 tis_changed, new_state
             )
+            if EXECUTION_STATES.intersection(old_states):
+                self.state_cache.mark_stale()
             Stats.gauge('scheduler.tasks.without_dagrun', tis_changed)
 
-    @provide_session
-    def __get_concurrency_maps(
-        self, states: List[str], session: Session = None
-    ) -> Tuple[DefaultDict[str, int], DefaultDict[Tuple[str, str], int]]:
-        """
-        Get the concurrency maps.
-
-        :param states: List of states to query for
-        :type states: list[airflow.utils.state.State]
-        :return: A map from (dag_id, task_id) to # of task instances and
-         a map from (dag_id, task_id) to # of task instances in the given state list
-        :rtype: tuple[dict[str, int], dict[tuple[str, str], int]]
-        """
-        ti_concurrency_query: List[Tuple[str, str, int]] = (
-            session
-            .query(TI.task_id, TI.dag_id, func.count('*'))
-            .filter(TI.state.in_(states))
-            .group_by(TI.task_id, TI.dag_id)
-        ).all()
-        dag_map: DefaultDict[str, int] = defaultdict(int)
-        task_map: DefaultDict[Tuple[str, str], int] = defaultdict(int)
-        for result in ti_concurrency_query:
-            task_id, dag_id, count = result
-            dag_map[dag_id] += count
-            task_map[(dag_id, task_id)] = count
-        return dag_map, task_map
-
     # pylint: disable=too-many-locals,too-many-statements
     @provide_session
     def _find_executable_task_instances(
@@ -1187,6 +1564,12 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         Finds TIs that are ready for execution with respect to pool limits,
         dag concurrency, executor state, and priority.
 
+        Candidates are read from the DB already ordered by priority, in pages of
+        ``max_tis_per_query`` rows, skipping the pools which have no open slots.
+        Pages are only read until the executor has no more open slots, the pools
+        are full or there are no more candidates, so the cost of a scheduler loop
+        does not grow with the number of scheduled task instances.
+
         :param simple_dag_bag: TaskInstances associated with DAGs in the
             simple_dag_bag will be fetched from the DB and executed
         :type simple_dag_bag: airflow.utils.dag_processing.SimpleDagBag
@@ -1194,10 +1577,35 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         """
         executable_tis: List[TI] = []
 
+        max_tis = self.executor.slots_available
+        if max_tis <= 0:
+            self.log.debug("Executor has no open slots, not examining any tasks.")
+            return executable_tis
+
+        # Get the pool settings. The pool rows are locked (without waiting) for the rest of
+        # the critical section, so only one scheduler at a time can pick task instances
+        # to queue, and the pool and concurrency limits can't be exceeded by concurrent
+        # schedulers.
+        pools: Dict[str, models.Pool] = {
+            p.pool: p for p in with_row_locks(session.query(models.Pool), **nowait(session)).all()
+        }
+
+        # dag_id to # of running tasks and (dag_id, task_id) to # of running tasks.
+        # Copies are used as the maps are updated below with the task instances picked
+        # in this loop, which are only added to the cache once they are actually queued.
+        self.state_cache.refresh_if_stale(session=session)
+        dag_concurrency_map: DefaultDict[str, int] = defaultdict(int, self.state_cache.dag_map)
+        task_concurrency_map: DefaultDict[Tuple[str, str], int] = defaultdict(
+            int, self.state_cache.task_map)
+        pool_open_slots: Dict[str, float] = {
+            pool_name: self.state_cache.open_slots(pool) for pool_name, pool in pools.items()
+        }
+        starved_pools = {pool_name for pool_name, open_slots in pool_open_slots.items() if open_slots <= 0}
+
         # Get all task instances associated with scheduled
         # DagRuns which are not backfilled, in the given states,
         # and the dag is not paused
-        task_instances_to_examine: List[TI] = (
+        query = (
             session
             .query(TI)
             .filter(TI.dag_id.in_(simple_dag_bag.dag_ids))
@@ -1208,75 +1616,52 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
             .outerjoin(DM, DM.dag_id == TI.dag_id)
             .filter(or_(DM.dag_id.is_(None), not_(DM.is_paused)))
             .filter(TI.state == State.SCHEDULED)
-            .all()
         )
-        Stats.gauge('scheduler.tasks.pending', len(task_instances_to_examine))
-
-        if len(task_instances_to_examine) == 0:
-            self.log.debug("No tasks to consider for execution.")
-            return executable_tis
-
-        # Put one task instance on each line
-        task_instance_str = "\n\t".join(
-            [repr(x) for x in task_instances_to_examine])
-        self.log.info(
-            "%s tasks up for execution:\n\t%s", len(task_instances_to_examine),
-            task_instance_str
-        )
-
-        # Get the pool settings
-        pools: Dict[str, models.Pool] = {p.pool: p for p in session.query(models.Pool).all()}
-
-        pool_to_task_instances: DefaultDict[str, List[models.Pool]] = defaultdict(list)
-        for task_instance in task_instances_to_examine:
-            pool_to_task_instances[task_instance.pool].append(task_instance)
-
-        # dag_id to # of running tasks and (dag_id, task_id) to # of running tasks.
-        dag_concurrency_map: DefaultDict[str, int]
-        task_concurrency_map: DefaultDict[Tuple[str, str], int]
-        dag_concurrency_map, task_concurrency_map = self.__get_concurrency_maps(
-            states=list(EXECUTION_STATES), session=session)
 
+        num_examined = 0
         num_tasks_in_executor = 0
+        num_concurrency_limited = 0
         # Number of tasks that cannot be scheduled because of no open slot in pool
-        num_starving_tasks_total = 0
+        num_starving_tasks: DefaultDict[str, int] = defaultdict(int)
+        missing_pools: Set[str] = set()
 
-        # Go through each pool, and queue up a task for execution if there are
-        # any open slots in the pool.
+        last_examined: Optional[TI] = None
         # pylint: disable=too-many-nested-blocks
-        for pool, task_instances in pool_to_task_instances.items():
-            pool_name = pool
-            if pool not in pools:
-                self.log.warning(
-                    "Tasks using non-existent pool '%s' will not be scheduled",
-                    pool
-                )
-                continue
-
-            open_slots = pools[pool].open_slots(session=session)
-
-            num_ready = len(task_instances)
-            self.log.info(
-                "Figuring out tasks to run in Pool(name=%s) with %s open slots "
-                "and %s task instances ready to be queued",
-                pool, open_slots, num_ready
-            )
-
-            priority_sorted_task_instances = sorted(
-                task_instances, key=lambda ti: (-ti.priority_weight, ti.execution_date))
+        while True:
+            # The pools which ran out of slots are filtered out again for each page, so the
+            # next pages are read after the last task instance examined, in priority order,
+            # rather than at an offset
+            page_query = query
+            if starved_pools or missing_pools:
+                page_query = page_query.filter(not_(TI.pool.in_(starved_pools | missing_pools)))
+            if last_examined is not None:
+                page_query = page_query.filter(self._after_in_priority_order(last_examined))
+            page_query = page_query.order_by(-TI.priority_weight, TI.execution_date, TI.dag_id, TI.task_id)
+            if self.max_tis_per_query > 0:
+                page_query = page_query.limit(self.max_tis_per_query)
+            # Lock these rows, so that another scheduler can't try and queue them too
+            task_instances_to_examine: List[TI] = with_row_locks(
+                page_query, of=TI, **skip_locked(session=session)
+            ).all()
+            num_examined += len(task_instances_to_examine)
+
+            for task_instance in task_instances_to_examine:
+                pool = task_instance.pool
+                if pool not in pools:
+                    if pool not in missing_pools:
+                        self.log.warning(
+                            "Tasks using non-existent pool '%s' will not be scheduled",
+                            pool
+                        )
+                        missing_pools.add(pool)
+                    continue
 
-            num_starving_tasks = 0
-            for current_index, task_instance in enumerate(priority_sorted_task_instances):
+                open_slots = pool_open_slots[pool]
                 if open_slots <= 0:
-                    self.log.info(
-                        "Not scheduling since there are %s open slots in pool %s",
-                        open_slots, pool
-                    )
                     # Can't schedule any more since there are no more open slots.
-                    num_unhandled = len(priority_sorted_task_instances) - current_index
-                    num_starving_tasks += num_unhandled
-                    num_starving_tasks_total += num_unhandled
-                    break
+                    num_starving_tasks[pool] += 1
+                    starved_pools.add(pool)
+                    continue
 
                 # Check to make sure that the task concurrency of the DAG hasn't been
                 # reached.
@@ -1284,17 +1669,14 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
                 serialized_dag = simple_dag_bag.get_dag(dag_id)
 
                 current_dag_concurrency = dag_concurrency_map[dag_id]
-                dag_concurrency_limit = simple_dag_bag.get_dag(dag_id).concurrency
-                self.log.info(
-                    "DAG %s has %s/%s running and queued tasks",
-                    dag_id, current_dag_concurrency, dag_concurrency_limit
-                )
+                dag_concurrency_limit = serialized_dag.concurrency
                 if current_dag_concurrency >= dag_concurrency_limit:
-                    self.log.info(
+                    self.log.debug(
                         "Not executing %s since the number of tasks running or queued "
                         "from DAG %s is >= to the DAG's task concurrency limit of %s",
                         task_instance, dag_id, dag_concurrency_limit
                     )
+                    num_concurrency_limited += 1
                     continue
 
                 task_concurrency_limit: Optional[int] = None
@@ -1308,8 +1690,9 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
                     ]
 
                     if current_task_concurrency >= task_concurrency_limit:
-                        self.log.info("Not executing %s since the task concurrency for"
-                                      " this task has been reached.", task_instance)
+                        self.log.debug("Not executing %s since the task concurrency for"
+                                       " this task has been reached.", task_instance)
+                        num_concurrency_limited += 1
                         continue
 
                 if self.executor.has_task(task_instance):
@@ -1321,29 +1704,69 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
                     continue
 
                 if task_instance.pool_slots > open_slots:
-                    self.log.info("Not executing %s since it requires %s slots "
-                                  "but there are %s open slots in the pool %s.",
-                                  task_instance, task_instance.pool_slots, open_slots, pool)
-                    num_starving_tasks += 1
-                    num_starving_tasks_total += 1
+                    self.log.debug("Not executing %s since it requires %s slots "
+                                   "but there are %s open slots in the pool %s.",
+                                   task_instance, task_instance.pool_slots, open_slots, pool)
+                    num_starving_tasks[pool] += 1
                     # Though we can execute tasks with lower priority if there's enough room
                     continue
 
                 executable_tis.append(task_instance)
-                open_slots -= task_instance.pool_slots
+                pool_open_slots[pool] = open_slots - task_instance.pool_slots
+                if pool_open_slots[pool] <= 0:
+                    starved_pools.add(pool)
                 dag_concurrency_map[dag_id] += 1
                 task_concurrency_map[(task_instance.dag_id, task_instance.task_id)] += 1
 
-            Stats.gauge(f'pool.starving_tasks.{pool_name}', num_starving_tasks)
+                if len(executable_tis) >= max_tis:
+                    break
 
+            if (
+                self.max_tis_per_query <= 0 or
+                len(task_instances_to_examine) < self.max_tis_per_query or
+                len(executable_tis) >= max_tis or
+                all(open_slots <= 0 for open_slots in pool_open_slots.values())
+            ):
+                break
+            last_examined = task_instances_to_examine[-1]
+
+        # The task instances of the pools without open slots are mostly not examined, they
+        # are counted at once. The ones picked in this loop are not starving.
+        starved_pools &= pools.keys()
+        if starved_pools:
+            num_scheduled_tis = (
+                query.with_entities(TI.pool, func.count('*'))
+                .filter(TI.pool.in_(starved_pools))
+                .group_by(TI.pool)
+            )
+            for pool_name, num_tis in num_scheduled_tis:
+                num_starving_tasks[pool_name] = num_tis - sum(
+                    1 for ti in executable_tis if ti.pool == pool_name
+                )
+        for pool_name in pools:
+            Stats.gauge(f'pool.starving_tasks.{pool_name}', num_starving_tasks[pool_name])
+        num_starving_tasks_total = sum(num_starving_tasks.values())
         Stats.gauge('scheduler.tasks.starving', num_starving_tasks_total)
+
+        Stats.gauge('scheduler.tasks.pending', num_examined)
+        if num_examined == 0:
+            self.log.debug("No tasks to consider for execution.")
+            return executable_tis
+
         Stats.gauge('scheduler.tasks.running', num_tasks_in_executor)
         Stats.gauge('scheduler.tasks.executable', len(executable_tis))
 
-        task_instance_str = "\n\t".join(
-            [repr(x) for x in executable_tis])
         self.log.info(
-            "Setting the following tasks to queued state:\n\t%s", task_instance_str)
+            "Examined %s scheduled tasks: %s executable, %s starving for pool slots, "
+            "%s limited by concurrency, %s already in the executor",
+            num_examined, len(executable_tis), num_starving_tasks_total,
+            num_concurrency_limited, num_tasks_in_executor
+        )
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(
+                "Setting the following tasks to queued state:\n\t%s",
+                "\n\t".join(repr(x) for x in executable_tis)
+            )
         # so these dont expire on commit
         for ti in executable_tis:
             copy_dag_id = ti.dag_id
@@ -1355,6 +1778,29 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
             ti.task_id = copy_task_id
         return executable_tis
 
+    @staticmethod
+    def _after_in_priority_order(task_instance: TI):
+        """
+        Filter for the task instances coming after the given one in the order the scheduled
+        task instances are examined in, i.e. (-priority_weight, execution_date, dag_id, task_id).
+        """
+        return or_(
+            TI.priority_weight < task_instance.priority_weight,
+            and_(
+                TI.priority_weight == task_instance.priority_weight,
+                or_(
+                    TI.execution_date > task_instance.execution_date,
+                    and_(
+                        TI.execution_date == task_instance.execution_date,
+                        or_(
+                            TI.dag_id > task_instance.dag_id,
+                            and_(TI.dag_id == task_instance.dag_id, TI.task_id > task_instance.task_id),
+                        ),
+                    ),
+                ),
+            ),
+        )
+
     @provide_session
     def _change_state_for_executable_task_instances(
         self, task_instances: List[TI], session: Session = None
@@ -1362,44 +1808,41 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         """
         Changes the state of task instances in the list with one of the given states
         to QUEUED atomically, and returns the TIs changed in SimpleTaskInstance format.
+        The changes are not committed, this is left to the caller.
 
         :param task_instances: TaskInstances to change the state of
         :type task_instances: list[airflow.models.TaskInstance]
         :rtype: list[airflow.models.taskinstance.SimpleTaskInstance]
         """
         if len(task_instances) == 0:
-            session.commit()
             return []
 
-        tis_to_set_to_queued: List[TI] = (
-            session
-            .query(TI)
-            .filter(TI.filter_for_tis(task_instances))
-            .filter(TI.state == State.SCHEDULED)
-            .with_for_update()
-            .all()
+        tis_to_set_to_queued: List[TI] = TI.bulk_set_state(
+            task_instances,
+            from_states=[State.SCHEDULED],
+            to_state=State.QUEUED,
+            values={TI.queued_dttm: timezone.utcnow(), TI.queued_by_job_id: self.id},
+            skip_locked=True,
+            session=session,
         )
 
         if len(tis_to_set_to_queued) == 0:
             self.log.info("No tasks were able to have their state changed to queued.")
-            session.commit()
             return []
 
-        # set TIs to queued state
-        filter_for_tis = TI.filter_for_tis(tis_to_set_to_queued)
-        session.query(TI).filter(filter_for_tis).update(
-            {TI.state: State.QUEUED, TI.queued_dttm: timezone.utcnow(), TI.queued_by_job_id: self.id},
-            synchronize_session=False
-        )
-        session.commit()
+        for ti in tis_to_set_to_queued:
+            self.state_cache.add(ti.key, ti.pool, ti.pool_slots)
 
         # Generate a list of SimpleTaskInstance for the use of queuing
         # them in the executor.
         simple_task_instances = [SimpleTaskInstance(ti) for ti in tis_to_set_to_queued]
 
-        task_instance_str = "\n\t".join([repr(x) for x in tis_to_set_to_queued])
-        self.log.info("Setting the following %s tasks to queued state:\n\t%s",
-                      len(tis_to_set_to_queued), task_instance_str)
+        self.log.info("Set %s tasks to queued state", len(tis_to_set_to_queued))
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(
+                "Set the following tasks to queued state:\n\t%s",
+                "\n\t".join(repr(x) for x in tis_to_set_to_queued)
+            )
         return simple_task_instances
 
     def _enqueue_task_instances_with_queued_state(
@@ -1463,23 +1906,36 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         2. Change the state for the TIs above atomically.
         3. Enqueue the TIs in the executor.
 
+        The first two steps form a critical section: the pool rows and the picked TI rows
+        are locked until the state change is committed, so several schedulers can run at
+        the same time without queueing the same TIs twice. If another scheduler is in its
+        critical section, nothing is queued in this loop.
+
         :param simple_dag_bag: TaskInstances associated with DAGs in the
             simple_dag_bag will be fetched from the DB and executed
         :type simple_dag_bag: airflow.utils.dag_processing.SimpleDagBag
         :return: Number of task instance with state changed.
         """
-        executable_tis = self._find_executable_task_instances(simple_dag_bag, session=session)
+        try:
+            executable_tis = self._find_executable_task_instances(simple_dag_bag, session=session)
 
-        def query(result: int, items: List[TI]) -> int:
-            simple_tis_with_state_changed = \
-                self._change_state_for_executable_task_instances(items, session=session)
-            self._enqueue_task_instances_with_queued_state(
-                simple_dag_bag,
-                simple_tis_with_state_changed)
+            def query(result: List[SimpleTaskInstance], items: List[TI]) -> List[SimpleTaskInstance]:
+                return result + self._change_state_for_executable_task_instances(items, session=session)
+
+            simple_tis_with_state_changed: List[SimpleTaskInstance] = helpers.reduce_in_chunks(
+                query, executable_tis, [], self.max_tis_per_query)
+            # Committing releases the row locks taken in the critical section
             session.commit()
-            return result + len(simple_tis_with_state_changed)
+        except OperationalError as e:
+            if is_lock_not_available_error(error=e):
+                self.log.debug("Critical section lock held by another Scheduler")
+                Stats.incr('scheduler.critical_section_busy')
+                session.rollback()
+                return 0
+            raise
 
-        return helpers.reduce_in_chunks(query, executable_tis, 0, self.max_tis_per_query)
+        self._enqueue_task_instances_with_queued_state(simple_dag_bag, simple_tis_with_state_changed)
+        return len(simple_tis_with_state_changed)
 
     @provide_session
     def _change_state_for_tasks_failed_to_execute(self, session: Session = None):
@@ -1492,30 +1948,21 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         if not self.executor.queued_tasks:
             return
 
-        filter_for_ti_state_change = (
-            [and_(
-                TI.dag_id == dag_id,
-                TI.task_id == task_id,
-                TI.execution_date == execution_date,
-                # The TI.try_number will return raw try_number+1 since the
-                # ti is not running. And we need to -1 to match the DB record.
-                TI._try_number == try_number - 1,  # pylint: disable=protected-access
-                TI.state == State.QUEUED)
-                for dag_id, task_id, execution_date, try_number
-                in self.executor.queued_tasks.keys()])
-        ti_query = session.query(TI).filter(or_(*filter_for_ti_state_change))
-        tis_to_set_to_scheduled: List[TI] = ti_query.with_for_update().all()
+        tis_to_set_to_scheduled: List[TI] = TI.bulk_set_state(
+            [TaskInstanceKey(*key) for key in self.executor.queued_tasks.keys()],
+            from_states=[State.QUEUED],
+            to_state=State.SCHEDULED,
+            values={TI.queued_dttm: None},
+            match_try_number=True,
+            chunk_size=self.max_tis_per_query,
+            session=session,
+        )
         if not tis_to_set_to_scheduled:
             return
 
-        # set TIs to queued state
-        filter_for_tis = TI.filter_for_tis(tis_to_set_to_scheduled)
-        session.query(TI).filter(filter_for_tis).update(
-            {TI.state: State.SCHEDULED, TI.queued_dttm: None}, synchronize_session=False
-        )
-
         for task_instance in tis_to_set_to_scheduled:
             self.executor.queued_tasks.pop(task_instance.key)
+            self.state_cache.remove(task_instance.key)
 
         task_instance_str = "\n\t".join(repr(x) for x in tis_to_set_to_scheduled)
         self.log.info("Set the following tasks to scheduled state:\n\t%s", task_instance_str)
@@ -1525,7 +1972,7 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         """
         Respond to executor events.
         """
-        if not self.processor_agent:
+        if not self.processor_agent and not self.standalone_dag_processor:
             raise ValueError("Processor agent is not started.")
         ti_primary_key_to_try_number_map: Dict[Tuple[str, str, datetime.datetime], int] = {}
         event_buffer = self.executor.get_event_buffer(simple_dag_bag.dag_ids)
@@ -1543,6 +1990,8 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
                 "exited with status %s for try_number %s",
                 ti_key.dag_id, ti_key.task_id, ti_key.execution_date, state, ti_key.try_number
             )
+            if state in (State.FAILED, State.SUCCESS):
+                self.state_cache.remove(ti_key)
             if state in (State.FAILED, State.SUCCESS, State.QUEUED):
                 tis_with_right_state.append(ti_key)
 
@@ -1569,11 +2018,32 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
                       "task says its %s. (Info: %s) Was the task killed externally?"
                 self.log.error(msg, ti, state, ti.state, info)
                 serialized_dag = simple_dag_bag.get_dag(ti.dag_id)
-                self.processor_agent.send_callback_to_execute(
-                    full_filepath=serialized_dag.full_filepath,
-                    task_instance=ti,
-                    msg=msg % (ti, state, ti.state, info),
-                )
+                if self.processor_agent:
+                    self.processor_agent.send_callback_to_execute(
+                        full_filepath=serialized_dag.full_filepath,
+                        task_instance=ti,
+                        msg=msg % (ti, state, ti.state, info),
+                    )
+                else:
+                    self._fail_task_instance_without_callbacks(
+                        ti, serialized_dag, msg % (ti, state, ti.state, info), session=session
+                    )
+
+    @staticmethod
+    def _fail_task_instance_without_callbacks(
+        ti: TI, serialized_dag: SerializedDAG, msg: str, session: Session = None
+    ) -> None:
+        """
+        Fail or retry a task instance killed externally, from its serialized DAG.
+
+        The scheduler doesn't parse the DAG files with a standalone DAG processor, so
+        the callbacks of the task, which are not in the serialized DAG, are not run.
+        """
+        task = copy.copy(serialized_dag.get_task(ti.task_id))
+        task.on_failure_callback = None
+        task.on_retry_callback = None
+        ti.task = task
+        ti.handle_failure(msg, session=session)
 
     def _execute(self) -> None:
         self.log.info("Starting the scheduler")
@@ -1589,15 +2059,18 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
 
         processor_timeout_seconds: int = conf.getint('core', 'dag_file_processor_timeout')
         processor_timeout = timedelta(seconds=processor_timeout_seconds)
-        self.processor_agent = DagFileProcessorAgent(
-            dag_directory=self.subdir,
-            max_runs=self.num_runs,
-            processor_factory=type(self)._create_dag_file_processor,
-            processor_timeout=processor_timeout,
-            dag_ids=self.dag_ids,
-            pickle_dags=pickle_dags,
-            async_mode=async_mode,
-        )
+        if self.standalone_dag_processor:
+            self.log.info("Not parsing the DAG files, they are parsed by the standalone DAG processors")
+        else:
+            self.processor_agent = DagFileProcessorAgent(
+                dag_directory=self.subdir,
+                max_runs=self.num_runs,
+                processor_factory=type(self)._create_dag_file_processor,
+                processor_timeout=processor_timeout,
+                dag_ids=self.dag_ids,
+                pickle_dags=pickle_dags,
+                async_mode=async_mode,
+            )
 
         try:
             self.executor.start()
@@ -1608,19 +2081,21 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
             self.register_exit_signals()
 
             # Start after resetting orphaned tasks to avoid stressing out DB.
-            self.processor_agent.start()
+            if self.processor_agent:
+                self.processor_agent.start()
 
             execute_start_time = timezone.utcnow()
 
             self._run_scheduler_loop()
 
             # Stop any processors
-            self.processor_agent.terminate()
+            if self.processor_agent:
+                self.processor_agent.terminate()
 
             # Verify that all files were processed, and if so, deactivate DAGs that
             # haven't been touched by the scheduler as they likely have been
             # deleted.
-            if self.processor_agent.all_files_processed:
+            if self.processor_agent and self.processor_agent.all_files_processed:
                 self.log.info(
                     "Deactivating DAGs that haven't been touched since %s",
                     execute_start_time.isoformat()
@@ -1633,7 +2108,8 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         except Exception:  # pylint: disable=broad-except
             self.log.exception("Exception when executing SchedulerJob._run_scheduler_loop")
         finally:
-            self.processor_agent.end()
+            if self.processor_agent:
+                self.processor_agent.end()
             self.log.info("Exited execute loop")
 
     @staticmethod
@@ -1657,6 +2133,8 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         """
         The actual scheduler loop. The main steps in the loop are:
             #. Harvest DAG parsing results through DagFileProcessorAgent
+            #. Create DagRuns and schedule task instances from the serialized DAGs,
+               if ``[scheduler] schedule_from_serialized_dags`` is enabled
             #. Find and queue executable tasks
                 #. Change task instance state in DB
                 #. Queue tasks in executor
@@ -1670,48 +2148,141 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
 
         :rtype: None
         """
-        if not self.processor_agent:
+        if not self.processor_agent and not self.standalone_dag_processor:
             raise ValueError("Processor agent is not started.")
         is_unit_test: bool = conf.getboolean('core', 'unit_test_mode')
+        orphaned_tasks_check_interval: float = conf.getfloat('scheduler', 'orphaned_tasks_check_interval')
+        last_orphaned_tasks_check = time.monotonic()
+        num_loops = 0
 
         # For the execute duration, parse and schedule DAGs
         while True:
+            num_loops += 1
             loop_start_time = time.time()
+            self.loop_profiler.loop_started()
+            try:
+                # Other schedulers may have died since the last check, adopt their tasks
+                if (
+                    orphaned_tasks_check_interval > 0 and
+                    time.monotonic() - last_orphaned_tasks_check >= orphaned_tasks_check_interval
+                ):
+                    with self.loop_stats.phase('adopt_orphaned_tasks'):
+                        self.adopt_or_reset_orphaned_tasks(at_startup=False)
+                    last_orphaned_tasks_check = time.monotonic()
+
+                if self.processor_agent:
+                    with self.loop_stats.phase('harvest_dags'):
+                        if self.using_sqlite:
+                            self.processor_agent.run_single_parsing_loop()
+                            # For the sqlite case w/ 1 thread, wait until the processor
+                            # is finished to avoid concurrent access to the DB.
+                            self.log.debug("Waiting for processors to finish since we're using sqlite")
+                            self.processor_agent.wait_until_finished()
+
+                        parsing_results = self.processor_agent.harvest_parsing_results()
+                        self.simple_dag_bag.update(parsing_results, self.processor_agent.file_paths)
+
+                    self.log.debug("Harvested the SimpleDAGs of %d files", len(parsing_results))
+
+                simple_dag_bag = self.simple_dag_bag
+                if self.schedule_from_serialized_dags:
+                    try:
+                        with self.loop_stats.phase('schedule_dags'):
+                            simple_dag_bag = SimpleDagBag(self._schedule_dags_from_serialized_dags())
+                    except Exception:  # pylint: disable=broad-except
+                        self.log.exception("Error scheduling DAGs from serialized DAGs")
+
+                # Send tasks for execution if available
+
+                if not self._validate_and_run_task_instances(simple_dag_bag=simple_dag_bag):
+                    continue
 
-            if self.using_sqlite:
-                self.processor_agent.run_single_parsing_loop()
-                # For the sqlite case w/ 1 thread, wait until the processor
-                # is finished to avoid concurrent access to the DB.
-                self.log.debug("Waiting for processors to finish since we're using sqlite")
-                self.processor_agent.wait_until_finished()
-
-            serialized_dags = self.processor_agent.harvest_serialized_dags()
-
-            self.log.debug("Harvested %d SimpleDAGs", len(serialized_dags))
-
-            # Send tasks for execution if available
-            simple_dag_bag = SimpleDagBag(serialized_dags)
-
-            if not self._validate_and_run_task_instances(simple_dag_bag=simple_dag_bag):
-                continue
-
-            # Heartbeat the scheduler periodically
-            self.heartbeat(only_if_necessary=True)
+                # Heartbeat the scheduler periodically
+                with self.loop_stats.phase('heartbeat'):
+                    self.heartbeat(only_if_necessary=True)
 
-            self._emit_pool_metrics()
+                with self.loop_stats.phase('pool_metrics'):
+                    self._emit_pool_metrics()
+            finally:
+                self.loop_profiler.loop_finished()
 
             loop_end_time = time.time()
             loop_duration = loop_end_time - loop_start_time
-            self.log.debug("Ran scheduling loop in %.2f seconds", loop_duration)
+            Stats.timing('scheduler.loop_duration', timedelta(seconds=loop_duration))
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug(
+                    "Ran scheduling loop in %.2f seconds (%s)",
+                    loop_duration,
+                    ", ".join(
+                        "{}: {:.2f}".format(phase, duration)
+                        for phase, duration in self.loop_stats.last_durations.items()
+                    ),
+                )
 
             if not is_unit_test:
                 time.sleep(self._processor_poll_interval)
 
-            if self.processor_agent.done:
+            if self.processor_agent and self.processor_agent.done:
                 self.log.info(
                     "Exiting scheduler loop as all files have been processed %d times", self.num_runs
                 )
                 break
+            if not self.processor_agent and 0 < self.num_runs <= num_loops:
+                self.log.info("Exiting scheduler loop after %d loops", num_loops)
+                break
+
+    @provide_session
+    def _schedule_dags_from_serialized_dags(self, session: Session = None) -> List[DAG]:
+        """
+        Creates DagRuns and moves task instances to the SCHEDULED state for all
+        active, unpaused DAGs, using the serialized DAGs stored in the DB instead
+        of waiting for the DAG file processors to parse the files again.
+
+        SLA misses are still checked by the DAG file processors, as they need
+        the callbacks from the DAG files.
+
+        :return: the DAGs that were processed, to be used for executing task instances
+        :rtype: List[airflow.models.DAG]
+        """
+        dagbag, dag_run_processor = self.dagbag, self.dag_run_processor
+        if not dagbag or not dag_run_processor:
+            raise ValueError("The scheduler does not schedule DAGs from serialized DAGs.")
+
+        query = session.query(DagModel.dag_id).filter(
+            DagModel.is_active == True,  # noqa: E712 pylint: disable=singleton-comparison
+            DagModel.is_paused == False,  # noqa: E712 pylint: disable=singleton-comparison
+        )
+        if self.dag_ids:
+            query = query.filter(DagModel.dag_id.in_(self.dag_ids))
+
+        dags: List[DAG] = []
+        for (dag_id,) in query.all():
+            try:
+                dag = dagbag.get_dag(dag_id)
+            except ValueError:
+                # The DAG file has been parsed but the DAG is not serialized yet
+                self.log.debug("DAG %s not found in serialized_dag table", dag_id)
+                continue
+            except Exception:  # pylint: disable=broad-except
+                self.log.exception("Error loading the serialized DAG %s", dag_id)
+                continue
+            if not dag:
+                continue
+            dags.append(dag)
+
+            # Each DAG is scheduled and committed on its own, so an error in one DAG
+            # doesn't stop the others from being scheduled in this loop
+            try:
+                ti_keys_to_schedule = dag_run_processor._process_dags(  # pylint: disable=protected-access
+                    [dag], check_slas=False, session=session
+                )
+                dag_run_processor._schedule_task_instances(  # pylint: disable=protected-access
+                    dagbag, ti_keys_to_schedule, session=session
+                )
+            except Exception:  # pylint: disable=broad-except
+                self.log.exception("Error scheduling DAG %s", dag_id)
+                session.rollback()
+        return dags
 
     def _validate_and_run_task_instances(self, simple_dag_bag: SimpleDagBag) -> bool:
         if simple_dag_bag.serialized_dags:
@@ -1724,12 +2295,15 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
 
         # Call heartbeats
         self.log.debug("Heartbeating the executor")
-        self.executor.heartbeat()
+        with self.loop_stats.phase('executor_heartbeat'):
+            self.executor.heartbeat()
 
-        self._change_state_for_tasks_failed_to_execute()
+        with self.loop_stats.phase('tasks_failed_to_execute'):
+            self._change_state_for_tasks_failed_to_execute()
 
         # Process events from the executor
-        self._process_executor_events(simple_dag_bag)
+        with self.loop_stats.phase('executor_events'):
+            self._process_executor_events(simple_dag_bag)
         return True
 
     def _process_and_execute_tasks(self, simple_dag_bag: SimpleDagBag) -> None:
@@ -1739,23 +2313,25 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         # If a task instance is up for retry but the corresponding DAG run
         # isn't running, mark the task instance as FAILED so we don't try
         # to re-run it.
-        self._change_state_for_tis_without_dagrun(
-            simple_dag_bag=simple_dag_bag,
-            old_states=[State.UP_FOR_RETRY],
-            new_state=State.FAILED
-        )
-        # If a task instance is scheduled or queued or up for reschedule,
-        # but the corresponding DAG run isn't running, set the state to
-        # NONE so we don't try to re-run it.
-        self._change_state_for_tis_without_dagrun(
-            simple_dag_bag=simple_dag_bag,
-            old_states=[State.QUEUED,
-                        State.SCHEDULED,
-                        State.UP_FOR_RESCHEDULE,
-                        State.SENSING],
-            new_state=State.NONE
-        )
-        self._execute_task_instances(simple_dag_bag)
+        with self.loop_stats.phase('tis_without_dagrun'):
+            self._change_state_for_tis_without_dagrun(
+                simple_dag_bag=simple_dag_bag,
+                old_states=[State.UP_FOR_RETRY],
+                new_state=State.FAILED
+            )
+            # If a task instance is scheduled or queued or up for reschedule,
+            # but the corresponding DAG run isn't running, set the state to
+            # NONE so we don't try to re-run it.
+            self._change_state_for_tis_without_dagrun(
+                simple_dag_bag=simple_dag_bag,
+                old_states=[State.QUEUED,
+                            State.SCHEDULED,
+                            State.UP_FOR_RESCHEDULE,
+                            State.SENSING],
+                new_state=State.NONE
+            )
+        with self.loop_stats.phase('execute_task_instances'):
+            self._execute_task_instances(simple_dag_bag)
 
     @provide_session
     def _emit_pool_metrics(self, session: Session = None) -> None:
@@ -1770,11 +2346,16 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         Stats.incr('scheduler_heartbeat', 1, 1)
 
     @provide_session
-    def adopt_or_reset_orphaned_tasks(self, session: Session = None):
+    def adopt_or_reset_orphaned_tasks(self, at_startup: bool = True, session: Session = None):
         """
         Reset any TaskInstance still in QUEUED or SCHEDULED states that were
         enqueued by a SchedulerJob that is no longer running.
 
+        :param at_startup: whether the scheduler is starting. The TIs not queued by any
+            scheduler are then reset too. Afterwards, only the QUEUED and RUNNING TIs
+            queued by a SchedulerJob that is no longer running are, as the SCHEDULED TIs
+            and the TIs run by hand are left alone by a live scheduler.
+        :type at_startup: bool
         :return: the number of TIs reset
         :rtype: int
         """
@@ -1789,24 +2370,33 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
             self.log.info("Marked %d SchedulerJob instances as failed", num_failed)
             Stats.incr(self.__class__.__name__.lower() + '_end', num_failed)
 
-        resettable_states = [State.SCHEDULED, State.QUEUED, State.RUNNING]
-        tis_to_reset_or_adopt = (
-            session.query(TI).filter(TI.state.in_(resettable_states))
-            # outerjoin is because we didn't use to have queued_by_job
-            # set, so we need to pick up anything pre upgrade. This (and the
-            # "or queued_by_job_id IS NONE") can go as soon as scheduler HA is
-            # released.
-            .outerjoin(TI.queued_by_job)
-            .filter(or_(TI.queued_by_job_id.is_(None), SchedulerJob.state != State.RUNNING))
+        if at_startup:
+            resettable_states = [State.SCHEDULED, State.QUEUED, State.RUNNING]
+            query = (
+                session.query(TI).filter(TI.state.in_(resettable_states))
+                # outerjoin is because we didn't use to have queued_by_job
+                # set, so we need to pick up anything pre upgrade. This (and the
+                # "or queued_by_job_id IS NONE") can go as soon as scheduler HA is
+                # released.
+                .outerjoin(TI.queued_by_job)
+                .filter(or_(TI.queued_by_job_id.is_(None), SchedulerJob.state != State.RUNNING))
+            )
+        else:
+            query = (
+                session.query(TI).filter(TI.state.in_([State.QUEUED, State.RUNNING]))
+                .join(TI.queued_by_job)
+                .filter(SchedulerJob.state != State.RUNNING)
+            )
+        query = (
+            query
             .join(TI.dag_run)
             .filter(DagRun.run_type != DagRunType.BACKFILL_JOB.value,
                     # pylint: disable=comparison-with-callable
                     DagRun.state == State.RUNNING)
             .options(load_only(TI.dag_id, TI.task_id, TI.execution_date))
-            # Lock these rows, so that another scheduler can't try and adopt these too
-            .with_for_update(of=TI, **skip_locked(session=session))
-            .all()
         )
+        # Lock these rows, so that another scheduler can't try and adopt these too
+        tis_to_reset_or_adopt: List[TI] = with_row_locks(query, of=TI, **skip_locked(session=session)).all()
         to_reset = self.executor.try_adopt_task_instances(tis_to_reset_or_adopt)
 
         reset_tis_message = []
@@ -1818,6 +2408,9 @@ class SchedulerJob(BaseJob):  # pylint: disable=too-many-instance-attributes
         for ti in set(tis_to_reset_or_adopt) - set(to_reset):
             ti.queued_by_job_id = self.id
 
+        if to_reset:
+            self.state_cache.mark_stale()
+
         Stats.incr('scheduler.orphaned_tasks.cleared', len(to_reset))
         Stats.incr('scheduler.orphaned_tasks.adopted', len(tis_to_reset_or_adopt) - len(to_reset))
 
@@ -0,0 +1,149 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Local cache of the worker pods of the KubernetesExecutor, kept current from the
+listings and the watch stream of the KubernetesJobWatcher.
+"""
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from kubernetes.client import models as k8s
+
+from airflow.kubernetes.pod_generator import datetime_to_label_safe_datestring, make_safe_label_value
+
+# The annotations of the worker pods identifying their task instance
+TASK_ANNOTATIONS = ('dag_id', 'task_id', 'execution_date', 'try_number')
+
+# The labels of the worker pods identifying their task, whatever the try
+TASK_LABELS = ('dag_id', 'task_id', 'execution_date')
+
+# Type of the event sent when the pods were listed, which replaces the content of the cache
+SYNC_EVENT = 'SYNC'
+
+PodCacheKey = Tuple[str, str]
+
+
+class CachedPod(NamedTuple):
+    """The state of a worker pod kept in the cache, much smaller than the V1Pod"""
+
+    name: str
+    namespace: str
+    phase: Optional[str]
+    annotations: Dict[str, str]
+    task_labels: Tuple[str, ...]
+    resource_version: str
+
+    @classmethod
+    def from_pod(cls, pod: k8s.V1Pod) -> 'CachedPod':
+        """The cached state of the pod"""
+        annotations = pod.metadata.annotations or {}
+        labels = pod.metadata.labels or {}
+        return cls(
+            name=pod.metadata.name,
+            namespace=pod.metadata.namespace,
+            phase=pod.status.phase if pod.status else None,
+            annotations={key: annotations[key] for key in TASK_ANNOTATIONS},
+            task_labels=tuple(labels.get(key, '') for key in TASK_LABELS),
+            resource_version=pod.metadata.resource_version,
+        )
+
+    @property
+    def key(self) -> PodCacheKey:
+        """Key of the pod in the cache"""
+        return self.namespace, self.name
+
+
+class WatchEvent(NamedTuple):
+    """
+    Event sent by the KubernetesJobWatcher: the pods of a listing for ``SYNC`` events,
+    or the pod of an event of the watch stream.
+    """
+
+    type: str
+    pods: List[CachedPod]
+    resource_version: Optional[str]
+
+
+class PodCache:
+    """
+    The worker pods, as last listed or watched. Only the compact state of the pods
+    that exist is kept, the deleted pods are removed from the cache.
+    """
+
+    def __init__(self):
+        self._pods: Dict[PodCacheKey, CachedPod] = {}
+        self._pods_by_task: Dict[Tuple[str, ...], Set[PodCacheKey]] = {}
+        # Whether the pods were listed at least once
+        self.synced = False
+
+    def __len__(self) -> int:
+        return len(self._pods)
+
+    def get(self, namespace: str, name: str) -> Optional[CachedPod]:
+        """The cached pod, if it exists"""
+        return self._pods.get((namespace, name))
+
+    def update(self, pod: CachedPod) -> Optional[CachedPod]:
+        """Add or update the pod, and return its previous state"""
+        previous = self._pods.get(pod.key)
+        if previous and previous.task_labels != pod.task_labels:
+            self._unindex(previous)
+        self._pods[pod.key] = pod
+        self._pods_by_task.setdefault(pod.task_labels, set()).add(pod.key)
+        return previous
+
+    def delete(self, namespace: str, name: str) -> Optional[CachedPod]:
+        """Remove the pod, and return its previous state"""
+        previous = self._pods.pop((namespace, name), None)
+        if previous:
+            self._unindex(previous)
+        return previous
+
+    def replace(self, pods: Iterable[CachedPod]) -> List[Tuple[Optional[CachedPod], CachedPod, bool]]:
+        """
+        Replace the cached pods with the listed ones.
+
+        :return: the previous state, the new state and whether it was deleted, of the
+            pods which were listed and of the cached pods which were not
+        """
+        changes = []
+        listed: Set[PodCacheKey] = set()
+        for pod in pods:
+            listed.add(pod.key)
+            changes.append((self.update(pod), pod, False))
+        for key in [key for key in self._pods if key not in listed]:
+            previous = self.delete(*key)
+            if previous:
+                changes.append((previous, previous, True))
+        self.synced = True
+        return changes
+
+    def get_task_pods(self, dag_id: str, task_id: str, execution_date: datetime.datetime) -> List[CachedPod]:
+        """The pods of the tries of the task instance"""
+        task_labels = (
+            make_safe_label_value(dag_id),
+            make_safe_label_value(task_id),
+            datetime_to_label_safe_datestring(execution_date),
+        )
+        return [self._pods[key] for key in self._pods_by_task.get(task_labels, ())]
+
+    def _unindex(self, pod: CachedPod) -> None:
+        keys = self._pods_by_task.get(pod.task_labels)
+        if keys is not None:
+            keys.discard(pod.key)
+            if not keys:
+                del self._pods_by_task[pod.task_labels]
@@ -0,0 +1,45 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Add dag_fingerprint column to serialized_dag table
+
+Revision ID: b1261e641f20
+Revises: e1a11ece99cc
+Create Date: 2026-10-18 19:31:02.514317
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b1261e641f20'
+down_revision = 'e1a11ece99cc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Apply Add dag_fingerprint column to serialized_dag table"""
+    op.add_column('serialized_dag', sa.Column('dag_fingerprint', sa.String(32), nullable=True))
+
+
+def downgrade():
+    """Unapply Add dag_fingerprint column to serialized_dag table"""
+    with op.batch_alter_table('serialized_dag') as batch_op:
+        batch_op.drop_column('dag_fingerprint')
@@ -1037,6 +1037,11 @@ class BaseOperator(Operator, LoggingMixin, TaskMixin, metaclass=BaseOperatorMeta
         if not self._dag:
             return set()
 
+        if not found_descendants and self.task_id in self._dag.task_dict:
+            # Memoized in the DAG's topology index until the DAG structure changes
+            return set(self._dag._get_topology().get_flat_relative_ids(  # pylint: disable=protected-access
+                self.task_id, upstream=upstream))
+
         if not found_descendants:
             found_descendants = set()
         relative_ids = self.get_direct_relative_ids(upstream)
@@ -1189,6 +1194,8 @@ class BaseOperator(Operator, LoggingMixin, TaskMixin, metaclass=BaseOperatorMeta
                 self.add_only_new(self._downstream_task_ids, task.task_id)
                 task.add_only_new(task.get_direct_relative_ids(upstream=True), self.task_id)
 
+        dag._invalidate_topology()  # pylint: disable=protected-access
+
     def set_downstream(self, task_or_task_list: Union[TaskMixin, Sequence[TaskMixin]]) -> None:
         """
         Set a task or a task list to be directly downstream from the current
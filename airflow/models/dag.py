@@ -25,7 +25,6 @@ import re
 import sys
 import traceback
 import warnings
-from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import (
     TYPE_CHECKING, Callable, Collection, Dict, FrozenSet, Iterable, List, Optional, Set, Type, Union, cast,
@@ -52,9 +51,10 @@ from airflow.models.dagrun import DagRun
 from airflow.models.taskinstance import Context, TaskInstance, clear_task_instances
 from airflow.stats import Stats
 from airflow.utils import timezone
+from airflow.utils.dag_topology import DagTopology
 from airflow.utils.dates import cron_presets, date_range as utils_date_range
 from airflow.utils.file import correct_maybe_zipped
-from airflow.utils.helpers import validate_key
+from airflow.utils.helpers import chunks, validate_key
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.session import provide_session
 from airflow.utils.sqlalchemy import Interval, UtcDateTime
@@ -337,6 +337,8 @@ class DAG(BaseDag, LoggingMixin):
 
         self.jinja_environment_kwargs = jinja_environment_kwargs
         self.tags = tags
+        # Built on first use and dropped when tasks or relations are added
+        self._topology: Optional[DagTopology] = None
         self._task_group = TaskGroup.create_root(self)
 
     def __repr__(self):
@@ -897,20 +899,32 @@ class DAG(BaseDag, LoggingMixin):
         tis = tis.order_by(TaskInstance.execution_date).all()
         return tis
 
+    def _get_topology(self) -> DagTopology:
+        """Returns the index of the DAG structure, building it if needed"""
+        topology = getattr(self, '_topology', None)
+        if topology is None:
+            topology = self._topology = DagTopology(self)
+        return topology
+
+    def _invalidate_topology(self) -> None:
+        """Drops the index of the DAG structure, to be called whenever tasks or relations change"""
+        self._topology = None
+
     @property
     def roots(self) -> List[BaseOperator]:
         """Return nodes with no parents. These are first to execute and are called roots or root nodes."""
-        return [task for task in self.tasks if not task.upstream_list]
+        return [self.task_dict[task_id] for task_id in self._get_topology().root_ids]
 
     @property
     def leaves(self) -> List[BaseOperator]:
         """Return nodes with no children. These are last to execute and are called leaves or leaf nodes."""
-        return [task for task in self.tasks if not task.downstream_list]
+        return [self.task_dict[task_id] for task_id in self._get_topology().leaf_ids]
 
     def topological_sort(self, include_subdag_tasks: bool = False):
         """
         Sorts tasks in topographical order, such that a task comes after any of its
-        upstream dependencies.
+        upstream dependencies. The order is computed once and kept until the DAG
+        structure changes.
 
         Heavily inspired by:
         http://blog.jupo.org/2012/04/06/topological-sorting-acyclic-directed-graphs/
@@ -920,45 +934,12 @@ class DAG(BaseDag, LoggingMixin):
         """
         from airflow.operators.subdag_operator import SubDagOperator  # Avoid circular import
 
-        # convert into an OrderedDict to speedup lookup while keeping order the same
-        graph_unsorted = OrderedDict((task.task_id, task) for task in self.tasks)
-
         graph_sorted = []  # type: List[BaseOperator]
-
-        # special case
-        if len(self.tasks) == 0:
-            return tuple(graph_sorted)
-
-        # Run until the unsorted graph is empty.
-        while graph_unsorted:
-            # Go through each of the node/edges pairs in the unsorted
-            # graph. If a set of edges doesn't contain any nodes that
-            # haven't been resolved, that is, that are still in the
-            # unsorted graph, remove the pair from the unsorted graph,
-            # and append it to the sorted graph. Note here that by using
-            # using the items() method for iterating, a copy of the
-            # unsorted graph is used, allowing us to modify the unsorted
-            # graph as we move through it. We also keep a flag for
-            # checking that that graph is acyclic, which is true if any
-            # nodes are resolved during each pass through the graph. If
-            # not, we need to exit as the graph therefore can't be
-            # sorted.
-            acyclic = False
-            for node in list(graph_unsorted.values()):
-                for edge in node.upstream_list:
-                    if edge.task_id in graph_unsorted:
-                        break
-                # no edges in upstream tasks
-                else:
-                    acyclic = True
-                    del graph_unsorted[node.task_id]
-                    graph_sorted.append(node)
-                    if include_subdag_tasks and isinstance(node, SubDagOperator):
-                        graph_sorted.extend(node.subdag.topological_sort(include_subdag_tasks=True))
-
-            if not acyclic:
-                raise AirflowException("A cyclic dependency occurred in dag: {}"
-                                       .format(self.dag_id))
+        for task_id in self._get_topology().topological_order():
+            node = self.task_dict[task_id]
+            graph_sorted.append(node)
+            if include_subdag_tasks and isinstance(node, SubDagOperator):
+                graph_sorted.extend(node.subdag.topological_sort(include_subdag_tasks=True))
 
         return tuple(graph_sorted)
 
@@ -1237,14 +1218,21 @@ class DAG(BaseDag, LoggingMixin):
         result = cls.__new__(cls)
         memo[id(self)] = result
         for k, v in self.__dict__.items():
-            if k not in ('user_defined_macros', 'user_defined_filters', 'params'):
+            if k not in ('user_defined_macros', 'user_defined_filters', 'params', '_topology'):
                 setattr(result, k, copy.deepcopy(v, memo))
 
         result.user_defined_macros = self.user_defined_macros
         result.user_defined_filters = self.user_defined_filters
         result.params = self.params
+        result._topology = None
         return result
 
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # The topology index is cheap to rebuild, no need to pickle it
+        state['_topology'] = None
+        return state
+
     def sub_dag(self, task_regex, include_downstream=False,
                 include_upstream=True):
         """
@@ -1308,6 +1296,8 @@ class DAG(BaseDag, LoggingMixin):
             t._downstream_task_ids = t.downstream_task_ids.intersection(
                 dag.task_dict.keys())
 
+        dag._invalidate_topology()
+
         if len(dag.tasks) < len(self.tasks):
             dag.partial = True
 
@@ -1408,6 +1398,7 @@ class DAG(BaseDag, LoggingMixin):
             self._task_group.used_group_ids.add(task.task_id)
 
         self.task_count = len(self.task_dict)
+        self._invalidate_topology()
 
     def add_tasks(self, tasks):
         """
@@ -1590,7 +1581,24 @@ class DAG(BaseDag, LoggingMixin):
 
         if sync_time is None:
             sync_time = timezone.utcnow()
-        log.info("Sync %s DAGs", len(dags))
+        # The DAGs come before their SubDAGs, which are synced once
+        dag_by_ids = {}
+        for dag in dags:
+            dag_by_ids.setdefault(dag.dag_id, dag)
+            for subdag in dag.subdags:
+                dag_by_ids.setdefault(subdag.dag_id, subdag)
+        log.info("Sync %s DAGs", len(dag_by_ids))
+
+        for chunk in chunks(list(dag_by_ids.values()), settings.DAG_SYNC_BATCH_SIZE):
+            cls._sync_chunk_to_db(chunk, sync_time, session)
+            session.commit()
+
+    @classmethod
+    def _sync_chunk_to_db(cls, dags: List["DAG"], sync_time: datetime, session: Session):
+        """
+        Save attributes about a chunk of DAGs to the DB: their DagModels are read with one query,
+        and the tags are diffed so that only the changed ones are written.
+        """
         dag_by_ids = {dag.dag_id: dag for dag in dags}
         dag_ids = set(dag_by_ids.keys())
         orm_dags = (
@@ -1631,25 +1639,19 @@ class DAG(BaseDag, LoggingMixin):
             orm_dag.default_view = dag.default_view
             orm_dag.description = dag.description
             orm_dag.schedule_interval = dag.schedule_interval
+
+            dag_tag_names = dag.tags or []
             for orm_tag in list(orm_dag.tags):
-                if orm_tag.name not in orm_dag.tags:
-                    session.delete(orm_tag)
-                orm_dag.tags.remove(orm_tag)
-            if dag.tags:
-                orm_tag_names = [t.name for t in orm_dag.tags]
-                for dag_tag in list(dag.tags):
-                    if dag_tag not in orm_tag_names:
-                        dag_tag_orm = DagTag(name=dag_tag, dag_id=dag.dag_id)
-                        orm_dag.tags.append(dag_tag_orm)
-                        session.add(dag_tag_orm)
+                if orm_tag.name not in dag_tag_names:
+                    orm_dag.tags.remove(orm_tag)
+            orm_tag_names = {orm_tag.name for orm_tag in orm_dag.tags}
+            for dag_tag in dag_tag_names:
+                if dag_tag not in orm_tag_names:
+                    orm_dag.tags.append(DagTag(name=dag_tag, dag_id=dag.dag_id))
+                    orm_tag_names.add(dag_tag)
 
         if settings.STORE_DAG_CODE:
-            DagCode.bulk_sync_to_db([dag.fileloc for dag in orm_dags])
-
-        session.commit()
-
-        for dag in dags:
-            cls.bulk_sync_to_db(dag.subdags, sync_time=sync_time, session=session)
+            DagCode.bulk_sync_to_db([dag.fileloc for dag in orm_dags], session=session)
 
     @provide_session
     def sync_to_db(self, sync_time=None, session=None):
@@ -1758,7 +1760,7 @@ class DAG(BaseDag, LoggingMixin):
                 'parent_dag', '_old_context_manager_dags', 'safe_dag_id', 'last_loaded',
                 '_full_filepath', 'user_defined_filters', 'user_defined_macros',
                 'partial', '_old_context_manager_dags',
-                '_pickle_id', '_log', 'is_subdag', 'task_dict', 'template_searchpath',
+                '_pickle_id', '_log', 'is_subdag', 'task_dict', 'template_searchpath', '_topology',
                 'sla_miss_callback', 'on_success_callback', 'on_failure_callback',
                 'template_undefined', 'jinja_environment_kwargs'
             }
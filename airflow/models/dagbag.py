@@ -25,6 +25,7 @@ import sys
 import textwrap
 import warnings
 import zipfile
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, NamedTuple, Optional
 
@@ -41,6 +42,7 @@ from airflow.utils import timezone
 from airflow.utils.dag_cycle_tester import test_cycle
 from airflow.utils.file import correct_maybe_zipped, list_py_file_paths, might_contain_dag
 from airflow.utils.log.logging_mixin import LoggingMixin
+from airflow.utils.profiling import DagParseProfiler
 from airflow.utils.timeout import timeout
 
 
@@ -79,6 +81,10 @@ class DagBag(BaseDagBag, LoggingMixin):
         determining whether or not to write Serialized DAGs, that is done by checking
         the config ``store_serialized_dags``.
     :type read_dags_from_db: bool
+    :param profile_parsing: Profile the parsing of the DAG files, the profiles are kept in
+        ``parse_profiler.profiles``. See :class:`airflow.utils.profiling.DagParseProfiler`.
+        The DAG file processor sets it from ``[core] profile_dag_parsing``.
+    :type profile_parsing: bool
     """
 
     DAGBAG_IMPORT_TIMEOUT = conf.getint('core', 'DAGBAG_IMPORT_TIMEOUT')
@@ -92,6 +98,7 @@ class DagBag(BaseDagBag, LoggingMixin):
         safe_mode: bool = conf.getboolean('core', 'DAG_DISCOVERY_SAFE_MODE'),
         read_dags_from_db: bool = False,
         store_serialized_dags: Optional[bool] = None,
+        profile_parsing: bool = False,
     ):
         # Avoid circular import
         from airflow.models.dag import DAG
@@ -114,6 +121,15 @@ class DagBag(BaseDagBag, LoggingMixin):
         self.read_dags_from_db = read_dags_from_db
         # Only used by read_dags_from_db=True
         self.dags_last_fetched: Dict[str, datetime] = {}
+        # last_updated dates of the serialized DAGs, all checked at once every
+        # min_serialized_dag_fetch_interval
+        self.serialized_dags_last_updated: Dict[str, datetime] = {}
+        self.serialized_dags_last_checked: Optional[datetime] = None
+        self.serialized_dag_cache = None
+        if read_dags_from_db and settings.SERIALIZED_DAG_CACHE_FOLDER:
+            from airflow.serialization.dag_cache import SerializedDagFileCache
+            self.serialized_dag_cache = SerializedDagFileCache(settings.SERIALIZED_DAG_CACHE_FOLDER)
+        self.parse_profiler: Optional[DagParseProfiler] = DagParseProfiler() if profile_parsing else None
 
         self.collect_dags(
             dag_folder=dag_folder,
@@ -151,25 +167,19 @@ class DagBag(BaseDagBag, LoggingMixin):
         from airflow.models.dag import DagModel
 
         if self.read_dags_from_db:
-            # Import here so that serialized dag is only imported when serialization is enabled
-            from airflow.models.serialized_dag import SerializedDagModel
             if dag_id not in self.dags:
                 # Load from DB if not (yet) in the bag
                 self._add_dag_from_db(dag_id=dag_id)
                 return self.dags.get(dag_id)
 
             # If DAG is in the DagBag, check the following
-            # 1. if time has come to check if DAG is updated (controlled by min_serialized_dag_fetch_secs)
-            # 2. check the last_updated column in SerializedDag table to see if Serialized DAG is updated
-            # 3. if (2) is yes, fetch the Serialized DAG.
-            min_serialized_dag_fetch_secs = timedelta(seconds=settings.MIN_SERIALIZED_DAG_FETCH_INTERVAL)
-            if (
-                dag_id in self.dags_last_fetched and
-                timezone.utcnow() > self.dags_last_fetched[dag_id] + min_serialized_dag_fetch_secs
-            ):
-                sd_last_updated_datetime = SerializedDagModel.get_last_updated_datetime(dag_id=dag_id)
-                if sd_last_updated_datetime > self.dags_last_fetched[dag_id]:
-                    self._add_dag_from_db(dag_id=dag_id)
+            # 1. if time has come to check if DAGs are updated (controlled by min_serialized_dag_fetch_secs),
+            #    read the last_updated column in SerializedDag table for all the DAGs in the bag at once
+            # 2. if the Serialized DAG was updated since it was fetched, fetch it again.
+            if dag_id in self.dags_last_fetched:
+                sd_last_updated_datetime = self._get_serialized_dag_last_updated(dag_id)
+                if sd_last_updated_datetime and sd_last_updated_datetime > self.dags_last_fetched[dag_id]:
+                    self._add_dag_from_db(dag_id=dag_id, last_updated=sd_last_updated_datetime)
 
             return self.dags.get(dag_id)
 
@@ -201,18 +211,46 @@ class DagBag(BaseDagBag, LoggingMixin):
                 del self.dags[dag_id]
         return self.dags.get(dag_id)
 
-    def _add_dag_from_db(self, dag_id: str):
-        """Add DAG to DagBag from DB"""
+    def _get_serialized_dag_last_updated(self, dag_id: str) -> Optional[datetime]:
+        """
+        Get the last_updated date of the Serialized DAG as of the last check, checking
+        all the DAGs fetched so far if min_serialized_dag_fetch_interval has passed.
+        """
+        from airflow.models.serialized_dag import SerializedDagModel
+        min_serialized_dag_fetch_secs = timedelta(seconds=settings.MIN_SERIALIZED_DAG_FETCH_INTERVAL)
+        now = timezone.utcnow()
+        if (
+            self.serialized_dags_last_checked is None or
+            now > self.serialized_dags_last_checked + min_serialized_dag_fetch_secs
+        ):
+            self.serialized_dags_last_updated = SerializedDagModel.get_last_updated_datetimes(
+                list(self.dags_last_fetched.keys()))
+            self.serialized_dags_last_checked = now
+        return self.serialized_dags_last_updated.get(dag_id)
+
+    def _add_dag_from_db(self, dag_id: str, last_updated: Optional[datetime] = None):
+        """Add DAG to DagBag from DB, or from the serialized DAG cache if it is enabled"""
         from airflow.models.serialized_dag import SerializedDagModel
-        row = SerializedDagModel.get(dag_id)
-        if not row:
-            raise ValueError(f"DAG '{dag_id}' not found in serialized_dag table")
+        dag = None
+        if self.serialized_dag_cache:
+            last_updated = last_updated or SerializedDagModel.get_last_updated_datetime(dag_id)
+            if last_updated:
+                dag = self.serialized_dag_cache.get(dag_id, last_updated)
+
+        if dag is None:
+            row = SerializedDagModel.get(dag_id)
+            if not row:
+                raise ValueError(f"DAG '{dag_id}' not found in serialized_dag table")
+            dag = row.dag
+            if self.serialized_dag_cache:
+                self.serialized_dag_cache.put(dag, row.last_updated)
 
-        dag = row.dag
         for subdag in dag.subdags:
             self.dags[subdag.dag_id] = subdag
         self.dags[dag.dag_id] = dag
         self.dags_last_fetched[dag.dag_id] = timezone.utcnow()
+        if self.serialized_dags_last_checked is None:
+            self.serialized_dags_last_checked = self.dags_last_fetched[dag.dag_id]
 
     def process_file(self, filepath, only_if_updated=True, safe_mode=True):
         """
@@ -239,12 +277,13 @@ class DagBag(BaseDagBag, LoggingMixin):
             self.log.exception(e)
             return []
 
-        if not zipfile.is_zipfile(filepath):
-            mods = self._load_modules_from_file(filepath, safe_mode)
-        else:
-            mods = self._load_modules_from_zip(filepath, safe_mode)
+        with self._profile_file(filepath):
+            if not zipfile.is_zipfile(filepath):
+                mods = self._load_modules_from_file(filepath, safe_mode)
+            else:
+                mods = self._load_modules_from_zip(filepath, safe_mode)
 
-        found_dags = self._process_modules(filepath, mods, file_last_changed_on_disk)
+            found_dags = self._process_modules(filepath, mods, file_last_changed_on_disk)
 
         self.file_last_changed[filepath] = file_last_changed_on_disk
         return found_dags
@@ -271,7 +310,8 @@ class DagBag(BaseDagBag, LoggingMixin):
                 spec = importlib.util.spec_from_loader(mod_name, loader)
                 new_module = importlib.util.module_from_spec(spec)
                 sys.modules[spec.name] = new_module
-                loader.exec_module(new_module)
+                with self._profile_phase('top_level_code'):
+                    loader.exec_module(new_module)
                 return [new_module]
             except Exception as e:  # pylint: disable=broad-except
                 self.log.exception("Failed to import: %s", filepath)
@@ -310,7 +350,8 @@ class DagBag(BaseDagBag, LoggingMixin):
 
             try:
                 sys.path.insert(0, filepath)
-                current_module = importlib.import_module(mod_name)
+                with self._profile_phase('top_level_code'):
+                    current_module = importlib.import_module(mod_name)
                 mods.append(current_module)
             except Exception as e:  # pylint: disable=broad-except
                 self.log.exception("Failed to import: %s", filepath)
@@ -337,7 +378,8 @@ class DagBag(BaseDagBag, LoggingMixin):
                     dag.fileloc = filepath
             try:
                 dag.is_subdag = False
-                self.bag_dag(dag=dag, root_dag=dag)
+                with self._profile_phase('bag_dag'):
+                    self.bag_dag(dag=dag, root_dag=dag)
                 if isinstance(dag.normalized_schedule_interval, str):
                     croniter(dag.normalized_schedule_interval)
                 found_dags.append(dag)
@@ -356,6 +398,22 @@ class DagBag(BaseDagBag, LoggingMixin):
                 self.file_last_changed[dag.full_filepath] = file_last_changed_on_disk
         return found_dags
 
+    @contextmanager
+    def _profile_file(self, filepath):
+        if self.parse_profiler is None:
+            yield
+        else:
+            with self.parse_profiler.profile_file(filepath):
+                yield
+
+    @contextmanager
+    def _profile_phase(self, name):
+        if self.parse_profiler is None:
+            yield
+        else:
+            with self.parse_profiler.phase(name):
+                yield
+
     def bag_dag(self, dag, root_dag):
         """
         Adds the DAG into the bag, recurses into sub dags.
@@ -499,9 +557,12 @@ class DagBag(BaseDagBag, LoggingMixin):
         """)
         return report
 
-    def sync_to_db(self):
+    def sync_to_db(self, fingerprints: Optional[Dict[str, str]] = None):
         """
         Save attributes about list of DAG to the DB.
+
+        :param fingerprints: the fingerprints of the DAGs if already computed, see
+            :meth:`SerializedDagModel.bulk_sync_to_db`
         """
         # To avoid circular import - airflow.models.dagbag -> airflow.models.dag -> airflow.models.dagbag
         from airflow.models.dag import DAG
@@ -512,4 +573,4 @@ class DagBag(BaseDagBag, LoggingMixin):
         # Even though self.read_dags_from_db is False
         if settings.STORE_SERIALIZED_DAGS:
             self.log.debug("Calling the SerializedDagModel.bulk_sync_to_db method")
-            SerializedDagModel.bulk_sync_to_db(self.dags.values())
+            SerializedDagModel.bulk_sync_to_db(self.dags.values(), fingerprints=fingerprints)
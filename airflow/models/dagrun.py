@@ -391,14 +391,11 @@ class DagRun(Base, LoggingMixin):
         if not scheduleable_tasks:
             return ready_tis, changed_tis
 
-        # Check dependencies
+        # Check dependencies, sharing the context so the finished tasks are only indexed once
+        dep_context = DepContext(flag_upstream_failed=True, finished_tasks=finished_tasks)
         for st in scheduleable_tasks:
             old_state = st.state
-            if st.are_dependencies_met(
-                dep_context=DepContext(
-                    flag_upstream_failed=True,
-                    finished_tasks=finished_tasks),
-                    session=session):
+            if st.are_dependencies_met(dep_context=dep_context, session=session):
                 ready_tis.append(st)
             else:
                 old_states[st.key] = old_state
@@ -419,14 +416,13 @@ class DagRun(Base, LoggingMixin):
     ) -> bool:
         # there might be runnable tasks that are up for retry and for some reason(retry delay, etc) are
         # not ready yet so we set the flags to count them in
+        dep_context = DepContext(
+            flag_upstream_failed=True,
+            ignore_in_retry_period=True,
+            ignore_in_reschedule_period=True,
+            finished_tasks=finished_tasks)
         for ut in unfinished_tasks:
-            if ut.are_dependencies_met(
-                dep_context=DepContext(
-                    flag_upstream_failed=True,
-                    ignore_in_retry_period=True,
-                    ignore_in_reschedule_period=True,
-                    finished_tasks=finished_tasks),
-                    session=session):
+            if ut.are_dependencies_met(dep_context=dep_context, session=session):
                 return True
         return False
 
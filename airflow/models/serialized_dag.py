@@ -21,10 +21,11 @@
 import hashlib
 import logging
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 import sqlalchemy_jsonfield
 from sqlalchemy import BigInteger, Column, Index, String, and_
+from sqlalchemy.dialects import mysql, postgresql
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import exists
 
@@ -32,8 +33,9 @@ from airflow.models.base import ID_LEN, Base
 from airflow.models.dag import DAG, DagModel
 from airflow.models.dagcode import DagCode
 from airflow.serialization.serialized_objects import SerializedDAG
-from airflow.settings import MIN_SERIALIZED_DAG_UPDATE_INTERVAL, json
+from airflow.settings import DAG_SYNC_BATCH_SIZE, MIN_SERIALIZED_DAG_UPDATE_INTERVAL, json
 from airflow.utils import timezone
+from airflow.utils.helpers import chunks
 from airflow.utils.session import provide_session
 from airflow.utils.sqlalchemy import UtcDateTime
 
@@ -68,32 +70,39 @@ class SerializedDagModel(Base):
     data = Column(sqlalchemy_jsonfield.JSONField(json=json), nullable=False)
     last_updated = Column(UtcDateTime, nullable=False)
     dag_hash = Column(String(32), nullable=False)
+    # Hash of the DAG before it is serialized, see SerializedDAG.fingerprint
+    dag_fingerprint = Column(String(32))
 
     __table_args__ = (
         Index('idx_fileloc_hash', fileloc_hash, unique=False),
     )
 
-    def __init__(self, dag: DAG):
+    def __init__(self, dag: DAG, fingerprint: Optional[str] = None):
         self.dag_id = dag.dag_id
         self.fileloc = dag.full_filepath
         self.fileloc_hash = DagCode.dag_fileloc_hash(self.fileloc)
         self.data = SerializedDAG.to_dict(dag)
         self.last_updated = timezone.utcnow()
         self.dag_hash = hashlib.md5(json.dumps(self.data, sort_keys=True).encode("utf-8")).hexdigest()
+        self.dag_fingerprint = fingerprint or SerializedDAG.fingerprint(dag)
 
     def __repr__(self):
         return f"<SerializedDag: {self.dag_id}>"
 
     @classmethod
     @provide_session
-    def write_dag(cls, dag: DAG, min_update_interval: Optional[int] = None, session: Session = None):
+    def write_dag(cls, dag: DAG, min_update_interval: Optional[int] = None, session: Session = None) -> bool:
         """Serializes a DAG and writes it into database.
         If the record already exists, it checks if the Serialized DAG changed or not. If it is
         changed, it updates the record, ignores otherwise.
 
+        The fingerprint of the DAG is compared with the stored one first, so that unchanged
+        DAGs are not serialized at all.
+
         :param dag: a DAG to be written into database
         :param min_update_interval: minimal interval in seconds to update serialized DAG
         :param session: ORM Session
+        :return: whether the Serialized DAG was written
         """
         # Checks if (Current Time - Time when the DAG was written to DB) < min_update_interval
         # If Yes, does nothing
@@ -103,20 +112,29 @@ class SerializedDagModel(Base):
                 and_(cls.dag_id == dag.dag_id,
                      (timezone.utcnow() - timedelta(seconds=min_update_interval)) < cls.last_updated))
             ).scalar():
-                return
+                return False
 
         log.debug("Checking if DAG (%s) changed", dag.dag_id)
-        new_serialized_dag = cls(dag)
-        serialized_dag_hash_from_db = session.query(
-            cls.dag_hash).filter(cls.dag_id == dag.dag_id).scalar()
+        fingerprint = SerializedDAG.fingerprint(dag)
+        row_from_db = session.query(
+            cls.dag_hash, cls.dag_fingerprint).filter(cls.dag_id == dag.dag_id).one_or_none()
+
+        if row_from_db and row_from_db.dag_fingerprint == fingerprint:
+            log.debug("DAG (%s) is unchanged. Skipping serializing it", dag.dag_id)
+            return False
 
-        if serialized_dag_hash_from_db == new_serialized_dag.dag_hash:
+        new_serialized_dag = cls(dag, fingerprint=fingerprint)
+        if row_from_db and row_from_db.dag_hash == new_serialized_dag.dag_hash:
             log.debug("Serialized DAG (%s) is unchanged. Skipping writing to DB", dag.dag_id)
-            return
+            # Rows written before fingerprints were stored have none
+            session.query(cls).filter(cls.dag_id == dag.dag_id).update(
+                {cls.dag_fingerprint: fingerprint}, synchronize_session=False)
+            return False
 
         log.debug("Writing Serialized DAG: %s to the DB", dag.dag_id)
         session.merge(new_serialized_dag)
         log.debug("DAG: %s written to the DB", dag.dag_id)
+        return True
 
     @classmethod
     @provide_session
@@ -213,26 +231,104 @@ class SerializedDagModel(Base):
 
         return session.query(cls).filter(cls.dag_id == root_dag_id).one_or_none()
 
-    @staticmethod
+    @classmethod
     @provide_session
-    def bulk_sync_to_db(dags: List[DAG], session: Session = None):
+    def bulk_sync_to_db(
+        cls, dags: Iterable[DAG], fingerprints: Optional[Dict[str, str]] = None, session: Session = None
+    ):
         """
-        Saves DAGs as Serialized DAG objects in the database. Each
-        DAG is saved in a separate database query.
+        Saves DAGs as Serialized DAG objects in the database, ``[core] dag_sync_batch_size``
+        DAGs at a time: the stored hashes of a batch are read with one query, and the DAGs
+        which changed are written with one upsert. As in :meth:`write_dag`, the DAGs written
+        less than ``[core] min_serialized_dag_update_interval`` seconds ago are skipped.
 
         :param dags: the DAG objects to save to the DB
         :type dags: List[airflow.models.dag.DAG]
+        :param fingerprints: the fingerprints of the DAGs keyed by dag_id, if already
+            computed by the caller. The missing ones are computed.
+        :type fingerprints: Dict[str, str]
         :param session: ORM Session
         :type session: Session
         :return: None
         """
+        dags = [dag for dag in dags if not dag.is_subdag]
+        for chunk in chunks(dags, DAG_SYNC_BATCH_SIZE):
+            cls._sync_chunk_to_db(chunk, MIN_SERIALIZED_DAG_UPDATE_INTERVAL, session, fingerprints)
+
+    @classmethod
+    def _sync_chunk_to_db(
+        cls,
+        dags: List[DAG],
+        min_update_interval: Optional[int],
+        session: Session,
+        fingerprints: Optional[Dict[str, str]] = None,
+    ):
+        stored_rows = {
+            row.dag_id: row
+            for row in session.query(cls.dag_id, cls.dag_hash, cls.dag_fingerprint, cls.last_updated)
+            .filter(cls.dag_id.in_([dag.dag_id for dag in dags]))
+        }
+        min_last_updated = None
+        if min_update_interval is not None:
+            min_last_updated = timezone.utcnow() - timedelta(seconds=min_update_interval)
+
+        new_rows: List[Dict[str, Any]] = []
+        changed_rows: List[Dict[str, Any]] = []
+        fingerprint_updates: List[Dict[str, Any]] = []
         for dag in dags:
-            if not dag.is_subdag:
-                SerializedDagModel.write_dag(
-                    dag,
-                    min_update_interval=MIN_SERIALIZED_DAG_UPDATE_INTERVAL,
-                    session=session
-                )
+            stored_row = stored_rows.get(dag.dag_id)
+            if stored_row and min_last_updated and stored_row.last_updated > min_last_updated:
+                continue
+            fingerprint = (fingerprints or {}).get(dag.dag_id) or SerializedDAG.fingerprint(dag)
+            if stored_row and stored_row.dag_fingerprint == fingerprint:
+                continue
+            serialized_dag = cls(dag, fingerprint=fingerprint)
+            if stored_row and stored_row.dag_hash == serialized_dag.dag_hash:
+                # Rows written before fingerprints were stored have none
+                fingerprint_updates.append({'dag_id': dag.dag_id, 'dag_fingerprint': fingerprint})
+                continue
+            row = {
+                column.key: getattr(serialized_dag, column.key)
+                for column in cls.__table__.columns  # pylint: disable=no-member
+            }
+            (changed_rows if stored_row else new_rows).append(row)
+
+        log.debug(
+            "Writing %d new and %d changed Serialized DAGs to the DB, %d unchanged",
+            len(new_rows), len(changed_rows), len(dags) - len(new_rows) - len(changed_rows)
+        )
+        cls._upsert(new_rows, changed_rows, session)
+        if fingerprint_updates:
+            session.bulk_update_mappings(cls, fingerprint_updates)
+
+    @classmethod
+    def _upsert(cls, new_rows: List[Dict[str, Any]], changed_rows: List[Dict[str, Any]], session: Session):
+        """
+        Writes the rows with a single INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE statement when
+        the database supports it, so that rows inserted in the meantime by another process are updated.
+        The other databases get the new rows inserted and the changed ones updated.
+        """
+        table = cls.__table__  # pylint: disable=no-member
+        updated_columns = [column.key for column in table.columns if column.key != 'dag_id']
+        dialect_name = session.get_bind().dialect.name
+        if dialect_name == 'postgresql' and (new_rows or changed_rows):
+            statement = postgresql.insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.dag_id],
+                set_={key: statement.excluded[key] for key in updated_columns},
+            )
+            session.execute(statement, new_rows + changed_rows)
+        elif dialect_name == 'mysql' and (new_rows or changed_rows):
+            statement = mysql.insert(table)
+            statement = statement.on_duplicate_key_update(
+                {key: statement.inserted[key] for key in updated_columns}
+            )
+            session.execute(statement, new_rows + changed_rows)
+        else:
+            if new_rows:
+                session.bulk_insert_mappings(cls, new_rows)
+            if changed_rows:
+                session.bulk_update_mappings(cls, changed_rows)
 
     @classmethod
     @provide_session
@@ -247,3 +343,38 @@ class SerializedDagModel(Base):
         :type session: Session
         """
         return session.query(cls.last_updated).filter(cls.dag_id == dag_id).scalar()
+
+    @classmethod
+    @provide_session
+    def get_last_updated_datetimes(cls, dag_ids: List[str], session: Session = None) -> Dict[str, datetime]:
+        """
+        Get the dates when the Serialized DAGs were last updated in serialized_dag table,
+        in a single query
+
+        :param dag_ids: DAG IDs
+        :type dag_ids: List[str]
+        :param session: ORM Session
+        :type session: Session
+        :return: a dict of last updated dates keyed by dag_id, DAGs missing from the table are left out
+        """
+        if not dag_ids:
+            return {}
+        rows = session.query(cls.dag_id, cls.last_updated).filter(cls.dag_id.in_(dag_ids))
+        return {dag_id: last_updated for dag_id, last_updated in rows}
+
+    @classmethod
+    @provide_session
+    def get_dag_fingerprints(cls, dag_ids: List[str], session: Session = None) -> Dict[str, Optional[str]]:
+        """
+        Get the fingerprints of the DAGs stored in serialized_dag table, in a single query
+
+        :param dag_ids: DAG IDs
+        :type dag_ids: List[str]
+        :param session: ORM Session
+        :type session: Session
+        :return: a dict of fingerprints keyed by dag_id, DAGs missing from the table are left out
+        """
+        if not dag_ids:
+            return {}
+        rows = session.query(cls.dag_id, cls.dag_fingerprint).filter(cls.dag_id.in_(dag_ids))
+        return {dag_id: dag_fingerprint for dag_id, dag_fingerprint in rows}
@@ -24,6 +24,7 @@ import os
 import signal
 import time
 import warnings
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 from urllib.parse import quote
@@ -57,12 +58,12 @@ from airflow.ti_deps.dep_context import DepContext
 from airflow.ti_deps.dependencies_deps import REQUEUEABLE_DEPS, RUNNING_DEPS
 from airflow.utils import timezone
 from airflow.utils.email import send_email
-from airflow.utils.helpers import is_container
+from airflow.utils.helpers import chunks, is_container
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.net import get_hostname
 from airflow.utils.operator_helpers import context_to_airflow_vars
 from airflow.utils.session import provide_session
-from airflow.utils.sqlalchemy import UtcDateTime
+from airflow.utils.sqlalchemy import UtcDateTime, skip_locked as skip_locked_kwargs, with_row_locks
 from airflow.utils.state import State
 from airflow.utils.timeout import timeout
 
@@ -1808,23 +1809,91 @@ class TaskInstance(Base, LoggingMixin):     # pylint: disable=R0902,R0904
     def filter_for_tis(
         tis: Iterable[Union["TaskInstance", TaskInstanceKey]]
     ) -> Optional[BooleanClauseList]:
-        """Returns SQLAlchemy filter to query selected task instances"""
+        """
+        Returns SQLAlchemy filter to query selected task instances
+
+        The task instances are grouped by DAG and execution date, so the filter has
+        one ``task_id IN (...)`` clause per DagRun instead of one clause per task instance.
+        """
         if not tis:
             return None
-        if all(isinstance(t, TaskInstanceKey) for t in tis):
-            filter_for_tis = ([and_(TaskInstance.dag_id == tik.dag_id,
-                                    TaskInstance.task_id == tik.task_id,
-                                    TaskInstance.execution_date == tik.execution_date)
-                               for tik in tis])
-            return or_(*filter_for_tis)
-        if all(isinstance(t, TaskInstance) for t in tis):
-            filter_for_tis = ([and_(TaskInstance.dag_id == ti.dag_id,
-                                    TaskInstance.task_id == ti.task_id,
-                                    TaskInstance.execution_date == ti.execution_date)
-                               for ti in tis])
-            return or_(*filter_for_tis)
-
-        raise TypeError("All elements must have the same type: `TaskInstance` or `TaskInstanceKey`.")
+        if not (all(isinstance(t, TaskInstanceKey) for t in tis) or
+                all(isinstance(t, TaskInstance) for t in tis)):
+            raise TypeError("All elements must have the same type: `TaskInstance` or `TaskInstanceKey`.")
+
+        task_ids_by_run: Dict[Tuple[str, datetime], List[str]] = defaultdict(list)
+        for ti in tis:
+            task_ids_by_run[(ti.dag_id, ti.execution_date)].append(ti.task_id)
+        return or_(*[and_(TaskInstance.dag_id == dag_id,
+                          TaskInstance.execution_date == execution_date,
+                          TaskInstance.task_id.in_(task_ids))
+                     for (dag_id, execution_date), task_ids in task_ids_by_run.items()])
+
+    @staticmethod
+    def filter_for_states(states: Iterable[Optional[str]]) -> BooleanClauseList:
+        """Returns SQLAlchemy filter to query task instances in the given states, None included"""
+        states = list(states)
+        filter_for_states = TaskInstance.state.in_([state for state in states if state is not None])
+        if State.NONE in states:
+            return or_(filter_for_states, TaskInstance.state.is_(None))
+        return filter_for_states
+
+    @staticmethod
+    @provide_session
+    def bulk_set_state(
+        tis: Iterable[Union["TaskInstance", TaskInstanceKey]],
+        from_states: Iterable[Optional[str]],
+        to_state: Optional[str],
+        values: Optional[Dict[Any, Any]] = None,
+        match_try_number: bool = False,
+        skip_locked: bool = False,
+        chunk_size: int = 0,
+        session: Session = None,
+    ) -> List["TaskInstance"]:
+        """
+        Changes the state of the given task instances that are in one of ``from_states``
+        to ``to_state``. Each chunk of task instances costs one ``SELECT ... FOR UPDATE``
+        to find and lock the rows to change and one ``UPDATE``, whatever its size.
+        The changes are not committed, this is left to the caller.
+
+        :param tis: the task instances, or their keys, to change the state of
+        :param from_states: the states task instances are changed from, others are left as they are
+        :param to_state: the state to change the task instances to
+        :param values: other columns to update along with the state, e.g. ``{TI.queued_dttm: None}``
+        :param match_try_number: only change task instances whose try number is the one of the
+            given keys, instead of any try
+        :param skip_locked: skip the rows locked by another transaction instead of waiting for them
+        :param chunk_size: the maximum number of task instances per statement, 0 for no limit
+        :param session: SQLAlchemy ORM Session
+        :return: the task instances that were changed, as they were loaded before the change
+        """
+        tis = list(tis)
+        if not tis:
+            return []
+        filter_for_states = TaskInstance.filter_for_states(from_states)
+        lock_kwargs = skip_locked_kwargs(session=session) if skip_locked else {}
+
+        changed_tis: List[TaskInstance] = []
+        for chunk in chunks(tis, chunk_size or len(tis)):
+            tis_to_change: List[TaskInstance] = with_row_locks(
+                session.query(TaskInstance)
+                .filter(TaskInstance.filter_for_tis(chunk))
+                .filter(filter_for_states),
+                of=TaskInstance, **lock_kwargs
+            ).all()
+            if match_try_number:
+                keys = {ti if isinstance(ti, TaskInstanceKey) else ti.key for ti in chunk}
+                tis_to_change = [ti for ti in tis_to_change if ti.key in keys]
+            if not tis_to_change:
+                continue
+
+            session.query(TaskInstance).filter(
+                TaskInstance.filter_for_tis(tis_to_change)
+            ).filter(filter_for_states).update(
+                {TaskInstance.state: to_state, **(values or {})}, synchronize_session=False
+            )
+            changed_tis.extend(tis_to_change)
+        return changed_tis
 
 
 # State of the task instance.
@@ -0,0 +1,107 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""On-disk cache of deserialized DAGs, shared by the processes of a host."""
+
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+from datetime import datetime
+from typing import Optional
+
+from airflow.serialization.serialized_objects import SerializedDAG
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+
+class SerializedDagFileCache(LoggingMixin):
+    """
+    Keeps pickles of deserialized DAGs in a folder, keyed by ``dag_id`` and by the
+    ``last_updated`` date of their row in the serialized_dag table.
+
+    Loading a pickle is several times faster than parsing the JSON of a serialized
+    DAG and deserializing it, so the first process of a host that reads a DAG from
+    the database pays for it and the others (e.g. the other Webserver workers, or
+    workers started after a refresh) only load the pickle. A DAG updated in the
+    database gets a new ``last_updated`` date, so stale entries are never read.
+
+    :param folder: the folder to keep the pickles in, created if missing
+    :type folder: str
+    """
+
+    def __init__(self, folder: str):
+        super().__init__()
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def _key(dag_id: str) -> str:
+        return hashlib.sha1(dag_id.encode('utf-8')).hexdigest()
+
+    def _path(self, dag_id: str, last_updated: datetime) -> str:
+        return os.path.join(self.folder, "{}-{}.pickle".format(
+            self._key(dag_id), int(last_updated.timestamp() * 1000000)))
+
+    def get(self, dag_id: str, last_updated: datetime) -> Optional[SerializedDAG]:
+        """
+        Get the DAG as it was when its serialized DAG was updated at ``last_updated``.
+
+        :param dag_id: the DAG to get
+        :param last_updated: the ``last_updated`` date of the serialized DAG
+        :return: the DAG, or None if it is not in the cache
+        """
+        try:
+            with open(self._path(dag_id, last_updated), 'rb') as cache_file:
+                dag = pickle.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except Exception:  # pylint: disable=broad-except
+            self.log.warning("Failed to read DAG %s from %s", dag_id, self.folder, exc_info=True)
+            return None
+        return dag if dag.dag_id == dag_id else None
+
+    def put(self, dag: SerializedDAG, last_updated: datetime) -> None:
+        """
+        Add the DAG to the cache and remove its older versions.
+
+        The pickle is written to a temporary file first and moved in place, so
+        other processes never read a partially written file.
+
+        :param dag: the DAG deserialized from the serialized_dag table
+        :param last_updated: the ``last_updated`` date of the serialized DAG
+        """
+        path = self._path(dag.dag_id, last_updated)
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                pickle.dump(dag, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:  # pylint: disable=broad-except
+            self.log.warning("Failed to write DAG %s to %s", dag.dag_id, self.folder, exc_info=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        for stale_path in glob.glob(os.path.join(self.folder, self._key(dag.dag_id) + '-*.pickle')):
+            if stale_path != path:
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    # Already removed by another process
+                    pass
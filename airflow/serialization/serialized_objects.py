@@ -18,9 +18,11 @@
 """Serialized DAG and BaseOperator"""
 import datetime
 import enum
+import functools
+import hashlib
 import logging
 from inspect import Parameter, signature
-from typing import Any, Dict, Iterable, List, Optional, Set, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
 
 import cattr
 import pendulum
@@ -33,6 +35,7 @@ except ImportError:
 
 from pendulum.tz.timezone import Timezone
 
+from airflow import version
 from airflow.exceptions import AirflowException
 from airflow.kubernetes.pod_generator import PodGenerator
 from airflow.models.baseoperator import BaseOperator, BaseOperatorLink
@@ -327,6 +330,9 @@ class SerializedBaseOperator(BaseOperator, BaseSerialization):
         # task_type is used by UI to display the correct class type, because UI only
         # receives BaseOperator from deserialized DAGs.
         self._task_type = 'BaseOperator'
+        # The scheduler needs to know which tasks it can mark as done without
+        # running them, and it only has the deserialized operator to go on.
+        self._is_dummy = False
         # Move class attributes into object attributes.
         self.ui_color = BaseOperator.ui_color
         self.ui_fgcolor = BaseOperator.ui_fgcolor
@@ -343,6 +349,23 @@ class SerializedBaseOperator(BaseOperator, BaseSerialization):
     def task_type(self, task_type: str):
         self._task_type = task_type
 
+    @staticmethod
+    def is_dummy_without_callbacks(op: BaseOperator) -> bool:
+        """
+        Whether the operator is a DummyOperator without execute or success callbacks,
+        which the scheduler marks as successful without running it. This also works
+        for deserialized operators, whose original class is not available.
+        """
+        if isinstance(op, SerializedBaseOperator):
+            return op._is_dummy  # pylint: disable=protected-access
+        # Avoid circular import
+        from airflow.operators.dummy_operator import DummyOperator
+        return (
+            isinstance(op, DummyOperator) and
+            not op.on_execute_callback and
+            not op.on_success_callback
+        )
+
     @classmethod
     def serialize_operator(cls, op: BaseOperator) -> dict:
         """Serializes operator into a JSON object.
@@ -350,6 +373,8 @@ class SerializedBaseOperator(BaseOperator, BaseSerialization):
         serialize_op = cls.serialize_to_json(op, cls._decorated_fields)
         serialize_op['_task_type'] = op.__class__.__name__
         serialize_op['_task_module'] = op.__class__.__module__
+        if cls.is_dummy_without_callbacks(op):
+            serialize_op['_is_dummy'] = True
         if op.operator_extra_links:
             serialize_op['_operator_extra_links'] = \
                 cls._serialize_operator_extra_links(op.operator_extra_links)
@@ -536,6 +561,94 @@ class SerializedBaseOperator(BaseOperator, BaseSerialization):
         return serialize_operator_extra_links
 
 
+# Fields of the DAG and operator classes hashed by SerializedDAG.fingerprint, in a deterministic order
+_FINGERPRINTED_FIELDS: Dict[type, List[str]] = {}
+_PLAIN_TYPES = {str, int, float, bool, type(None)}
+
+
+def _get_fingerprinted_values(obj: Union[DAG, BaseOperator]) -> List[Any]:
+    fields = _FINGERPRINTED_FIELDS.get(type(obj))
+    if fields is None:
+        all_fields = set(obj.get_serialized_fields()) | set(getattr(obj, 'template_fields', ()))
+        # The task group is hashed on its own, and loggers have nothing to hash
+        fields = _FINGERPRINTED_FIELDS[type(obj)] = sorted(all_fields - {'_task_group', '_log'})
+    values = [getattr(obj, field, None) for field in fields]
+    return [value if type(value) in _PLAIN_TYPES else _normalize_for_fingerprint(value) for value in values]
+
+
+def _normalize_for_fingerprint(value: Any) -> Any:
+    """Value with a deterministic ``repr``, that does not depend on where objects are in memory"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return [(key, _normalize_for_fingerprint(item)) for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [_normalize_for_fingerprint(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalize_for_fingerprint(item) for item in value), key=repr)
+    if isinstance(value, DAG):
+        return _get_dag_fingerprint_parts(value)
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if callable(value):
+        # Callables are serialized as their source
+        return _get_callable_source(value)
+    if type(value).__repr__ is object.__repr__:
+        # Only the type is left once the address is stripped, as when serialized as a string
+        return f"{type(value).__module__}.{type(value).__qualname__}"
+    return value
+
+
+def _get_callable_source(value: Callable) -> Optional[str]:
+    try:
+        try:
+            return _get_cached_callable_source(value)
+        except TypeError:
+            # Not hashable
+            return get_python_source(value)
+    except Exception:  # pylint: disable=broad-except
+        # Without source, the value is serialized as FAILED
+        return FAILED
+
+
+# The same callbacks are often set on all the tasks of a DAG, through its default_args
+@functools.lru_cache(maxsize=1024)
+def _get_cached_callable_source(value: Callable) -> Optional[str]:
+    return get_python_source(value)
+
+
+def _get_task_group_fingerprint_parts(task_group: Optional[TaskGroup]) -> Any:
+    if task_group is None:
+        return None
+    return [
+        task_group._group_id,  # pylint: disable=protected-access
+        task_group.prefix_group_id,
+        task_group.tooltip,
+        task_group.ui_color,
+        task_group.ui_fgcolor,
+        [
+            (label, child.task_id if isinstance(child, BaseOperator)
+             else _get_task_group_fingerprint_parts(child))
+            for label, child in task_group.children.items()
+        ],
+        sorted(task_group.upstream_group_ids),
+        sorted(task_group.downstream_group_ids),
+        sorted(task_group.upstream_task_ids),
+        sorted(task_group.downstream_task_ids),
+    ]
+
+
+def _get_dag_fingerprint_parts(dag: DAG) -> Any:
+    return [
+        _get_fingerprinted_values(dag),
+        _get_task_group_fingerprint_parts(dag.task_group),
+        [
+            (type(task).__module__, type(task).__qualname__, _get_fingerprinted_values(task))
+            for task in dag.task_dict.values()
+        ],
+    ]
+
+
 class SerializedDAG(DAG, BaseSerialization):
     """
     A JSON serializable representation of DAG.
@@ -642,6 +755,8 @@ class SerializedDAG(DAG, BaseSerialization):
                 # Bypass set_upstream etc here - it does more than we want
                 dag.task_dict[task_id]._upstream_task_ids.add(serializable_task.task_id)  # noqa: E501 # pylint: disable=protected-access
 
+        # Relations were set directly above, make sure they are picked up
+        dag._invalidate_topology()  # pylint: disable=protected-access
         return dag
 
     @classmethod
@@ -665,6 +780,19 @@ class SerializedDAG(DAG, BaseSerialization):
             raise ValueError("Unsure how to deserialize version {!r}".format(ver))
         return cls.deserialize_dag(serialized_obj['dag'])
 
+    @classmethod
+    def fingerprint(cls, dag: DAG) -> str:
+        """
+        Hash of the fields of the DAG and of its tasks that are serialized, to tell whether the
+        DAG changed without serializing it, which costs several times more for large DAGs.
+
+        Values are hashed through their ``repr``: values whose ``repr`` changes from a parse
+        to the next, e.g. that of objects without ``__repr__``, change the fingerprint, and
+        the DAG is serialized again as if it changed.
+        """
+        parts = [cls.SERIALIZER_VERSION, version.version, _get_dag_fingerprint_parts(dag)]
+        return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
 
 class SerializedTaskGroup(TaskGroup, BaseSerialization):
     """
@@ -349,11 +349,18 @@ STORE_SERIALIZED_DAGS = conf.getboolean('core', 'store_serialized_dags', fallbac
 MIN_SERIALIZED_DAG_UPDATE_INTERVAL = conf.getint(
     'core', 'min_serialized_dag_update_interval', fallback=30)
 
+# Number of DAGs read and written at once when syncing the DAGs of a DagBag to the database
+DAG_SYNC_BATCH_SIZE = conf.getint('core', 'dag_sync_batch_size', fallback=500)
+
 # Fetching serialized DAG can not be faster than a minimum interval to reduce database
 # read rate. This config controls when your DAGs are updated in the Webserver
 MIN_SERIALIZED_DAG_FETCH_INTERVAL = conf.getint(
     'core', 'min_serialized_dag_fetch_interval', fallback=10)
 
+# Folder where processes reading serialized DAGs from the DB share the deserialized DAGs,
+# so that each of them does not have to parse and deserialize them again. Disabled if empty.
+SERIALIZED_DAG_CACHE_FOLDER = conf.get('core', 'serialized_dag_cache_folder', fallback='')
+
 # Whether to persist DAG files code in DB. If set to True, Webserver reads file contents
 # from DB instead of trying to access files in a DAG folder.
 # Defaults to same as the store_serialized_dags setting.
@@ -365,3 +372,11 @@ STORE_DAG_CODE = conf.getboolean("core", "store_dag_code", fallback=STORE_SERIAL
 # to get all the logs from the print & log statements in the DAG files before a task is run
 # The handlers are restored after the task completes execution.
 DONOT_MODIFY_HANDLERS = conf.getboolean('logging', 'donot_modify_handlers', fallback=False)
+
+CAN_FORK = hasattr(os, "fork")
+
+# Whether the executors run the tasks in a new Python interpreter, rather than in a fork of
+# the worker, which already imported Airflow
+EXECUTE_TASKS_NEW_PYTHON_INTERPRETER = not CAN_FORK or conf.getboolean(
+    'core', 'execute_tasks_new_python_interpreter', fallback=False
+)
@@ -16,6 +16,8 @@
 # specific language governing permissions and limitations
 # under the License.
 
+from typing import Dict, Optional
+
 import pendulum
 from sqlalchemy.orm.session import Session
 
@@ -61,6 +63,9 @@ class DepContext:
     :type ignore_ti_state: bool
     :param finished_tasks: A list of all the finished tasks of this run
     :type finished_tasks: list[airflow.models.TaskInstance]
+
+    A context can be shared by all the task instances of a DagRun, in which case
+    the states of the finished tasks are indexed only once for all of them.
     """
 
     def __init__(
@@ -83,6 +88,7 @@ class DepContext:
         self.ignore_task_deps = ignore_task_deps
         self.ignore_ti_state = ignore_ti_state
         self.finished_tasks = finished_tasks
+        self._finished_task_states: Optional[Dict[str, str]] = None
 
     def ensure_finished_tasks(self, dag, execution_date: pendulum.DateTime, session: Session):
         """
@@ -104,3 +110,25 @@ class DepContext:
                 session=session,
             )
         return self.finished_tasks
+
+    def ensure_finished_task_states(
+        self, dag, execution_date: pendulum.DateTime, session: Session
+    ) -> Dict[str, str]:
+        """
+        Returns the states of the finished tasks of this run keyed by task id, so
+        dependencies can look up the upstream tasks of a task instance directly
+        instead of going through every finished task.
+
+        :param dag: The DAG for which to find finished tasks
+        :type dag: airflow.models.DAG
+        :param execution_date: The execution_date to look for
+        :param session: Database session to use
+        :return: A dict mapping the task ids of the finished tasks to their states
+        :rtype: dict[str, str]
+        """
+        if self._finished_task_states is None:
+            self._finished_task_states = {
+                ti.task_id: ti.state
+                for ti in self.ensure_finished_tasks(dag, execution_date, session)
+            }
+        return self._finished_task_states
@@ -38,15 +38,13 @@ class NotPreviouslySkippedDep(BaseTIDep):
 
         upstream = ti.task.get_direct_relatives(upstream=True)
 
-        finished_tasks = dep_context.ensure_finished_tasks(
+        finished_task_states = dep_context.ensure_finished_task_states(
             ti.task.dag, ti.execution_date, session
         )
 
-        finished_task_ids = {t.task_id for t in finished_tasks}
-
         for parent in upstream:
             if isinstance(parent, SkipMixin):
-                if parent.task_id not in finished_task_ids:
+                if parent.task_id not in finished_task_states:
                     # This can happen if the parent task has not yet run.
                     continue
 
@@ -45,7 +45,26 @@ class TriggerRuleDep(BaseTIDep):
         :param finished_tasks: all the finished tasks of the dag_run
         :type finished_tasks: list[airflow.models.TaskInstance]
         """
-        counter = Counter(task.state for task in finished_tasks if task.task_id in ti.task.upstream_task_ids)
+        return TriggerRuleDep._count_upstream_states(
+            ti=ti,
+            finished_task_states={task.task_id: task.state for task in finished_tasks})
+
+    @staticmethod
+    def _count_upstream_states(ti, finished_task_states):
+        """
+        Same as ``_get_states_count_upstream_ti``, but only looks up the upstream tasks
+        of the ti in an index of the finished tasks, which is built once per DagRun.
+
+        :param ti: the ti that we want to calculate deps for
+        :type ti: airflow.models.TaskInstance
+        :param finished_task_states: the states of the finished tasks of the dag_run by task id
+        :type finished_task_states: dict[str, str]
+        """
+        counter = Counter(
+            finished_task_states[task_id]
+            for task_id in ti.task.upstream_task_ids
+            if task_id in finished_task_states
+        )
         return counter.get(State.SUCCESS, 0), counter.get(State.SKIPPED, 0), counter.get(State.FAILED, 0), \
             counter.get(State.UPSTREAM_FAILED, 0), sum(counter.values())
 
@@ -61,9 +80,10 @@ class TriggerRuleDep(BaseTIDep):
             yield self._passing_status(reason="The task had a dummy trigger rule set.")
             return
         # see if the task name is in the task upstream for our task
-        successes, skipped, failed, upstream_failed, done = self._get_states_count_upstream_ti(
+        successes, skipped, failed, upstream_failed, done = self._count_upstream_states(
             ti=ti,
-            finished_tasks=dep_context.ensure_finished_tasks(ti.task.dag, ti.execution_date, session))
+            finished_task_states=dep_context.ensure_finished_task_states(
+                ti.task.dag, ti.execution_date, session))
 
         yield from self._evaluate_trigger_rule(
             ti=ti,
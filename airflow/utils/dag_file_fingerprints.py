@@ -0,0 +1,244 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Fingerprints of DAG files, to tell whether they changed since they were last parsed."""
+import ast
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from airflow import version
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+# Coarsest granularity of the modification times of the file systems, in seconds
+_MTIME_GRANULARITY = 2
+
+
+class FileFingerprint(NamedTuple):
+    """Modification time, size and content hash of a file"""
+
+    mtime: float
+    size: int
+    content_hash: str
+
+
+class DagFileEntry(NamedTuple):
+    """Fingerprints of a DAG file and of the modules of the DAG folder it imports, when it was parsed"""
+
+    fingerprint: FileFingerprint
+    dependencies: Dict[str, FileFingerprint]
+    parsed_at: float
+
+
+def _hash_file(path: str) -> str:
+    content_hash = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(65536), b''):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def get_fingerprint(path: str) -> Optional[FileFingerprint]:
+    """Fingerprint of the file, or None if it can't be read"""
+    try:
+        stat = os.stat(path)
+        return FileFingerprint(stat.st_mtime, stat.st_size, _hash_file(path))
+    except OSError:
+        return None
+
+
+class DagFileFingerprints(LoggingMixin):
+    """
+    Index of the fingerprints of the DAG files as they were when they were last parsed,
+    with the fingerprints of the modules of the DAG folder they import, so that the DAG
+    file processor manager can skip the files that did not change.
+
+    A file is only hashed again when its modification time or size changed, so checking
+    an unchanged file costs a ``stat`` per file and dependency. The index is saved to
+    ``index_path`` so that it outlives restarts; it is discarded on Airflow upgrades.
+
+    :param dag_directory: the DAG folder, where imported modules are looked for
+    :type dag_directory: str
+    :param index_path: the file the index is saved to, not saved if None
+    :type index_path: str
+    """
+
+    def __init__(self, dag_directory: str, index_path: Optional[str] = None):
+        super().__init__()
+        self._dag_directory = dag_directory
+        self._index_path = index_path
+        self._entries: Dict[str, DagFileEntry] = {}
+        # Fingerprints taken when the processors started, recorded once they succeed
+        self._pending: Dict[str, DagFileEntry] = {}
+        self._dirty = False
+        self._load()
+
+    def has_changed(self, file_path: str) -> bool:
+        """Whether the file or one of the modules it imports changed since it was last parsed"""
+        entry = self._entries.get(file_path)
+        if entry is None:
+            return True
+        if self._has_changed(file_path, entry.fingerprint, entry.parsed_at):
+            return True
+        return any(
+            self._has_changed(path, fingerprint, entry.parsed_at)
+            for path, fingerprint in entry.dependencies.items()
+        )
+
+    def last_parsed_at(self, file_path: str) -> Optional[float]:
+        """When the file was last parsed, as a timestamp"""
+        entry = self._entries.get(file_path)
+        return entry.parsed_at if entry else None
+
+    def start(self, file_path: str) -> None:
+        """Take the fingerprints of the file, which is about to be parsed"""
+        fingerprint = get_fingerprint(file_path)
+        if fingerprint is None:
+            return
+        dependencies = {}
+        for path in self._find_dependencies(file_path):
+            dependency_fingerprint = get_fingerprint(path)
+            if dependency_fingerprint:
+                dependencies[path] = dependency_fingerprint
+        self._pending[file_path] = DagFileEntry(fingerprint, dependencies, time.time())
+
+    def finish(self, file_path: str, succeeded: bool) -> None:
+        """
+        Record the fingerprints taken when the file started to be parsed, if it was parsed.
+        Files whose processor crashed or timed out are considered changed, to be parsed again.
+        """
+        entry = self._pending.pop(file_path, None)
+        if succeeded and entry:
+            self._entries[file_path] = entry
+        else:
+            self._entries.pop(file_path, None)
+        self._dirty = True
+
+    def retain(self, file_paths: Iterable[str]) -> None:
+        """Forget the files that are not in ``file_paths`` any more"""
+        file_paths = set(file_paths)
+        for file_path in list(self._entries):
+            if file_path not in file_paths:
+                del self._entries[file_path]
+                self._dirty = True
+
+    def save(self) -> None:
+        """Save the index to ``index_path`` if it changed"""
+        if not self._index_path or not self._dirty:
+            return
+        data = {
+            'version': version.version,
+            'files': {
+                file_path: {
+                    'fingerprint': entry.fingerprint,
+                    'dependencies': entry.dependencies,
+                    'parsed_at': entry.parsed_at,
+                }
+                for file_path, entry in self._entries.items()
+            },
+        }
+        try:
+            index_dir = os.path.dirname(os.path.abspath(self._index_path))
+            os.makedirs(index_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=index_dir, prefix='.', suffix='.tmp')
+            with os.fdopen(fd, 'w') as tmp_file:
+                json.dump(data, tmp_file)
+            os.replace(tmp_path, self._index_path)
+            self._dirty = False
+        except OSError:
+            self.log.exception("Failed to save the DAG file fingerprints to %s", self._index_path)
+
+    def _load(self) -> None:
+        if not self._index_path or not os.path.isfile(self._index_path):
+            return
+        try:
+            with open(self._index_path) as index_file:
+                data = json.load(index_file)
+            if data.get('version') != version.version:
+                self.log.info("Ignoring DAG file fingerprints saved by another version of Airflow")
+                return
+            self._entries = {
+                file_path: DagFileEntry(
+                    fingerprint=FileFingerprint(*entry['fingerprint']),
+                    dependencies={
+                        path: FileFingerprint(*fingerprint)
+                        for path, fingerprint in entry['dependencies'].items()
+                    },
+                    parsed_at=entry['parsed_at'],
+                )
+                for file_path, entry in data['files'].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            self.log.warning("Ignoring invalid DAG file fingerprints in %s", self._index_path, exc_info=True)
+            self._entries = {}
+
+    def _has_changed(self, path: str, fingerprint: FileFingerprint, parsed_at: float) -> bool:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+        # A file written again just before its fingerprint was taken can keep the same
+        # modification time, given the granularity of the file system, so it is hashed
+        racy = fingerprint.mtime >= parsed_at - _MTIME_GRANULARITY
+        if (stat.st_mtime, stat.st_size) == (fingerprint.mtime, fingerprint.size) and not racy:
+            return False
+        # Only the modification time changed, e.g. the file was checked out again
+        return _hash_file(path) != fingerprint.content_hash
+
+    def _find_dependencies(self, file_path: str) -> List[str]:
+        """The modules of the DAG folder imported by the file, directly or not"""
+        found: Set[str] = set()
+        to_visit = [file_path]
+        while to_visit:
+            path = to_visit.pop()
+            for module_path in self._find_imported_modules(path):
+                if module_path not in found and module_path != file_path:
+                    found.add(module_path)
+                    to_visit.append(module_path)
+        return sorted(found)
+
+    def _find_imported_modules(self, path: str) -> List[str]:
+        if not path.endswith('.py'):
+            return []
+        try:
+            with open(path, 'rb') as file:
+                tree = ast.parse(file.read(), filename=path)
+        except (OSError, SyntaxError, ValueError):
+            return []
+
+        module_names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                module_names.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                module_names.append(node.module)
+                # The imported names can be submodules
+                module_names.extend(node.module + '.' + alias.name for alias in node.names)
+
+        module_paths = []
+        for module_name in module_names:
+            parts = module_name.split('.')
+            # Importing a module also imports the packages it is in
+            for i in range(1, len(parts) + 1):
+                module_path = os.path.join(self._dag_directory, *parts[:i])
+                for candidate in (module_path + '.py', os.path.join(module_path, '__init__.py')):
+                    if os.path.isfile(candidate):
+                        module_paths.append(candidate)
+        return module_paths
@@ -17,23 +17,32 @@
 # under the License.
 """Processes DAGs."""
 import enum
+import hashlib
 import importlib
 import inspect
+import json
 import logging
 import multiprocessing
 import os
+import pickle
+import shutil
 import signal
 import sys
+import tempfile
+import threading
 import time
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict
+from contextlib import suppress
 from datetime import datetime, timedelta
+from fnmatch import fnmatch
 from importlib import import_module
 from multiprocessing.connection import Connection as MultiprocessingConnection
-from typing import Callable, Dict, KeysView, List, NamedTuple, Optional, Tuple
+from typing import Callable, Dict, KeysView, List, NamedTuple, Optional, Set, Tuple, Union
 
+from croniter import croniter
 from setproctitle import setproctitle  # pylint: disable=no-name-in-module
-from sqlalchemy import or_
+from sqlalchemy import func, not_, or_
 from tabulate import tabulate
 
 import airflow.models
@@ -46,17 +55,47 @@ from airflow.serialization.serialized_objects import SerializedDAG
 from airflow.settings import STORE_DAG_CODE, STORE_SERIALIZED_DAGS
 from airflow.stats import Stats
 from airflow.utils import timezone
-from airflow.utils.file import list_py_file_paths
+from airflow.utils.dag_file_fingerprints import DagFileFingerprints
+from airflow.utils.dates import cron_presets
+from airflow.utils.file import DagFolderIndex, correct_maybe_zipped, list_py_file_paths
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.mixins import MultiprocessingStartMethodMixin
 from airflow.utils.process_utils import kill_child_processes_by_pids, reap_process_group
 from airflow.utils.session import provide_session
 from airflow.utils.state import State
+from airflow.utils.types import DagRunType
+
+# Batches of DAG parsing results larger than this, in bytes, are written to a spool file
+_SPOOL_THRESHOLD = 1024 * 1024
+
+
+def _get_next_dagrun_due_date(schedule_interval, last_execution_date: Optional[datetime],
+                              now: datetime) -> Optional[datetime]:
+    """
+    When the DagRun following the one of ``last_execution_date`` is due, i.e. at the end of its
+    schedule interval. Cron expressions are evaluated in UTC, as the time zone of the DAG is not
+    known without the DAG, so this is an approximation to order the files to parse by.
+    """
+    if schedule_interval is None or schedule_interval == '@once':
+        return now if schedule_interval and last_execution_date is None else None
+    if last_execution_date is None:
+        return now
+    schedule_interval = cron_presets.get(schedule_interval, schedule_interval)
+    if not isinstance(schedule_interval, str):
+        return last_execution_date + schedule_interval + schedule_interval
+    try:
+        cron = croniter(schedule_interval, last_execution_date)
+        cron.get_next(datetime)
+        return cron.get_next(datetime)
+    except (ValueError, KeyError):
+        return None
 
 
 class SimpleDagBag(BaseDagBag):
     """
     A collection of SimpleDag objects with some convenience methods.
+
+    The scheduler keeps one bag, updated with the DAGs of the files parsed in each loop.
     """
 
     def __init__(self, serialized_dags: List[SerializedDAG]):
@@ -66,12 +105,56 @@ class SimpleDagBag(BaseDagBag):
         :param serialized_dags: SimpleDag objects that should be in this
         :type serialized_dags: list[dict]
         """
-        self.serialized_dags = serialized_dags
         self.dag_id_to_simple_dag: Dict[str, SerializedDAG] = {}
+        # The file each DAG was last found in, and the DAGs found in each file
+        self._dag_id_to_file_path: Dict[str, str] = {}
+        self._file_path_to_dag_ids: Dict[str, Set[str]] = {}
 
         for serialized_dag in serialized_dags:
             self.dag_id_to_simple_dag[serialized_dag.dag_id] = serialized_dag
 
+    @property
+    def serialized_dags(self) -> List[SerializedDAG]:
+        """
+        :return: the DAGs in this
+        :rtype: list[SerializedDAG]
+        """
+        return list(self.dag_id_to_simple_dag.values())
+
+    def update(
+        self, parsing_results: List['DagFileParsingResult'], file_paths: Optional[Set[str]] = None
+    ) -> None:
+        """
+        Replace the DAGs of the parsed files by the ones found in them, and remove the
+        DAGs of the files which are not in ``file_paths`` any more, if given.
+
+        :param parsing_results: the DAGs found in each parsed file
+        :type parsing_results: list[DagFileParsingResult]
+        :param file_paths: all the DAG files
+        :type file_paths: set[str]
+        """
+        for result in parsing_results:
+            self._remove_file(result.file_path)
+            dag_ids = set()
+            for serialized_dag in result.serialized_dags:
+                previous_file_path = self._dag_id_to_file_path.get(serialized_dag.dag_id)
+                if previous_file_path is not None:
+                    # The DAG moved to another file
+                    self._file_path_to_dag_ids[previous_file_path].discard(serialized_dag.dag_id)
+                self.dag_id_to_simple_dag[serialized_dag.dag_id] = serialized_dag
+                self._dag_id_to_file_path[serialized_dag.dag_id] = result.file_path
+                dag_ids.add(serialized_dag.dag_id)
+            self._file_path_to_dag_ids[result.file_path] = dag_ids
+
+        if file_paths is not None:
+            for file_path in self._file_path_to_dag_ids.keys() - file_paths:
+                self._remove_file(file_path)
+
+    def _remove_file(self, file_path: str) -> None:
+        for dag_id in self._file_path_to_dag_ids.pop(file_path, ()):
+            del self.dag_id_to_simple_dag[dag_id]
+            del self._dag_id_to_file_path[dag_id]
+
     @property
     def dag_ids(self) -> KeysView[str]:
         """
@@ -149,12 +232,12 @@ class AbstractDagFileProcessorProcess(metaclass=ABCMeta):
 
     @property
     @abstractmethod
-    def result(self) -> Optional[Tuple[List[dict], int]]:
+    def result(self) -> Optional[Tuple[List[Union[dict, 'SerializedDagUpdate']], int]]:
         """
         A list of simple dags found, and the number of import errors
 
         :return: result of running SchedulerJob.process_file() if availlablle. Otherwise, none
-        :rtype: Optional[Tuple[List[dict], int]]
+        :rtype: Optional[Tuple[List[Union[dict, SerializedDagUpdate]], int]]
         """
         raise NotImplementedError()
 
@@ -193,6 +276,40 @@ class DagParsingStat(NamedTuple):
     all_files_processed: bool
 
 
+class SerializedDagUpdate(NamedTuple):
+    """
+    A DAG found by a DAG file processor, with its fingerprint. ``data`` is the serialized
+    DAG, or None when the DAG did not change since it was stored in the DB.
+    """
+
+    dag_id: str
+    fingerprint: str
+    data: Optional[dict]
+
+
+class DagFileParsingResult(NamedTuple):
+    """
+    The DAGs found in a DAG file by a processor, as sent by the DagFileProcessorManager
+    (dicts or SerializedDagUpdates) or as harvested from the DagFileProcessorAgent
+    (SerializedDAGs).
+    """
+
+    file_path: str
+    serialized_dags: List[Union[dict, SerializedDagUpdate, SerializedDAG]]
+
+
+class DagParsingResultBatch(NamedTuple):
+    """
+    The results of the files parsed in a loop of the DagFileProcessorManager, sent to
+    the agent in one message: a pickled list of DagFileParsingResults, or the path of
+    the spool file it was written to when it is large, so that the manager does not
+    wait for the agent to read large DAGs from the pipe.
+    """
+
+    data: Optional[bytes]
+    spool_path: Optional[str] = None
+
+
 class DagFileStat(NamedTuple):
     """Information about single processing of one file"""
 
@@ -219,6 +336,35 @@ class FailureCallbackRequest(NamedTuple):
     msg: str
 
 
+def get_dag_file_shard(
+    file_paths: List[str], dag_directory: str, processor_ids: List[int], processor_id: int
+) -> List[str]:
+    """
+    The DAG files parsed by one of the DagProcessorJobs sharing the DAG folder.
+
+    The files are shared by rendezvous hashing: each file goes to the processor with the
+    highest hash of its id and of the path of the file, relative to the DAG folder so that
+    the processors can mount it at different places. When a processor starts or stops,
+    only the files it gets or had move to another processor.
+
+    :param file_paths: the files of the DAG folder
+    :param dag_directory: the DAG folder
+    :param processor_ids: the ids of the running DagProcessorJobs
+    :param processor_id: the id of the DagProcessorJob to get the files of
+    :return: the files parsed by the DagProcessorJob ``processor_id``
+    """
+    def score(other_id: int, relative_path: str) -> str:
+        return hashlib.md5(f"{other_id}:{relative_path}".encode('utf-8')).hexdigest()
+
+    processor_ids = sorted(set(processor_ids) | {processor_id})
+    shard = []
+    for file_path in file_paths:
+        relative_path = os.path.relpath(file_path, dag_directory)
+        if max(processor_ids, key=lambda other_id: score(other_id, relative_path)) == processor_id:
+            shard.append(file_path)
+    return shard
+
+
 class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
     """
     Agent for DAG file processing. It is responsible for all DAG parsing
@@ -247,6 +393,9 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
     :type: pickle_dags: bool
     :param async_mode: Whether to start agent in async mode
     :type async_mode: bool
+    :param dag_processor_job_id: the id of the DagProcessorJob running the agent, if any.
+        Its manager only parses its share of the DAG files then, see :func:`get_dag_file_shard`.
+    :type dag_processor_job_id: int
     """
 
     def __init__(
@@ -260,7 +409,8 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
         processor_timeout: timedelta,
         dag_ids: Optional[List[str]],
         pickle_dags: bool,
-        async_mode: bool
+        async_mode: bool,
+        dag_processor_job_id: Optional[int] = None,
     ):
         super().__init__()
         self._file_path_queue: List[str] = []
@@ -271,6 +421,7 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
         self._dag_ids = dag_ids
         self._pickle_dags = pickle_dags
         self._async_mode = async_mode
+        self._dag_processor_job_id = dag_processor_job_id
         # Map from file path to the processor
         self._processors: Dict[str, AbstractDagFileProcessorProcess] = {}
         # Pipe for communicating signals
@@ -280,7 +431,14 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
         self._all_files_processed = True
 
         self._parent_signal_conn: Optional[MultiprocessingConnection] = None
-        self._collected_dag_buffer: List = []
+        self._collected_results: List[DagFileParsingResult] = []
+        # Where the manager writes the large batches of results
+        self._spool_directory: Optional[str] = None
+        # The last version of the DAGs received, with their fingerprints, to not deserialize
+        # the DAGs that did not change
+        self._serialized_dags: Dict[str, Tuple[str, SerializedDAG]] = {}
+        # None until the first DagParsingStat, which the manager sends after the first results
+        self._file_paths: Optional[Set[str]] = None
 
         self._last_parsing_stat_received_at: float = time.monotonic()
 
@@ -293,6 +451,8 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
         self._last_parsing_stat_received_at = time.monotonic()
 
         self._parent_signal_conn, child_signal_conn = context.Pipe()
+        if self._spool_directory is None:
+            self._spool_directory = tempfile.mkdtemp(prefix='airflow-dag-parsing-')
         process = context.Process(
             target=type(self)._run_processor_manager,
             args=(
@@ -304,7 +464,9 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
                 child_signal_conn,
                 self._dag_ids,
                 self._pickle_dags,
-                self._async_mode
+                self._async_mode,
+                self._dag_processor_job_id,
+                self._spool_directory,
             )
         )
         self._process = process
@@ -389,7 +551,9 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
         signal_conn: MultiprocessingConnection,
         dag_ids: Optional[List[str]],
         pickle_dags: bool,
-        async_mode: bool
+        async_mode: bool,
+        dag_processor_job_id: Optional[int] = None,
+        spool_directory: Optional[str] = None,
     ) -> None:
 
         # Make this process start as a new process group - that makes it easy
@@ -397,7 +561,10 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
         # to iterate the child processes
         os.setpgid(0, 0)
 
-        setproctitle("airflow scheduler -- DagFileProcessorManager")
+        if dag_processor_job_id is None:
+            setproctitle("airflow scheduler -- DagFileProcessorManager")
+        else:
+            setproctitle("airflow dag-processor -- DagFileProcessorManager")
         # Reload configurations and settings to avoid collision with parent process.
         # Because this process may need custom configurations that cannot be shared,
         # e.g. RotatingFileHandler. And it can cause connection corruption if we
@@ -417,7 +584,9 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
                                                     signal_conn,
                                                     dag_ids,
                                                     pickle_dags,
-                                                    async_mode)
+                                                    async_mode,
+                                                    dag_processor_job_id,
+                                                    spool_directory)
 
         processor_manager.start()
 
@@ -427,6 +596,16 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
 
         :return: List of parsing result in SerializedDAG format.
         """
+        return [
+            dag for result in self.harvest_parsing_results() for dag in result.serialized_dags
+        ]
+
+    def harvest_parsing_results(self) -> List[DagFileParsingResult]:
+        """
+        Harvest DAG parsing results from result queue and sync metadata from stat queue.
+
+        :return: The DAGs found in each file parsed since the last harvest, as SerializedDAGs.
+        """
         if not self._parent_signal_conn:
             raise ValueError("Process not started.")
         # Receive any pending messages before checking if the process has exited.
@@ -436,20 +615,68 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
             except (EOFError, ConnectionError):
                 break
             self._process_message(result)
-        serialized_dags = self._collected_dag_buffer
-        self._collected_dag_buffer = []
+        parsing_results = self._collected_results
+        self._collected_results = []
 
         # If it died unexpectedly restart the manager process
         self._heartbeat_manager()
 
-        return serialized_dags
+        return parsing_results
+
+    @property
+    def file_paths(self) -> Optional[Set[str]]:
+        """The DAG files the manager parses, None until the manager sent them"""
+        return self._file_paths
 
     def _process_message(self, message):
         self.log.debug("Received message of type %s", type(message).__name__)
         if isinstance(message, DagParsingStat):
             self._sync_metadata(message)
+        elif isinstance(message, DagParsingResultBatch):
+            for result in self._read_batch(message):
+                serialized_dags = []
+                for serialized_dag in result.serialized_dags:
+                    if isinstance(serialized_dag, SerializedDagUpdate):
+                        dag = self._get_serialized_dag(serialized_dag)
+                        if dag is not None:
+                            serialized_dags.append(dag)
+                    else:
+                        serialized_dags.append(SerializedDAG.from_dict(serialized_dag))
+                self._collected_results.append(DagFileParsingResult(result.file_path, serialized_dags))
+        else:
+            raise ValueError(f"Invalid message {type(message)}")
+
+    def _read_batch(self, batch: DagParsingResultBatch) -> List[DagFileParsingResult]:
+        if batch.spool_path is None:
+            return pickle.loads(batch.data)
+        try:
+            with open(batch.spool_path, 'rb') as spool_file:
+                return pickle.load(spool_file)
+        except OSError:
+            self.log.exception("Failed to read the DAG parsing results from %s", batch.spool_path)
+            return []
+        finally:
+            with suppress(OSError):
+                os.remove(batch.spool_path)
+
+    def _get_serialized_dag(self, update: SerializedDagUpdate) -> Optional[SerializedDAG]:
+        """The DAG of the update, only deserialized if it changed since it was last received"""
+        fingerprint = update.fingerprint
+        cached = self._serialized_dags.get(update.dag_id)
+        if update.data is not None:
+            dag = SerializedDAG.from_dict(update.data)
+        elif cached and cached[0] == fingerprint:
+            return cached[1]
         else:
-            self._collected_dag_buffer.append(SerializedDAG.from_dict(message))
+            # The DAG did not change since it was last stored, but this scheduler has not
+            # received that version: it restarted since, or another scheduler stored it
+            from airflow.models.serialized_dag import SerializedDagModel
+            row = SerializedDagModel.get(update.dag_id)
+            if row is None:
+                return None
+            dag, fingerprint = row.dag, row.dag_fingerprint
+        self._serialized_dags[update.dag_id] = (fingerprint, dag)
+        return dag
 
     def _heartbeat_manager(self):
         """
@@ -485,6 +712,15 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
         self._done = stat.done
         self._all_files_processed = stat.all_files_processed
         self._last_parsing_stat_received_at = time.monotonic()
+        file_paths = set(stat.file_paths)
+        if file_paths != self._file_paths:
+            self._file_paths = file_paths
+            # Forget the DAGs of the deleted files
+            self._serialized_dags = {
+                dag_id: (fingerprint, dag)
+                for dag_id, (fingerprint, dag) in self._serialized_dags.items()
+                if correct_maybe_zipped(dag.fileloc) in file_paths
+            }
 
     @property
     def done(self) -> bool:
@@ -522,6 +758,9 @@ class DagFileProcessorAgent(LoggingMixin, MultiprocessingStartMethodMixin):
             return
         reap_process_group(self._process.pid, logger=self.log)
         self._parent_signal_conn.close()
+        if self._spool_directory:
+            shutil.rmtree(self._spool_directory, ignore_errors=True)
+            self._spool_directory = None
 
 
 class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instance-attributes
@@ -551,6 +790,13 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
     :type pickle_dags: bool
     :param async_mode: whether to start the manager in async mode
     :type async_mode: bool
+    :param dag_processor_job_id: the id of the DagProcessorJob running the manager, if any.
+        Only its share of the DAG files is parsed then, see :func:`get_dag_file_shard`, and
+        the serialized DAGs are not sent to the agent.
+    :type dag_processor_job_id: int
+    :param spool_directory: where to write the batches of results too large to be sent
+        through the pipe, see :class:`DagParsingResultBatch`
+    :type spool_directory: str
     """
 
     def __init__(self,
@@ -564,9 +810,13 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
                  signal_conn: MultiprocessingConnection,
                  dag_ids: Optional[List[str]],
                  pickle_dags: bool,
-                 async_mode: bool = True):
+                 async_mode: bool = True,
+                 dag_processor_job_id: Optional[int] = None,
+                 spool_directory: Optional[str] = None):
         super().__init__()
         self._file_paths: List[str] = []
+        # All the files of the DAG folder, of which _file_paths is the share of this manager
+        self._dag_folder_file_paths: List[str] = []
         self._file_path_queue: List[str] = []
         self._dag_directory = dag_directory
         self._max_runs = max_runs
@@ -618,10 +868,57 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
 
         # How often to scan the DAGs directory for new files. Default to 5 minutes.
         self.dag_dir_list_interval = conf.getint('scheduler', 'dag_dir_list_interval')
+        # The DAG folder is listed again in a background thread, from what the previous listings learnt
+        self._dag_folder_index = DagFolderIndex()
+        self._dag_dir_listing_thread: Optional[threading.Thread] = None
+        self._listed_file_paths: Optional[List[str]] = None
 
         # Mapping file name and callbacks requests
         self._callback_to_execute: Dict[str, List[FailureCallbackRequest]] = defaultdict(list)
 
+        # Fingerprints of the files as they were last parsed, to skip the unchanged ones.
+        # Not used when the files have to be parsed a given number of times.
+        self._file_fingerprints: Optional[DagFileFingerprints] = None
+        if conf.getboolean('scheduler', 'skip_unchanged_dag_files') and self._max_runs == -1:
+            self._file_fingerprints = DagFileFingerprints(
+                dag_directory, conf.get('scheduler', 'dag_file_fingerprints_path') or None
+            )
+        # Parse unchanged files no less often than this interval
+        self._unchanged_file_process_interval = conf.getint(
+            'scheduler', 'unchanged_dag_file_process_interval'
+        )
+        # Last time the unchanged files were checked for changes
+        self._file_last_checked: Dict[str, float] = {}
+
+        # User-assigned priority of the files matching each pattern of paths relative to the DAG folder
+        self._file_priority_patterns: Dict[str, int] = json.loads(
+            conf.get('scheduler', 'dag_file_parsing_priorities') or '{}'
+        )
+        self._file_priorities: Dict[str, int] = {}
+        # Files that took at least this long to parse share a limited number of processes,
+        # so that they can't hold all of them while the other files wait
+        self._slow_file_threshold = conf.getfloat('scheduler', 'slow_dag_file_threshold')
+        self._slow_file_parallelism = conf.getint('scheduler', 'slow_dag_file_parsing_processes')
+        # While the slow files wait, the queue is only refilled when more files may be due:
+        # a processor finished, the DAG files changed, or file_process_interval elapsed
+        self._file_path_queue_stale = False
+        self._last_file_path_queue_fill_time = 0.0
+        # DagRuns are created when the files are parsed, unless the scheduler creates them
+        self._prioritize_imminent_dagruns = not conf.getboolean('scheduler', 'schedule_from_serialized_dags')
+
+        # The results collected in the current loop, sent to the agent at the end of the loop
+        self._parsing_results: List[DagFileParsingResult] = []
+        self._spool_directory = spool_directory
+
+        # The DAG files are shared between the running DagProcessorJobs
+        self._dag_processor_job_id = dag_processor_job_id
+        self._dag_processor_ids: List[int] = []
+        self._dag_processor_health_check_threshold = conf.getint(
+            'scheduler', 'dag_processor_health_check_threshold'
+        )
+        self._dag_processors_check_interval = conf.getfloat('scheduler', 'job_heartbeat_sec')
+        self._last_dag_processors_check_time = 0.0
+
         self._log = logging.getLogger('airflow.processor_manager')
 
         self.waitables = {self._signal_conn: self._signal_conn}
@@ -724,13 +1021,12 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
                 if not processor:
                     continue
 
-                serialized_dags = self._collect_results_from_processor(processor)
+                self._collect_results_from_processor(processor)
                 self.waitables.pop(sentinel)
                 self._processors.pop(processor.file_path)
-                for serialized_dag in serialized_dags:
-                    self._signal_conn.send(serialized_dag)
 
             self._refresh_dag_dir()
+            self._refresh_dag_file_shard()
             self._find_zombies()  # pylint: disable=no-value-for-parameter
 
             self._kill_timed_out_processors()
@@ -740,6 +1036,9 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
             if not self._file_path_queue:
                 self.emit_metrics()
                 self.prepare_file_path_queue()
+            elif self._only_waiting_slow_files_queued() and self._is_file_path_queue_refill_due():
+                # Don't let the other files wait for the slow ones to get a process
+                self._add_file_paths_to_queue()
 
             self.start_new_processes()
 
@@ -756,9 +1055,8 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
                 self.wait_until_finished()
 
             # Collect anything else that has finished, but don't kick off any more processors
-            serialized_dags = self.collect_results()
-            for serialized_dag in serialized_dags:
-                self._signal_conn.send(serialized_dag)
+            self.collect_results()
+            self._send_parsing_results()
 
             self._print_stat()
 
@@ -783,6 +1081,24 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
                 else:
                     poll_time = 0.0
 
+    def _send_parsing_results(self):
+        """Send the results collected in the loop to the agent, in one batch"""
+        parsing_results, self._parsing_results = self._parsing_results, []
+        # The DAGs parsed for a DagProcessorJob are only written to the DB
+        if not parsing_results or self._dag_processor_job_id is not None:
+            return
+        data = pickle.dumps(parsing_results, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._spool_directory and len(data) > _SPOOL_THRESHOLD:
+            try:
+                fd, spool_path = tempfile.mkstemp(dir=self._spool_directory, suffix='.pickle')
+                with os.fdopen(fd, 'wb') as spool_file:
+                    spool_file.write(data)
+                self._signal_conn.send(DagParsingResultBatch(None, spool_path))
+                return
+            except OSError:
+                self.log.exception("Failed to write the DAG parsing results to %s", self._spool_directory)
+        self._signal_conn.send(DagParsingResultBatch(data))
+
     def _add_callback_to_queue(self, request: FailureCallbackRequest):
         self._callback_to_execute[request.full_filepath].append(request)
         # Callback has a higher priority over DAG Run scheduling
@@ -790,19 +1106,43 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
             self._file_path_queue.remove(request.full_filepath)
         self._file_path_queue.insert(0, request.full_filepath)
 
+    def _list_dag_dir(self):
+        # Build up a list of Python files that could contain DAGs
+        try:
+            self._listed_file_paths = list_py_file_paths(self._dag_directory, index=self._dag_folder_index)
+        except Exception:  # noqa pylint: disable=broad-except
+            self.log.exception("Error listing the files in %s", self._dag_directory)
+
     def _refresh_dag_dir(self):
         """
         Refresh file paths from dag dir if we haven't done it for too long.
+
+        The DAG folder is listed in a background thread, except the first time, so that
+        listing a slow file system doesn't hold the parsing loop. The files found are
+        used from the first loop after the listing finished.
         """
         now = timezone.utcnow()
         elapsed_time_since_refresh = (now - self.last_dag_dir_refresh_time).total_seconds()
-        if elapsed_time_since_refresh > self.dag_dir_list_interval:
-            # Build up a list of Python files that could contain DAGs
+        if elapsed_time_since_refresh > self.dag_dir_list_interval and not self._dag_dir_listing_thread:
             self.log.info("Searching for files in %s", self._dag_directory)
-            self._file_paths = list_py_file_paths(self._dag_directory)
             self.last_dag_dir_refresh_time = now
-            self.log.info("There are %s files in %s", len(self._file_paths), self._dag_directory)
-            self.set_file_paths(self._file_paths)
+            self._dag_dir_listing_thread = threading.Thread(
+                target=self._list_dag_dir, name="dag-dir-listing", daemon=True
+            )
+            self._dag_dir_listing_thread.start()
+            if not self._dag_folder_file_paths:
+                # There are no files to parse in the meantime
+                self._dag_dir_listing_thread.join()
+
+        if self._dag_dir_listing_thread and not self._dag_dir_listing_thread.is_alive():
+            self._dag_dir_listing_thread = None
+            if self._listed_file_paths is None:
+                return
+            self._dag_folder_file_paths, self._listed_file_paths = self._listed_file_paths, None
+            self.log.info(
+                "There are %s files in %s", len(self._dag_folder_file_paths), self._dag_directory
+            )
+            self.set_file_paths(self._get_dag_file_shard())
 
             try:
                 self.log.debug("Removing old import errors")
@@ -813,12 +1153,57 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
             if STORE_SERIALIZED_DAGS:
                 from airflow.models.dag import DagModel
                 from airflow.models.serialized_dag import SerializedDagModel
-                SerializedDagModel.remove_deleted_dags(self._file_paths)
-                DagModel.deactivate_deleted_dags(self._file_paths)
+                SerializedDagModel.remove_deleted_dags(self._dag_folder_file_paths)
+                DagModel.deactivate_deleted_dags(self._dag_folder_file_paths)
 
             if self.store_dag_code:
                 from airflow.models.dagcode import DagCode
-                DagCode.remove_deleted_code(self._file_paths)
+                DagCode.remove_deleted_code(self._dag_folder_file_paths)
+
+    def _get_dag_file_shard(self) -> List[str]:
+        """The files of the DAG folder this manager parses"""
+        if self._dag_processor_job_id is None:
+            return self._dag_folder_file_paths
+        return get_dag_file_shard(
+            self._dag_folder_file_paths,
+            self._dag_directory,
+            self._dag_processor_ids or [self._dag_processor_job_id],
+            self._dag_processor_job_id,
+        )
+
+    def _refresh_dag_file_shard(self):
+        """
+        Share the DAG files again if DagProcessorJobs started or stopped since they
+        were last checked, or stopped heartbeating.
+        """
+        if self._dag_processor_job_id is None:
+            return
+        if time.monotonic() - self._last_dag_processors_check_time < self._dag_processors_check_interval:
+            return
+        self._last_dag_processors_check_time = time.monotonic()
+
+        dag_processor_ids = self._get_running_dag_processor_ids()  # pylint: disable=no-value-for-parameter
+        if dag_processor_ids != self._dag_processor_ids:
+            self.log.info(
+                "Running DAG processors changed to %s, sharing the DAG files again", dag_processor_ids
+            )
+            self._dag_processor_ids = dag_processor_ids
+            self.set_file_paths(self._get_dag_file_shard())
+            self.log.info(
+                "Parsing %s of the %s files in %s",
+                len(self._file_paths), len(self._dag_folder_file_paths), self._dag_directory,
+            )
+
+    @provide_session
+    def _get_running_dag_processor_ids(self, session=None) -> List[int]:
+        from airflow.jobs.base_job import BaseJob
+        limit_dttm = timezone.utcnow() - timedelta(seconds=self._dag_processor_health_check_threshold)
+        rows = session.query(BaseJob.id).filter(
+            BaseJob.job_type == 'DagProcessorJob',
+            BaseJob.state == State.RUNNING,
+            BaseJob.latest_heartbeat > limit_dttm,
+        )
+        return sorted({job_id for job_id, in rows} | {self._dag_processor_job_id})
 
     def _print_stat(self):
         """
@@ -839,9 +1224,9 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
         :type session: sqlalchemy.orm.session.Session
         """
         query = session.query(errors.ImportError)
-        if self._file_paths:
+        if self._dag_folder_file_paths:
             query = query.filter(
-                ~errors.ImportError.filename.in_(self._file_paths)
+                ~errors.ImportError.filename.in_(self._dag_folder_file_paths)
             )
         query.delete(synchronize_session='fetch')
         session.commit()
@@ -1019,6 +1404,9 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
         self._file_paths = new_file_paths
         self._file_path_queue = [x for x in self._file_path_queue
                                  if x in new_file_paths]
+        self._file_path_queue_stale = True
+        if self._file_fingerprints:
+            self._file_fingerprints.retain(new_file_paths)
         # Stop processors that are working on deleted files
         filtered_processors = {}
         for file_path, processor in self._processors.items():
@@ -1027,17 +1415,20 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
             else:
                 self.log.warning("Stopping processor for %s", file_path)
                 Stats.decr('dag_processing.processes')
+                self.waitables.pop(processor.waitable_handle, None)
                 processor.terminate()
-                self._file_stats.pop(file_path)
+                self._file_stats.pop(file_path, None)
         self._processors = filtered_processors
 
     def wait_until_finished(self):
         """
         Sleeps until all the processors are done.
         """
-        for processor in self._processors.values():
-            while not processor.done:
-                time.sleep(0.1)
+        # Wait without checking ``done``, which would consume the results of reused
+        # processes before collect_results gets to see them ready
+        waitables = {processor.waitable_handle for processor in self._processors.values()}
+        while waitables:
+            waitables -= set(multiprocessing.connection.wait(waitables))
 
     def _collect_results_from_processor(self, processor):
         self.log.debug("Processor for %s finished", processor.file_path)
@@ -1046,6 +1437,7 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
 
         if processor.result is not None:
             dags, count_import_errors = processor.result
+            self._parsing_results.append(DagFileParsingResult(processor.file_path, dags))
         else:
             self.log.error(
                 "Processor for %s exited with return code %s.",
@@ -1061,27 +1453,22 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
             run_count=self.get_run_count(processor.file_path) + 1,
         )
         self._file_stats[processor.file_path] = stat
-
-        return dags
+        self._file_path_queue_stale = True
+        if self._file_fingerprints:
+            self._file_fingerprints.finish(processor.file_path, succeeded=processor.result is not None)
 
     def collect_results(self):
         """
-        Collect the result from any finished DAG processors
-
-        :return: a list of dicts that were produced by processors that
-            have finished since the last time this was called
-        :rtype: list[dict]
+        Collect the result from any finished DAG processors, to be sent to the agent
+        at the end of the loop.
         """
-        # Collect all the DAGs that were found in the processed files
-        serialized_dags = []
-
         ready = multiprocessing.connection.wait(self.waitables.keys() - [self._signal_conn], timeout=0)
 
         for sentinel in ready:
             processor = self.waitables[sentinel]
             self.waitables.pop(processor.waitable_handle)
             self._processors.pop(processor.file_path)
-            serialized_dags += self._collect_results_from_processor(processor)
+            self._collect_results_from_processor(processor)
 
         self.log.debug("%s/%s DAG parsing processes running",
                        len(self._processors), self._parallelism)
@@ -1089,14 +1476,20 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
         self.log.debug("%s file paths queued for processing",
                        len(self._file_path_queue))
 
-        return serialized_dags
-
     def start_new_processes(self):
         """
         Start more processors if we have enough slots and files to process
         """
+        num_slow_processors = sum(1 for file_path in self._processors if self._is_slow_file(file_path))
+        # Slow files waiting for one of the processes they are limited to
+        waiting_slow_file_paths = []
         while self._parallelism - len(self._processors) > 0 and self._file_path_queue:
             file_path = self._file_path_queue.pop(0)
+            if self._is_slow_file(file_path):
+                if num_slow_processors >= self._slow_file_parallelism:
+                    waiting_slow_file_paths.append(file_path)
+                    continue
+                num_slow_processors += 1
             callback_to_execute_for_file = self._callback_to_execute[file_path]
             processor = self._processor_factory(
                 file_path,
@@ -1107,6 +1500,9 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
             del self._callback_to_execute[file_path]
             Stats.incr('dag_processing.processes')
 
+            if self._file_fingerprints:
+                self._file_fingerprints.start(file_path)
+
             processor.start()
             self.log.debug(
                 "Started a process (PID: %s) to generate tasks for %s",
@@ -1114,12 +1510,44 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
             )
             self._processors[file_path] = processor
             self.waitables[processor.waitable_handle] = processor
+        self._file_path_queue[:0] = waiting_slow_file_paths
+
+    def _is_slow_file(self, file_path: str) -> bool:
+        stat = self._file_stats.get(file_path)
+        return bool(
+            self._slow_file_threshold > 0 and
+            stat and stat.last_duration and
+            stat.last_duration >= self._slow_file_threshold
+        )
+
+    def _only_waiting_slow_files_queued(self) -> bool:
+        """Whether processes are free, but all the queued files are slow files waiting for one"""
+        if len(self._processors) >= self._parallelism:
+            return False
+        num_slow_processors = sum(1 for file_path in self._processors if self._is_slow_file(file_path))
+        return (
+            num_slow_processors >= self._slow_file_parallelism and
+            all(self._is_slow_file(file_path) for file_path in self._file_path_queue)
+        )
+
+    def _is_file_path_queue_refill_due(self) -> bool:
+        """Whether files may have become due since the queue was last filled"""
+        if self._file_path_queue_stale:
+            return True
+        elapsed = time.monotonic() - self._last_file_path_queue_fill_time
+        return 0 < self._file_process_interval <= elapsed
 
     def prepare_file_path_queue(self):
         """
         Generate more file paths to process. Result are saved in _file_path_queue.
         """
         self._parsing_start_time = timezone.utcnow()
+        self._add_file_paths_to_queue()
+
+    def _add_file_paths_to_queue(self):
+        """Add the files that are due to be processed to the queue, ordered by priority"""
+        self._file_path_queue_stale = False
+        self._last_file_path_queue_fill_time = time.monotonic()
         # If the file path is already being processed, or if a file was
         # processed recently, wait until the next batch
         file_paths_in_progress = self._processors.keys()
@@ -1139,7 +1567,11 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
         files_paths_to_queue = list(set(self._file_paths) -
                                     set(file_paths_in_progress) -
                                     set(file_paths_recently_processed) -
-                                    set(files_paths_at_run_limit))
+                                    set(files_paths_at_run_limit) -
+                                    set(self._file_path_queue))
+
+        if self._file_fingerprints:
+            files_paths_to_queue = self._skip_unchanged_files(files_paths_to_queue)
 
         for file_path, processor in self._processors.items():
             self.log.debug(
@@ -1163,6 +1595,105 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
                 )
 
         self._file_path_queue.extend(files_paths_to_queue)
+        self._sort_file_path_queue()
+
+    def _sort_file_path_queue(self):
+        """
+        Order the queue by priority: the files with callbacks to run, then by user-assigned
+        priority, then the files with DagRuns due before they would be parsed again, then by
+        time since they were last parsed relative to how long they take to parse, so that
+        cheap files are not stuck behind expensive ones and no file waits forever.
+        """
+        if not self._file_path_queue:
+            return
+        now = timezone.utcnow()
+        imminent_file_paths = (
+            self._get_file_paths_with_imminent_dagruns(now)  # pylint: disable=no-value-for-parameter
+            if self._prioritize_imminent_dagruns else set()
+        )
+        self._file_path_queue.sort(
+            key=lambda file_path: self._get_file_path_priority(file_path, now, imminent_file_paths),
+            reverse=True,
+        )
+
+    def _get_file_path_priority(self, file_path: str, now: datetime,
+                                imminent_file_paths: Set[str]) -> Tuple[bool, int, bool, float]:
+        stat = self._file_stats.get(file_path)
+        if stat is None or stat.last_finish_time is None:
+            staleness_per_cost = float('inf')
+        else:
+            staleness = (now - stat.last_finish_time).total_seconds()
+            staleness_per_cost = staleness / (1 + (stat.last_duration or 0))
+        return (
+            file_path in self._callback_to_execute,
+            self._get_user_priority(file_path),
+            file_path in imminent_file_paths,
+            staleness_per_cost,
+        )
+
+    def _get_user_priority(self, file_path: str) -> int:
+        if file_path not in self._file_priorities:
+            relative_path = os.path.relpath(file_path, self._dag_directory)
+            self._file_priorities[file_path] = max(
+                (
+                    priority for pattern, priority in self._file_priority_patterns.items()
+                    if fnmatch(relative_path, pattern)
+                ),
+                default=0,
+            )
+        return self._file_priorities[file_path]
+
+    @provide_session
+    def _get_file_paths_with_imminent_dagruns(self, now: datetime, session=None) -> Set[str]:
+        """The files with DAGs whose next scheduled DagRun is due before they would be parsed again"""
+        DM = airflow.models.DagModel
+        DR = airflow.models.DagRun
+        last_dagruns = (
+            session.query(DR.dag_id, func.max(DR.execution_date).label('execution_date'))
+            .filter(DR.run_type == DagRunType.SCHEDULED.value)
+            .group_by(DR.dag_id)
+            .subquery()
+        )
+        dags = (
+            session.query(DM.fileloc, DM.schedule_interval, last_dagruns.c.execution_date)
+            .outerjoin(last_dagruns, DM.dag_id == last_dagruns.c.dag_id)
+            .filter(not_(DM.is_paused), DM.is_active)
+        )
+        horizon = now + timedelta(seconds=self._file_process_interval)
+        imminent_file_paths = set()
+        for fileloc, schedule_interval, last_execution_date in dags:
+            due_date = _get_next_dagrun_due_date(schedule_interval, last_execution_date, now)
+            if due_date is not None and due_date <= horizon:
+                imminent_file_paths.add(fileloc)
+        return imminent_file_paths
+
+    def _skip_unchanged_files(self, file_paths: List[str]) -> List[str]:
+        """
+        Leave out the files that did not change since they were last parsed, unless
+        they were last parsed more than unchanged_dag_file_process_interval ago.
+        """
+        now = time.time()
+        changed_file_paths = []
+        num_skipped = 0
+        for file_path in file_paths:
+            last_parsed_at = self._file_fingerprints.last_parsed_at(file_path)
+            if last_parsed_at is None or now - last_parsed_at >= self._unchanged_file_process_interval:
+                changed_file_paths.append(file_path)
+                continue
+            # Like parsed files, check unchanged files no more often than min_file_process_interval
+            if now - self._file_last_checked.get(file_path, 0) < self._file_process_interval:
+                continue
+            self._file_last_checked[file_path] = now
+            if self._file_fingerprints.has_changed(file_path):
+                changed_file_paths.append(file_path)
+            else:
+                num_skipped += 1
+
+        if num_skipped:
+            self.log.debug("Skipping %d unchanged files", num_skipped)
+            Stats.incr('dag_processing.unchanged_files_skipped', num_skipped)
+        self._file_fingerprints.save()
+        return changed_file_paths
 
     @provide_session
     def _find_zombies(self, session):
@@ -1195,6 +1726,12 @@ class DagFileProcessorManager(LoggingMixin):  # pylint: disable=too-many-instanc
             )
 
             self._last_zombie_query_time = timezone.utcnow()
+            if self._dag_processor_job_id is not None:
+                # The other DagProcessorJobs handle the zombies of their share of the files
+                file_paths = set(self._file_paths)
+                zombies = [
+                    (ti, file_loc) for ti, file_loc in zombies if correct_maybe_zipped(file_loc) in file_paths
+                ]
             for ti, file_loc in zombies:
                 request = FailureCallbackRequest(
                     full_filepath=file_loc,
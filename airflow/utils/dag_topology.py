@@ -0,0 +1,131 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+DAG topology index
+"""
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from airflow.exceptions import AirflowException
+
+
+class DagTopology:
+    """
+    Index of the structure of a DAG: task ids are numbered in the order of the
+    DAG's ``task_dict`` and the upstream/downstream relations are stored as
+    adjacency lists of those numbers. Roots, leaves and the topological order
+    are computed once, transitive relatives are memoized per task.
+
+    The index only holds task ids, it is built by the DAG on first use and
+    dropped whenever tasks or relations are added to it.
+
+    :param dag: the DAG to index
+    :type dag: airflow.models.DAG
+    """
+
+    def __init__(self, dag):
+        self.dag_id: str = dag.dag_id
+        self.task_ids: List[str] = list(dag.task_dict.keys())
+        self._index: Dict[str, int] = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self.upstream: List[List[int]] = []
+        self.downstream: List[List[int]] = []
+        for task in dag.task_dict.values():
+            self.upstream.append([self._index[t] for t in task.upstream_task_ids if t in self._index])
+            self.downstream.append([self._index[t] for t in task.downstream_task_ids if t in self._index])
+
+        self.root_ids: List[str] = [
+            task_id for task_id, upstream in zip(self.task_ids, self.upstream) if not upstream
+        ]
+        self.leaf_ids: List[str] = [
+            task_id for task_id, downstream in zip(self.task_ids, self.downstream) if not downstream
+        ]
+        self._topological_order: Optional[Tuple[str, ...]] = None
+        self._relatives: Dict[Tuple[int, bool], FrozenSet[str]] = {}
+
+    def topological_order(self) -> Tuple[str, ...]:
+        """
+        Task ids sorted so that a task comes after all of its upstream tasks.
+
+        The order is the same as the one of the pass-based sort DAGs always used:
+        each pass goes through the remaining tasks in ``task_dict`` order and takes
+        every task whose upstream tasks have all been taken, including the ones
+        taken earlier in the same pass. A task's pass is therefore known from its
+        upstream tasks' passes, which are resolved here in a single Kahn traversal.
+
+        :raises AirflowException: if the DAG has a cycle
+        """
+        if self._topological_order is not None:
+            return self._topological_order
+
+        pending = [len(upstream) for upstream in self.upstream]
+        ready = deque(i for i, count in enumerate(pending) if count == 0)
+        passes = [0] * len(self.task_ids)
+        resolved = 0
+        while ready:
+            i = ready.popleft()
+            resolved += 1
+            for child in self.downstream[i]:
+                # The child is visited after this task in the same pass only
+                # if it comes later in task_dict, otherwise it has to wait for
+                # the next pass.
+                passes[child] = max(passes[child], passes[i] if i < child else passes[i] + 1)
+                pending[child] -= 1
+                if pending[child] == 0:
+                    ready.append(child)
+
+        if resolved < len(self.task_ids):
+            raise AirflowException("A cyclic dependency occurred in dag: {}".format(self.dag_id))
+
+        order = sorted(range(len(self.task_ids)), key=lambda i: (passes[i], i))
+        self._topological_order = tuple(self.task_ids[i] for i in order)
+        return self._topological_order
+
+    def get_flat_relative_ids(self, task_id: str, upstream: bool = False) -> FrozenSet[str]:
+        """
+        Ids of all the tasks upstream or downstream of the given task, memoized so
+        that later calls for the task or any of its relatives are cheap.
+
+        :param task_id: the task to get the relatives of
+        :type task_id: str
+        :param upstream: whether to follow upstream instead of downstream relations
+        :type upstream: bool
+        """
+        start = self._index[task_id]
+        cached = self._relatives.get((start, upstream))
+        if cached is not None:
+            return cached
+
+        adjacency = self.upstream if upstream else self.downstream
+        found = set()
+        seen = {start}
+        queue = deque(adjacency[start])
+        while queue:
+            i = queue.popleft()
+            if i in seen:
+                continue
+            seen.add(i)
+            found.add(self.task_ids[i])
+            relatives = self._relatives.get((i, upstream))
+            if relatives is not None:
+                # Everything reachable from here is already known
+                found.update(relatives)
+                continue
+            queue.extend(adjacency[i])
+
+        result = frozenset(found)
+        self._relatives[(start, upstream)] = result
+        return result
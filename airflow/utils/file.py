@@ -19,9 +19,12 @@ import io
 import logging
 import os
 import re
+import stat
+import time
 import zipfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Generator, List, Optional, Pattern
+from typing import Dict, Generator, List, NamedTuple, Optional, Pattern, Set, Tuple
 
 from airflow.configuration import conf
 
@@ -88,27 +91,159 @@ def open_maybe_zipped(fileloc, mode='r'):
         return io.open(fileloc, mode=mode)
 
 
+# Coarsest granularity of the modification times of the file systems, in seconds
+_MTIME_GRANULARITY = 2
+
+
+class _DirectoryListing(NamedTuple):
+    """Subdirectories and files of a directory, when its modification time was ``mtime``"""
+
+    mtime: float
+    listed_at: float
+    dirs: List[str]
+    files: List[str]
+
+
+class DagFolderIndex:
+    """
+    Caches what listing a DAG folder learns, so that listing it again only reads what changed.
+
+    * A directory is only read again when its modification time changed, i.e. when entries
+      were added, removed or renamed in it. Its subdirectories are still checked one by one,
+      so an unchanged folder costs a ``stat`` per directory instead of reading every directory.
+    * The patterns of each ignore file are only compiled again when the file changed.
+    * Whether a file might contain a DAG is only checked again when its modification time or
+      size changed, so the content of unchanged files is not read.
+
+    Entries of the files and directories that were not seen by a listing are dropped after it.
+    """
+
+    def __init__(self):
+        self._listings: Dict[str, _DirectoryListing] = {}
+        self._ignore_patterns: Dict[str, Tuple[float, int, List[Pattern[str]]]] = {}
+        self._dag_file_checks: Dict[Tuple[str, bool], Tuple[float, int, bool]] = {}
+        self._seen_directories: Set[str] = set()
+        self._seen_ignore_files: Set[str] = set()
+        self._seen_files: Set[Tuple[str, bool]] = set()
+
+    @contextmanager
+    def listing(self):
+        """Drop the entries not seen while listing folders in the context"""
+        self._seen_directories, self._seen_ignore_files, self._seen_files = set(), set(), set()
+        yield
+        self._listings = {
+            path: listing for path, listing in self._listings.items() if path in self._seen_directories
+        }
+        self._ignore_patterns = {
+            path: patterns for path, patterns in self._ignore_patterns.items()
+            if path in self._seen_ignore_files
+        }
+        self._dag_file_checks = {
+            key: check for key, check in self._dag_file_checks.items() if key in self._seen_files
+        }
+
+    def list_directory(self, path: str) -> Tuple[List[str], List[str]]:
+        """The names of the subdirectories and of the other files of the directory"""
+        self._seen_directories.add(path)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return [], []
+        listing = self._listings.get(path)
+        # A directory changed again just after it was listed can keep the same modification time
+        if listing and listing.mtime == mtime and mtime < listing.listed_at - _MTIME_GRANULARITY:
+            return list(listing.dirs), listing.files
+        listed_at = time.time()
+        dirs, files = _list_directory(path)
+        self._listings[path] = _DirectoryListing(mtime, listed_at, dirs, files)
+        return list(dirs), files
+
+    def get_ignore_patterns(self, ignore_file_path: str) -> List[Pattern[str]]:
+        """The compiled patterns of the ignore file"""
+        self._seen_ignore_files.add(ignore_file_path)
+        try:
+            file_stat = os.stat(ignore_file_path)
+        except OSError:
+            return []
+        cached = self._ignore_patterns.get(ignore_file_path)
+        if cached and cached[:2] == (file_stat.st_mtime, file_stat.st_size):
+            return cached[2]
+        patterns = _read_ignore_patterns(ignore_file_path)
+        self._ignore_patterns[ignore_file_path] = (file_stat.st_mtime, file_stat.st_size, patterns)
+        return patterns
+
+    def is_dag_file(self, file_path: str, safe_mode: bool) -> bool:
+        """Whether the file is a Python file or a zip archive which might contain a DAG"""
+        key = (file_path, safe_mode)
+        self._seen_files.add(key)
+        file_stat = os.stat(file_path)
+        cached = self._dag_file_checks.get(key)
+        if cached and cached[:2] == (file_stat.st_mtime, file_stat.st_size):
+            return cached[2]
+        result = stat.S_ISREG(file_stat.st_mode) and _is_dag_file(file_path, safe_mode)
+        self._dag_file_checks[key] = (file_stat.st_mtime, file_stat.st_size, result)
+        return result
+
+
+def _list_directory(path: str) -> Tuple[List[str], List[str]]:
+    dirs: List[str] = []
+    files: List[str] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                (dirs if is_dir else files).append(entry.name)
+    except OSError:
+        pass
+    return dirs, files
+
+
+def _walk(base_dir_path: str, index: Optional[DagFolderIndex]):
+    """Like ``os.walk(base_dir_path, followlinks=True)``, with the listings of the index if any"""
+    to_visit = [base_dir_path]
+    while to_visit:
+        root = to_visit.pop()
+        if index is not None:
+            dirs, files = index.list_directory(root)
+        else:
+            dirs, files = _list_directory(root)
+        yield root, dirs, files
+        to_visit.extend(os.path.join(root, subdir) for subdir in reversed(dirs))
+
+
+def _read_ignore_patterns(ignore_file_path: str) -> List[Pattern[str]]:
+    with open(ignore_file_path, 'r') as file:
+        lines_no_comments = [re.sub(r"\s*#.*", "", line) for line in file.read().split("\n")]
+        return [re.compile(line) for line in lines_no_comments if line]
+
+
 def find_path_from_directory(
         base_dir_path: str,
-        ignore_file_name: str) -> Generator[str, None, None]:
+        ignore_file_name: str,
+        index: Optional[DagFolderIndex] = None) -> Generator[str, None, None]:
     """
     Search the file and return the path of the file that should not be ignored.
     :param base_dir_path: the base path to be searched for.
     :param ignore_file_name: the file name in which specifies a regular expression pattern is written.
+    :param index: caches the listings of the directories and the ignore patterns, if given.
 
     :return : file path not to be ignored.
     """
     patterns_by_dir: Dict[str, List[Pattern[str]]] = {}
 
-    for root, dirs, files in os.walk(str(base_dir_path), followlinks=True):
+    for root, dirs, files in _walk(str(base_dir_path), index):
         patterns: List[Pattern[str]] = patterns_by_dir.get(root, [])
 
         ignore_file_path = os.path.join(root, ignore_file_name)
-        if os.path.isfile(ignore_file_path):
-            with open(ignore_file_path, 'r') as file:
-                lines_no_comments = [re.sub(r"\s*#.*", "", line) for line in file.read().split("\n")]
-                patterns += [re.compile(line) for line in lines_no_comments if line]
-                patterns = list(set(patterns))
+        if ignore_file_name in files and os.path.isfile(ignore_file_path):
+            if index is not None:
+                patterns += index.get_ignore_patterns(ignore_file_path)
+            else:
+                patterns += _read_ignore_patterns(ignore_file_path)
+            patterns = list(set(patterns))
 
         dirs[:] = [
             subdir
@@ -132,7 +267,8 @@ def list_py_file_paths(directory: str,
                        safe_mode: bool = conf.getboolean('core', 'DAG_DISCOVERY_SAFE_MODE', fallback=True),
                        include_examples: Optional[bool] = None,
                        include_smart_sensor: Optional[bool] =
-                       conf.getboolean('smart_sensor', 'use_smart_sensor')):
+                       conf.getboolean('smart_sensor', 'use_smart_sensor'),
+                       index: Optional[DagFolderIndex] = None):
     """
     Traverse a directory and look for Python files.
 
@@ -147,40 +283,51 @@ def list_py_file_paths(directory: str,
     :type include_examples: bool
     :param include_smart_sensor: include smart sensor native control DAGs
     :type include_examples: bool
+    :param index: caches what listing the directory learns, to list it again faster
+    :type index: DagFolderIndex
     :return: a list of paths to Python files in the specified directory
     :rtype: list[unicode]
     """
     if include_examples is None:
         include_examples = conf.getboolean('core', 'LOAD_EXAMPLES')
+    if index is not None:
+        with index.listing():
+            return _list_py_file_paths(directory, safe_mode, include_examples, include_smart_sensor, index)
+    return _list_py_file_paths(directory, safe_mode, include_examples, include_smart_sensor, index)
+
+
+def _list_py_file_paths(directory, safe_mode, include_examples, include_smart_sensor, index):
     file_paths: List[str] = []
     if directory is None:
         file_paths = []
     elif os.path.isfile(directory):
         file_paths = [directory]
     elif os.path.isdir(directory):
-        find_dag_file_paths(directory, file_paths, safe_mode)
+        find_dag_file_paths(directory, file_paths, safe_mode, index)
     if include_examples:
         from airflow import example_dags
         example_dag_folder = example_dags.__path__[0]  # type: ignore
-        file_paths.extend(list_py_file_paths(example_dag_folder, safe_mode, False, False))
+        find_dag_file_paths(example_dag_folder, file_paths, safe_mode, index)
     if include_smart_sensor:
         from airflow import smart_sensor_dags
         smart_sensor_dag_folder = smart_sensor_dags.__path__[0]  # type: ignore
-        file_paths.extend(list_py_file_paths(smart_sensor_dag_folder, safe_mode, False, False))
+        find_dag_file_paths(smart_sensor_dag_folder, file_paths, safe_mode, index)
     return file_paths
 
 
-def find_dag_file_paths(directory: str, file_paths: list, safe_mode: bool):
+def find_dag_file_paths(directory: str, file_paths: list, safe_mode: bool,
+                        index: Optional[DagFolderIndex] = None):
     """Finds file paths of all DAG files."""
     for file_path in find_path_from_directory(
-            directory, ".airflowignore"):
+            directory, ".airflowignore", index):
         try:
-            if not os.path.isfile(file_path):
+            if index is not None:
+                if index.is_dag_file(file_path, safe_mode):
+                    file_paths.append(file_path)
                 continue
-            _, file_ext = os.path.splitext(os.path.split(file_path)[-1])
-            if file_ext != '.py' and not zipfile.is_zipfile(file_path):
+            if not os.path.isfile(file_path):
                 continue
-            if not might_contain_dag(file_path, safe_mode):
+            if not _is_dag_file(file_path, safe_mode):
                 continue
 
             file_paths.append(file_path)
@@ -188,6 +335,13 @@ def find_dag_file_paths(directory: str, file_paths: list, safe_mode: bool):
             log.exception("Error while examining %s", file_path)
 
 
+def _is_dag_file(file_path: str, safe_mode: bool) -> bool:
+    _, file_ext = os.path.splitext(os.path.split(file_path)[-1])
+    if file_ext != '.py' and not zipfile.is_zipfile(file_path):
+        return False
+    return might_contain_dag(file_path, safe_mode)
+
+
 COMMENT_PATTERN = re.compile(r"\s*#.*")
 
 
@@ -0,0 +1,265 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Heartbeat aggregator of a worker, which writes the heartbeats of all the LocalTaskJobs
+of the host to the database at once.
+"""
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlalchemy import and_, or_
+
+from airflow import settings
+from airflow.configuration import conf
+from airflow.stats import Stats
+from airflow.utils import timezone
+from airflow.utils.log.logging_mixin import LoggingMixin
+from airflow.utils.session import provide_session
+
+# Seconds LocalTaskJobs wait for the answer of the heartbeat aggregator
+HEARTBEAT_AGGREGATOR_TIMEOUT = 5
+
+
+class _TaskInstanceId(NamedTuple):
+    dag_id: str
+    task_id: str
+    execution_date: str
+
+
+class _JobHeartbeat(NamedTuple):
+    task_instance_id: _TaskInstanceId
+    received_at: float
+
+
+def send_heartbeat(
+    socket_path: str,
+    job_id: int,
+    dag_id: str,
+    task_id: str,
+    execution_date: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Send the heartbeat of a LocalTaskJob to the heartbeat aggregator listening on ``socket_path``.
+
+    :return: the state of the job and of its task instance when the aggregator last wrote
+        the heartbeats to the database, None if the job was not in these heartbeats
+    :raises OSError: if the heartbeat aggregator can't be reached
+    """
+    request = {
+        'job_id': job_id,
+        'dag_id': dag_id,
+        'task_id': task_id,
+        'execution_date': execution_date,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(HEARTBEAT_AGGREGATOR_TIMEOUT)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        with sock.makefile('rb') as response_file:
+            response = response_file.readline()
+    if not response:
+        raise ConnectionError("The heartbeat aggregator closed the connection")
+    return json.loads(response)
+
+
+class HeartbeatAggregator(LoggingMixin):
+    """
+    Collects the heartbeats of the LocalTaskJobs of a host through a Unix socket, and writes
+    them to the database every ``interval`` seconds in one UPDATE. The states of the jobs and
+    of their task instances are then fetched at once, and sent back with the next heartbeats
+    of the jobs, so that they can stop when their task instance was changed externally.
+
+    :param socket_path: path of the Unix socket to listen on
+    :type socket_path: str
+    :param interval: seconds between two writes of the heartbeats
+    :type interval: float
+    """
+
+    def __init__(self, socket_path: str, interval: float):
+        super().__init__()
+        self.socket_path = socket_path
+        self.interval = interval
+        # Jobs which will be forgotten when they stop heartbeating for this long
+        self._job_timeout = conf.getint('scheduler', 'scheduler_zombie_task_threshold')
+        self._lock = threading.Lock()
+        self._heartbeats: Dict[int, _JobHeartbeat] = {}
+        self._statuses: Dict[int, Dict[str, Any]] = {}
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        # Inode of the socket bound by this aggregator, to only remove its own socket
+        self._socket_inode: Optional[int] = None
+
+    def heartbeat(self, job_id: int, task_instance_id: _TaskInstanceId) -> Optional[Dict[str, Any]]:
+        """Record the heartbeat of the job, and return its status when the heartbeats were last written"""
+        with self._lock:
+            self._heartbeats[job_id] = _JobHeartbeat(task_instance_id, time.monotonic())
+            return self._statuses.get(job_id)
+
+    @provide_session
+    def write_heartbeats(self, session=None) -> None:
+        """Write the heartbeats of the jobs to the database, and fetch the states of the jobs"""
+        from airflow.jobs.base_job import BaseJob
+        from airflow.models.taskinstance import TaskInstance
+
+        with self._lock:
+            expired_before = time.monotonic() - self._job_timeout
+            for job_id in [job_id for job_id, heartbeat in self._heartbeats.items()
+                           if heartbeat.received_at < expired_before]:
+                del self._heartbeats[job_id]
+                self._statuses.pop(job_id, None)
+            heartbeats = dict(self._heartbeats)
+        if not heartbeats:
+            return
+
+        latest_heartbeat = timezone.utcnow()
+        job_ids = list(heartbeats)
+        session.query(BaseJob).filter(BaseJob.id.in_(job_ids)).update(
+            {BaseJob.latest_heartbeat: latest_heartbeat}, synchronize_session=False
+        )
+        job_states = dict(session.query(BaseJob.id, BaseJob.state).filter(BaseJob.id.in_(job_ids)))
+
+        task_instance_ids = {heartbeat.task_instance_id for heartbeat in heartbeats.values()}
+        task_instances = session.query(
+            TaskInstance.dag_id, TaskInstance.task_id, TaskInstance.execution_date,
+            TaskInstance.state, TaskInstance.hostname, TaskInstance.pid,
+        ).filter(or_(*(
+            and_(
+                TaskInstance.dag_id == task_instance_id.dag_id,
+                TaskInstance.task_id == task_instance_id.task_id,
+                TaskInstance.execution_date == timezone.parse(task_instance_id.execution_date),
+            )
+            for task_instance_id in task_instance_ids
+        )))
+        task_instance_states = {
+            (dag_id, task_id, execution_date): {
+                'state': state, 'hostname': hostname, 'pid': pid,
+            }
+            for dag_id, task_id, execution_date, state, hostname, pid in task_instances
+        }
+        session.commit()
+        Stats.gauge('heartbeat_aggregator.jobs', len(heartbeats))
+
+        statuses = {}
+        for job_id, heartbeat in heartbeats.items():
+            task_instance_id = heartbeat.task_instance_id
+            statuses[job_id] = {
+                'latest_heartbeat': latest_heartbeat.isoformat(),
+                'job_state': job_states.get(job_id),
+                'task_instance': task_instance_states.get((
+                    task_instance_id.dag_id,
+                    task_instance_id.task_id,
+                    timezone.parse(task_instance_id.execution_date),
+                )),
+            }
+        with self._lock:
+            for job_id, status in statuses.items():
+                if job_id in self._heartbeats:
+                    self._statuses[job_id] = status
+
+    def serve(self) -> None:
+        """Listen to the heartbeats, and write them to the database until terminated"""
+        aggregator = self
+
+        class HeartbeatHandler(socketserver.StreamRequestHandler):
+            """Answers a heartbeat of a LocalTaskJob"""
+
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    # Connected to check that the aggregator is alive
+                    return
+                try:
+                    request = json.loads(line)
+                    status = aggregator.heartbeat(request['job_id'], _TaskInstanceId(
+                        request['dag_id'], request['task_id'], request['execution_date']
+                    ))
+                    self.wfile.write(json.dumps(status).encode() + b'\n')
+                except (ValueError, KeyError, TypeError):
+                    aggregator.log.warning("Invalid heartbeat", exc_info=True)
+
+        if os.path.exists(self.socket_path):
+            if self._is_socket_served():
+                self.log.warning("A heartbeat aggregator already listens on %s", self.socket_path)
+                return
+            # Left over by an aggregator which did not stop cleanly
+            os.unlink(self.socket_path)
+        server = socketserver.ThreadingUnixStreamServer(self.socket_path, HeartbeatHandler)
+        server.daemon_threads = True
+        self._socket_inode = os.stat(self.socket_path).st_ino
+        self._server = server
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        self.log.info("Heartbeat aggregator listening on %s", self.socket_path)
+        try:
+            while self._server:
+                started_at = time.monotonic()
+                try:
+                    self.write_heartbeats()
+                except Exception:  # pylint: disable=broad-except
+                    # The jobs stop once their heartbeat is too old, which they check themselves
+                    self.log.exception("Failed to write the heartbeats to the database")
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started_at)))
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop listening to the heartbeats"""
+        server, self._server = self._server, None
+        if server:
+            server.shutdown()
+            server.server_close()
+            try:
+                # The socket may have been replaced by the one of another aggregator
+                if os.stat(self.socket_path).st_ino == self._socket_inode:
+                    os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+            self._socket_inode = None
+
+    def _is_socket_served(self) -> bool:
+        """Whether another aggregator accepts connections on the socket"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(HEARTBEAT_AGGREGATOR_TIMEOUT)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                return False
+        return True
+
+
+def serve_heartbeat_aggregator() -> None:
+    """Run the heartbeat aggregator of the host, in the process started by the worker"""
+    aggregator = HeartbeatAggregator(
+        socket_path=conf.get('core', 'heartbeat_aggregator_socket'),
+        interval=conf.getfloat('core', 'heartbeat_aggregator_interval'),
+    )
+
+    def exit_gracefully(signum, frame):  # pylint: disable=unused-argument
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, exit_gracefully)
+    signal.signal(signal.SIGINT, exit_gracefully)
+    # The DB connections of the worker can't be shared with this process
+    if settings.engine:
+        settings.engine.dispose()
+    aggregator.serve()
@@ -150,6 +150,57 @@ def execute_in_subprocess(cmd: List[str]):
         raise subprocess.CalledProcessError(exit_code, cmd)
 
 
+def execute_in_fork(cmd: List[str]) -> int:
+    """
+    Execute an Airflow CLI command in a fork of the current process, rather than in a new
+    Python interpreter, so that Airflow and the providers are not imported again.
+
+    :param cmd: the Airflow CLI command, starting with ``airflow``
+    :type cmd: List[str]
+    :return: the exit code of the command
+    """
+    pid = os.fork()
+    if pid:
+        _, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            return -os.WTERMSIG(status)
+        return os.WEXITSTATUS(status)
+
+    # pylint: disable=import-outside-toplevel
+    from setproctitle import setproctitle  # pylint: disable=no-name-in-module
+
+    from airflow import settings
+    from airflow.sentry import Sentry
+
+    exit_code = 1
+    try:
+        from airflow.cli.cli_parser import get_parser
+
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # Force a new SQLAlchemy session. We can't share open DB handles
+        # between process. The cli code will re-create this as part of its
+        # normal startup
+        if settings.engine:
+            settings.engine.pool.dispose()
+            settings.engine.dispose()
+
+        setproctitle("airflow task supervisor: {}".format(" ".join(cmd)))
+        # [1:] - remove "airflow" from the start of the command
+        args = get_parser().parse_args(cmd[1:])
+        args.func(args)
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Failed to execute %s", cmd)
+    finally:
+        # Explicitly flush any pending exception to Sentry if enabled
+        Sentry.flush()
+        logging.shutdown()
+        os._exit(exit_code)  # pylint: disable=protected-access
+
+
 def execute_interactive(cmd: List[str], **kwargs):
     """
     Runs the new command as a subprocess and ensures that the terminal's state is restored to its original
@@ -0,0 +1,338 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Timing and profiling of the phases of long running loops, e.g. the scheduler loop, and of DAG parsing."""
+
+import builtins
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+
+# Long import to not create a copy of the reference, as the engine can be replaced
+import airflow.settings
+from airflow.stats import Stats
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+
+class _QueryCounter:
+    """Counts the queries sent to the Airflow database, and the rows they returned or changed"""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self._engine = None
+
+    def listen(self):
+        """Start counting the queries of the current engine, if it is not counted yet"""
+        engine = airflow.settings.engine
+        if engine is None or engine is self._engine:
+            return
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+        self._engine = engine
+
+    def after_cursor_execute(self, conn, cursor, *args, **kwargs):  # pylint: disable=unused-argument
+        self.queries += 1
+        # Not every driver reports the number of rows of a SELECT, -1 is returned then
+        if cursor.rowcount > 0:
+            self.rows += cursor.rowcount
+
+
+_query_counter = _QueryCounter()
+
+
+class PhaseStats:
+    """
+    Emits the duration of the phases of a loop, and the number of queries sent
+    to the database and of rows they returned or changed during each phase.
+
+    For each phase, ``<prefix>.<phase>.duration`` is a timer and ``<prefix>.<phase>.queries``
+    and ``<prefix>.<phase>.rows`` are counters. The durations of the last loop are also
+    kept in ``last_durations`` to be logged.
+
+    :param prefix: the prefix of the names of the metrics
+    :type prefix: str
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.last_durations: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the code run in the context as the given phase"""
+        _query_counter.listen()
+        queries, rows = _query_counter.queries, _query_counter.rows
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.last_durations[name] = duration
+            Stats.timing(f'{self.prefix}.{name}.duration', timedelta(seconds=duration))
+            Stats.incr(f'{self.prefix}.{name}.queries', _query_counter.queries - queries)
+            Stats.incr(f'{self.prefix}.{name}.rows', _query_counter.rows - rows)
+
+
+class LoopProfiler(LoggingMixin):
+    """
+    Profiles a number of iterations of a loop with cProfile on request, and writes
+    the stats of each profiling session to a folder: a ``.prof`` file to load with
+    :mod:`pstats` or tools like snakeviz, and a ``.txt`` report of the functions
+    with the highest cumulative time.
+
+    :meth:`request` only sets a counter, so it can be called from a signal handler.
+
+    :param name: the name of the profiled loop, used in the file names
+    :type name: str
+    :param folder: the folder to write the stats to
+    :type folder: str
+    :param num_loops: the number of iterations profiled per request
+    :type num_loops: int
+    """
+
+    def __init__(self, name: str, folder: str, num_loops: int):
+        super().__init__()
+        self.name = name
+        self.folder = folder
+        self.num_loops = num_loops
+        self._requested_loops = 0
+        self._remaining_loops = 0
+        self._profile: Optional[cProfile.Profile] = None
+
+    def request(self, num_loops: Optional[int] = None) -> None:
+        """Profile the next ``num_loops`` iterations, ``num_loops`` of the profiler by default"""
+        self._requested_loops = num_loops or self.num_loops
+
+    @property
+    def active(self) -> bool:
+        """Whether the current iteration is profiled"""
+        return self._profile is not None
+
+    def loop_started(self) -> None:
+        """Start profiling if it was requested. Call at the start of each iteration."""
+        if self._profile is None and self._requested_loops > 0:
+            self._remaining_loops, self._requested_loops = self._requested_loops, 0
+            self.log.info("Profiling the next %d iterations of the %s loop", self._remaining_loops, self.name)
+            self._profile = cProfile.Profile()
+        if self._profile is not None:
+            self._profile.enable()
+
+    def loop_finished(self) -> Optional[str]:
+        """
+        Stop profiling the iteration. Call at the end of each iteration.
+
+        :return: the path of the stats once the requested number of iterations is profiled
+        """
+        if self._profile is None:
+            return None
+        self._profile.disable()
+        self._remaining_loops -= 1
+        if self._remaining_loops > 0:
+            return None
+
+        profile, self._profile = self._profile, None
+        try:
+            return self._dump(profile)
+        except OSError:
+            self.log.exception("Failed to write the profile of the %s loop to %s", self.name, self.folder)
+            return None
+
+    def _dump(self, profile: cProfile.Profile) -> str:
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(
+            self.folder, "{}-{}-{}".format(self.name, os.getpid(), time.strftime("%Y%m%dT%H%M%S"))
+        )
+        profile.dump_stats(path + ".prof")
+
+        report = io.StringIO()
+        stats = pstats.Stats(profile, stream=report)
+        stats.sort_stats("cumulative").print_stats(50)
+        with open(path + ".txt", "w") as report_file:
+            report_file.write(report.getvalue())
+
+        self.log.info("Wrote the profile of the %s loop to %s.prof and %s.txt", self.name, path, path)
+        return path + ".prof"
+
+
+class DagFileParseProfile:
+    """
+    Where the time went while a DAG file was parsed.
+
+    ``durations`` holds the seconds spent in each phase of the parsing, ``counts`` the number
+    of times each phase ran: ``top_level_code`` is the execution of the module, ``imports``
+    the modules it imported first, ``dag_init`` the constructors of the DAGs, ``operator_init``
+    the construction of the operators and ``bag_dag`` the checks run once the DAGs are found.
+    Nested phases of the same kind, e.g. operators building other operators, are counted once.
+
+    :param file_path: the path of the DAG file
+    :type file_path: str
+    """
+
+    PHASES = ('top_level_code', 'imports', 'dag_init', 'operator_init', 'bag_dag')
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.duration = 0.0
+        self.durations: Dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        self.counts: Dict[str, int] = dict.fromkeys(self.PHASES, 0)
+        # Cumulative import time of each module imported for the first time, with its own imports
+        self.module_import_durations: Dict[str, float] = {}
+        # Queries sent to the metadata database by the top level code
+        self.queries = 0
+
+    def slowest_imports(self, num: int = 5) -> List[Tuple[str, float]]:
+        """The ``num`` modules that took the longest to import, with their cumulative import time"""
+        return sorted(self.module_import_durations.items(), key=lambda item: item[1], reverse=True)[:num]
+
+
+class DagParseProfiler(LoggingMixin):
+    """
+    Profiles the parsing of DAG files: the import time of each module imported for the first
+    time, the queries sent to the metadata database by the top level code, and the time spent
+    constructing DAGs and operators and bagging the DAGs, see :class:`DagFileParseProfile`.
+
+    While a file is profiled ``builtins.__import__``, ``DAG.__init__`` and
+    ``BaseOperatorMeta.__call__`` are wrapped, and only the calls made from the parsing thread
+    are measured. Modules already imported by the process are not imported again, so their cost
+    is only attributed to the first file importing them.
+
+    For each profiled file, the durations are emitted as the
+    ``dag_processing.parse_profile.<dag_file>.<phase>`` timers and the queries as the
+    ``dag_processing.parse_profile.<dag_file>.queries`` counter.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.profiles: Dict[str, DagFileParseProfile] = {}
+        self._current: Optional[DagFileParseProfile] = None
+        self._thread_id: Optional[int] = None
+        self._active_phases: Set[str] = set()
+
+    @contextmanager
+    def profile_file(self, file_path: str):
+        """Profile the parsing of the file run in the context"""
+        if self._current is not None:
+            # A file parsed while parsing another one, e.g. by a DagBag created at the top level
+            yield self._current
+            return
+
+        profile = DagFileParseProfile(file_path)
+        self._current, self._thread_id = profile, threading.get_ident()
+        start = time.perf_counter()
+        try:
+            with self._wrap_constructors():
+                yield profile
+        finally:
+            profile.duration = time.perf_counter() - start
+            self._current, self._thread_id = None, None
+            self._active_phases.clear()
+            self.profiles[file_path] = profile
+            self._emit(profile)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the time spent in the context to the given phase of the profiled file, if any"""
+        profile = self._current
+        if profile is None or name in self._active_phases or threading.get_ident() != self._thread_id:
+            yield
+            return
+
+        self._active_phases.add(name)
+        if name == 'top_level_code':
+            _query_counter.listen()
+            queries = _query_counter.queries
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            profile.durations[name] += time.perf_counter() - start
+            profile.counts[name] += 1
+            if name == 'top_level_code':
+                profile.queries += _query_counter.queries - queries
+            self._active_phases.discard(name)
+
+    @contextmanager
+    def _wrap_constructors(self):
+        # Avoid circular imports
+        from airflow.models.baseoperator import BaseOperatorMeta
+        from airflow.models.dag import DAG
+
+        original_import = builtins.__import__
+        original_dag_init = DAG.__init__
+        original_operator_call = BaseOperatorMeta.__call__
+
+        @functools.wraps(original_import)
+        # pylint: disable=redefined-builtin
+        def profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+            profile = self._current
+            if level or name in sys.modules or profile is None or threading.get_ident() != self._thread_id:
+                return original_import(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            try:
+                with self.phase('imports'):
+                    return original_import(name, globals, locals, fromlist, level)
+            finally:
+                profile.module_import_durations[name] = time.perf_counter() - start
+
+        @functools.wraps(original_dag_init)
+        def profiled_dag_init(*args, **kwargs):
+            with self.phase('dag_init'):
+                original_dag_init(*args, **kwargs)
+
+        @functools.wraps(original_operator_call)
+        def profiled_operator_call(cls, *args, **kwargs):
+            with self.phase('operator_init'):
+                return original_operator_call(cls, *args, **kwargs)
+
+        builtins.__import__ = profiled_import
+        DAG.__init__ = profiled_dag_init
+        BaseOperatorMeta.__call__ = profiled_operator_call
+        try:
+            yield
+        finally:
+            builtins.__import__ = original_import
+            DAG.__init__ = original_dag_init
+            BaseOperatorMeta.__call__ = original_operator_call
+
+    def _emit(self, profile: DagFileParseProfile) -> None:
+        file_name = os.path.splitext(os.path.basename(profile.file_path))[0]
+        prefix = f'dag_processing.parse_profile.{file_name}'
+        for phase, duration in profile.durations.items():
+            Stats.timing(f'{prefix}.{phase}', timedelta(seconds=duration))
+        Stats.incr(f'{prefix}.queries', profile.queries)
+
+        self.log.info(
+            "Parsed %s in %.2fs: top level code %.2fs (imports %.2fs, %d queries), "
+            "%d DAGs in %.2fs, %d operators in %.2fs, bag_dag %.2fs. Slowest imports: %s",
+            profile.file_path, profile.duration, profile.durations['top_level_code'],
+            profile.durations['imports'], profile.queries,
+            profile.counts['dag_init'], profile.durations['dag_init'],
+            profile.counts['operator_init'], profile.durations['operator_init'],
+            profile.durations['bag_dag'],
+            ", ".join(f"{name} {duration:.2f}s" for name, duration in profile.slowest_imports()) or "none",
+        )
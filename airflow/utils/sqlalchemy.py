@@ -23,6 +23,8 @@ from typing import Any, Dict
 
 import pendulum
 from dateutil import relativedelta
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.query import Query
 from sqlalchemy.orm.session import Session
 from sqlalchemy.types import DateTime, Text, TypeDecorator
 
@@ -34,6 +36,8 @@ utc = pendulum.tz.timezone('UTC')
 
 using_mysql = conf.get('core', 'sql_alchemy_conn').lower().startswith('mysql')
 
+USE_ROW_LEVEL_LOCKING: bool = conf.getboolean('scheduler', 'use_row_level_locking', fallback=True)
+
 
 # pylint: enable=unused-argument
 class UtcDateTime(TypeDecorator):
@@ -141,3 +145,61 @@ def skip_locked(session: Session) -> Dict[str, Any]:
         return {'skip_locked': True}
     else:
         return {}
+
+
+def nowait(session: Session) -> Dict[str, Any]:
+    """
+    Return kwargs for passing to `with_for_update()` suitable for the current DB engine version.
+
+    We do this as we document the fact that on DB engines that don't support this construct, we do not
+    support/recommend running HA scheduler. If a user ignores this and tries anyway everything will still
+    work, just slightly slower in some circumstances.
+
+    Specifically don't emit NOWAIT for MySQL < 8, or MariaDB, neither of which support this construct
+
+    See https://jira.mariadb.org/browse/MDEV-13115
+    """
+    dialect = session.bind.dialect
+
+    if dialect.name != "mysql" or dialect.supports_for_update_of:
+        return {'nowait': True}
+    else:
+        return {}
+
+
+def with_row_locks(query: Query, **kwargs) -> Query:
+    """
+    Apply with_for_update to an SQLAlchemy query, if row level locking is in use.
+
+    :param query: An SQLAlchemy Query object
+    :param kwargs: Extra kwargs to pass to with_for_update (of, nowait, skip_locked, etc)
+    :return: updated query
+    """
+    if USE_ROW_LEVEL_LOCKING:
+        return query.with_for_update(**kwargs)
+    else:
+        return query
+
+
+def is_lock_not_available_error(error: OperationalError) -> bool:
+    """
+    Check if the Error is about not being able to acquire lock, i.e. a row locked
+    with ``NOWAIT`` by another transaction.
+
+    :param error: the error raised by the DB driver
+    :type error: sqlalchemy.exc.OperationalError
+    """
+    # DB specific error codes:
+    # Postgres: 55P03
+    # MySQL: 3572, 'Statement aborted because lock(s) could not be acquired immediately and NOWAIT
+    #               is set.'
+    # MySQL: 1205, 'Lock wait timeout exceeded; try restarting transaction
+    #              (when NOWAIT isn't available)
+    db_err_code = getattr(error.orig, 'pgcode', None) or error.orig.args[0]
+
+    # We could test if error.orig is an instance of
+    # psycopg2.errors.LockNotAvailable/_mysql_exceptions.OperationalError, but that involves
+    # importing the driver, which checking the error code doesn't.
+    if db_err_code in ('55P03', 1205, 3572):
+        return True
+    return False
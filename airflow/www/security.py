@@ -113,6 +113,7 @@ class AirflowSecurityManager(SecurityManager, LoggingMixin):
         'can_tries',
         'can_graph',
         'can_tree',
+        'can_tree_data',
         'can_task',
         'can_task_instances',
         'can_xcom',
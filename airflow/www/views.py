@@ -24,9 +24,9 @@ import math
 import socket
 import traceback
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import timedelta
 from json import JSONDecodeError
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 from urllib.parse import unquote, urlparse
 
 import lazy_object_proxy
@@ -40,7 +40,7 @@ from flask_appbuilder import BaseView, ModelView, expose, has_access, permission
 from flask_appbuilder.actions import action
 from flask_appbuilder.models.sqla.filters import BaseFilter  # noqa
 from flask_babel import lazy_gettext
-from jinja2.utils import htmlsafe_json_dumps, pformat  # type: ignore
+from jinja2.utils import pformat  # type: ignore
 from pygments import highlight, lexers
 from pygments.formatters import HtmlFormatter  # noqa pylint: disable=no-name-in-module
 from sqlalchemy import and_, desc, func, or_, union_all
@@ -304,6 +304,119 @@ def dag_edges(dag):
             in sorted(edges.union(edges_to_add) - edges_to_skip)]
 
 
+def tree_data(dag, dag_runs, task_instances, start_task_ids=None, depth=None):
+    """
+    Encode the tree view data in columns instead of one nested node per path
+    through the DAG, so the payload grows with tasks x runs rather than with
+    the number of paths.
+
+    Tasks are listed once and referred to by their index in that list: the DAG
+    structure is a list of ``[upstream, downstream]`` index pairs and the task
+    instances are matrices with one row per task and one column per run, oldest
+    run first. States are given as codes into the ``states`` list, ``null``
+    means there is no task instance.
+
+    :param dag: the DAG to encode
+    :param dag_runs: the DagRuns to include, oldest first
+    :param task_instances: TaskInstances of those runs, keyed by (task_id, execution_date)
+    :param start_task_ids: the tasks to start from, defaults to the DAG roots
+    :param depth: how many levels of downstream tasks to include below the start
+        tasks, all of them if None. Tasks that have more downstream tasks than
+        were included are listed in ``truncated``, to be fetched when expanded.
+    """
+    if start_task_ids is None:
+        start_task_ids = [task.task_id for task in dag.roots]
+
+    # Breadth first, so that a depth limit cuts the tree at the same level everywhere
+    task_ids = list(dict.fromkeys(start_task_ids))
+    index = {task_id: i for i, task_id in enumerate(task_ids)}
+    level = [0] * len(task_ids)
+    truncated = []
+    for i, task_id in enumerate(task_ids):  # task_ids grows while iterating
+        downstream_ids = sorted(dag.task_dict[task_id].downstream_task_ids)
+        if depth is not None and level[i] >= depth:
+            if downstream_ids:
+                truncated.append(i)
+            continue
+        for downstream_id in downstream_ids:
+            if downstream_id not in index:
+                index[downstream_id] = len(task_ids)
+                task_ids.append(downstream_id)
+                level.append(level[i] + 1)
+
+    truncated_ids = {task_ids[i] for i in truncated}
+    edges = [
+        [index[task_id], index[downstream_id]]
+        for task_id in task_ids if task_id not in truncated_ids
+        for downstream_id in sorted(dag.task_dict[task_id].downstream_task_ids)
+        if downstream_id in index
+    ]
+
+    tasks = [dag.task_dict[task_id] for task_id in task_ids]
+    dates = [dag_run.execution_date for dag_run in dag_runs]
+
+    states: List[Optional[str]] = []
+    state_codes: Dict[Optional[str], int] = {}
+    state_matrix, try_number_matrix, start_ts_matrix, duration_matrix = [], [], [], []
+    for task_id in task_ids:
+        state_row, try_number_row, start_ts_row, duration_row = [], [], [], []
+        for execution_date in dates:
+            ti = task_instances.get((task_id, execution_date))
+            if ti is None:
+                state_row.append(None)
+                try_number_row.append(None)
+                start_ts_row.append(None)
+                duration_row.append(None)
+                continue
+            if ti.state not in state_codes:
+                state_codes[ti.state] = len(states)
+                states.append(ti.state)
+            state_row.append(state_codes[ti.state])
+            try_number_row.append(ti.try_number)
+            # round to seconds to reduce payload size
+            start_ts_row.append(int(ti.start_date.timestamp()) if ti.start_date else None)
+            duration_row.append(int(ti.duration) if ti.start_date and ti.duration is not None else None)
+        state_matrix.append(state_row)
+        try_number_matrix.append(try_number_row)
+        start_ts_matrix.append(start_ts_row)
+        duration_matrix.append(duration_row)
+
+    return {
+        'tasks': {
+            'task_id': task_ids,
+            'operator': [task.task_type for task in tasks],
+            'retries': [task.retries for task in tasks],
+            'owner': [task.owner for task in tasks],
+            'ui_color': [task.ui_color for task in tasks],
+            'depends_on_past': [task.depends_on_past for task in tasks],
+            'start_ts': [int(task.start_date.timestamp()) if task.start_date else None for task in tasks],
+            'end_ts': [int(task.end_date.timestamp()) if task.end_date else None for task in tasks],
+            'extra_links': [task.extra_links for task in tasks],
+        },
+        'edges': edges,
+        'truncated': truncated,
+        'runs': {
+            'run_id': [dag_run.run_id for dag_run in dag_runs],
+            'execution_date': [dag_run.execution_date.isoformat() for dag_run in dag_runs],
+            'state': [dag_run.state for dag_run in dag_runs],
+            'start_date': [
+                dag_run.start_date.isoformat() if dag_run.start_date else None for dag_run in dag_runs
+            ],
+            'end_date': [
+                dag_run.end_date.isoformat() if dag_run.end_date else None for dag_run in dag_runs
+            ],
+            'external_trigger': [dag_run.external_trigger for dag_run in dag_runs],
+        },
+        'states': states,
+        'instances': {
+            'state': state_matrix,
+            'try_number': try_number_matrix,
+            'start_ts': start_ts_matrix,
+            'duration': duration_matrix,
+        },
+    }
+
+
 ######################################################################################
 #                                    Error handlers
 ######################################################################################
@@ -1586,7 +1699,7 @@ class Airflow(AirflowBaseView):  # noqa: D101  pylint: disable=too-many-public-m
     @has_access
     @gzipped
     @action_logging
-    def tree(self):  # pylint: disable=too-many-locals
+    def tree(self):
         """Get Dag as tree."""
         dag_id = request.args.get('dag_id')
         blur = conf.getboolean('webserver', 'demo_mode')
@@ -1614,114 +1727,16 @@ class Airflow(AirflowBaseView):  # noqa: D101  pylint: disable=too-many-public-m
         else:
             base_date = dag.get_latest_execution_date() or timezone.utcnow()
 
-        with create_session() as session:
-            dag_runs = (
-                session.query(DagRun)
-                .filter(
-                    DagRun.dag_id == dag.dag_id,
-                    DagRun.execution_date <= base_date)
-                .order_by(DagRun.execution_date.desc())
-                .limit(num_runs)
-                .all()
-            )
-        dag_runs = {
-            dr.execution_date: alchemy_to_dict(dr) for dr in dag_runs
-        }
-
-        dates = sorted(list(dag_runs.keys()))
-        max_date = max(dates) if dates else None
-        min_date = min(dates) if dates else None
-
-        tis = dag.get_task_instances(start_date=min_date, end_date=base_date)
-        task_instances: Dict[Tuple[str, datetime], models.TaskInstance] = {}
-        for ti in tis:
-            task_instances[(ti.task_id, ti.execution_date)] = ti
-
-        expanded = set()
-        # The default recursion traces every path so that tree view has full
-        # expand/collapse functionality. After 5,000 nodes we stop and fall
-        # back on a quick DFS search for performance. See PR #320.
-        node_count = 0
-        node_limit = 5000 / max(1, len(dag.leaves))
-
-        def encode_ti(task_instance: Optional[models.TaskInstance]) -> Optional[List]:
-            if not task_instance:
-                return None
-
-            # NOTE: order of entry is important here because client JS relies on it for
-            # tree node reconstruction. Remember to change JS code in tree.html
-            # whenever order is altered.
-            task_instance_data = [
-                task_instance.state,
-                task_instance.try_number,
-                None,  # start_ts
-                None,  # duration
-            ]
-
-            if task_instance.start_date:
-                # round to seconds to reduce payload size
-                task_instance_data[2] = int(task_instance.start_date.timestamp())
-                if task_instance.duration is not None:
-                    task_instance_data[3] = int(task_instance.duration)
-
-            return task_instance_data
-
-        def recurse_nodes(task, visited):
-            nonlocal node_count
-            node_count += 1
-            visited.add(task)
-            task_id = task.task_id
-
-            node = {
-                'name': task.task_id,
-                'instances': [
-                    encode_ti(task_instances.get((task_id, d)))
-                    for d in dates
-                ],
-                'num_dep': len(task.downstream_list),
-                'operator': task.task_type,
-                'retries': task.retries,
-                'owner': task.owner,
-                'ui_color': task.ui_color,
-            }
-
-            if task.downstream_list:
-                children = [
-                    recurse_nodes(t, visited) for t in task.downstream_list
-                    if node_count < node_limit or t not in visited]
-
-                # D3 tree uses children vs _children to define what is
-                # expanded or not. The following block makes it such that
-                # repeated nodes are collapsed by default.
-                if task.task_id not in expanded:
-                    children_key = 'children'
-                    expanded.add(task.task_id)
-                else:
-                    children_key = "_children"
-                node[children_key] = children
-
-            if task.depends_on_past:
-                node['depends_on_past'] = task.depends_on_past
-            if task.start_date:
-                # round to seconds to reduce payload size
-                node['start_ts'] = int(task.start_date.timestamp())
-                if task.end_date:
-                    # round to seconds to reduce payload size
-                    node['end_ts'] = int(task.end_date.timestamp())
-            if task.extra_links:
-                node['extra_links'] = task.extra_links
-            return node
-
-        data = {
-            'name': '[DAG]',
-            'children': [recurse_nodes(t, set()) for t in dag.roots],
-            'instances': [
-                dag_runs.get(d) or {'execution_date': d.isoformat()}
-                for d in dates
-            ],
-        }
+        # The runs and task instances are fetched by the page from tree_data, so that
+        # loading the page does not wait for them
+        tree_data_url = url_for(
+            'Airflow.tree_data',
+            dag_id=dag.dag_id,
+            num_runs=num_runs,
+            base_date=base_date.isoformat(),
+            task_regex=root or None)
 
-        form = DateTimeWithNumRunsForm(data={'base_date': max_date,
+        form = DateTimeWithNumRunsForm(data={'base_date': base_date,
                                              'num_runs': num_runs})
 
         doc_md = wwwutils.wrapped_markdown(getattr(dag, 'doc_md', None), css_class='dag-doc')
@@ -1732,9 +1747,6 @@ class Airflow(AirflowBaseView):  # noqa: D101  pylint: disable=too-many-public-m
         else:
             external_log_name = None
 
-        # avoid spaces to reduce payload size
-        data = htmlsafe_json_dumps(data, separators=(',', ':'))
-
         return self.render_template(
             'airflow/tree.html',
             operators=sorted({op.task_type: op for op in dag.tasks}.values(), key=lambda x: x.task_type),
@@ -1742,11 +1754,93 @@ class Airflow(AirflowBaseView):  # noqa: D101  pylint: disable=too-many-public-m
             form=form,
             dag=dag,
             doc_md=doc_md,
-            data=data,
+            tree_data_url=tree_data_url,
             blur=blur, num_runs=num_runs,
             show_external_log_redirect=task_log_reader.supports_external_link,
             external_log_name=external_log_name)
 
+    @expose('/object/tree_data')
+    @has_dag_access(can_dag_read=True)
+    @has_access
+    @gzipped
+    @action_logging
+    @provide_session
+    def tree_data(self, session=None):
+        """
+        Get the tree view data in a compact columnar encoding, see :func:`tree_data`.
+
+        Older runs are fetched by passing ``next_base_date`` from the previous response
+        as ``base_date``, collapsed subtrees by passing the ``truncated`` task as ``root``.
+        ``task_regex`` limits the DAG to the matching tasks and their upstream tasks, like
+        the ``root`` argument of the tree view.
+        """
+        dag_id = request.args.get('dag_id')
+        dag = current_app.dag_bag.get_dag(dag_id)
+        if not dag:
+            response = jsonify({'error': 'DAG "{}" seems to be missing from DagBag.'.format(dag_id)})
+            response.status_code = 404
+            return response
+
+        try:
+            num_runs = int(request.args.get(
+                'num_runs', conf.getint('webserver', 'default_dag_run_display_number')))
+            depth = request.args.get('depth')
+            depth = int(depth) if depth is not None else None
+            base_date = request.args.get('base_date')
+            base_date = timezone.parse(base_date) if base_date else None
+        except ValueError as e:
+            response = jsonify({'error': str(e)})
+            response.status_code = 400
+            return response
+        if num_runs < 1 or (depth is not None and depth < 0):
+            response = jsonify({'error': 'num_runs must be at least 1 and depth must not be negative.'})
+            response.status_code = 400
+            return response
+
+        task_regex = request.args.get('task_regex')
+        if task_regex:
+            dag = dag.sub_dag(
+                task_regex=task_regex,
+                include_downstream=False,
+                include_upstream=True)
+
+        root = request.args.get('root')
+        if root and root not in dag.task_dict:
+            response = jsonify({'error': 'Task "{}" not found in DAG "{}".'.format(root, dag_id)})
+            response.status_code = 404
+            return response
+
+        query = session.query(DagRun).filter(DagRun.dag_id == dag.dag_id)
+        if base_date:
+            query = query.filter(DagRun.execution_date <= base_date)
+        # Fetch one more run than asked for, to know where the next page starts
+        dag_runs = query.order_by(DagRun.execution_date.desc()).limit(num_runs + 1).all()
+        next_base_date = dag_runs.pop().execution_date.isoformat() if len(dag_runs) > num_runs else None
+        dag_runs.reverse()
+
+        task_instances = {}
+        if dag_runs:
+            tis = session.query(TaskInstance).filter(
+                TaskInstance.dag_id == dag.dag_id,
+                TaskInstance.execution_date.in_([dag_run.execution_date for dag_run in dag_runs]),
+            )
+            task_instances = {(ti.task_id, ti.execution_date): ti for ti in tis}
+
+        data = tree_data(
+            dag,
+            dag_runs,
+            task_instances,
+            start_task_ids=[root] if root else None,
+            depth=depth,
+        )
+        data['dag_id'] = dag.dag_id
+        data['next_base_date'] = next_base_date
+        # avoid spaces to reduce payload size
+        return Response(
+            response=json.dumps(data, separators=(',', ':')),
+            status=200,
+            mimetype="application/json")
+
     @expose('/graph')
     @has_dag_access(can_dag_read=True)
     @has_access
@@ -27,6 +27,7 @@ import airflow
 from airflow.cli import cli_parser
 from airflow.cli.commands import celery_command
 from airflow.configuration import conf
+from airflow.utils.heartbeat_aggregator import serve_heartbeat_aggregator
 from tests.test_utils.config import conf_vars
 
 
@@ -91,6 +92,21 @@ class TestWorkerServeLogs(unittest.TestCase):
                 celery_command.worker(args)
                 mock_popen.assert_not_called()
 
+    @mock.patch('airflow.cli.commands.celery_command.worker_bin')
+    @conf_vars({
+        ("core", "executor"): "CeleryExecutor",
+        ("core", "heartbeat_aggregator_socket"): "/tmp/airflow-heartbeat-aggregator.sock",
+    })
+    def test_serve_heartbeat_aggregator_on_worker_start(self, mock_worker):
+        with mock.patch('airflow.cli.commands.celery_command.Process') as mock_process:
+            args = self.parser.parse_args(['celery', 'worker', '--concurrency', '1', '--skip-serve-logs'])
+
+            with mock.patch('celery.platforms.check_privileges') as mock_privil:
+                mock_privil.return_value = 0
+                celery_command.worker(args)
+                mock_process.assert_called_once_with(target=serve_heartbeat_aggregator)
+                mock_process.return_value.terminate.assert_called_once_with()
+
 
 @pytest.mark.backend("mysql", "postgres")
 class TestCeleryStopCommand(unittest.TestCase):
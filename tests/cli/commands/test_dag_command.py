@@ -335,6 +335,16 @@ class TestCliDags(unittest.TestCase):
         self.assertIn("airflow/example_dags/example_complex.py ", out)
         self.assertIn("['example_complex']", out)
 
+    def test_cli_report_profile(self):
+        args = self.parser.parse_args(['dags', 'report', '--profile'])
+        with contextlib.redirect_stdout(io.StringIO()) as temp_stdout:
+            dag_command.dag_report(args)
+            out = temp_stdout.getvalue()
+
+        self.assertIn("airflow/example_dags/example_complex.py ", out)
+        self.assertIn("operator_init", out)
+        self.assertIn("slowest_imports", out)
+
     @conf_vars({
         ('core', 'load_examples'): 'true'
     })
@@ -16,6 +16,7 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import sys
 import unittest
 from datetime import datetime, timedelta
 from unittest import mock
@@ -70,3 +71,12 @@ class TestBaseExecutor(unittest.TestCase):
         key3 = TaskInstance(task=task_3, execution_date=date)
         tis = [key1, key2, key3]
         self.assertEqual(BaseExecutor().try_adopt_task_instances(tis), tis)
+
+    def test_slots_available(self):
+        date = datetime.utcnow()
+        executor = BaseExecutor(parallelism=3)
+        executor.running.add(TaskInstanceKey("my_dag1", "my_task1", date, 1))
+        executor.queued_tasks[TaskInstanceKey("my_dag1", "my_task2", date, 1)] = mock.MagicMock()
+        self.assertEqual(executor.slots_available, 1)
+
+        self.assertEqual(BaseExecutor(parallelism=0).slots_available, sys.maxsize)
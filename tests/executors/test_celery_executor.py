@@ -19,6 +19,7 @@ import contextlib
 import json
 import os
 import sys
+import time
 import unittest
 from datetime import datetime, timedelta
 from unittest import mock
@@ -26,7 +27,7 @@ from unittest import mock
 # leave this it is used by the test worker
 import celery.contrib.testing.tasks  # noqa: F401 pylint: disable=unused-import
 import pytest
-from celery import Celery
+from celery import Celery, states as celery_states
 from celery.backends.base import BaseBackend, BaseKeyValueStoreBackend  # noqa
 from celery.backends.database import DatabaseBackend
 from celery.contrib.testing.worker import start_worker
@@ -34,6 +35,7 @@ from celery.result import AsyncResult
 from kombu.asynchronous import set_event_loop
 from parameterized import parameterized
 
+from airflow import settings
 from airflow.configuration import conf
 from airflow.exceptions import AirflowException
 from airflow.executors import celery_executor
@@ -45,6 +47,7 @@ from airflow.operators.bash import BashOperator
 from airflow.utils import timezone
 from airflow.utils.state import State
 from tests.test_utils import db
+from tests.test_utils.config import conf_vars
 
 
 def _prepare_test_bodies():
@@ -225,18 +228,35 @@ class TestCeleryExecutor(unittest.TestCase):
         [['airflow', 'version'], ValueError],
         [['airflow', 'tasks', 'run'], None]
     ))
+    @mock.patch('airflow.executors.celery_executor.execute_in_fork')
     @mock.patch('subprocess.check_output')
-    def test_command_validation(self, command, expected_exception, mock_check_output):
+    def test_command_validation(self, command, expected_exception, mock_check_output, mock_execute_in_fork):
         # Check that we validate _on the receiving_ side, not just sending side
-        if expected_exception:
-            with pytest.raises(expected_exception):
+        with mock.patch.object(settings, 'EXECUTE_TASKS_NEW_PYTHON_INTERPRETER', True):
+            if expected_exception:
+                with pytest.raises(expected_exception):
+                    celery_executor.execute_command(command)
+                mock_check_output.assert_not_called()
+            else:
                 celery_executor.execute_command(command)
-            mock_check_output.assert_not_called()
-        else:
+                mock_check_output.assert_called_once_with(
+                    command, stderr=mock.ANY, close_fds=mock.ANY, env=mock.ANY,
+                )
+        mock_execute_in_fork.assert_not_called()
+
+    @mock.patch('airflow.executors.celery_executor.execute_in_fork')
+    @mock.patch('subprocess.check_output')
+    def test_execute_command_in_fork(self, mock_check_output, mock_execute_in_fork):
+        command = ['airflow', 'tasks', 'run', 'dag', 'task']
+        with mock.patch.object(settings, 'EXECUTE_TASKS_NEW_PYTHON_INTERPRETER', False):
+            mock_execute_in_fork.return_value = 0
             celery_executor.execute_command(command)
-            mock_check_output.assert_called_once_with(
-                command, stderr=mock.ANY, close_fds=mock.ANY, env=mock.ANY,
-            )
+            mock_execute_in_fork.assert_called_once_with(command)
+
+            mock_execute_in_fork.return_value = 1
+            with pytest.raises(AirflowException, match='Celery command failed'):
+                celery_executor.execute_command(command)
+        mock_check_output.assert_not_called()
 
     @pytest.mark.backend("mysql", "postgres")
     def test_try_adopt_task_instances_none(self):
@@ -321,6 +341,149 @@ class TestCeleryExecutor(unittest.TestCase):
         self.assertEqual(executor.tasks, {})
         self.assertEqual(executor.adopted_task_timeouts, {})
 
+    @mock.patch('airflow.executors.celery_executor.app')
+    def test_send_tasks_to_executor_with_one_producer(self, mock_app):
+        producer = mock_app.producer_or_acquire.return_value.__enter__.return_value
+        task = mock.MagicMock()
+        task.apply_async.side_effect = [mock.sentinel.result, ValueError("broken")]
+        task_tuples = [
+            ('key_1', None, ['airflow', 'tasks', 'run', '1'], 'default', task),
+            ('key_2', None, ['airflow', 'tasks', 'run', '2'], 'default', task),
+        ]
+
+        results = celery_executor.send_tasks_to_executor(task_tuples)
+
+        mock_app.producer_or_acquire.assert_called_once_with()
+        task.apply_async.assert_any_call(
+            args=[['airflow', 'tasks', 'run', '1']], queue='default', producer=producer
+        )
+        self.assertEqual(results[0], ('key_1', ['airflow', 'tasks', 'run', '1'], mock.sentinel.result))
+        self.assertEqual(results[1][0], 'key_2')
+        self.assertIsInstance(results[1][2], celery_executor.ExceptionWithTraceback)
+
+    @mock.patch('airflow.executors.celery_executor.app')
+    def test_send_tasks_to_executor_without_broker(self, mock_app):
+        mock_app.producer_or_acquire.side_effect = ConnectionError("broker is down")
+        task_tuples = [('key_1', None, ['true'], 'default', mock.MagicMock())]
+
+        results = celery_executor.send_tasks_to_executor(task_tuples)
+
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0][2], celery_executor.ExceptionWithTraceback)
+        self.assertIsInstance(results[0][2].exception, ConnectionError)
+
+    @mock.patch('airflow.executors.celery_executor.Pool')
+    def test_send_pool_is_kept_between_heartbeats(self, mock_pool):
+        mock_pool.return_value.map.side_effect = lambda func, batches, chunksize: [
+            [(key, command, mock.sentinel.result) for key, _, command, _, _ in batch] for batch in batches
+        ]
+        executor = celery_executor.CeleryExecutor()
+        executor._sync_parallelism = 2
+        task_tuples = [(f'key_{i}', None, ['true'], 'default', None) for i in range(5)]
+
+        for _ in range(2):
+            results = executor._send_tasks_to_celery(task_tuples)
+            self.assertEqual([key for key, _, _ in results], [f'key_{i}' for i in range(5)])
+
+        mock_pool.assert_called_once_with(processes=2, initializer=mock.ANY)
+        # The tasks are sent in one batch per process
+        batches = list(mock_pool.return_value.map.call_args[0][1])
+        self.assertEqual([len(batch) for batch in batches], [3, 2])
+
+        executor.end()
+        mock_pool.return_value.close.assert_called_once_with()
+        mock_pool.return_value.join.assert_called_once_with()
+        self.assertIsNone(executor._send_pool)
+
+    @conf_vars({('celery', 'use_task_events'): 'True'})
+    @mock.patch('airflow.executors.celery_executor.TaskEventReceiver')
+    @mock.patch('airflow.executors.celery_executor.Pool')
+    def test_send_pool_is_forked_before_task_event_receiver_starts(self, mock_pool, mock_receiver):
+        calls = mock.Mock()
+        calls.attach_mock(mock_pool, 'pool')
+        calls.attach_mock(mock_receiver.return_value.start, 'receiver_start')
+        executor = celery_executor.CeleryExecutor()
+        executor._sync_parallelism = 2
+
+        executor.start()
+        self.assertEqual(
+            [call[0] for call in calls.mock_calls], ['pool', 'receiver_start']
+        )
+        self.assertIs(executor._send_pool, mock_pool.return_value)
+
+    @conf_vars({('celery', 'use_task_events'): 'True', ('celery', 'task_events_reconcile_interval'): '60'})
+    def test_update_task_states_from_events(self):
+        executor = celery_executor.CeleryExecutor()
+        executor.task_event_receiver = mock.MagicMock()
+        executor.task_event_receiver.pop_states.return_value = {
+            'succeeded_id': (celery_states.SUCCESS, None),
+            'unknown_id': (celery_states.FAILURE, None),
+        }
+        executor.bulk_state_fetcher = mock.MagicMock()
+        executor.bulk_state_fetcher.get_many.return_value = {'stale_id': (celery_states.FAILURE, None)}
+        keys = {name: (name, 'task', timezone.utcnow(), 1) for name in ('succeeded', 'running', 'stale')}
+        executor.tasks = {key: AsyncResult(f'{name}_id') for name, key in keys.items()}
+        executor.running = set(keys.values())
+        executor._reconcile_task_state_after = {
+            keys['succeeded']: time.monotonic() + 60,
+            keys['running']: time.monotonic() + 60,
+            keys['stale']: time.monotonic() - 1,
+        }
+
+        executor.sync()
+
+        # Only the task without any recent event is polled
+        executor.bulk_state_fetcher.get_many.assert_called_once_with([AsyncResult('stale_id')])
+        self.assertEqual(executor.event_buffer[keys['succeeded']][0], State.SUCCESS)
+        self.assertEqual(executor.event_buffer[keys['stale']][0], State.FAILED)
+        self.assertEqual(list(executor.tasks), [keys['running']])
+        self.assertEqual(list(executor._reconcile_task_state_after), [keys['running']])
+
+
+class TestTaskEventReceiver(unittest.TestCase):
+    def test_on_event(self):
+        receiver = celery_executor.TaskEventReceiver()
+        receiver.on_event({'type': 'task-started', 'uuid': 'task_1'})
+        receiver.on_event({'type': 'task-succeeded', 'uuid': 'task_1'})
+        receiver.on_event({'type': 'task-failed', 'uuid': 'task_2', 'exception': 'boom'})
+        # Late events do not bring the tasks back from a ready state
+        receiver.on_event({'type': 'task-started', 'uuid': 'task_2'})
+        receiver.on_event({'type': 'task-received', 'uuid': 'task_3'})
+        receiver.on_event({'type': 'worker-heartbeat'})
+
+        self.assertEqual(
+            receiver.pop_states(),
+            {'task_1': (celery_states.SUCCESS, None), 'task_2': (celery_states.FAILURE, 'boom')}
+        )
+        self.assertEqual(receiver.pop_states(), {})
+
+    def test_receive_events_from_broker(self):
+        app = Celery('test_receive_events_from_broker', broker='memory://')
+        with mock.patch('airflow.executors.celery_executor.app', app):
+            receiver = celery_executor.TaskEventReceiver()
+            receiver.start()
+            try:
+                self._wait_for(lambda: receiver._receiver is not None)
+                # Leave the receiver time to declare its queue
+                time.sleep(1)
+                with app.events.default_dispatcher() as dispatcher:
+                    dispatcher.send('task-succeeded', uuid='task_1')
+                states = {}
+                self._wait_for(lambda: states.update(receiver.pop_states()) or states)
+            finally:
+                receiver.stop()
+
+        self.assertEqual(states, {'task_1': (celery_states.SUCCESS, None)})
+        self.assertIsNone(receiver._thread)
+
+    @staticmethod
+    def _wait_for(condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError("Condition not met in time")
+            time.sleep(0.1)
+
 
 def test_operation_timeout_config():
     assert celery_executor.OPERATION_TIMEOUT == 2
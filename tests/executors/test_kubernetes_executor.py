@@ -15,9 +15,11 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import os
 import random
 import re
 import string
+import tempfile
 import unittest
 from datetime import datetime
 
@@ -25,14 +27,19 @@ import mock
 from urllib3 import HTTPResponse
 
 from airflow.utils import timezone
+from tests.kubernetes.test_pod_cache import EXECUTION_DATE, make_pod
 from tests.test_utils.config import conf_vars
 
 try:
+    from kubernetes.client import models as k8s
     from kubernetes.client.rest import ApiException
 
     from airflow.executors.kubernetes_executor import AirflowKubernetesScheduler, KubernetesExecutor
+    from airflow.executors.kubernetes_executor import KubernetesJobWatcher
     from airflow.kubernetes import pod_generator
+    from airflow.kubernetes.pod_cache import CachedPod, WatchEvent
     from airflow.kubernetes.pod_generator import PodGenerator
+    from airflow.models import TaskInstance
     from airflow.utils.state import State
 except ImportError:
     AirflowKubernetesScheduler = None  # type: ignore
@@ -115,6 +122,152 @@ class TestAirflowKubernetesScheduler(unittest.TestCase):
 
         self.assertEqual(datetime_obj, new_datetime_obj)
 
+    @unittest.skipIf(AirflowKubernetesScheduler is None,
+                     'kubernetes python package is not installed')
+    @mock.patch('airflow.executors.kubernetes_executor.AirflowKubernetesScheduler._make_kube_watcher')
+    def test_base_worker_pod_is_parsed_when_the_file_changes(self, mock_make_kube_watcher):
+        with open(os.path.dirname(__file__) + '/../kubernetes/pod_generator_base.yaml') as template:
+            pod_template = template.read()
+        with tempfile.NamedTemporaryFile('w', suffix='.yaml') as pod_template_file:
+            pod_template_file.write(pod_template)
+            pod_template_file.flush()
+            kube_config = mock.MagicMock(pod_template_file=pod_template_file.name)
+            scheduler = AirflowKubernetesScheduler(
+                kube_config, mock.MagicMock(), mock.MagicMock(), mock.MagicMock(), 'worker-uuid'
+            )
+            with mock.patch.object(
+                PodGenerator, 'deserialize_model_file', wraps=PodGenerator.deserialize_model_file
+            ) as mock_deserialize_model_file:
+                first_pod = scheduler._get_base_worker_pod()
+                second_pod = scheduler._get_base_worker_pod()
+                self.assertEqual(mock_deserialize_model_file.call_count, 1)
+                # Each pod is a copy of the parsed one
+                self.assertEqual(first_pod, second_pod)
+                self.assertIsNot(first_pod, second_pod)
+                self.assertIsNot(first_pod.spec.containers[0], second_pod.spec.containers[0])
+
+                stat = os.stat(pod_template_file.name)
+                os.utime(pod_template_file.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+                scheduler._get_base_worker_pod()
+                self.assertEqual(mock_deserialize_model_file.call_count, 2)
+
+    @unittest.skipIf(AirflowKubernetesScheduler is None,
+                     'kubernetes python package is not installed')
+    @mock.patch('airflow.executors.kubernetes_executor.AirflowKubernetesScheduler._make_kube_watcher')
+    @mock.patch('time.sleep')
+    def test_create_pod_is_retried_when_throttled(self, mock_sleep, mock_make_kube_watcher):
+        response = HTTPResponse(body='{"message": "Too many requests"}')
+        response.status = 429
+        response.reason = "TooManyRequests"
+        scheduler = AirflowKubernetesScheduler(
+            mock.MagicMock(kube_client_request_args={}), mock.MagicMock(), mock.MagicMock(),
+            mock.MagicMock(), 'worker-uuid'
+        )
+        pod = k8s.V1Pod(metadata=k8s.V1ObjectMeta(name='pod', namespace='default'))
+        with mock.patch.object(scheduler.launcher, 'run_pod_async') as mock_run_pod_async:
+            mock_run_pod_async.side_effect = [ApiException(http_resp=response), None]
+            scheduler._create_pod(pod)
+            self.assertEqual(mock_run_pod_async.call_count, 2)
+
+            # The requests which are invalid are not retried
+            response.status = 400
+            response.reason = "BadRequest"
+            mock_run_pod_async.reset_mock()
+            mock_run_pod_async.side_effect = ApiException(http_resp=response)
+            with self.assertRaises(ApiException):
+                scheduler._create_pod(pod)
+            self.assertEqual(mock_run_pod_async.call_count, 1)
+
+    @unittest.skipIf(AirflowKubernetesScheduler is None,
+                     'kubernetes python package is not installed')
+    @mock.patch('airflow.executors.kubernetes_executor.AirflowKubernetesScheduler._make_kube_watcher')
+    def test_process_watcher_event(self, mock_make_kube_watcher):
+        scheduler = AirflowKubernetesScheduler(
+            mock.MagicMock(), mock.MagicMock(), mock.MagicMock(), mock.MagicMock(), 'worker-uuid'
+        )
+        key = ('dag', 'task', EXECUTION_DATE, 1)
+
+        def event(event_type, *pods):
+            return WatchEvent(event_type, [CachedPod.from_pod(pod) for pod in pods], None)
+
+        scheduler.process_watcher_event(event('SYNC', make_pod('pod', phase='Running')))
+        scheduler.process_watcher_event(event('MODIFIED', make_pod('pod', phase='Running')))
+        scheduler.result_queue.put.assert_not_called()
+
+        # The state of a task is only sent when the phase of its pod changed
+        scheduler.process_watcher_event(event('MODIFIED', make_pod('pod', phase='Failed')))
+        scheduler.process_watcher_event(event('MODIFIED', make_pod('pod', phase='Failed')))
+        scheduler.process_watcher_event(event('DELETED', make_pod('pod', phase='Failed')))
+        scheduler.result_queue.put.assert_called_once_with((key, State.FAILED, 'pod', 'default', '1'))
+        self.assertEqual(len(scheduler.pod_cache), 0)
+
+        # The pods deleted before they started, when watched or listed again, are rescheduled
+        scheduler.result_queue.reset_mock()
+        scheduler.process_watcher_event(event('ADDED', make_pod('pending'), make_pod('deleted')))
+        scheduler.process_watcher_event(event('DELETED', make_pod('deleted')))
+        scheduler.process_watcher_event(event('SYNC', make_pod('succeeded', phase='Succeeded')))
+        self.assertCountEqual(scheduler.result_queue.put.call_args_list, [
+            mock.call((key, State.UP_FOR_RESCHEDULE, 'deleted', 'default', '1')),
+            mock.call((key, State.UP_FOR_RESCHEDULE, 'pending', 'default', '1')),
+            mock.call((key, None, 'succeeded', 'default', '1')),
+        ])
+        self.assertEqual(len(scheduler.pod_cache), 1)
+
+
+class TestKubernetesJobWatcher(unittest.TestCase):
+    def setUp(self):
+        self.watcher_queue = mock.MagicMock()
+        self.kube_client = mock.MagicMock()
+        self.watcher = KubernetesJobWatcher(
+            namespace='default',
+            multi_namespace_mode=False,
+            watcher_queue=self.watcher_queue,
+            worker_uuid='worker-uuid',
+            kube_config=mock.MagicMock(kube_client_request_args={}),
+        )
+
+    def test_list_pods(self):
+        self.kube_client.list_namespaced_pod.return_value = k8s.V1PodList(
+            items=[make_pod('pod')], metadata=k8s.V1ListMeta(resource_version='10')
+        )
+
+        resource_version = self.watcher._list_pods(self.kube_client, 'worker-uuid', self.watcher.kube_config)
+
+        self.assertEqual(resource_version, '10')
+        self.kube_client.list_namespaced_pod.assert_called_once_with(
+            'default', label_selector='airflow-worker=worker-uuid'
+        )
+        self.watcher_queue.put.assert_called_once_with(
+            WatchEvent('SYNC', [CachedPod.from_pod(make_pod('pod'))], '10')
+        )
+
+    @mock.patch('airflow.executors.kubernetes_executor.watch.Watch')
+    def test_run(self, mock_watch):
+        mock_watch.return_value.stream.return_value = [
+            {'type': 'MODIFIED', 'object': make_pod('pod', phase='Running', resource_version='11')},
+            {'type': 'DELETED', 'object': make_pod('pod', phase='Running', resource_version='12')},
+        ]
+
+        resource_version = self.watcher._run(
+            self.kube_client, '10', 'worker-uuid', self.watcher.kube_config, timeout_seconds=300
+        )
+
+        self.assertEqual(resource_version, '12')
+        mock_watch.return_value.stream.assert_called_once_with(
+            self.kube_client.list_namespaced_pod, 'default',
+            label_selector='airflow-worker=worker-uuid', resource_version='10', timeout_seconds=300
+        )
+        self.assertEqual([call[0][0].type for call in self.watcher_queue.put.call_args_list],
+                         ['MODIFIED', 'DELETED'])
+
+        # The pods are listed again when the resource version expired
+        mock_watch.return_value.stream.return_value = [{
+            'type': 'ERROR',
+            'object': make_pod('pod'),
+            'raw_object': {'code': 410, 'reason': 'Gone', 'message': 'too old resource version'},
+        }]
+        self.assertIsNone(self.watcher._run(self.kube_client, '12', 'worker-uuid', self.watcher.kube_config))
+
 
 class TestKubernetesExecutor(unittest.TestCase):
     """
@@ -173,6 +326,64 @@ class TestKubernetesExecutor(unittest.TestCase):
             assert mock_kube_client.create_namespaced_pod.called
             self.assertTrue(kubernetes_executor.task_queue.empty())
 
+    @unittest.skipIf(AirflowKubernetesScheduler is None,
+                     'kubernetes python package is not installed')
+    @mock.patch('airflow.executors.kubernetes_executor.KubernetesJobWatcher')
+    @mock.patch('airflow.executors.kubernetes_executor.get_kube_client')
+    @mock.patch('airflow.executors.kubernetes_executor.AirflowKubernetesScheduler.run_next')
+    def test_sync_runs_a_batch_of_tasks(self, mock_run_next, mock_get_kube_client,
+                                        mock_kubernetes_job_watcher):
+        response = HTTPResponse(body='{"message": "Invalid pod"}')
+        response.status = 400
+        response.reason = "BadRequest"
+
+        def run_next(task):
+            (_, task_id, _, _), _, _ = task
+            if task_id == 'invalid':
+                raise ApiException(http_resp=response)
+
+        mock_run_next.side_effect = run_next
+        with conf_vars({('kubernetes', 'worker_pods_creation_batch_size'): '3'}):
+            executor = KubernetesExecutor()
+        executor.start()
+        execution_date = datetime.utcnow()
+        for task_id in ('task_1', 'invalid', 'task_2', 'task_3'):
+            executor.execute_async(key=('dag', task_id, execution_date, 1), queue=None,
+                                   command=['airflow', 'tasks', 'run', 'dag', task_id])
+        executor.sync()
+
+        self.assertEqual(mock_run_next.call_count, 3)
+        self.assertEqual(executor.event_buffer[('dag', 'invalid', execution_date, 1)][0], State.FAILED)
+        self.assertEqual(executor.task_queue.qsize(), 1)
+
+        executor.sync()
+        self.assertEqual(mock_run_next.call_count, 4)
+        self.assertTrue(executor.task_queue.empty())
+        executor.end()
+
+    @unittest.skipIf(AirflowKubernetesScheduler is None,
+                     'kubernetes python package is not installed')
+    @mock.patch('airflow.executors.kubernetes_executor.KubernetesJobWatcher')
+    @mock.patch('airflow.executors.kubernetes_executor.get_kube_client')
+    def test_clear_not_launched_queued_tasks(self, mock_get_kube_client, mock_kubernetes_job_watcher):
+        executor = KubernetesExecutor()
+        executor.start()
+        executor.kube_scheduler.watcher_queue.put(
+            WatchEvent('SYNC', [CachedPod.from_pod(make_pod('pod', task_id='launched'))], '1')
+        )
+        launched_ti = mock.MagicMock(dag_id='dag', task_id='launched', execution_date=EXECUTION_DATE)
+        not_launched_ti = mock.MagicMock(dag_id='dag', task_id='not_launched', execution_date=EXECUTION_DATE)
+        session = mock.MagicMock()
+        session.query.return_value.filter.return_value.all.return_value = [launched_ti, not_launched_ti]
+
+        executor.clear_not_launched_queued_tasks(session=session)
+
+        # The pods are not listed for each task
+        mock_get_kube_client.return_value.list_namespaced_pod.assert_not_called()
+        session.query.return_value.filter.return_value.update.assert_called_once_with(
+            {TaskInstance.state: State.NONE}
+        )
+
     @mock.patch('airflow.executors.kubernetes_executor.KubeConfig')
     @mock.patch('airflow.executors.kubernetes_executor.KubernetesExecutor.sync')
     @mock.patch('airflow.executors.base_executor.BaseExecutor.trigger_tasks')
@@ -20,6 +20,7 @@ import subprocess
 import unittest
 from unittest import mock
 
+from airflow import settings
 from airflow.executors.local_executor import LocalExecutor
 from airflow.utils.state import State
 
@@ -28,8 +29,10 @@ class TestLocalExecutor(unittest.TestCase):
 
     TEST_SUCCESS_COMMANDS = 5
 
+    @mock.patch('airflow.executors.local_executor.execute_in_fork')
     @mock.patch('airflow.executors.local_executor.subprocess.check_call')
-    def execution_parallelism(self, mock_check_call, parallelism=0):
+    def execution_parallelism(self, mock_check_call, mock_execute_in_fork, parallelism=0,
+                              new_python_interpreter=True):
         success_command = ['airflow', 'tasks', 'run', 'true', 'some_parameter']
         fail_command = ['airflow', 'tasks', 'run', 'false']
 
@@ -39,7 +42,22 @@ class TestLocalExecutor(unittest.TestCase):
             else:
                 return 0
 
-        mock_check_call.side_effect = fake_execute_command
+        def fake_execute_in_fork(command):
+            return 0 if command == success_command else 1
+
+        # The tasks run the other way fail
+        if new_python_interpreter:
+            mock_check_call.side_effect = fake_execute_command
+            mock_execute_in_fork.return_value = 1
+        else:
+            mock_check_call.side_effect = subprocess.CalledProcessError(returncode=1, cmd=None)
+            mock_execute_in_fork.side_effect = fake_execute_in_fork
+
+        patch_new_python_interpreter = mock.patch.object(
+            settings, 'EXECUTE_TASKS_NEW_PYTHON_INTERPRETER', new_python_interpreter
+        )
+        patch_new_python_interpreter.start()
+        self.addCleanup(patch_new_python_interpreter.stop)
 
         executor = LocalExecutor(parallelism=parallelism)
         executor.start()
@@ -78,6 +96,9 @@ class TestLocalExecutor(unittest.TestCase):
         test_parallelism = 2
         self.execution_parallelism(parallelism=test_parallelism)  # pylint: disable=no-value-for-parameter
 
+    def test_execution_in_fork(self):
+        self.execution_parallelism(new_python_interpreter=False)  # pylint: disable=no-value-for-parameter
+
     @mock.patch('airflow.executors.local_executor.LocalExecutor.sync')
     @mock.patch('airflow.executors.base_executor.BaseExecutor.trigger_tasks')
     @mock.patch('airflow.executors.base_executor.Stats.gauge')
@@ -0,0 +1,87 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import os
+import unittest
+from datetime import timedelta
+
+from airflow.jobs.dag_processor_job import DagProcessorJob
+from airflow.jobs.scheduler_job import SchedulerJob
+from airflow.models import DagModel
+from airflow.utils import timezone
+from airflow.utils.dag_processing import DagFileProcessorManager
+from airflow.utils.session import create_session
+from airflow.utils.state import State
+from tests.test_utils.config import conf_vars
+from tests.test_utils.db import clear_db_dags, clear_db_import_errors, clear_db_jobs
+from tests.test_utils.mock_executor import MockExecutor
+
+TEST_DAG_FOLDER = os.path.realpath(os.path.join(os.path.dirname(__file__), '..', 'dags'))
+
+
+class TestDagProcessorJob(unittest.TestCase):
+    def setUp(self):
+        clear_db_jobs()
+        clear_db_dags()
+        clear_db_import_errors()
+
+    def tearDown(self):
+        clear_db_jobs()
+        clear_db_dags()
+        clear_db_import_errors()
+
+    @conf_vars({('core', 'load_examples'): 'False'})
+    def test_run_parses_dag_files(self):
+        dag_file = os.path.join(TEST_DAG_FOLDER, 'test_example_bash_operator.py')
+        job = DagProcessorJob(subdir=dag_file, num_runs=1, executor=MockExecutor())
+        job.run()
+
+        self.assertEqual(State.SUCCESS, job.state)
+        with create_session() as session:
+            dag_model = session.query(DagModel).filter(DagModel.dag_id == 'test_example_bash_operator').one()
+        self.assertEqual(dag_file, os.path.realpath(dag_model.fileloc))
+
+    @conf_vars({('scheduler', 'dag_processor_health_check_threshold'): '30'})
+    def test_get_running_dag_processor_ids(self):
+        now = timezone.utcnow()
+        with create_session() as session:
+            jobs = {
+                'self': DagProcessorJob(state=State.RUNNING, latest_heartbeat=now - timedelta(minutes=5)),
+                'running': DagProcessorJob(state=State.RUNNING, latest_heartbeat=now),
+                'stale': DagProcessorJob(state=State.RUNNING, latest_heartbeat=now - timedelta(minutes=5)),
+                'finished': DagProcessorJob(state=State.SUCCESS, latest_heartbeat=now),
+                'scheduler': SchedulerJob(state=State.RUNNING, latest_heartbeat=now),
+            }
+            session.add_all(jobs.values())
+            session.commit()
+            job_ids = {name: job.id for name, job in jobs.items()}
+
+        manager = DagFileProcessorManager(
+            dag_directory=TEST_DAG_FOLDER,
+            max_runs=1,
+            processor_factory=SchedulerJob._create_dag_file_processor,
+            processor_timeout=timedelta.max,
+            signal_conn=None,
+            dag_ids=[],
+            pickle_dags=False,
+            dag_processor_job_id=job_ids['self'],
+        )
+        self.assertEqual(
+            sorted([job_ids['self'], job_ids['running']]),
+            manager._get_running_dag_processor_ids(),
+        )
@@ -29,6 +29,7 @@ from mock import patch
 from airflow import settings
 from airflow.exceptions import AirflowException
 from airflow.executors.sequential_executor import SequentialExecutor
+from airflow.jobs.base_job import BaseJob
 from airflow.jobs.local_task_job import LocalTaskJob
 from airflow.models.dag import DAG
 from airflow.models.dagbag import DagBag
@@ -41,6 +42,7 @@ from airflow.utils.session import create_session
 from airflow.utils.state import State
 from airflow.utils.timeout import timeout
 from tests.test_utils.asserts import assert_queries_count
+from tests.test_utils.config import conf_vars
 from tests.test_utils.db import clear_db_jobs, clear_db_runs
 from tests.test_utils.mock_executor import MockExecutor
 
@@ -176,6 +178,97 @@ class TestLocalTaskJob(unittest.TestCase):
                 self.assertAlmostEqual(delta, job.heartrate, delta=0.05)
 
     @pytest.mark.xfail(condition=True, reason="This test might be flaky in postgres/mysql")
+    @conf_vars({('core', 'heartbeat_aggregator_socket'): '/tmp/airflow-heartbeat-aggregator.sock'})
+    @patch('airflow.jobs.local_task_job.sleep')
+    @patch('airflow.jobs.local_task_job.send_heartbeat')
+    def test_heartbeat_through_heartbeat_aggregator(self, mock_send_heartbeat, mock_sleep):
+        dag = DAG('test_heartbeat_through_heartbeat_aggregator', start_date=DEFAULT_DATE)
+        with dag:
+            op1 = DummyOperator(task_id='op1')
+        dag.clear()
+        dr = dag.create_dagrun(run_id="test",
+                               state=State.RUNNING,
+                               execution_date=DEFAULT_DATE,
+                               start_date=DEFAULT_DATE)
+        ti = dr.get_task_instance(task_id=op1.task_id)
+        ti.task = op1
+
+        job1 = LocalTaskJob(task_instance=ti, ignore_ti_state=True, executor=SequentialExecutor())
+        job1.latest_heartbeat = DEFAULT_DATE
+        job1.task_runner = mock.MagicMock()
+        job1.task_runner.return_code.return_value = None
+
+        # The aggregator did not write the heartbeat yet
+        mock_send_heartbeat.return_value = None
+        job1.heartbeat()
+        mock_send_heartbeat.assert_called_once_with(
+            '/tmp/airflow-heartbeat-aggregator.sock', job1.id, ti.dag_id, ti.task_id, DEFAULT_DATE.isoformat()
+        )
+        self.assertEqual(job1.latest_heartbeat, DEFAULT_DATE)
+        job1.task_runner.terminate.assert_not_called()
+
+        # The state of the task instance was set externally
+        latest_heartbeat = timezone.utcnow()
+        mock_send_heartbeat.return_value = {
+            'latest_heartbeat': latest_heartbeat.isoformat(),
+            'job_state': State.RUNNING,
+            'task_instance': {'state': State.FAILED, 'hostname': get_hostname(), 'pid': os.getpid()},
+        }
+        job1.heartbeat()
+        self.assertEqual(job1.latest_heartbeat, latest_heartbeat)
+        self.assertEqual(ti.state, State.FAILED)
+        job1.task_runner.terminate.assert_called_once_with()
+        self.assertTrue(job1.terminating)
+        self.assertGreater(mock_sleep.call_args[0][0], 0)
+
+    @conf_vars({('core', 'heartbeat_aggregator_socket'): '/tmp/airflow-heartbeat-aggregator.sock'})
+    @patch('airflow.jobs.local_task_job.sleep')
+    @patch('airflow.jobs.local_task_job.send_heartbeat')
+    def test_heartbeat_through_heartbeat_aggregator_task_instance_deleted(
+        self, mock_send_heartbeat, mock_sleep  # pylint: disable=unused-argument
+    ):
+        dag = DAG('test_heartbeat_through_heartbeat_aggregator_deleted', start_date=DEFAULT_DATE)
+        with dag:
+            op1 = DummyOperator(task_id='op1')
+        ti = TaskInstance(task=op1, execution_date=DEFAULT_DATE)
+        ti.state = State.RUNNING
+
+        job1 = LocalTaskJob(task_instance=ti, ignore_ti_state=True, executor=SequentialExecutor())
+        job1.latest_heartbeat = DEFAULT_DATE
+        job1.task_runner = mock.MagicMock()
+        job1.task_runner.return_code.return_value = None
+
+        # The heartbeat of the job was written, but its task instance row is gone
+        mock_send_heartbeat.return_value = {
+            'latest_heartbeat': timezone.utcnow().isoformat(),
+            'job_state': State.RUNNING,
+            'task_instance': None,
+        }
+        job1.heartbeat()
+        self.assertIsNone(ti.state)
+        job1.task_runner.terminate.assert_called_once_with()
+        self.assertTrue(job1.terminating)
+
+    @conf_vars({('core', 'heartbeat_aggregator_socket'): '/tmp/airflow-heartbeat-aggregator.sock'})
+    @patch('airflow.jobs.local_task_job.send_heartbeat', side_effect=ConnectionRefusedError)
+    def test_heartbeat_without_heartbeat_aggregator(self, mock_send_heartbeat):
+        dag = DAG('test_heartbeat_without_heartbeat_aggregator', start_date=DEFAULT_DATE)
+        with dag:
+            op1 = DummyOperator(task_id='op1')
+        dag.clear()
+        dr = dag.create_dagrun(run_id="test",
+                               state=State.RUNNING,
+                               execution_date=DEFAULT_DATE,
+                               start_date=DEFAULT_DATE)
+        ti = dr.get_task_instance(task_id=op1.task_id)
+
+        job1 = LocalTaskJob(task_instance=ti, ignore_ti_state=True, executor=SequentialExecutor())
+        with patch.object(BaseJob, 'heartbeat') as mock_base_job_heartbeat:
+            job1.heartbeat()
+
+        mock_send_heartbeat.assert_called_once()
+        mock_base_job_heartbeat.assert_called_once_with(only_if_necessary=False)
+
     def test_mark_success_no_kill(self):
         """
         Test that ensures that mark_success in the UI doesn't cause
@@ -20,6 +20,10 @@
 import datetime
 import os
 import shutil
+import signal
+import sys
+import time
+import types
 import unittest
 from datetime import timedelta
 from tempfile import NamedTemporaryFile, mkdtemp
@@ -31,6 +35,7 @@ import six
 from freezegun import freeze_time
 from mock import MagicMock, patch
 from parameterized import parameterized
+from sqlalchemy.exc import OperationalError
 
 import airflow.example_dags
 import airflow.smart_sensor_dags
@@ -39,15 +44,20 @@ from airflow.configuration import conf
 from airflow.exceptions import AirflowException
 from airflow.executors.base_executor import BaseExecutor
 from airflow.jobs.backfill_job import BackfillJob
-from airflow.jobs.scheduler_job import DagFileProcessor, SchedulerJob
+from airflow.jobs.scheduler_job import (
+    DagFileProcessor, DagFileProcessorProcess, SchedulerJob, _unload_dag_folder_modules,
+)
 from airflow.models import DAG, DagBag, DagModel, Pool, SlaMiss, TaskInstance, errors
 from airflow.models.dagrun import DagRun
+from airflow.models.serialized_dag import SerializedDagModel
 from airflow.models.taskinstance import SimpleTaskInstance, TaskInstanceKey
 from airflow.operators.bash import BashOperator
 from airflow.operators.dummy_operator import DummyOperator
 from airflow.serialization.serialized_objects import SerializedDAG
 from airflow.utils import timezone
-from airflow.utils.dag_processing import FailureCallbackRequest, SimpleDagBag
+from airflow.utils.dag_processing import (
+    DagFileParsingResult, FailureCallbackRequest, SerializedDagUpdate, SimpleDagBag,
+)
 from airflow.utils.dates import days_ago
 from airflow.utils.file import list_py_file_paths
 from airflow.utils.session import create_session, provide_session
@@ -432,6 +442,26 @@ class TestDagFileProcessor(unittest.TestCase):
         dr = dag_file_processor.create_dag_run(dag)
         self.assertIsNone(dr)
 
+    def test_dag_file_processor_dagrun_dag_model_locked(self):
+        """
+        Test that no DagRun is created while another scheduler holds the lock
+        of the DagModel row
+        """
+        dag = DAG(
+            'test_dag_file_processor_dagrun_dag_model_locked',
+            start_date=timezone.datetime(2015, 1, 1),
+            schedule_interval="@once")
+        dag.sync_to_db()
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        dag.clear()
+        with mock.patch('airflow.jobs.scheduler_job.with_row_locks') as mock_with_row_locks:
+            # The row is skipped by SELECT ... FOR UPDATE SKIP LOCKED
+            mock_with_row_locks.return_value.scalar.return_value = None
+            self.assertIsNone(dag_file_processor.create_dag_run(dag))
+
+        self.assertIsNotNone(dag_file_processor.create_dag_run(dag))
+
     @freeze_time(timezone.datetime(2020, 1, 5))
     def test_dag_file_processor_dagrun_with_timedelta_schedule_and_catchup_false(self):
         """
@@ -1116,6 +1146,15 @@ class TestDagFileProcessor(unittest.TestCase):
                 mock.ANY
             )
 
+    @parameterized.expand([('True', True), ('False', False)])
+    def test_process_file_profile_parsing(self, profile_dag_parsing, expected):
+        dag_file = os.path.join(TEST_DAG_FOLDER, 'test_only_dummy_tasks.py')
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        with conf_vars({('core', 'profile_dag_parsing'): profile_dag_parsing}), \
+                mock.patch('airflow.jobs.scheduler_job.DagBag', wraps=DagBag) as mock_dagbag:
+            dag_file_processor.process_file(dag_file, [])
+        self.assertEqual(mock_dagbag.call_args[1]['profile_parsing'], expected)
+
     def test_process_file_should_failure_callback(self):
         dag_file = os.path.join(
             os.path.dirname(os.path.realpath(__file__)), '../dags/test_on_failure_callback.py'
@@ -1243,6 +1282,238 @@ class TestDagFileProcessor(unittest.TestCase):
                 self.assertIsNone(end_date)
                 self.assertIsNone(duration)
 
+    @conf_vars({('scheduler', 'schedule_from_serialized_dags'): 'True'})
+    @patch("airflow.models.dagbag.settings.STORE_SERIALIZED_DAGS", True)
+    def test_schedule_from_serialized_dags(self):
+        dag_file = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)), '../dags/test_only_dummy_tasks.py'
+        )
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        with create_session() as session:
+            session.query(TaskInstance).delete()
+            session.query(DagModel).delete()
+
+        serialized_dags, import_errors_count = dag_file_processor.process_file(
+            file_path=dag_file, failure_callback_requests=[]
+        )
+
+        # The DAG file processor only parses and serializes the DAG
+        self.assertEqual(0, import_errors_count)
+        self.assertEqual(['test_only_dummy_tasks'], [dag.dag_id for dag in serialized_dags])
+        with create_session() as session:
+            self.assertEqual(0, session.query(DagRun).count())
+            self.assertEqual(0, session.query(TaskInstance).count())
+
+        scheduler = SchedulerJob(dag_id='test_only_dummy_tasks', executor=MockExecutor())
+        dags = scheduler._schedule_dags_from_serialized_dags()
+
+        self.assertEqual(['test_only_dummy_tasks'], [dag.dag_id for dag in dags])
+        with create_session() as session:
+            self.assertEqual(1, session.query(DagRun).count())
+            tis = session.query(TaskInstance).all()
+
+        # Dummy tasks without callbacks are still marked as done right away
+        self.assertEqual({
+            ('test_task_a', 'success'),
+            ('test_task_b', None),
+            ('test_task_c', 'success'),
+            ('test_task_on_execute', 'scheduled'),
+            ('test_task_on_success', 'scheduled'),
+        }, {(ti.task_id, ti.state) for ti in tis})
+
+        scheduler._schedule_dags_from_serialized_dags()
+        with create_session() as session:
+            tis = session.query(TaskInstance).all()
+
+        self.assertIn(('test_task_b', 'success'), {(ti.task_id, ti.state) for ti in tis})
+
+    @conf_vars({('scheduler', 'schedule_from_serialized_dags'): 'True'})
+    def test_schedule_from_serialized_dags_isolates_dag_errors(self):
+        dags = {
+            dag_id: DAG(dag_id=dag_id, start_date=DEFAULT_DATE)
+            for dag_id in ('test_schedule_broken_dag', 'test_schedule_working_dag')
+        }
+        with create_session() as session:
+            session.query(DagModel).delete()
+            for dag_id in dags:
+                session.add(DagModel(dag_id=dag_id, is_active=True, is_paused=False))
+
+        def process_dags(dags_to_process, **kwargs):
+            if dags_to_process[0].dag_id == 'test_schedule_broken_dag':
+                raise ValueError("Broken DAG")
+            return ['ti_key']
+
+        scheduler = SchedulerJob(executor=MockExecutor())
+        scheduler.dagbag = mock.MagicMock()
+        scheduler.dagbag.get_dag.side_effect = dags.get
+        scheduler.dag_run_processor = mock.MagicMock()
+        scheduler.dag_run_processor._process_dags.side_effect = process_dags
+
+        processed_dags = scheduler._schedule_dags_from_serialized_dags()
+
+        # The error in one DAG doesn't stop the other from being scheduled
+        self.assertCountEqual(list(dags.values()), processed_dags)
+        scheduler.dag_run_processor._schedule_task_instances.assert_called_once_with(
+            scheduler.dagbag, ['ti_key'], session=mock.ANY
+        )
+
+    def test_scheduler_without_serialized_dags_scheduling(self):
+        scheduler = SchedulerJob(executor=MockExecutor())
+        self.assertIsNone(scheduler.dagbag)
+        self.assertIsNone(scheduler.dag_run_processor)
+
+    def test_prepare_serialized_dags_skips_unchanged_dags(self):
+        dag = self.create_test_dag()
+        DummyOperator(task_id='dummy', dag=dag)
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        fingerprint = SerializedDAG.fingerprint(dag)
+
+        # Not stored
+        serialized_dags = dag_file_processor._prepare_serialized_dags([dag], False, {}, {})
+        self.assertEqual([SerializedDAG.to_dict(dag)], serialized_dags)
+
+        # Stored for the first time
+        serialized_dags = dag_file_processor._prepare_serialized_dags(
+            [dag], False, {}, {dag.dag_id: fingerprint}
+        )
+        self.assertEqual(
+            [SerializedDagUpdate(dag.dag_id, fingerprint, SerializedDAG.to_dict(dag))], serialized_dags
+        )
+
+        serialized_dags = dag_file_processor._prepare_serialized_dags(
+            [dag], False, {dag.dag_id: fingerprint}, {dag.dag_id: fingerprint}
+        )
+        self.assertEqual([SerializedDagUpdate(dag.dag_id, fingerprint, None)], serialized_dags)
+
+        serialized_dags = dag_file_processor._prepare_serialized_dags(
+            [dag], False, {dag.dag_id: 'changed'}, {dag.dag_id: fingerprint}
+        )
+        self.assertEqual(
+            [SerializedDagUpdate(dag.dag_id, fingerprint, SerializedDAG.to_dict(dag))], serialized_dags
+        )
+
+    @patch("airflow.models.dagbag.settings.STORE_SERIALIZED_DAGS", True)
+    @patch("airflow.jobs.scheduler_job.settings.STORE_SERIALIZED_DAGS", True)
+    @patch("airflow.models.dagbag.settings.STORE_SERIALIZED_DAGS", True)
+    @patch("airflow.jobs.scheduler_job.settings.STORE_SERIALIZED_DAGS", True)
+    @patch("airflow.models.serialized_dag.MIN_SERIALIZED_DAG_UPDATE_INTERVAL", None)
+    def test_process_file_sends_changed_serialized_dags(self):
+        dag_file = os.path.join(TEST_DAG_FOLDER, 'test_multiple_dags.py')
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        dag_ids = DagBag(dag_file, include_examples=False).dag_ids
+        with create_session() as session:
+            session.query(SerializedDagModel).filter(SerializedDagModel.dag_id.in_(dag_ids)).delete(
+                synchronize_session=False
+            )
+
+        with patch.object(SerializedDAG, 'fingerprint', wraps=SerializedDAG.fingerprint) as fingerprint:
+            serialized_dags, _ = dag_file_processor.process_file(dag_file, [])
+        # Computed once per DAG, for the sync and for the scheduler
+        self.assertEqual(fingerprint.call_count, len(dag_ids))
+        self.assertCountEqual(dag_ids, [serialized_dag.dag_id for serialized_dag in serialized_dags])
+        self.assertTrue(all(serialized_dag.data is not None for serialized_dag in serialized_dags))
+
+        serialized_dags, _ = dag_file_processor.process_file(dag_file, [])
+        self.assertTrue(all(serialized_dag.data is None for serialized_dag in serialized_dags))
+
+        # Changed since stored: written by the sync, and still sent to the scheduler
+        with create_session() as session:
+            session.query(SerializedDagModel).filter(SerializedDagModel.dag_id.in_(dag_ids)).update(
+                {SerializedDagModel.dag_fingerprint: 'stale', SerializedDagModel.dag_hash: 'stale'},
+                synchronize_session=False,
+            )
+        serialized_dags, _ = dag_file_processor.process_file(dag_file, [])
+        self.assertTrue(all(serialized_dag.data is not None for serialized_dag in serialized_dags))
+        self.assertCountEqual(
+            set(SerializedDagModel.get_dag_fingerprints(dag_ids).values()),
+            {serialized_dag.fingerprint for serialized_dag in serialized_dags},
+        )
+
+
+class TestDagFileProcessorProcess(unittest.TestCase):
+    def setUp(self):
+        clear_db_dags()
+        clear_db_errors()
+        self.dag_file = os.path.join(TEST_DAG_FOLDER, 'test_scheduler_dags.py')
+
+    def tearDown(self):
+        for worker in DagFileProcessorProcess._idle_workers:
+            worker.channel.close()
+            worker.process.join(timeout=10)
+        DagFileProcessorProcess._idle_workers = []
+        clear_db_dags()
+        clear_db_errors()
+
+    def _process(self):
+        processor = DagFileProcessorProcess(self.dag_file, False, None, [])
+        processor.start()
+        deadline = time.monotonic() + 60
+        while not processor.done:
+            self.assertLess(time.monotonic(), deadline, "Timed out waiting for the processor")
+            time.sleep(0.05)
+        return processor
+
+    @conf_vars({('scheduler', 'max_files_per_dag_file_processor'): '2'})
+    def test_reuse_process(self):
+        first, second, third = self._process(), self._process(), self._process()
+
+        for processor in (first, second, third):
+            self.assertIsNotNone(processor.result)
+            self.assertEqual(2, len(processor.result[0]))
+        self.assertEqual(first.pid, second.pid)
+        self.assertNotEqual(second.pid, third.pid)
+        self.assertEqual(0, second.exit_code)
+        self.assertEqual(1, len(DagFileProcessorProcess._idle_workers))
+
+    @conf_vars({('scheduler', 'max_files_per_dag_file_processor'): '1'})
+    def test_new_process_per_file(self):
+        first, second = self._process(), self._process()
+
+        self.assertIsNotNone(first.result)
+        self.assertNotEqual(first.pid, second.pid)
+        self.assertEqual(0, first.exit_code)
+        self.assertEqual([], DagFileProcessorProcess._idle_workers)
+
+    @conf_vars({('scheduler', 'parsing_preload_modules'): 'pandas, numpy'})
+    @mock.patch('airflow.jobs.scheduler_job.importlib.import_module')
+    @mock.patch.object(DagFileProcessorProcess, '_modules_preloaded', False)
+    def test_preload_modules_fork(self, mock_import_module):
+        context = MagicMock()
+        context.get_start_method.return_value = 'fork'
+        DagFileProcessorProcess._preload_modules(context)
+        DagFileProcessorProcess._preload_modules(context)
+
+        self.assertEqual([mock.call('pandas'), mock.call('numpy')], mock_import_module.call_args_list)
+        context.set_forkserver_preload.assert_not_called()
+
+    @conf_vars({('scheduler', 'parsing_preload_modules'): 'pandas'})
+    @mock.patch.object(DagFileProcessorProcess, '_modules_preloaded', False)
+    def test_preload_modules_forkserver(self):
+        context = MagicMock()
+        context.get_start_method.return_value = 'forkserver'
+        DagFileProcessorProcess._preload_modules(context)
+
+        context.set_forkserver_preload.assert_called_once_with(['airflow.jobs.scheduler_job', 'pandas'])
+
+    def test_unload_dag_folder_modules(self):
+        loaded_modules = set(sys.modules)
+        dag_folder_module = types.ModuleType('dag_folder_module')
+        dag_folder_module.__file__ = os.path.join(settings.DAGS_FOLDER, 'dag_folder_module.py')
+        other_module = types.ModuleType('other_module')
+        other_module.__file__ = os.path.join(ROOT_FOLDER, 'other_module.py')
+        sys.modules.update({
+            'dag_folder_module': dag_folder_module,
+            'other_module': other_module,
+            'unusual_prefix_123_dag': types.ModuleType('unusual_prefix_123_dag'),
+        })
+        try:
+            _unload_dag_folder_modules(loaded_modules)
+            self.assertNotIn('dag_folder_module', sys.modules)
+            self.assertNotIn('unusual_prefix_123_dag', sys.modules)
+            self.assertIn('other_module', sys.modules)
+        finally:
+            sys.modules.pop('other_module', None)
+
 
 @pytest.mark.heisentests
 class TestDagFileProcessorQueriesCount(unittest.TestCase):
@@ -1505,6 +1776,68 @@ class TestSchedulerJob(unittest.TestCase):
 
         mock_stats_incr.assert_called_once_with('scheduler.tasks.killed_externally')
 
+    @conf_vars({('scheduler', 'standalone_dag_processor'): 'True'})
+    def test_process_executor_events_with_standalone_dag_processor(self):
+        dag = DAG(dag_id="test_process_executor_events", start_date=DEFAULT_DATE)
+        task1 = DummyOperator(dag=dag, task_id='dummy_task', on_failure_callback=lambda context: None)
+        dagbag = self._make_simple_dag_bag([dag])
+
+        scheduler = SchedulerJob()
+        session = settings.Session()
+
+        ti1 = TaskInstance(task1, DEFAULT_DATE)
+        ti1.state = State.QUEUED
+        session.merge(ti1)
+        session.commit()
+
+        executor = MockExecutor(do_update=False)
+        executor.event_buffer[ti1.key] = State.FAILED, None
+        scheduler.executor = executor
+
+        # The task fails from the serialized DAG, whose callbacks can't be run
+        scheduler._process_executor_events(simple_dag_bag=dagbag)
+        ti1.refresh_from_db()
+        self.assertEqual(ti1.state, State.FAILED)
+        session.close()
+
+    @conf_vars({('scheduler', 'standalone_dag_processor'): 'True'})
+    def test_scheduler_loop_with_standalone_dag_processor(self):
+        scheduler = SchedulerJob(num_runs=2, executor=MockExecutor())
+        scheduler.heartbeat = mock.MagicMock()
+
+        with mock.patch.object(scheduler, '_validate_and_run_task_instances', return_value=True) as mock_run:
+            scheduler._run_scheduler_loop()
+        self.assertIsNone(scheduler.processor_agent)
+        self.assertEqual(2, mock_run.call_count)
+        self.assertNotIn('harvest_dags', scheduler.loop_stats.last_durations)
+
+    def test_scheduler_loop_keeps_harvested_dags(self):
+        dag = DAG(dag_id='test_scheduler_loop_keeps_harvested_dags', start_date=DEFAULT_DATE)
+        DummyOperator(dag=dag, task_id='dummy')
+        serialized_dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        mock_agent = mock.MagicMock()
+        mock_agent.harvest_parsing_results.side_effect = [
+            [DagFileParsingResult('/dags/dag.py', [serialized_dag])], [],
+        ]
+        mock_agent.file_paths = {'/dags/dag.py'}
+        mock_agent.done = False
+
+        scheduler = SchedulerJob(num_runs=2, executor=MockExecutor())
+        scheduler.heartbeat = mock.MagicMock()
+        scheduler.processor_agent = mock_agent
+
+        simple_dag_bags = []
+
+        def run_task_instances(simple_dag_bag):
+            simple_dag_bags.append(list(simple_dag_bag.dag_ids))
+            mock_agent.done = len(simple_dag_bags) == 2
+            return True
+
+        with mock.patch.object(scheduler, '_validate_and_run_task_instances', side_effect=run_task_instances):
+            scheduler._run_scheduler_loop()
+        # The DAG is still used when its file wasn't parsed in the loop
+        self.assertEqual([[dag.dag_id], [dag.dag_id]], simple_dag_bags)
+
     def test_process_executor_events_uses_inmemory_try_number(self):
         execution_date = DEFAULT_DATE
         dag_id = "dag_id"
@@ -1706,6 +2039,157 @@ class TestSchedulerJob(unittest.TestCase):
         self.assertIn(tis[1].key, res_keys)
         self.assertIn(tis[3].key, res_keys)
 
+    def test_find_executable_task_instances_pages_in_priority_order(self):
+        dag_id = 'SchedulerJobTest.test_find_executable_task_instances_pages_in_priority_order'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, concurrency=16)
+        tasks = [
+            DummyOperator(dag=dag, task_id=f'dummy{i}', priority_weight=i)
+            for i in range(6)
+        ]
+        task_limited = DummyOperator(dag=dag, task_id='limited', priority_weight=10, task_concurrency=0)
+        dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        dagbag = self._make_simple_dag_bag([dag])
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        scheduler = SchedulerJob(executor=MockExecutor(parallelism=3))
+        scheduler.max_tis_per_query = 2
+        session = settings.Session()
+
+        dr = dag_file_processor.create_dag_run(dag)
+        for task in tasks + [task_limited]:
+            ti = TaskInstance(task, dr.execution_date)
+            ti.state = State.SCHEDULED
+            session.merge(ti)
+        session.commit()
+
+        with assert_queries_count(4):
+            res = scheduler._find_executable_task_instances(dagbag, session=session)
+
+        # The task instance which is not allowed to run does not block the
+        # ones of lower priority, and no more than the executor can run are picked
+        self.assertEqual(['dummy5', 'dummy4', 'dummy3'], [ti.task_id for ti in res])
+
+    def test_find_executable_task_instances_skips_full_pools(self):
+        dag_id = 'SchedulerJobTest.test_find_executable_task_instances_skips_full_pools'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, concurrency=16)
+        task1 = DummyOperator(dag=dag, task_id='dummy', pool='full')
+        task2 = DummyOperator(dag=dag, task_id='dummy2', pool='open')
+        dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        dagbag = self._make_simple_dag_bag([dag])
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        scheduler = SchedulerJob()
+        session = settings.Session()
+
+        dr1 = dag_file_processor.create_dag_run(dag)
+        dr2 = dag_file_processor.create_dag_run(dag)
+        running_ti = TaskInstance(task1, dr1.execution_date)
+        running_ti.state = State.RUNNING
+        session.merge(running_ti)
+        for ti in [TaskInstance(task1, dr2.execution_date), TaskInstance(task2, dr2.execution_date)]:
+            ti.state = State.SCHEDULED
+            session.merge(ti)
+        session.add(Pool(pool='full', slots=1))
+        session.add(Pool(pool='open', slots=1))
+        session.commit()
+
+        with mock.patch('airflow.jobs.scheduler_job.Stats.gauge') as mock_gauge:
+            res = scheduler._find_executable_task_instances(dagbag, session=session)
+
+        self.assertEqual(['dummy2'], [ti.task_id for ti in res])
+        # Task instances in full pools are not even read from the DB
+        mock_gauge.assert_any_call('scheduler.tasks.pending', 1)
+
+    def test_find_executable_task_instances_skips_pools_filled_while_paging(self):
+        dag_id = 'SchedulerJobTest.test_find_executable_task_instances_skips_pools_filled_while_paging'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, concurrency=16)
+        busy_tasks = [
+            DummyOperator(dag=dag, task_id=f'busy{i}', pool='busy', priority_weight=10 + i)
+            for i in range(5)
+        ]
+        open_tasks = [
+            DummyOperator(dag=dag, task_id=f'open{i}', pool='open', priority_weight=i)
+            for i in range(2)
+        ]
+        dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        dagbag = self._make_simple_dag_bag([dag])
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        scheduler = SchedulerJob()
+        scheduler.max_tis_per_query = 2
+        session = settings.Session()
+
+        dr = dag_file_processor.create_dag_run(dag)
+        for task in busy_tasks + open_tasks:
+            ti = TaskInstance(task, dr.execution_date)
+            ti.state = State.SCHEDULED
+            session.merge(ti)
+        session.add(Pool(pool='busy', slots=1))
+        session.add(Pool(pool='open', slots=10))
+        session.commit()
+
+        with mock.patch('airflow.jobs.scheduler_job.Stats.gauge') as mock_gauge:
+            res = scheduler._find_executable_task_instances(dagbag, session=session)
+
+        self.assertEqual(['busy4', 'open1', 'open0'], [ti.task_id for ti in res])
+        # Once the busy pool is full, its other task instances are not read anymore
+        mock_gauge.assert_any_call('scheduler.tasks.pending', 4)
+        # but they are still counted as starving
+        mock_gauge.assert_any_call('pool.starving_tasks.busy', 4)
+        mock_gauge.assert_any_call('pool.starving_tasks.open', 0)
+        mock_gauge.assert_any_call('scheduler.tasks.starving', 4)
+
+    def test_find_executable_task_instances_counts_starving_tasks_of_full_pools(self):
+        dag_id = 'SchedulerJobTest.test_find_executable_task_instances_counts_starving_tasks_of_full_pools'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, concurrency=16)
+        tasks = [DummyOperator(dag=dag, task_id=f'dummy{i}', pool='full') for i in range(3)]
+        dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        dagbag = self._make_simple_dag_bag([dag])
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        scheduler = SchedulerJob()
+        session = settings.Session()
+
+        dr = dag_file_processor.create_dag_run(dag)
+        for task in tasks:
+            ti = TaskInstance(task, dr.execution_date)
+            ti.state = State.SCHEDULED
+            session.merge(ti)
+        session.add(Pool(pool='full', slots=0))
+        session.commit()
+
+        with mock.patch('airflow.jobs.scheduler_job.Stats.gauge') as mock_gauge:
+            res = scheduler._find_executable_task_instances(dagbag, session=session)
+
+        self.assertEqual([], res)
+        # None of them is examined, since the pool is full from the start
+        mock_gauge.assert_any_call('scheduler.tasks.pending', 0)
+        mock_gauge.assert_any_call('pool.starving_tasks.full', 3)
+        mock_gauge.assert_any_call('scheduler.tasks.starving', 3)
+
+    def test_find_executable_task_instances_no_executor_slots(self):
+        dag_id = 'SchedulerJobTest.test_find_executable_task_instances_no_executor_slots'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, concurrency=16)
+        task1 = DummyOperator(dag=dag, task_id='dummy')
+        dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        dagbag = self._make_simple_dag_bag([dag])
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        executor = MockExecutor(parallelism=1)
+        executor.running.add(TaskInstanceKey('other_dag', 'other_task', DEFAULT_DATE, 1))
+        scheduler = SchedulerJob(executor=executor)
+        session = settings.Session()
+
+        dr = dag_file_processor.create_dag_run(dag)
+        ti = TaskInstance(task1, dr.execution_date)
+        ti.state = State.SCHEDULED
+        session.merge(ti)
+        session.commit()
+
+        with assert_queries_count(0):
+            res = scheduler._find_executable_task_instances(dagbag, session=session)
+        self.assertEqual([], res)
+
     def test_find_executable_task_instances_in_default_pool(self):
         set_default_pool_slots(1)
 
@@ -2158,6 +2642,112 @@ class TestSchedulerJob(unittest.TestCase):
             ti.refresh_from_db()
             self.assertEqual(State.QUEUED, ti.state)
 
+    @conf_vars({('scheduler', 'state_cache_reconcile_interval'): '3600'})
+    def test_execute_task_instances_updates_state_cache(self):
+        dag_id = 'SchedulerJobTest.test_execute_task_instances_updates_state_cache'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, concurrency=1)
+        task1 = DummyOperator(dag=dag, task_id='dummy')
+        dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        dagbag = self._make_simple_dag_bag([dag])
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        scheduler = SchedulerJob()
+        session = settings.Session()
+
+        dr1 = dag_file_processor.create_dag_run(dag)
+        dr2 = dag_file_processor.create_dag_run(dag)
+        ti1 = TaskInstance(task1, dr1.execution_date)
+        ti2 = TaskInstance(task1, dr2.execution_date)
+        ti1.state = State.SCHEDULED
+        ti2.state = State.SCHEDULED
+        session.merge(ti1)
+        session.merge(ti2)
+        session.commit()
+
+        self.assertEqual(1, scheduler._execute_task_instances(dagbag))
+        self.assertEqual(1, scheduler.state_cache.dag_map[dag_id])
+        self.assertEqual(1, scheduler.state_cache.pool_map[Pool.DEFAULT_POOL_NAME])
+
+        # The concurrency limit is enforced from the cache, without reloading it
+        with mock.patch.object(scheduler.state_cache, 'reconcile') as mock_reconcile:
+            self.assertEqual([], scheduler._find_executable_task_instances(dagbag, session=session))
+            mock_reconcile.assert_not_called()
+
+        # Once the executor reports the queued task as finished, its slot is freed
+        queued_key = ti1.key if ti1.key in scheduler.executor.queued_tasks else ti2.key
+        scheduler.executor.queued_tasks.clear()
+        scheduler.executor.event_buffer[queued_key] = State.SUCCESS, None
+        scheduler.processor_agent = mock.MagicMock()
+        scheduler._process_executor_events(simple_dag_bag=dagbag, session=session)
+        self.assertEqual(0, scheduler.state_cache.dag_map[dag_id])
+        self.assertEqual(0, len(scheduler.state_cache))
+
+        res = scheduler._find_executable_task_instances(dagbag, session=session)
+        self.assertEqual(1, len(res))
+
+    def test_state_cache_reconcile(self):
+        dag_id = 'SchedulerJobTest.test_state_cache_reconcile'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE)
+        task1 = DummyOperator(dag=dag, task_id='dummy', pool_slots=2)
+        task2 = DummyOperator(dag=dag, task_id='dummy2')
+        dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        scheduler = SchedulerJob()
+        session = settings.Session()
+
+        dr = dag_file_processor.create_dag_run(dag)
+        ti1 = TaskInstance(task1, dr.execution_date)
+        ti2 = TaskInstance(task2, dr.execution_date)
+        ti1.state = State.RUNNING
+        ti2.state = State.QUEUED
+        session.merge(ti1)
+        session.merge(ti2)
+        session.commit()
+
+        # By default only the counts are loaded, on every use
+        state_cache = scheduler.state_cache
+        self.assertTrue(state_cache.is_stale)
+        state_cache.refresh_if_stale(session=session)
+        self.assertTrue(state_cache.is_stale)
+        self.assertEqual(0, len(state_cache))
+        self.assertEqual(2, state_cache.dag_map[dag_id])
+        self.assertEqual(1, state_cache.task_map[(dag_id, 'dummy')])
+        self.assertEqual(3, state_cache.pool_map[Pool.DEFAULT_POOL_NAME])
+
+        state_cache.reconcile_interval = 3600
+        state_cache.reconcile(session=session)
+        self.assertFalse(state_cache.is_stale)
+        self.assertEqual(2, len(state_cache))
+        self.assertEqual(2, state_cache.dag_map[dag_id])
+        self.assertEqual(1, state_cache.task_map[(dag_id, 'dummy')])
+        self.assertEqual(3, state_cache.pool_map[Pool.DEFAULT_POOL_NAME])
+
+        # Removing a task instance twice only frees its slots once
+        state_cache.remove(ti1.key)
+        state_cache.remove(ti1.key)
+        self.assertEqual(1, state_cache.dag_map[dag_id])
+        self.assertEqual(1, state_cache.pool_map[Pool.DEFAULT_POOL_NAME])
+
+        # The late event of a previous try doesn't free the slots of the queued try
+        self.assertEqual(1, ti2.key.try_number)
+        state_cache.remove(TaskInstanceKey(dag_id, task2.task_id, dr.execution_date, 0))
+        self.assertEqual(1, state_cache.dag_map[dag_id])
+        state_cache.add(TaskInstanceKey(dag_id, task2.task_id, dr.execution_date, 2), 'default_pool', 1)
+        self.assertEqual(1, state_cache.dag_map[dag_id])
+        state_cache.remove(ti2.key)
+        self.assertEqual(1, state_cache.dag_map[dag_id])
+        state_cache.remove(TaskInstanceKey(dag_id, task2.task_id, dr.execution_date, 2))
+        self.assertEqual(0, state_cache.dag_map[dag_id])
+        self.assertEqual(0, state_cache.pool_map[Pool.DEFAULT_POOL_NAME])
+
+        state_cache.reconcile(session=session)
+        self.assertEqual(2, state_cache.dag_map[dag_id])
+        self.assertEqual(3, state_cache.pool_map[Pool.DEFAULT_POOL_NAME])
+
+        state_cache.mark_stale()
+        self.assertTrue(state_cache.is_stale)
+
     @pytest.mark.quarantined
     def test_change_state_for_tis_without_dagrun(self):
         dag1 = DAG(dag_id='test_change_state_for_tis_without_dagrun', start_date=DEFAULT_DATE)
@@ -2343,6 +2933,72 @@ class TestSchedulerJob(unittest.TestCase):
         ti2 = dr2.get_task_instance(task_id=op1.task_id, session=session)
         self.assertEqual(ti2.state, State.SCHEDULED, "Tasks run by Backfill Jobs should not be reset")
 
+    @conf_vars({('scheduler', 'orphaned_tasks_check_interval'): '0.0001'})
+    def test_scheduler_loop_adopts_orphaned_tasks_periodically(self):
+        mock_agent = mock.MagicMock()
+        mock_agent.harvest_parsing_results.return_value = []
+        mock_agent.done = True
+
+        scheduler = SchedulerJob(num_runs=1, executor=MockExecutor())
+        scheduler.heartbeat = mock.MagicMock()
+        scheduler.processor_agent = mock_agent
+
+        with mock.patch.object(scheduler, 'adopt_or_reset_orphaned_tasks') as mock_adopt, \
+                mock.patch('airflow.jobs.scheduler_job.time.monotonic', side_effect=[0, 1, 1]):
+            scheduler._run_scheduler_loop()
+        mock_adopt.assert_called_once_with(at_startup=False)
+
+    def test_scheduler_loop_phase_stats_and_profiling(self):
+        mock_agent = mock.MagicMock()
+        mock_agent.harvest_parsing_results.return_value = []
+        mock_agent.done = True
+
+        scheduler = SchedulerJob(num_runs=1, executor=MockExecutor())
+        scheduler.heartbeat = mock.MagicMock()
+        scheduler.processor_agent = mock_agent
+        scheduler.loop_profiler.num_loops = 1
+        scheduler._profile_loops(signal.SIGUSR1, None)
+
+        with mock.patch('airflow.utils.profiling.Stats') as mock_stats, \
+                mock.patch.object(scheduler.loop_profiler, '_dump') as mock_dump:
+            scheduler._run_scheduler_loop()
+
+        timers = {timing_call[0][0] for timing_call in mock_stats.timing.call_args_list}
+        self.assertEqual({
+            'scheduler.loop.harvest_dags.duration',
+            'scheduler.loop.executor_heartbeat.duration',
+            'scheduler.loop.tasks_failed_to_execute.duration',
+            'scheduler.loop.executor_events.duration',
+            'scheduler.loop.heartbeat.duration',
+            'scheduler.loop.pool_metrics.duration',
+        }, timers)
+        self.assertEqual(set(scheduler.loop_stats.last_durations), {
+            timer[len('scheduler.loop.'):-len('.duration')] for timer in timers
+        })
+        mock_dump.assert_called_once_with(mock.ANY)
+        self.assertFalse(scheduler.loop_profiler.active)
+
+    def test_execute_task_instances_critical_section_busy(self):
+        dag_id = 'SchedulerJobTest.test_execute_task_instances_critical_section_busy'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE)
+        DummyOperator(dag=dag, task_id='dummy')
+        dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        dagbag = self._make_simple_dag_bag([dag])
+
+        scheduler = SchedulerJob(executor=MockExecutor())
+        lock_not_available = OperationalError("SELECT 1", {}, mock.Mock(pgcode="55P03"))
+        with mock.patch.object(scheduler, '_find_executable_task_instances',
+                               side_effect=lock_not_available), \
+                mock.patch('airflow.jobs.scheduler_job.Stats.incr') as mock_stats_incr:
+            self.assertEqual(0, scheduler._execute_task_instances(dagbag))
+        mock_stats_incr.assert_called_once_with('scheduler.critical_section_busy')
+        self.assertEqual({}, scheduler.executor.queued_tasks)
+
+        other_error = OperationalError("SELECT 1", {}, mock.Mock(pgcode="40001"))
+        with mock.patch.object(scheduler, '_find_executable_task_instances', side_effect=other_error):
+            with self.assertRaises(OperationalError):
+                scheduler._execute_task_instances(dagbag)
+
     @parameterized.expand([
         [State.UP_FOR_RETRY, State.FAILED],
         [State.QUEUED, State.NONE],
@@ -2381,8 +3037,10 @@ class TestSchedulerJob(unittest.TestCase):
         executor.queued_tasks
         scheduler.executor = executor
         processor = mock.MagicMock()
-        processor.harvest_serialized_dags.return_value = [
-            SerializedDAG.from_dict(SerializedDAG.to_dict(dag))]
+        processor.harvest_parsing_results.return_value = [
+            DagFileParsingResult(dag.fileloc, [SerializedDAG.from_dict(SerializedDAG.to_dict(dag))])
+        ]
+        processor.file_paths = {dag.fileloc}
         processor.done = True
         scheduler.processor_agent = processor
 
@@ -3484,6 +4142,53 @@ class TestSchedulerJob(unittest.TestCase):
         self.assertEqual(State.SCHEDULED, ti2.state)
         session.rollback()
 
+    def test_adopt_or_reset_orphaned_tasks_periodic_check(self):
+        dag_id = 'test_adopt_or_reset_orphaned_tasks_periodic_check'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, schedule_interval='@daily')
+        DummyOperator(task_id='scheduled', dag=dag)
+        DummyOperator(task_id='run_by_hand', dag=dag)
+        DummyOperator(task_id='queued_by_live_scheduler', dag=dag)
+        DummyOperator(task_id='queued_by_dead_scheduler', dag=dag)
+
+        dag_file_processor = DagFileProcessor(dag_ids=[], log=mock.MagicMock())
+        scheduler_job = SchedulerJob()
+        session = settings.Session()
+        scheduler_job.state = State.RUNNING
+        scheduler_job.latest_heartbeat = timezone.utcnow()
+        session.add(scheduler_job)
+
+        old_job = SchedulerJob()
+        old_job.state = State.RUNNING
+        old_job.latest_heartbeat = timezone.utcnow() - timedelta(minutes=15)
+        session.add(old_job)
+        session.flush()
+
+        dr1 = dag_file_processor.create_dag_run(dag, session=session)
+        dr1.state = State.RUNNING
+        session.merge(dr1)
+        tis = {ti.task_id: ti for ti in dr1.get_task_instances(session=session)}
+        tis['scheduled'].state = State.SCHEDULED
+        tis['run_by_hand'].state = State.RUNNING
+        tis['queued_by_live_scheduler'].state = State.QUEUED
+        tis['queued_by_live_scheduler'].queued_by_job_id = scheduler_job.id
+        tis['queued_by_dead_scheduler'].state = State.QUEUED
+        tis['queued_by_dead_scheduler'].queued_by_job_id = old_job.id
+        for ti in tis.values():
+            session.merge(ti)
+        session.flush()
+
+        num_reset_tis = scheduler_job.adopt_or_reset_orphaned_tasks(at_startup=False, session=session)
+        session.flush()
+        self.assertEqual(1, num_reset_tis)
+
+        for ti in tis.values():
+            session.refresh(ti)
+        self.assertEqual(State.SCHEDULED, tis['scheduled'].state)
+        self.assertEqual(State.RUNNING, tis['run_by_hand'].state)
+        self.assertEqual(State.QUEUED, tis['queued_by_live_scheduler'].state)
+        self.assertIsNone(tis['queued_by_dead_scheduler'].state)
+        session.rollback()
+
 
 def test_task_with_upstream_skip_process_task_instances():
     """
@@ -3545,11 +4250,11 @@ class TestSchedulerJobQueriesCount(unittest.TestCase):
             # pylint: disable=bad-whitespace
             # expected, dag_count, task_count
             # One DAG with one task per DAG file
-            (13, 1, 1),  # noqa
+            (12, 1, 1),  # noqa
             # One DAG with five tasks per DAG  file
-            (17, 1, 5),  # noqa
+            (16, 1, 5),  # noqa
             # 10 DAGs with 10 tasks per DAG file
-            (46, 10, 10),  # noqa
+            (43, 10, 10),  # noqa
         ]
     )
     def test_execute_queries_count_with_harvested_dags(self, expected_query_count, dag_count, task_count):
@@ -3571,8 +4276,11 @@ class TestSchedulerJobQueriesCount(unittest.TestCase):
                     ti.set_state(state=State.SCHEDULED)
 
             mock_agent = mock.MagicMock()
-            mock_agent.harvest_serialized_dags.return_value = [
-                SerializedDAG.from_dict(SerializedDAG.to_dict(d)) for d in dagbag.dags.values()]
+            mock_agent.harvest_parsing_results.return_value = [DagFileParsingResult(
+                ELASTIC_DAG_FILE,
+                [SerializedDAG.from_dict(SerializedDAG.to_dict(d)) for d in dagbag.dags.values()],
+            )]
+            mock_agent.file_paths = {ELASTIC_DAG_FILE}
 
             job = SchedulerJob(subdir=PERF_DAGS_FOLDER)
             job.executor = MockExecutor()
@@ -3613,7 +4321,7 @@ class TestSchedulerJobQueriesCount(unittest.TestCase):
                     ti.set_state(state=State.SCHEDULED)
 
             mock_agent = mock.MagicMock()
-            mock_agent.harvest_serialized_dags.return_value = []
+            mock_agent.harvest_parsing_results.return_value = []
 
             job = SchedulerJob(subdir=PERF_DAGS_FOLDER)
             job.executor = MockExecutor()
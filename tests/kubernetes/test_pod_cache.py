@@ -0,0 +1,118 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import datetime
+import unittest
+
+from kubernetes.client import models as k8s
+
+from airflow.kubernetes.pod_cache import CachedPod, PodCache
+from airflow.kubernetes.pod_generator import datetime_to_label_safe_datestring
+
+EXECUTION_DATE = datetime.datetime(2020, 1, 1)
+
+
+def make_pod(name, phase='Pending', task_id='task', try_number=1, resource_version='1'):
+    return k8s.V1Pod(
+        metadata=k8s.V1ObjectMeta(
+            name=name,
+            namespace='default',
+            annotations={
+                'dag_id': 'dag',
+                'task_id': task_id,
+                'execution_date': EXECUTION_DATE.isoformat(),
+                'try_number': str(try_number),
+                'not_cached': 'value',
+            },
+            labels={
+                'airflow-worker': 'worker-uuid',
+                'dag_id': 'dag',
+                'task_id': task_id,
+                'execution_date': datetime_to_label_safe_datestring(EXECUTION_DATE),
+                'try_number': str(try_number),
+            },
+            resource_version=resource_version,
+        ),
+        status=k8s.V1PodStatus(phase=phase),
+    )
+
+
+class TestCachedPod(unittest.TestCase):
+    def test_from_pod(self):
+        cached_pod = CachedPod.from_pod(make_pod('pod', phase='Running'))
+
+        self.assertEqual(cached_pod.key, ('default', 'pod'))
+        self.assertEqual(cached_pod.phase, 'Running')
+        self.assertEqual(cached_pod.annotations, {
+            'dag_id': 'dag',
+            'task_id': 'task',
+            'execution_date': EXECUTION_DATE.isoformat(),
+            'try_number': '1',
+        })
+        self.assertEqual(cached_pod.resource_version, '1')
+
+
+class TestPodCache(unittest.TestCase):
+    def setUp(self):
+        self.pod_cache = PodCache()
+
+    def test_update_and_delete(self):
+        pending_pod = CachedPod.from_pod(make_pod('pod'))
+        running_pod = CachedPod.from_pod(make_pod('pod', phase='Running', resource_version='2'))
+
+        self.assertIsNone(self.pod_cache.update(pending_pod))
+        self.assertEqual(self.pod_cache.update(running_pod), pending_pod)
+        self.assertEqual(self.pod_cache.get('default', 'pod'), running_pod)
+        self.assertEqual(len(self.pod_cache), 1)
+
+        self.assertEqual(self.pod_cache.delete('default', 'pod'), running_pod)
+        self.assertIsNone(self.pod_cache.get('default', 'pod'))
+        self.assertIsNone(self.pod_cache.delete('default', 'pod'))
+        self.assertEqual(len(self.pod_cache), 0)
+        self.assertEqual(self.pod_cache.get_task_pods('dag', 'task', EXECUTION_DATE), [])
+
+    def test_get_task_pods(self):
+        first_try = CachedPod.from_pod(make_pod('first', phase='Failed'))
+        second_try = CachedPod.from_pod(make_pod('second', try_number=2))
+        other_task = CachedPod.from_pod(make_pod('other', task_id='other_task'))
+        for pod in (first_try, second_try, other_task):
+            self.pod_cache.update(pod)
+
+        self.assertCountEqual(
+            self.pod_cache.get_task_pods('dag', 'task', EXECUTION_DATE), [first_try, second_try]
+        )
+        self.assertEqual(self.pod_cache.get_task_pods('dag', 'other_task', EXECUTION_DATE), [other_task])
+        self.assertEqual(self.pod_cache.get_task_pods('dag', 'task', datetime.datetime(2020, 1, 2)), [])
+
+    def test_replace(self):
+        kept_pod = CachedPod.from_pod(make_pod('kept'))
+        removed_pod = CachedPod.from_pod(make_pod('removed', task_id='removed_task'))
+        self.pod_cache.update(kept_pod)
+        self.pod_cache.update(removed_pod)
+        self.assertFalse(self.pod_cache.synced)
+
+        updated_pod = CachedPod.from_pod(make_pod('kept', phase='Succeeded', resource_version='2'))
+        new_pod = CachedPod.from_pod(make_pod('new', task_id='new_task'))
+        changes = self.pod_cache.replace([updated_pod, new_pod])
+
+        self.assertTrue(self.pod_cache.synced)
+        self.assertEqual(changes, [
+            (kept_pod, updated_pod, False),
+            (None, new_pod, False),
+            (removed_pod, removed_pod, True),
+        ])
+        self.assertEqual(len(self.pod_cache), 2)
+        self.assertEqual(self.pod_cache.get_task_pods('dag', 'removed_task', EXECUTION_DATE), [])
@@ -731,6 +731,29 @@ class TestDag(unittest.TestCase):
                 set(session.query(DagTag.dag_id, DagTag.name).all())
             )
 
+    @patch('airflow.models.dag.settings.DAG_SYNC_BATCH_SIZE', 2)
+    def test_bulk_sync_to_db_in_batches(self):
+        clear_db_dags()
+        dags = [
+            DAG(f'dag-bulk-sync-{i}', start_date=DEFAULT_DATE, tags=["test-dag"]) for i in range(0, 4)
+        ]
+
+        # Each batch is read with one query, its DAGs and tags are inserted with one query each
+        with assert_queries_count(6):
+            DAG.bulk_sync_to_db(dags)
+        with assert_queries_count(4):
+            DAG.bulk_sync_to_db(dags)
+        with create_session() as session:
+            self.assertEqual(
+                {
+                    ('dag-bulk-sync-0', 'test-dag'),
+                    ('dag-bulk-sync-1', 'test-dag'),
+                    ('dag-bulk-sync-2', 'test-dag'),
+                    ('dag-bulk-sync-3', 'test-dag'),
+                },
+                set(session.query(DagTag.dag_id, DagTag.name).all())
+            )
+
     @patch('airflow.models.dag.timezone.utcnow')
     def test_sync_to_db(self, mock_now):
         dag = DAG(
@@ -17,11 +17,12 @@
 import inspect
 import os
 import shutil
+import sys
 import textwrap
 import unittest
 from datetime import datetime, timezone
 from tempfile import NamedTemporaryFile, mkdtemp
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 from freezegun import freeze_time
 from sqlalchemy import func
@@ -138,6 +139,56 @@ class TestDagBag(unittest.TestCase):
         dagbag = models.DagBag(dag_folder=self.empty_dir, include_examples=False)
         self.assertEqual([], dagbag.process_file(f.name))
 
+    def test_profile_parsing(self):
+        """
+        test that the profile of a DAG file attributes the time to the imports, the queries
+        of the top level code and the construction of the DAG and operators
+        """
+        dag_folder = mkdtemp()
+        self.addCleanup(shutil.rmtree, dag_folder)
+        with open(os.path.join(dag_folder, 'profiled_helper_module.py'), 'w') as helper_file:
+            helper_file.write("import time\ntime.sleep(0.1)\n")
+        dag_file = os.path.join(dag_folder, 'profiled_dag.py')
+        with open(dag_file, 'w') as f:
+            f.write(textwrap.dedent("""\
+            import sys
+            sys.path.insert(0, {!r})
+            import profiled_helper_module
+            from airflow.models import DAG, Variable
+            from airflow.operators.dummy_operator import DummyOperator
+            from airflow.utils.dates import days_ago
+
+            Variable.get('profiled_variable', default_var=None)
+            with DAG('profiled_dag', start_date=days_ago(1)) as dag:
+                DummyOperator(task_id='first') >> DummyOperator(task_id='second')
+            """.format(dag_folder)))
+        self.addCleanup(sys.modules.pop, 'profiled_helper_module', None)
+
+        with patch('airflow.utils.profiling.Stats') as mock_stats:
+            dagbag = models.DagBag(dag_folder=dag_file, include_examples=False, profile_parsing=True)
+
+        self.assertIn('profiled_dag', dagbag.dags)
+        profile = dagbag.parse_profiler.profiles[dag_file]
+        self.assertGreaterEqual(profile.module_import_durations['profiled_helper_module'], 0.1)
+        self.assertEqual(profile.slowest_imports(1)[0][0], 'profiled_helper_module')
+        self.assertGreaterEqual(profile.durations['imports'], 0.1)
+        self.assertGreaterEqual(profile.durations['top_level_code'], 0.1)
+        self.assertEqual(profile.queries, 1)
+        self.assertEqual(profile.counts['dag_init'], 1)
+        self.assertEqual(profile.counts['operator_init'], 2)
+        self.assertEqual(profile.counts['bag_dag'], 1)
+        mock_stats.timing.assert_any_call('dag_processing.parse_profile.profiled_dag.imports', ANY)
+        mock_stats.incr.assert_called_once_with('dag_processing.parse_profile.profiled_dag.queries', 1)
+
+        # Only profiled when asked to, regardless of [core] profile_dag_parsing
+        with conf_vars({('core', 'profile_dag_parsing'): 'True'}):
+            self.assertIsNone(models.DagBag(dag_folder=dag_file, include_examples=False).parse_profiler)
+
+        # The constructors are only wrapped while a file is profiled
+        from airflow.models.baseoperator import BaseOperatorMeta
+        self.assertIs(models.DAG.__init__, models.DAG.__dict__['__init__'])
+        self.assertEqual(BaseOperatorMeta.__call__.__qualname__, 'BaseOperatorMeta.__call__')
+
     def test_zip_skip_log(self):
         """
         test the loading of a DAG from within a zip file that skips another file because
@@ -701,6 +752,61 @@ class TestDagBag(unittest.TestCase):
         self.assertCountEqual(updated_ser_dag_1.tags, ["example", "new_tag"])
         self.assertGreater(updated_ser_dag_1_update_time, ser_dag_1_update_time)
 
+    @patch("airflow.models.dagbag.settings.STORE_SERIALIZED_DAGS", True)
+    @patch("airflow.models.dagbag.settings.MIN_SERIALIZED_DAG_FETCH_INTERVAL", 5)
+    def test_get_dag_with_dag_serialization_checks_dags_at_once(self):
+        """
+        Test that all the Serialized DAGs in the DagBag are checked for updates with a single query
+        once 'min_serialized_dag_fetch_interval' seconds are passed.
+        """
+        example_dags = DagBag(include_examples=True).dags
+        dag_ids = ["example_bash_operator", "example_branch_operator", "example_xcom"]
+        with freeze_time(tz.datetime(2020, 1, 5, 0, 0, 0)):
+            for dag_id in dag_ids:
+                SerializedDagModel.write_dag(dag=example_dags[dag_id])
+
+            dag_bag = DagBag(read_dags_from_db=True)
+            for dag_id in dag_ids:
+                dag_bag.get_dag(dag_id)
+
+        with freeze_time(tz.datetime(2020, 1, 5, 0, 0, 6)):
+            example_dags["example_xcom"].tags = ["new_tag"]
+            SerializedDagModel.write_dag(dag=example_dags["example_xcom"])
+
+        with freeze_time(tz.datetime(2020, 1, 5, 0, 0, 8)):
+            with assert_queries_count(1):
+                for dag_id in dag_ids[:2]:
+                    self.assertEqual(["example"], dag_bag.get_dag(dag_id).tags)
+            # The update was found by the same query, only the updated DAG is fetched
+            with assert_queries_count(1):
+                self.assertEqual(["new_tag"], dag_bag.get_dag("example_xcom").tags)
+
+    @patch("airflow.models.dagbag.settings.STORE_SERIALIZED_DAGS", True)
+    def test_get_dag_with_serialized_dag_cache(self):
+        """Test that DagBags reading from DB share the DAGs they deserialized through the cache folder"""
+        example_dag = DagBag(include_examples=True).dags["example_bash_operator"]
+        SerializedDagModel.write_dag(dag=example_dag)
+
+        cache_folder = mkdtemp()
+        try:
+            with patch("airflow.models.dagbag.settings.SERIALIZED_DAG_CACHE_FOLDER", cache_folder):
+                DagBag(read_dags_from_db=True).get_dag("example_bash_operator")
+                self.assertEqual(1, len(os.listdir(cache_folder)))
+
+                with patch.object(SerializedDagModel, "get") as mock_get:
+                    dag = DagBag(read_dags_from_db=True).get_dag("example_bash_operator")
+                mock_get.assert_not_called()
+                self.assertEqual(example_dag.task_ids, dag.task_ids)
+
+                # An updated DAG is read from the DB and replaces the older version in the cache
+                example_dag.tags = ["new_tag"]
+                SerializedDagModel.write_dag(dag=example_dag)
+                dag = DagBag(read_dags_from_db=True).get_dag("example_bash_operator")
+                self.assertEqual(["new_tag"], dag.tags)
+                self.assertEqual(1, len(os.listdir(cache_folder)))
+        finally:
+            shutil.rmtree(cache_folder)
+
     def test_collect_dags_from_db(self):
         """DAGs are collected from Database"""
         example_dags_folder = airflow.example_dags.__path__[0]
@@ -19,6 +19,7 @@
 """Unit tests for SerializedDagModel."""
 
 import unittest
+from unittest import mock
 
 from airflow import DAG, example_dags as example_dags_module
 from airflow.models import DagBag
@@ -144,5 +145,75 @@ class SerializedDagModelTest(unittest.TestCase):
         dags = [
             DAG("dag_1"), DAG("dag_2"), DAG("dag_3"),
         ]
-        with assert_queries_count(10):
+        with assert_queries_count(2):
             SDM.bulk_sync_to_db(dags)
+
+    @mock.patch('airflow.models.serialized_dag.MIN_SERIALIZED_DAG_UPDATE_INTERVAL', None)
+    @mock.patch('airflow.models.serialized_dag.DAG_SYNC_BATCH_SIZE', 2)
+    def test_bulk_sync_to_db_in_batches(self):
+        dags = [DAG("dag_1"), DAG("dag_2"), DAG("dag_3")]
+        # One query to read each batch, one to write it
+        with assert_queries_count(4):
+            SDM.bulk_sync_to_db(dags)
+        self.assertEqual(
+            {"dag_1", "dag_2", "dag_3"}, set(SDM.get_dag_fingerprints(["dag_1", "dag_2", "dag_3"]))
+        )
+
+        # The unchanged DAGs are only read
+        with assert_queries_count(2):
+            SDM.bulk_sync_to_db(dags)
+
+        dags[2] = DAG("dag_3", description="changed")
+        with assert_queries_count(3):
+            SDM.bulk_sync_to_db(dags)
+        self.assertEqual(SDM.get("dag_3").dag.description, "changed")
+        self.assertEqual(SDM.get("dag_3").dag_fingerprint, SerializedDAG.fingerprint(dags[2]))
+
+    def test_bulk_sync_to_db_skips_recently_updated_dags(self):
+        dags = [DAG("dag_1")]
+        SDM.bulk_sync_to_db(dags)
+        dags = [DAG("dag_1", description="changed")]
+        with assert_queries_count(1):
+            SDM.bulk_sync_to_db(dags)
+        self.assertIsNone(SDM.get("dag_1").dag.description)
+
+    def test_get_last_updated_datetimes(self):
+        example_dags = self._write_example_dags()
+        dag_ids = list(example_dags.keys())[:3]
+
+        with assert_queries_count(1):
+            last_updated = SDM.get_last_updated_datetimes(dag_ids + ['missing_dag'])
+
+        self.assertEqual(set(dag_ids), set(last_updated.keys()))
+        for dag_id in dag_ids:
+            self.assertEqual(SDM.get_last_updated_datetime(dag_id), last_updated[dag_id])
+
+    def test_write_dag_skips_serialization_if_fingerprint_is_unchanged(self):
+        example_bash_op_dag = make_example_dags(example_dags_module).get("example_bash_operator")
+        self.assertTrue(SDM.write_dag(dag=example_bash_op_dag))
+
+        with mock.patch.object(SerializedDAG, "to_dict") as mock_to_dict:
+            self.assertFalse(SDM.write_dag(dag=example_bash_op_dag))
+        mock_to_dict.assert_not_called()
+
+        example_bash_op_dag.tags += ["new_tag"]
+        self.assertTrue(SDM.write_dag(dag=example_bash_op_dag))
+        with create_session() as session:
+            s_dag = session.query(SDM).get(example_bash_op_dag.dag_id)
+            self.assertEqual(s_dag.dag_fingerprint, SerializedDAG.fingerprint(example_bash_op_dag))
+
+    def test_write_dag_stores_missing_fingerprint(self):
+        """Rows written before fingerprints were stored get one, without being written again"""
+        example_bash_op_dag = make_example_dags(example_dags_module).get("example_bash_operator")
+        SDM.write_dag(dag=example_bash_op_dag)
+        with create_session() as session:
+            session.query(SDM).update({SDM.dag_fingerprint: None})
+            last_updated = session.query(SDM).get(example_bash_op_dag.dag_id).last_updated
+
+        self.assertFalse(SDM.write_dag(dag=example_bash_op_dag))
+
+        fingerprints = SDM.get_dag_fingerprints([example_bash_op_dag.dag_id, 'missing_dag'])
+        self.assertEqual(
+            {example_bash_op_dag.dag_id: SerializedDAG.fingerprint(example_bash_op_dag)}, fingerprints
+        )
+        self.assertEqual(last_updated, SDM.get_last_updated_datetime(example_bash_op_dag.dag_id))
@@ -1115,6 +1115,76 @@ class TestTaskInstance(unittest.TestCase):
         self.assertEqual(1, ti2.get_num_running_task_instances(session=session))
         self.assertEqual(1, ti3.get_num_running_task_instances(session=session))
 
+    def test_bulk_set_state(self):
+        dag = models.DAG(dag_id='test_bulk_set_state')
+        tis = []
+        with create_session() as session:
+            for i, state in enumerate([State.SCHEDULED, State.SCHEDULED, State.RUNNING, State.NONE]):
+                task = DummyOperator(task_id='task_{}'.format(i), dag=dag, start_date=DEFAULT_DATE)
+                for day in range(2):
+                    ti = TI(task=task, execution_date=DEFAULT_DATE + datetime.timedelta(days=day))
+                    ti.state = state
+                    session.add(ti)
+                    tis.append(ti)
+
+        with create_session() as session:
+            with assert_queries_count(4):
+                changed_tis = TI.bulk_set_state(
+                    [ti.key for ti in tis],
+                    from_states=[State.SCHEDULED, State.NONE],
+                    to_state=State.QUEUED,
+                    values={TI.queued_by_job_id: 42},
+                    chunk_size=4,
+                    session=session,
+                )
+            self.assertEqual(6, len(changed_tis))
+            # The returned task instances are the ones loaded before the change
+            self.assertEqual({State.SCHEDULED, State.NONE}, {ti.state for ti in changed_tis})
+
+        with create_session() as session:
+            states = {
+                (ti.task_id, ti.execution_date): (ti.state, ti.queued_by_job_id)
+                for ti in session.query(TI).filter(TI.dag_id == dag.dag_id)
+            }
+        for ti in tis:
+            expected = (State.RUNNING, None) if ti.state == State.RUNNING else (State.QUEUED, 42)
+            self.assertEqual(expected, states[(ti.task_id, ti.execution_date)])
+
+    def test_bulk_set_state_match_try_number(self):
+        dag = models.DAG(dag_id='test_bulk_set_state_match_try_number')
+        task = DummyOperator(task_id='task', dag=dag, start_date=DEFAULT_DATE)
+        ti = TI(task=task, execution_date=DEFAULT_DATE)
+        ti.state = State.QUEUED
+        with create_session() as session:
+            session.add(ti)
+
+        old_try_key = ti.key.with_try_number(ti.try_number - 1)
+        self.assertEqual([], TI.bulk_set_state(
+            [old_try_key], from_states=[State.QUEUED], to_state=State.SCHEDULED, match_try_number=True
+        ))
+        ti.refresh_from_db()
+        self.assertEqual(State.QUEUED, ti.state)
+
+        changed_tis = TI.bulk_set_state(
+            [ti.key], from_states=[State.QUEUED], to_state=State.SCHEDULED, match_try_number=True
+        )
+        self.assertEqual([ti.key], [changed_ti.key for changed_ti in changed_tis])
+        ti.refresh_from_db()
+        self.assertEqual(State.SCHEDULED, ti.state)
+
+    def test_filter_for_tis(self):
+        dag = models.DAG(dag_id='test_filter_for_tis')
+        task1 = DummyOperator(task_id='task1', dag=dag, start_date=DEFAULT_DATE)
+        task2 = DummyOperator(task_id='task2', dag=dag, start_date=DEFAULT_DATE)
+        tis = [TI(task=task, execution_date=DEFAULT_DATE) for task in (task1, task2)]
+
+        self.assertIsNone(TI.filter_for_tis([]))
+        # One clause per DagRun
+        self.assertEqual(1, str(TI.filter_for_tis(tis)).count('task_instance.dag_id'))
+        self.assertEqual(1, str(TI.filter_for_tis([ti.key for ti in tis])).count('task_instance.dag_id'))
+        with self.assertRaises(TypeError):
+            TI.filter_for_tis([tis[0], tis[1].key])
+
     # def test_log_url(self):
     #     now = pendulum.now('Europe/Brussels')
     #     dag = DAG('dag', start_date=DEFAULT_DATE)
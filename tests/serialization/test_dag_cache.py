@@ -0,0 +1,68 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import os
+import shutil
+import unittest
+from datetime import timedelta
+from tempfile import mkdtemp
+
+from airflow import DAG
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.serialization.dag_cache import SerializedDagFileCache
+from airflow.serialization.serialized_objects import SerializedDAG
+from airflow.utils import timezone
+from tests.models import DEFAULT_DATE
+
+
+class TestSerializedDagFileCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = mkdtemp()
+        self.cache = SerializedDagFileCache(self.folder)
+        dag = DAG('test_dag', start_date=DEFAULT_DATE)
+        DummyOperator(task_id='task', dag=dag)
+        self.dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+        self.last_updated = timezone.utcnow()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get('test_dag', self.last_updated))
+
+        self.cache.put(self.dag, self.last_updated)
+        dag = self.cache.get('test_dag', self.last_updated)
+        self.assertEqual(['task'], dag.task_ids)
+        self.assertIsNone(self.cache.get('test_dag', self.last_updated + timedelta(seconds=1)))
+        self.assertIsNone(self.cache.get('other_dag', self.last_updated))
+
+    def test_put_removes_older_versions(self):
+        self.cache.put(self.dag, self.last_updated)
+        self.cache.put(self.dag, self.last_updated + timedelta(seconds=1))
+
+        self.assertEqual(1, len(os.listdir(self.folder)))
+        self.assertIsNone(self.cache.get('test_dag', self.last_updated))
+        self.assertIsNotNone(self.cache.get('test_dag', self.last_updated + timedelta(seconds=1)))
+
+    def test_get_corrupted_file(self):
+        self.cache.put(self.dag, self.last_updated)
+        with open(os.path.join(self.folder, os.listdir(self.folder)[0]), 'wb') as cache_file:
+            cache_file.write(b'not a pickle')
+
+        with self.assertLogs(self.cache.log, level='WARNING'):
+            self.assertIsNone(self.cache.get('test_dag', self.last_updated))
@@ -34,6 +34,7 @@ from airflow.kubernetes.pod_generator import PodGenerator
 from airflow.models import DAG, Connection, DagBag, TaskInstance
 from airflow.models.baseoperator import BaseOperator
 from airflow.operators.bash import BashOperator
+from airflow.operators.dummy_operator import DummyOperator
 from airflow.serialization.json_schema import load_dag_schema_dict
 from airflow.serialization.serialized_objects import SerializedBaseOperator, SerializedDAG
 from tests.test_utils.mock_operators import CustomOperator, CustomOpLink, GoogleLink
@@ -758,6 +759,21 @@ class TestStringifiedDAGs(unittest.TestCase):
 
         assert serialized_op.do_xcom_push is False
 
+    def test_dummy_operator_without_callbacks_roundtrip(self):
+        dummy = DummyOperator(task_id='dummy')
+        dummy_with_callback = DummyOperator(task_id='dummy_with_callback', on_success_callback=print)
+        bash = BashOperator(task_id='bash', bash_command='true')
+
+        assert SerializedBaseOperator.is_dummy_without_callbacks(dummy)
+        assert not SerializedBaseOperator.is_dummy_without_callbacks(dummy_with_callback)
+        assert not SerializedBaseOperator.is_dummy_without_callbacks(bash)
+
+        for op in (dummy, dummy_with_callback, bash):
+            blob = SerializedBaseOperator.serialize_operator(op)
+            serialized_op = SerializedBaseOperator.deserialize_operator(blob)
+            assert SerializedBaseOperator.is_dummy_without_callbacks(serialized_op) == \
+                SerializedBaseOperator.is_dummy_without_callbacks(op)
+
     def test_no_new_fields_added_to_base_operator(self):
         """
         This test verifies that there are no new fields added to BaseOperator. And reminds that
@@ -869,3 +885,56 @@ class TestStringifiedDAGs(unittest.TestCase):
                 check_task_group(child)
 
         check_task_group(serialized_dag.task_group)
+
+    @staticmethod
+    def _make_dag_to_fingerprint(bash_command='echo 1', group_task3=True, set_downstream=True):
+        class Opaque:
+            """An object without __repr__"""
+
+        def on_failure(context):
+            pass
+
+        from airflow.utils.task_group import TaskGroup
+
+        with DAG(
+            "test_fingerprint",
+            start_date=datetime(2020, 1, 1),
+            default_args={"on_failure_callback": on_failure},
+            params={"opaque": Opaque(), "modes": {"a", "b", "c"}},
+        ) as dag:
+            task1 = BashOperator(task_id="task1", bash_command=bash_command)
+            task2 = DummyOperator(task_id="task2")
+            if group_task3:
+                with TaskGroup("group"):
+                    DummyOperator(task_id="task3")
+            else:
+                DummyOperator(task_id="task3")
+            if set_downstream:
+                task1 >> task2
+        return dag
+
+    def test_fingerprint_is_stable_across_parses(self):
+        """Objects in memory, e.g. callbacks, do not change the fingerprint of the DAG"""
+        fingerprint = SerializedDAG.fingerprint(self._make_dag_to_fingerprint())
+
+        assert fingerprint == SerializedDAG.fingerprint(self._make_dag_to_fingerprint())
+
+    @parameterized.expand([
+        ({"bash_command": "echo 2"},),
+        ({"group_task3": False},),
+        ({"set_downstream": False},),
+    ])
+    def test_fingerprint_changes_with_dag(self, changes):
+        fingerprint = SerializedDAG.fingerprint(self._make_dag_to_fingerprint())
+
+        assert fingerprint != SerializedDAG.fingerprint(self._make_dag_to_fingerprint(**changes))
+
+    def test_fingerprint_changes_with_callback_source(self):
+        """Callbacks are serialized as their source, which the fingerprint follows"""
+        dag = DAG("test_fingerprint", start_date=datetime(2020, 1, 1))
+        task = DummyOperator(task_id="task", dag=dag, on_failure_callback=lambda context: 1)
+        fingerprint = SerializedDAG.fingerprint(dag)
+
+        task.on_failure_callback = lambda context: 2
+
+        assert fingerprint != SerializedDAG.fingerprint(dag)
@@ -536,6 +536,96 @@ AIRFLOW_HOME = /root/airflow
 
                     self.assertListEqual([], warning)
 
+    def test_schedule_from_serialized_dags_requires_store_serialized_dags(self):
+        def make_config(store_serialized_dags):
+            test_conf = AirflowConfigParser(default_config='')
+            test_conf.deprecated_values = {}
+            test_conf.read_dict({
+                'core': {
+                    'executor': 'SequentialExecutor',
+                    'sql_alchemy_conn': 'sqlite://',
+                    'store_serialized_dags': store_serialized_dags,
+                },
+                'scheduler': {
+                    'schedule_from_serialized_dags': 'True',
+                },
+            })
+            return test_conf
+
+        with self.assertRaisesRegex(AirflowConfigException, 'store_serialized_dags'):
+            make_config('False')
+
+        test_conf = make_config('True')
+        self.assertTrue(test_conf.getboolean('scheduler', 'schedule_from_serialized_dags'))
+
+    def test_skip_unchanged_dag_files_requires_schedule_from_serialized_dags(self):
+        def make_config(schedule_from_serialized_dags):
+            test_conf = AirflowConfigParser(default_config='')
+            test_conf.deprecated_values = {}
+            test_conf.read_dict({
+                'core': {
+                    'executor': 'SequentialExecutor',
+                    'sql_alchemy_conn': 'sqlite://',
+                    'store_serialized_dags': 'True',
+                },
+                'scheduler': {
+                    'schedule_from_serialized_dags': schedule_from_serialized_dags,
+                    'skip_unchanged_dag_files': 'True',
+                },
+            })
+            return test_conf
+
+        with self.assertRaisesRegex(AirflowConfigException, 'schedule_from_serialized_dags'):
+            make_config('False')
+
+        test_conf = make_config('True')
+        self.assertTrue(test_conf.getboolean('scheduler', 'skip_unchanged_dag_files'))
+
+    def test_standalone_dag_processor_requires_schedule_from_serialized_dags(self):
+        def make_config(schedule_from_serialized_dags):
+            test_conf = AirflowConfigParser(default_config='')
+            test_conf.deprecated_values = {}
+            test_conf.read_dict({
+                'core': {
+                    'executor': 'SequentialExecutor',
+                    'sql_alchemy_conn': 'sqlite://',
+                    'store_serialized_dags': 'True',
+                },
+                'scheduler': {
+                    'schedule_from_serialized_dags': schedule_from_serialized_dags,
+                    'standalone_dag_processor': 'True',
+                },
+            })
+            return test_conf
+
+        with self.assertRaisesRegex(AirflowConfigException, 'schedule_from_serialized_dags'):
+            make_config('False')
+
+        test_conf = make_config('True')
+        self.assertTrue(test_conf.getboolean('scheduler', 'standalone_dag_processor'))
+
+    def test_dag_file_parsing_priorities_validation(self):
+        def make_config(priorities):
+            test_conf = AirflowConfigParser(default_config='')
+            test_conf.deprecated_values = {}
+            test_conf.read_dict({
+                'core': {
+                    'executor': 'SequentialExecutor',
+                    'sql_alchemy_conn': 'sqlite://',
+                },
+                'scheduler': {
+                    'dag_file_parsing_priorities': priorities,
+                },
+            })
+            return test_conf
+
+        for priorities in ('{"critical/*": 10', '["critical/*"]', '{"critical/*": "high"}'):
+            with self.assertRaisesRegex(AirflowConfigException, 'dag_file_parsing_priorities'):
+                make_config(priorities)
+
+        test_conf = make_config('{"critical/*": 10}')
+        self.assertEqual('{"critical/*": 10}', test_conf.get('scheduler', 'dag_file_parsing_priorities'))
+
     def test_deprecated_funcs(self):
         for func in ['load_test_config', 'get', 'getboolean', 'getfloat', 'getint', 'has_option',
                      'remove_option', 'as_dict', 'set']:
@@ -554,5 +554,15 @@ class TestTriggerRuleDep(unittest.TestCase):
         self.assertEqual(get_states_count_upstream_ti(finished_tasks=finished_tasks, ti=ti_op5),
                          (2, 0, 1, 0, 3))
 
+        # a context shared by all the tis of the run indexes the finished tasks only once
+        dep_context = DepContext(finished_tasks=finished_tasks)
+        finished_task_states = dep_context.ensure_finished_task_states(dag, dr.execution_date, session)
+        self.assertIs(finished_task_states,
+                      dep_context.ensure_finished_task_states(dag, dr.execution_date, session))
+        for ti in (ti_op1, ti_op2, ti_op3, ti_op4, ti_op5):
+            self.assertEqual(
+                TriggerRuleDep._count_upstream_states(ti=ti, finished_task_states=finished_task_states),
+                get_states_count_upstream_ti(finished_tasks=finished_tasks, ti=ti))
+
         dr.update_state()
         self.assertEqual(State.SUCCESS, dr.state)
@@ -0,0 +1,149 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import json
+import os
+import shutil
+import time
+import unittest
+from tempfile import mkdtemp
+
+from airflow.utils.dag_file_fingerprints import DagFileFingerprints
+
+
+class TestDagFileFingerprints(unittest.TestCase):
+    def setUp(self):
+        self.dag_folder = mkdtemp()
+        self.dag_file = self._write('dag.py', 'from common import utils\nimport helper\n')
+        self.helper_file = self._write('helper.py', 'import os\n')
+        os.makedirs(os.path.join(self.dag_folder, 'common'))
+        self.package_file = self._write(os.path.join('common', '__init__.py'), '')
+        self.utils_file = self._write(os.path.join('common', 'utils.py'), 'from helper import VALUE\n')
+        self.index_path = os.path.join(self.dag_folder, 'index', 'fingerprints.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dag_folder)
+
+    def _write(self, name, content, age=60):
+        path = os.path.join(self.dag_folder, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        # Older than the fingerprints, so that they are not hashed again on every check
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _parse(self, fingerprints, succeeded=True):
+        fingerprints.start(self.dag_file)
+        fingerprints.finish(self.dag_file, succeeded=succeeded)
+
+    def test_never_parsed(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
+        self.assertIsNone(fingerprints.last_parsed_at(self.dag_file))
+
+    def test_unchanged(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self._parse(fingerprints)
+        self.assertFalse(fingerprints.has_changed(self.dag_file))
+        self.assertIsNotNone(fingerprints.last_parsed_at(self.dag_file))
+
+    def test_dependencies(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        fingerprints.start(self.dag_file)
+        self.assertEqual(
+            sorted([self.helper_file, self.package_file, self.utils_file]),
+            sorted(fingerprints._pending[self.dag_file].dependencies),
+        )
+
+    def test_file_changed(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self._parse(fingerprints)
+        self._write('dag.py', 'import helper\n', age=30)
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
+
+    def test_file_touched(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self._parse(fingerprints)
+        self._write('dag.py', 'from common import utils\nimport helper\n', age=30)
+        self.assertFalse(fingerprints.has_changed(self.dag_file))
+
+    def test_indirect_dependency_changed(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self._parse(fingerprints)
+        self._write('helper.py', 'import sys\n', age=30)
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
+
+    def test_dependency_deleted(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self._parse(fingerprints)
+        os.remove(self.helper_file)
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
+
+    def test_file_changed_while_fingerprinted(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self._write('dag.py', 'import helper\n', age=0)
+        self._parse(fingerprints)
+        mtime = os.stat(self.dag_file).st_mtime
+        # Same size and modification time, as when written twice within the granularity of the file system
+        with open(self.dag_file, 'w') as file:
+            file.write('import hepler\n')
+        os.utime(self.dag_file, (mtime, mtime))
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
+
+    def test_failed_parse_not_recorded(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self._parse(fingerprints)
+        self._parse(fingerprints, succeeded=False)
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
+
+    def test_retain(self):
+        fingerprints = DagFileFingerprints(self.dag_folder)
+        self._parse(fingerprints)
+        fingerprints.retain([self.helper_file])
+        self.assertIsNone(fingerprints.last_parsed_at(self.dag_file))
+
+    def test_save_and_load(self):
+        fingerprints = DagFileFingerprints(self.dag_folder, self.index_path)
+        self._parse(fingerprints)
+        fingerprints.save()
+
+        fingerprints = DagFileFingerprints(self.dag_folder, self.index_path)
+        self.assertFalse(fingerprints.has_changed(self.dag_file))
+        self._write('helper.py', 'import sys\n', age=30)
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
+
+    def test_load_from_other_version(self):
+        fingerprints = DagFileFingerprints(self.dag_folder, self.index_path)
+        self._parse(fingerprints)
+        fingerprints.save()
+        with open(self.index_path) as index_file:
+            data = json.load(index_file)
+        data['version'] = '1.10.12'
+        with open(self.index_path, 'w') as index_file:
+            json.dump(data, index_file)
+
+        fingerprints = DagFileFingerprints(self.dag_folder, self.index_path)
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
+
+    def test_load_invalid(self):
+        os.makedirs(os.path.dirname(self.index_path))
+        with open(self.index_path, 'w') as index_file:
+            index_file.write('{"version": ')
+
+        fingerprints = DagFileFingerprints(self.dag_folder, self.index_path)
+        self.assertTrue(fingerprints.has_changed(self.dag_file))
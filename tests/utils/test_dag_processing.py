@@ -18,7 +18,10 @@
 
 import multiprocessing
 import os
+import pickle
 import sys
+import threading
+import time
 import unittest
 from datetime import datetime, timedelta
 from tempfile import TemporaryDirectory
@@ -28,19 +31,23 @@ from unittest.mock import MagicMock, PropertyMock
 from airflow.configuration import conf
 from airflow.jobs.local_task_job import LocalTaskJob as LJ
 from airflow.jobs.scheduler_job import DagFileProcessorProcess
-from airflow.models import DagBag, TaskInstance as TI
+from airflow.models import DagBag, DagModel, DagRun, TaskInstance as TI
+from airflow.models.serialized_dag import SerializedDagModel
 from airflow.models.taskinstance import SimpleTaskInstance
+from airflow.serialization.serialized_objects import SerializedDAG
 from airflow.utils import timezone
 from airflow.utils.dag_processing import (
-    DagFileProcessorAgent, DagFileProcessorManager, DagFileStat, DagParsingSignal, DagParsingStat,
-    FailureCallbackRequest,
+    DagFileParsingResult, DagFileProcessorAgent, DagFileProcessorManager, DagFileStat, DagParsingResultBatch,
+    DagParsingSignal, DagParsingStat, FailureCallbackRequest, SerializedDagUpdate, SimpleDagBag,
+    _get_next_dagrun_due_date, get_dag_file_shard,
 )
-from airflow.utils.file import correct_maybe_zipped, open_maybe_zipped
+from airflow.utils.file import DagFolderIndex, correct_maybe_zipped, list_py_file_paths, open_maybe_zipped
 from airflow.utils.session import create_session
 from airflow.utils.state import State
 from tests.test_logging_config import SETTINGS_FILE_VALID, settings_context
 from tests.test_utils.config import conf_vars
-from tests.test_utils.db import clear_db_runs
+from airflow.utils.types import DagRunType
+from tests.test_utils.db import clear_db_dags, clear_db_runs, clear_db_serialized_dags
 
 TEST_DAG_FOLDER = os.path.join(
     os.path.dirname(os.path.realpath(__file__)), os.pardir, 'dags')
@@ -108,8 +115,9 @@ class TestDagFileProcessorManager(unittest.TestCase):
 
             while parent_pipe.poll(timeout=0.01):
                 obj = parent_pipe.recv()
-                if not isinstance(obj, DagParsingStat):
-                    results.append(obj)
+                if isinstance(obj, DagParsingResultBatch):
+                    for result in pickle.loads(obj.data):
+                        results.extend(result.serialized_dags)
                 elif obj.done:
                     return results
             raise RuntimeError("Shouldn't get here - nothing to read, but manager not finished!")
@@ -178,6 +186,286 @@ class TestDagFileProcessorManager(unittest.TestCase):
         manager.set_file_paths(['abc.txt'])
         self.assertDictEqual(manager._processors, {'abc.txt': mock_processor})
 
+    @conf_vars({
+        ('scheduler', 'skip_unchanged_dag_files'): 'True',
+        ('scheduler', 'dag_file_fingerprints_path'): '',
+        ('scheduler', 'min_file_process_interval'): '0',
+    })
+    def test_prepare_file_path_queue_skips_unchanged_files(self):
+        with TemporaryDirectory(prefix="airflow-dags-") as dags_folder:
+            dag_file = os.path.join(dags_folder, 'dag.py')
+            helper_file = os.path.join(dags_folder, 'helper.py')
+            with open(dag_file, 'w') as file:
+                file.write('import helper\n')
+            with open(helper_file, 'w') as file:
+                file.write('VALUE = 1\n')
+
+            manager = DagFileProcessorManager(
+                dag_directory=dags_folder,
+                max_runs=-1,
+                processor_factory=MagicMock(),
+                processor_timeout=timedelta.max,
+                signal_conn=MagicMock(),
+                dag_ids=[],
+                pickle_dags=False,
+                async_mode=True)
+            manager.set_file_paths([dag_file])
+
+            manager.prepare_file_path_queue()
+            self.assertEqual([dag_file], manager._file_path_queue)
+            manager.start_new_processes()
+            processor = manager._processors[dag_file]
+            processor.file_path = dag_file
+            processor.start_time = timezone.utcnow()
+            processor.result = [], 0
+            manager._collect_results_from_processor(processor)
+            manager._processors.clear()
+
+            manager.prepare_file_path_queue()
+            self.assertEqual([], manager._file_path_queue)
+
+            # A change in an imported module of the DAG folder gets the file parsed again
+            with open(helper_file, 'w') as file:
+                file.write('VALUE = 2\n')
+            manager._file_last_checked.clear()
+            manager.prepare_file_path_queue()
+            self.assertEqual([dag_file], manager._file_path_queue)
+
+    @staticmethod
+    def _make_manager(dag_directory='/dags', **kwargs):
+        return DagFileProcessorManager(
+            dag_directory=dag_directory,
+            max_runs=-1,
+            processor_factory=MagicMock(),
+            processor_timeout=timedelta.max,
+            signal_conn=MagicMock(),
+            dag_ids=[],
+            pickle_dags=False,
+            async_mode=True,
+            **kwargs)
+
+    @conf_vars({
+        ('scheduler', 'dag_file_parsing_priorities'): '{"critical/*.py": 10, "reports/*": -1}',
+        ('scheduler', 'min_file_process_interval'): '0',
+    })
+    def test_prepare_file_path_queue_priority(self):
+        manager = self._make_manager()
+        now = timezone.utcnow()
+        manager.set_file_paths([
+            '/dags/reports/report.py', '/dags/expensive.py', '/dags/cheap.py',
+            '/dags/new.py', '/dags/critical/dag.py', '/dags/callback.py',
+        ])
+        manager._file_stats = {
+            # Parsed as long ago as the expensive file, but 10 times faster
+            '/dags/cheap.py': DagFileStat(1, 0, now - timedelta(minutes=10), 1.0, 1),
+            '/dags/expensive.py': DagFileStat(1, 0, now - timedelta(minutes=10), 10.0, 1),
+            '/dags/reports/report.py': DagFileStat(1, 0, now - timedelta(hours=10), 1.0, 1),
+        }
+        manager._callback_to_execute['/dags/callback.py'].append(MagicMock())
+
+        manager.prepare_file_path_queue()
+        self.assertEqual([
+            '/dags/callback.py',
+            '/dags/critical/dag.py',
+            '/dags/new.py',
+            '/dags/cheap.py',
+            '/dags/expensive.py',
+            '/dags/reports/report.py',
+        ], manager._file_path_queue)
+
+    @conf_vars({('scheduler', 'min_file_process_interval'): '60'})
+    def test_prepare_file_path_queue_imminent_dagruns_first(self):
+        clear_db_dags()
+        clear_db_runs()
+        now = timezone.utcnow()
+        manager = self._make_manager()
+        manager.set_file_paths(['/dags/later.py', '/dags/imminent.py'])
+        manager._file_stats = {
+            file_path: DagFileStat(1, 0, now - timedelta(minutes=10), 1.0, 1)
+            for file_path in manager.file_paths
+        }
+        with create_session() as session:
+            for dag_id, fileloc in (('later', '/dags/later.py'), ('imminent', '/dags/imminent.py')):
+                session.add(DagModel(
+                    dag_id=dag_id, fileloc=fileloc, is_paused=False, is_active=True,
+                    schedule_interval=timedelta(hours=1),
+                ))
+            session.add(DagRun(
+                dag_id='later', run_id='later', run_type=DagRunType.SCHEDULED.value,
+                execution_date=now - timedelta(minutes=30),
+            ))
+            session.add(DagRun(
+                dag_id='imminent', run_id='imminent', run_type=DagRunType.SCHEDULED.value,
+                execution_date=now - timedelta(hours=1, minutes=59, seconds=30),
+            ))
+        try:
+            manager.prepare_file_path_queue()
+            self.assertEqual(['/dags/imminent.py', '/dags/later.py'], manager._file_path_queue)
+        finally:
+            clear_db_dags()
+            clear_db_runs()
+
+    def test_get_next_dagrun_due_date(self):
+        now = timezone.datetime(2020, 6, 1, 12)
+        last_run = timezone.datetime(2020, 6, 1)
+        self.assertEqual(now, _get_next_dagrun_due_date('@daily', None, now))
+        self.assertEqual(now, _get_next_dagrun_due_date('@once', None, now))
+        self.assertIsNone(_get_next_dagrun_due_date('@once', last_run, now))
+        self.assertIsNone(_get_next_dagrun_due_date(None, None, now))
+        self.assertEqual(
+            timezone.datetime(2020, 6, 3), _get_next_dagrun_due_date('@daily', last_run, now)
+        )
+        self.assertEqual(
+            timezone.datetime(2020, 6, 1, 2), _get_next_dagrun_due_date('0 * * * *', last_run, now)
+        )
+        self.assertEqual(
+            timezone.datetime(2020, 6, 1, 4), _get_next_dagrun_due_date(timedelta(hours=2), last_run, now)
+        )
+        self.assertIsNone(_get_next_dagrun_due_date('not a cron', last_run, now))
+
+    @conf_vars({
+        ('scheduler', 'slow_dag_file_threshold'): '30',
+        ('scheduler', 'slow_dag_file_parsing_processes'): '1',
+    })
+    def test_start_new_processes_slow_lane(self):
+        manager = self._make_manager()
+        manager._parallelism = 3
+        manager._file_stats = {
+            '/dags/slow_1.py': DagFileStat(1, 0, None, 40.0, 1),
+            '/dags/slow_2.py': DagFileStat(1, 0, None, 60.0, 1),
+            '/dags/fast.py': DagFileStat(1, 0, None, 1.0, 1),
+        }
+        manager._file_path_queue = ['/dags/slow_1.py', '/dags/slow_2.py', '/dags/fast.py']
+
+        manager.start_new_processes()
+        self.assertEqual({'/dags/slow_1.py', '/dags/fast.py'}, set(manager._processors))
+        self.assertEqual(['/dags/slow_2.py'], manager._file_path_queue)
+        # A process is free, but the only queued file is waiting for the slow one
+        self.assertTrue(manager._only_waiting_slow_files_queued())
+
+        manager._processors.pop('/dags/slow_1.py')
+        self.assertFalse(manager._only_waiting_slow_files_queued())
+        manager.start_new_processes()
+        self.assertEqual({'/dags/slow_2.py', '/dags/fast.py'}, set(manager._processors))
+
+    def test_file_path_queue_refill_due(self):
+        manager = self._make_manager()
+        manager._file_process_interval = 30
+        manager._file_paths = ['/dags/fast.py']
+        manager._file_stats = {'/dags/fast.py': DagFileStat(1, 0, timezone.utcnow(), 1.0, 1)}
+
+        manager._add_file_paths_to_queue()
+        self.assertFalse(manager._is_file_path_queue_refill_due())
+
+        # A processor finished
+        processor = mock.MagicMock(file_path='/dags/fast.py', start_time=timezone.utcnow(), result=([], 0))
+        manager._collect_results_from_processor(processor)
+        self.assertTrue(manager._is_file_path_queue_refill_due())
+        manager._add_file_paths_to_queue()
+        self.assertFalse(manager._is_file_path_queue_refill_due())
+
+        # The DAG files changed
+        manager.set_file_paths(['/dags/fast.py', '/dags/new.py'])
+        self.assertTrue(manager._is_file_path_queue_refill_due())
+        with mock.patch.object(manager, '_get_file_paths_with_imminent_dagruns') as get_imminent:
+            manager._add_file_paths_to_queue()
+        get_imminent.assert_called_once()
+        self.assertFalse(manager._is_file_path_queue_refill_due())
+
+        # file_process_interval elapsed
+        with mock.patch('airflow.utils.dag_processing.time.monotonic', return_value=time.monotonic() + 30):
+            self.assertTrue(manager._is_file_path_queue_refill_due())
+
+    def test_refresh_dag_file_shard(self):
+        manager = self._make_manager(dag_processor_job_id=1)
+        file_paths = ['/dags/dag_{}.py'.format(i) for i in range(20)]
+        manager._dag_folder_file_paths = file_paths
+        manager.set_file_paths(manager._get_dag_file_shard())
+        self.assertEqual(file_paths, manager._file_paths)
+
+        with mock.patch.object(manager, '_get_running_dag_processor_ids', return_value=[1, 2]):
+            manager._refresh_dag_file_shard()
+        self.assertEqual(get_dag_file_shard(file_paths, '/dags', [1, 2], 1), manager._file_paths)
+        self.assertLess(len(manager._file_paths), len(file_paths))
+
+        # The serialized DAGs are only written to the database
+        manager._parsing_results = [
+            DagFileParsingResult('/dags/dag_1.py', [SerializedDagUpdate('dag', 'fingerprint', None)])
+        ]
+        manager._send_parsing_results()
+        manager._signal_conn.send.assert_not_called()
+
+    def test_agent_file_paths_unknown_until_first_stat(self):
+        processor_agent = DagFileProcessorAgent('/dags', 1, MagicMock(), timedelta.max, [], False, False)
+        dag = MagicMock(dag_id='dag_1', fileloc='/dags/dag_1.py')
+        simple_dag_bag = SimpleDagBag([])
+
+        # The first results are sent before the first stat
+        self.assertIsNone(processor_agent.file_paths)
+        simple_dag_bag.update([DagFileParsingResult('/dags/dag_1.py', [dag])], processor_agent.file_paths)
+        self.assertEqual({'dag_1'}, set(simple_dag_bag.dag_ids))
+
+        processor_agent._process_message(DagParsingStat(['/dags/dag_1.py'], False, False))
+        self.assertEqual({'/dags/dag_1.py'}, processor_agent.file_paths)
+        processor_agent._process_message(DagParsingStat([], False, False))
+        simple_dag_bag.update([], processor_agent.file_paths)
+        self.assertEqual(set(), set(simple_dag_bag.dag_ids))
+
+    def test_send_parsing_results_in_batches(self):
+        with TemporaryDirectory(prefix="airflow-spool-") as spool_directory:
+            manager = self._make_manager(spool_directory=spool_directory)
+            processor_agent = DagFileProcessorAgent('/dags', 1, MagicMock(), timedelta.max, [], False, False)
+            results = [
+                DagFileParsingResult('/dags/dag_1.py', [SerializedDagUpdate('dag_1', 'fingerprint', None)]),
+                DagFileParsingResult('/dags/dag_2.py', []),
+            ]
+            cached_dag = MagicMock()
+            processor_agent._serialized_dags['dag_1'] = ('fingerprint', cached_dag)
+            expected = [
+                DagFileParsingResult('/dags/dag_1.py', [cached_dag]),
+                DagFileParsingResult('/dags/dag_2.py', []),
+            ]
+
+            manager._parsing_results = list(results)
+            manager._send_parsing_results()
+            [(batch,), _] = manager._signal_conn.send.call_args
+            self.assertIsNone(batch.spool_path)
+            processor_agent._process_message(batch)
+            self.assertEqual(expected, processor_agent._collected_results)
+            self.assertEqual([], manager._parsing_results)
+
+            # Large batches go through a spool file
+            processor_agent._collected_results = []
+            manager._parsing_results = list(results)
+            with mock.patch('airflow.utils.dag_processing._SPOOL_THRESHOLD', 0):
+                manager._send_parsing_results()
+            [(batch,), _] = manager._signal_conn.send.call_args
+            self.assertIsNone(batch.data)
+            self.assertTrue(os.path.isfile(batch.spool_path))
+            processor_agent._process_message(batch)
+            self.assertEqual(expected, processor_agent._collected_results)
+            self.assertFalse(os.path.exists(batch.spool_path))
+
+    def test_refresh_dag_dir_in_background(self):
+        manager = self._make_manager()
+        manager.dag_dir_list_interval = 0
+        listed = threading.Event()
+
+        def list_dag_dir():
+            listed.wait(timeout=10)
+            manager._listed_file_paths = ['/dags/dag_1.py', '/dags/dag_2.py']
+
+        with mock.patch.object(manager, '_list_dag_dir', side_effect=list_dag_dir):
+            manager._dag_folder_file_paths = ['/dags/dag_1.py']
+            manager._refresh_dag_dir()
+            # The files are not changed until the listing finishes
+            self.assertEqual(['/dags/dag_1.py'], manager._dag_folder_file_paths)
+            listed.set()
+            manager._dag_dir_listing_thread.join()
+            manager._refresh_dag_dir()
+        self.assertEqual(['/dags/dag_1.py', '/dags/dag_2.py'], manager._file_paths)
+        self.assertIsNone(manager._dag_dir_listing_thread)
+
     def test_find_zombies(self):
         manager = DagFileProcessorManager(
             dag_directory='directory',
@@ -405,6 +693,41 @@ class TestDagFileProcessorAgent(unittest.TestCase):
         dag_ids = [result.dag_id for result in parsing_result]
         self.assertEqual(dag_ids.count('test_start_date_scheduling'), 1)
 
+    def test_process_message_reuses_unchanged_dags(self):
+        clear_db_serialized_dags()
+        self.addCleanup(clear_db_serialized_dags)
+        dag = DagBag(TEST_DAG_FOLDER, include_examples=False).get_dag('test_start_date_scheduling')
+        SerializedDagModel.write_dag(dag)
+        fingerprint = SerializedDAG.fingerprint(dag)
+        processor_agent = DagFileProcessorAgent(TEST_DAG_FOLDER, 1, type(self)._processor_factory,
+                                                timedelta.max, [], False, False)
+
+        def receive(update):
+            result = DagFileParsingResult(dag.fileloc, [update])
+            processor_agent._process_message(DagParsingResultBatch(pickle.dumps([result])))
+            [received_dag] = processor_agent.harvest_serialized_dags()
+            return received_dag
+
+        processor_agent._parent_signal_conn = MagicMock()
+        processor_agent._parent_signal_conn.poll.return_value = False
+        processor_agent._heartbeat_manager = MagicMock()
+
+        # Not received yet, loaded from the DB
+        stored_dag = receive(SerializedDagUpdate(dag.dag_id, fingerprint, None))
+        self.assertEqual(dag.dag_id, stored_dag.dag_id)
+
+        self.assertIs(stored_dag, receive(SerializedDagUpdate(dag.dag_id, fingerprint, None)))
+
+        changed_dag = receive(SerializedDagUpdate(dag.dag_id, 'changed', SerializedDAG.to_dict(dag)))
+        self.assertIsNot(stored_dag, changed_dag)
+        self.assertIs(changed_dag, receive(SerializedDagUpdate(dag.dag_id, 'changed', None)))
+
+        # The DAGs of deleted files are forgotten
+        processor_agent._process_message(DagParsingStat([dag.fileloc], False, False))
+        self.assertIn(dag.dag_id, processor_agent._serialized_dags)
+        processor_agent._process_message(DagParsingStat([], False, False))
+        self.assertEqual({}, processor_agent._serialized_dags)
+
     def test_launch_process(self):
         test_dag_path = os.path.join(TEST_DAG_FOLDER, 'test_scheduler_dags.py')
         async_mode = 'sqlite' not in conf.get('core', 'sql_alchemy_conn')
@@ -432,6 +755,110 @@ class TestDagFileProcessorAgent(unittest.TestCase):
         self.assertTrue(os.path.isfile(log_file_loc))
 
 
+class TestGetDagFileShard(unittest.TestCase):
+    file_paths = ['/dags/dag_{}.py'.format(i) for i in range(100)]
+
+    def test_every_file_in_one_shard(self):
+        shards = [get_dag_file_shard(self.file_paths, '/dags', [1, 2, 3], i) for i in [1, 2, 3]]
+        self.assertEqual(sorted(self.file_paths), sorted(sum(shards, [])))
+        self.assertTrue(all(shards))
+
+    def test_shard_only_depends_on_relative_paths(self):
+        mounted_paths = [path.replace('/dags', '/mnt/dags') for path in self.file_paths]
+        self.assertEqual(
+            get_dag_file_shard(self.file_paths, '/dags', [1, 2], 1),
+            [path.replace('/mnt/dags', '/dags')
+             for path in get_dag_file_shard(mounted_paths, '/mnt/dags', [2, 1], 1)],
+        )
+
+    def test_new_processor_only_takes_files(self):
+        before = {i: set(get_dag_file_shard(self.file_paths, '/dags', [1, 2], i)) for i in [1, 2]}
+        after = {i: set(get_dag_file_shard(self.file_paths, '/dags', [1, 2, 3], i)) for i in [1, 2, 3]}
+        self.assertTrue(after[1] <= before[1])
+        self.assertTrue(after[2] <= before[2])
+        self.assertEqual((before[1] - after[1]) | (before[2] - after[2]), after[3])
+
+
+class TestSimpleDagBag(unittest.TestCase):
+    @staticmethod
+    def _dag(dag_id):
+        dag = MagicMock()
+        dag.dag_id = dag_id
+        return dag
+
+    def test_update(self):
+        dag_1, dag_2, dag_3 = self._dag('dag_1'), self._dag('dag_2'), self._dag('dag_3')
+        simple_dag_bag = SimpleDagBag([])
+        simple_dag_bag.update([
+            DagFileParsingResult('/dags/a.py', [dag_1, dag_2]),
+            DagFileParsingResult('/dags/b.py', [dag_3]),
+        ])
+        self.assertEqual({'dag_1', 'dag_2', 'dag_3'}, set(simple_dag_bag.dag_ids))
+
+        # The DAGs of a parsed file replace the ones previously found in it
+        new_dag_1 = self._dag('dag_1')
+        simple_dag_bag.update([DagFileParsingResult('/dags/a.py', [new_dag_1])])
+        self.assertEqual({'dag_1', 'dag_3'}, set(simple_dag_bag.dag_ids))
+        self.assertIs(new_dag_1, simple_dag_bag.get_dag('dag_1'))
+
+        # A DAG moved to another file isn't removed when its previous file is parsed again
+        simple_dag_bag.update([DagFileParsingResult('/dags/b.py', [dag_3, new_dag_1])])
+        simple_dag_bag.update([DagFileParsingResult('/dags/a.py', [])])
+        self.assertEqual({'dag_1', 'dag_3'}, set(simple_dag_bag.dag_ids))
+
+        # The DAGs of deleted files are removed
+        simple_dag_bag.update([], file_paths={'/dags/a.py'})
+        self.assertEqual([], simple_dag_bag.serialized_dags)
+
+
+class TestDagFolderIndex(unittest.TestCase):
+    @staticmethod
+    def _write(path, content, mtime=1000000000):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+        # Old modification times, the index doesn't trust recent ones
+        os.utime(path, (mtime, mtime))
+        os.utime(os.path.dirname(path), (mtime, mtime))
+
+    def test_same_files_as_without_index(self):
+        index = DagFolderIndex()
+        for _ in range(2):
+            self.assertEqual(
+                list_py_file_paths(TEST_DAG_FOLDER, include_examples=True),
+                list_py_file_paths(TEST_DAG_FOLDER, include_examples=True, index=index),
+            )
+
+    def test_only_changes_are_read_again(self):
+        with TemporaryDirectory(prefix="airflow-dags-") as dags_folder:
+            dag_file = os.path.join(dags_folder, 'subdir', 'dag.py')
+            ignored_file = os.path.join(dags_folder, 'subdir', 'ignored_dag.py')
+            ignore_file = os.path.join(dags_folder, 'subdir', '.airflowignore')
+            self._write(dag_file, 'from airflow import DAG')
+            self._write(ignored_file, 'from airflow import DAG')
+            self._write(ignore_file, 'ignored_.*')
+            os.utime(dags_folder, (1000000000, 1000000000))
+
+            index = DagFolderIndex()
+            self.assertEqual([dag_file], list_py_file_paths(dags_folder, include_examples=False, index=index))
+
+            with mock.patch('airflow.utils.file._list_directory') as mock_list_directory, \
+                    mock.patch('airflow.utils.file.might_contain_dag') as mock_might_contain_dag, \
+                    mock.patch('airflow.utils.file._read_ignore_patterns') as mock_read_ignore_patterns:
+                self.assertEqual(
+                    [dag_file], list_py_file_paths(dags_folder, include_examples=False, index=index)
+                )
+            mock_list_directory.assert_not_called()
+            mock_might_contain_dag.assert_not_called()
+            mock_read_ignore_patterns.assert_not_called()
+
+            new_file = os.path.join(dags_folder, 'subdir', 'new_dag.py')
+            self._write(new_file, 'from airflow import DAG', mtime=1000000010)
+            self._write(ignore_file, 'ignored_.*\nnew_.*', mtime=1000000010)
+            self._write(dag_file, 'print("not a DAG any more")', mtime=1000000010)
+            self.assertEqual([], list_py_file_paths(dags_folder, include_examples=False, index=index))
+
+
 class TestCorrectMaybeZipped(unittest.TestCase):
     @mock.patch("zipfile.is_zipfile")
     def test_correct_maybe_zipped_normal_file(self, mocked_is_zipfile):
@@ -0,0 +1,147 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import copy
+import pickle
+import random
+import unittest
+from collections import OrderedDict
+
+from airflow import DAG
+from airflow.exceptions import AirflowException
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.serialization.serialized_objects import SerializedDAG
+from airflow.utils.dag_topology import DagTopology
+from tests.models import DEFAULT_DATE
+
+
+def pass_based_sort(dag):
+    """The topological sort DAG.topological_sort used before the topology index"""
+    graph_unsorted = OrderedDict((task.task_id, task) for task in dag.tasks)
+    graph_sorted = []
+    while graph_unsorted:
+        acyclic = False
+        for node in list(graph_unsorted.values()):
+            for edge in node.upstream_list:
+                if edge.task_id in graph_unsorted:
+                    break
+            else:
+                acyclic = True
+                del graph_unsorted[node.task_id]
+                graph_sorted.append(node.task_id)
+        if not acyclic:
+            raise AirflowException("A cyclic dependency occurred in dag: {}".format(dag.dag_id))
+    return tuple(graph_sorted)
+
+
+def flat_relative_ids(task, upstream, found=None):
+    """The recursive traversal BaseOperator.get_flat_relative_ids used before the topology index"""
+    found = set() if found is None else found
+    for relative_id in task.get_direct_relative_ids(upstream):
+        if relative_id not in found:
+            found.add(relative_id)
+            flat_relative_ids(task.dag.task_dict[relative_id], upstream, found)
+    return found
+
+
+def make_random_dag(seed, num_tasks=60, num_edges=120):
+    rand = random.Random(seed)
+    dag = DAG('random_dag_{}'.format(seed), start_date=DEFAULT_DATE)
+    task_ids = ['task_{}'.format(i) for i in range(num_tasks)]
+    # Add the tasks in a random order so task_dict order differs from the edge direction
+    order = list(range(num_tasks))
+    rand.shuffle(order)
+    tasks = {}
+    for i in order:
+        tasks[i] = DummyOperator(task_id=task_ids[i], dag=dag)
+    edges = set()
+    while len(edges) < num_edges:
+        upstream, downstream = sorted(rand.sample(range(num_tasks), 2))
+        edges.add((upstream, downstream))
+    for upstream, downstream in edges:
+        tasks[upstream] >> tasks[downstream]  # pylint: disable=expression-not-assigned
+    return dag
+
+
+class TestDagTopology(unittest.TestCase):
+    def test_matches_previous_traversals(self):
+        for seed in range(10):
+            dag = make_random_dag(seed)
+            topology = DagTopology(dag)
+
+            self.assertEqual(pass_based_sort(dag), topology.topological_order())
+            self.assertEqual([t.task_id for t in dag.tasks if not t.upstream_list], topology.root_ids)
+            self.assertEqual([t.task_id for t in dag.tasks if not t.downstream_list], topology.leaf_ids)
+            for task in dag.tasks:
+                for upstream in (True, False):
+                    self.assertEqual(flat_relative_ids(task, upstream),
+                                     topology.get_flat_relative_ids(task.task_id, upstream))
+
+    def test_cycle(self):
+        dag = DAG('dag', start_date=DEFAULT_DATE)
+        with dag:
+            op1 = DummyOperator(task_id='A')
+            op2 = DummyOperator(task_id='B')
+            op1 >> op2  # pylint: disable=pointless-statement
+        # Bypass set_downstream, which would refuse to add the same relation twice
+        op2.downstream_task_ids.add('A')
+        op1.upstream_task_ids.add('B')
+
+        with self.assertRaisesRegex(AirflowException, 'A cyclic dependency occurred in dag: dag'):
+            DagTopology(dag).topological_order()
+
+    def test_invalidated_on_change(self):
+        dag = DAG('dag', start_date=DEFAULT_DATE)
+        with dag:
+            op1 = DummyOperator(task_id='A')
+            op2 = DummyOperator(task_id='B')
+
+        self.assertEqual([op1, op2], dag.roots)
+        self.assertEqual(set(), op1.get_flat_relative_ids())
+
+        op1 >> op2  # pylint: disable=pointless-statement
+        self.assertEqual([op1], dag.roots)
+        self.assertEqual([op2], dag.leaves)
+        self.assertEqual({'B'}, op1.get_flat_relative_ids())
+
+        op3 = DummyOperator(task_id='C', dag=dag)
+        op2 >> op3  # pylint: disable=pointless-statement
+        self.assertEqual((op1, op2, op3), dag.topological_sort())
+        self.assertEqual({'B', 'C'}, op1.get_flat_relative_ids())
+
+    def test_not_copied(self):
+        dag = DAG('dag', start_date=DEFAULT_DATE)
+        with dag:
+            op1 = DummyOperator(task_id='A')
+            op1 >> DummyOperator(task_id='B')  # pylint: disable=expression-not-assigned
+        dag.topological_sort()
+        self.assertIsNotNone(dag._topology)
+
+        self.assertIsNone(copy.deepcopy(dag)._topology)
+        self.assertIsNone(pickle.loads(pickle.dumps(dag))._topology)
+
+        sub_dag = dag.sub_dag('B', include_upstream=False)
+        self.assertEqual(['B'], [task.task_id for task in sub_dag.roots])
+        self.assertEqual(['A'], [task.task_id for task in dag.roots])
+
+    def test_serialized_dag(self):
+        dag = make_random_dag(0)
+        serialized_dag = SerializedDAG.from_dict(SerializedDAG.to_dict(dag))
+
+        self.assertEqual([t.task_id for t in dag.topological_sort()],
+                         [t.task_id for t in serialized_dag.topological_sort()])
+        self.assertEqual([t.task_id for t in dag.roots], [t.task_id for t in serialized_dag.roots])
@@ -0,0 +1,191 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from airflow.executors.sequential_executor import SequentialExecutor
+from airflow.jobs.base_job import BaseJob
+from airflow.jobs.local_task_job import LocalTaskJob
+from airflow.models.dag import DAG
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils import timezone
+from airflow.utils.heartbeat_aggregator import HeartbeatAggregator, _TaskInstanceId, send_heartbeat
+from airflow.utils.session import create_session
+from airflow.utils.state import State
+from tests.test_utils.db import clear_db_jobs, clear_db_runs
+
+DEFAULT_DATE = timezone.datetime(2016, 1, 1)
+
+
+class TestHeartbeatAggregator(unittest.TestCase):
+    def setUp(self):
+        clear_db_jobs()
+        clear_db_runs()
+        self.dag = DAG('test_heartbeat_aggregator', start_date=DEFAULT_DATE)
+        with self.dag:
+            DummyOperator(task_id='running')
+            DummyOperator(task_id='failed')
+        self.dag_run = self.dag.create_dagrun(
+            run_id="test", state=State.RUNNING, execution_date=DEFAULT_DATE
+        )
+
+    def tearDown(self):
+        clear_db_jobs()
+        clear_db_runs()
+
+    def _create_job(self, task_id, state):
+        with create_session() as session:
+            ti = self.dag_run.get_task_instance(task_id=task_id, session=session)
+            ti.state = state
+            ti.hostname = 'hostname'
+            ti.pid = 1
+            session.merge(ti)
+            job = LocalTaskJob(task_instance=ti, executor=SequentialExecutor())
+            job.state = State.RUNNING
+            job.latest_heartbeat = DEFAULT_DATE
+            session.add(job)
+            session.commit()
+            return job.id, _TaskInstanceId(ti.dag_id, ti.task_id, DEFAULT_DATE.isoformat())
+
+    def test_write_heartbeats(self):
+        running_job_id, running_ti_id = self._create_job('running', State.RUNNING)
+        failed_job_id, failed_ti_id = self._create_job('failed', State.FAILED)
+        aggregator = HeartbeatAggregator(socket_path='unused', interval=5)
+
+        self.assertIsNone(aggregator.heartbeat(running_job_id, running_ti_id))
+        self.assertIsNone(aggregator.heartbeat(failed_job_id, failed_ti_id))
+        aggregator.write_heartbeats()
+
+        with create_session() as session:
+            latest_heartbeats = dict(session.query(BaseJob.id, BaseJob.latest_heartbeat))
+        self.assertGreater(latest_heartbeats[running_job_id], DEFAULT_DATE)
+        self.assertEqual(latest_heartbeats[running_job_id], latest_heartbeats[failed_job_id])
+
+        self.assertEqual(aggregator.heartbeat(running_job_id, running_ti_id), {
+            'latest_heartbeat': latest_heartbeats[running_job_id].isoformat(),
+            'job_state': State.RUNNING,
+            'task_instance': {'state': State.RUNNING, 'hostname': 'hostname', 'pid': 1},
+        })
+        self.assertEqual(
+            aggregator.heartbeat(failed_job_id, failed_ti_id)['task_instance']['state'], State.FAILED
+        )
+
+    def test_write_heartbeats_forgets_stopped_jobs(self):
+        job_id, ti_id = self._create_job('running', State.RUNNING)
+        aggregator = HeartbeatAggregator(socket_path='unused', interval=5)
+        aggregator.heartbeat(job_id, ti_id)
+
+        expired = time.monotonic() + 3600
+        with mock.patch('airflow.utils.heartbeat_aggregator.time.monotonic', return_value=expired):
+            aggregator.write_heartbeats()
+
+        with create_session() as session:
+            self.assertEqual(session.query(BaseJob.latest_heartbeat).filter(BaseJob.id == job_id).scalar(),
+                             DEFAULT_DATE)
+        self.assertIsNone(aggregator.heartbeat(job_id, ti_id))
+
+    @staticmethod
+    def _start_serving(aggregator):
+        aggregator.write_heartbeats = mock.MagicMock()
+        server_thread = threading.Thread(target=aggregator.serve, daemon=True)
+        server_thread.start()
+        for _ in range(50):
+            if aggregator._server is not None:  # pylint: disable=protected-access
+                break
+            time.sleep(0.1)
+        return server_thread
+
+    def test_serve_replaces_stale_socket(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = os.path.join(tmp_dir, 'heartbeat-aggregator.sock')
+            # Left over by an aggregator which was killed
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale_socket:
+                stale_socket.bind(socket_path)
+
+            aggregator = HeartbeatAggregator(socket_path=socket_path, interval=0.1)
+            server_thread = self._start_serving(aggregator)
+            try:
+                self.assertIsNone(send_heartbeat(socket_path, 1, 'dag', 'task', DEFAULT_DATE.isoformat()))
+            finally:
+                aggregator.stop()
+                server_thread.join(timeout=5)
+            self.assertFalse(os.path.exists(socket_path))
+
+    def test_serve_leaves_live_aggregator(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = os.path.join(tmp_dir, 'heartbeat-aggregator.sock')
+            aggregator = HeartbeatAggregator(socket_path=socket_path, interval=0.1)
+            server_thread = self._start_serving(aggregator)
+            try:
+                other_aggregator = HeartbeatAggregator(socket_path=socket_path, interval=0.1)
+                # Returns at once, without taking over the socket
+                other_aggregator.serve()
+                other_aggregator.stop()
+                self.assertIsNone(send_heartbeat(socket_path, 1, 'dag', 'task', DEFAULT_DATE.isoformat()))
+                self.assertIn(1, aggregator._heartbeats)  # pylint: disable=protected-access
+            finally:
+                aggregator.stop()
+                server_thread.join(timeout=5)
+
+    def test_stop_leaves_socket_of_other_aggregator(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = os.path.join(tmp_dir, 'heartbeat-aggregator.sock')
+            aggregator = HeartbeatAggregator(socket_path=socket_path, interval=0.1)
+            server_thread = self._start_serving(aggregator)
+            # Another aggregator took over the path
+            os.unlink(socket_path)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as other_socket:
+                other_socket.bind(socket_path)
+                aggregator.stop()
+                server_thread.join(timeout=5)
+                self.assertTrue(os.path.exists(socket_path))
+
+    def test_send_heartbeat(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = os.path.join(tmp_dir, 'heartbeat-aggregator.sock')
+            aggregator = HeartbeatAggregator(socket_path=socket_path, interval=0.1)
+            with mock.patch.object(aggregator, 'write_heartbeats'):
+                server_thread = threading.Thread(target=aggregator.serve, daemon=True)
+                server_thread.start()
+                try:
+                    for _ in range(50):
+                        if os.path.exists(socket_path):
+                            break
+                        time.sleep(0.1)
+
+                    self.assertIsNone(send_heartbeat(socket_path, 1, 'dag', 'task', DEFAULT_DATE.isoformat()))
+                    status = {'latest_heartbeat': DEFAULT_DATE.isoformat(), 'job_state': State.RUNNING,
+                              'task_instance': None}
+                    aggregator._statuses[1] = status  # pylint: disable=protected-access
+                    self.assertEqual(send_heartbeat(socket_path, 1, 'dag', 'task', DEFAULT_DATE.isoformat()),
+                                     status)
+                    heartbeat = aggregator._heartbeats[1]  # pylint: disable=protected-access
+                    self.assertEqual(heartbeat.task_instance_id,
+                                     _TaskInstanceId('dag', 'task', DEFAULT_DATE.isoformat()))
+                finally:
+                    aggregator.stop()
+                    server_thread.join(timeout=5)
+
+            self.assertFalse(os.path.exists(socket_path))
+            with self.assertRaises(OSError):
+                send_heartbeat(socket_path, 1, 'dag', 'task', DEFAULT_DATE.isoformat())
@@ -22,6 +22,7 @@ import multiprocessing
 import os
 import signal
 import subprocess
+import sys
 import time
 import unittest
 from contextlib import suppress
@@ -115,6 +116,39 @@ class TestExecuteInSubProcess(unittest.TestCase):
             process_utils.execute_in_subprocess(["bash", "-c", "exit 1"])
 
 
+class TestExecuteInFork(unittest.TestCase):
+
+    @mock.patch('airflow.cli.cli_parser.get_parser')
+    def test_should_run_command_in_fork(self, mock_get_parser):
+        with NamedTemporaryFile() as pid_file:
+            def write_pid(args):
+                with open(pid_file.name, 'w') as file:
+                    file.write(str(os.getpid()))
+
+            mock_get_parser.return_value.parse_args.return_value.func = write_pid
+            exit_code = process_utils.execute_in_fork(['airflow', 'tasks', 'run', 'dag', 'task'])
+
+            self.assertEqual(exit_code, 0)
+            with open(pid_file.name) as file:
+                self.assertNotEqual(int(file.read()), os.getpid())
+        # The parser is not called in the current process
+        mock_get_parser.assert_not_called()
+
+    @mock.patch('airflow.cli.cli_parser.get_parser')
+    def test_should_return_exit_code(self, mock_get_parser):
+        def fail(args):
+            raise ValueError("Failed")
+
+        def exit_with_code(args):
+            sys.exit(3)
+
+        mock_get_parser.return_value.parse_args.return_value.func = fail
+        self.assertEqual(process_utils.execute_in_fork(['airflow', 'tasks', 'run', 'dag', 'task']), 1)
+
+        mock_get_parser.return_value.parse_args.return_value.func = exit_with_code
+        self.assertEqual(process_utils.execute_in_fork(['airflow', 'tasks', 'run', 'dag', 'task']), 3)
+
+
 def my_sleep_subprocess():
     sleep(100)
 
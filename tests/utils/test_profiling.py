@@ -0,0 +1,117 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import os
+import shutil
+import threading
+import unittest
+from tempfile import mkdtemp
+from unittest import mock
+
+from airflow.models import DagModel
+from airflow.utils.profiling import DagParseProfiler, LoopProfiler, PhaseStats
+from airflow.utils.session import create_session
+
+
+class TestPhaseStats(unittest.TestCase):
+    @mock.patch('airflow.utils.profiling.Stats')
+    def test_phase(self, mock_stats):
+        phase_stats = PhaseStats('loop')
+        with phase_stats.phase('query'):
+            with create_session() as session:
+                session.query(DagModel).all()
+
+        mock_stats.timing.assert_called_once_with('loop.query.duration', mock.ANY)
+        mock_stats.incr.assert_any_call('loop.query.queries', 1)
+        mock_stats.incr.assert_any_call('loop.query.rows', mock.ANY)
+        self.assertIn('query', phase_stats.last_durations)
+
+    @mock.patch('airflow.utils.profiling.Stats')
+    def test_phase_with_exception(self, mock_stats):
+        phase_stats = PhaseStats('loop')
+        with self.assertRaises(ValueError):
+            with phase_stats.phase('failing'):
+                raise ValueError()
+
+        mock_stats.timing.assert_called_once_with('loop.failing.duration', mock.ANY)
+        mock_stats.incr.assert_any_call('loop.failing.queries', 0)
+
+
+class TestLoopProfiler(unittest.TestCase):
+    def setUp(self):
+        self.folder = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_not_requested(self):
+        profiler = LoopProfiler('test', self.folder, num_loops=2)
+        profiler.loop_started()
+        self.assertFalse(profiler.active)
+        self.assertIsNone(profiler.loop_finished())
+        self.assertEqual([], os.listdir(self.folder))
+
+    def test_request(self):
+        profiler = LoopProfiler('test', self.folder, num_loops=2)
+        profiler.request()
+
+        paths = []
+        for _ in range(3):
+            profiler.loop_started()
+            sum(range(1000))
+            paths.append(profiler.loop_finished())
+
+        self.assertIsNone(paths[0])
+        self.assertTrue(os.path.isfile(paths[1]))
+        self.assertTrue(os.path.isfile(paths[1][:-len('.prof')] + '.txt'))
+        self.assertIsNone(paths[2])
+        self.assertFalse(profiler.active)
+        self.assertEqual(2, len(os.listdir(self.folder)))
+
+
+class TestDagParseProfiler(unittest.TestCase):
+    @mock.patch('airflow.utils.profiling.Stats')
+    def test_phase(self, mock_stats):
+        profiler = DagParseProfiler()
+        with profiler.phase('bag_dag'):
+            pass  # Not profiling a file
+        with profiler.profile_file('/dags/dag_file.py') as profile:
+            with profiler.phase('bag_dag'):
+                with profiler.phase('bag_dag'):
+                    pass
+            # Only the phases of the parsing thread are measured
+            thread = threading.Thread(target=lambda: profiler.phase('bag_dag').__enter__())
+            thread.start()
+            thread.join()
+
+        self.assertEqual(profile.counts['bag_dag'], 1)
+        self.assertIs(profiler.profiles['/dags/dag_file.py'], profile)
+        mock_stats.timing.assert_any_call('dag_processing.parse_profile.dag_file.bag_dag', mock.ANY)
+
+    @mock.patch('airflow.utils.profiling.Stats')
+    def test_profile_file_restores_import(self, mock_stats):
+        import builtins
+        original_import = builtins.__import__
+        profiler = DagParseProfiler()
+        with self.assertRaises(ImportError):
+            with profiler.profile_file('/dags/dag_file.py'):
+                self.assertIsNot(builtins.__import__, original_import)
+                import airflow_module_that_does_not_exist  # noqa pylint: disable=unused-import
+
+        self.assertIs(builtins.__import__, original_import)
+        profile = profiler.profiles['/dags/dag_file.py']
+        self.assertIn('airflow_module_that_does_not_exist', profile.module_import_durations)
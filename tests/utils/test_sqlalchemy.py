@@ -21,12 +21,12 @@ import unittest
 from unittest import mock
 
 from parameterized import parameterized
-from sqlalchemy.exc import StatementError
+from sqlalchemy.exc import OperationalError, StatementError
 
 from airflow import settings
 from airflow.models import DAG
 from airflow.settings import Session
-from airflow.utils.sqlalchemy import skip_locked
+from airflow.utils.sqlalchemy import is_lock_not_available_error, nowait, skip_locked, with_row_locks
 from airflow.utils.state import State
 from airflow.utils.timezone import utcnow
 
@@ -110,6 +110,47 @@ class TestSqlAlchemyUtils(unittest.TestCase):
         session.bind.dialect.supports_for_update_of = supports_for_update_of
         self.assertEqual(skip_locked(session=session), expected_return_value)
 
+    @parameterized.expand([
+        ("postgresql", True, {'nowait': True}, ),
+        ("mysql", False, {}, ),
+        ("mysql", True, {'nowait': True}, ),
+        ("sqlite", False, {'nowait': True}, ),
+    ])
+    def test_nowait(self, dialect, supports_for_update_of, expected_return_value):
+        session = mock.Mock()
+        session.bind.dialect.name = dialect
+        session.bind.dialect.supports_for_update_of = supports_for_update_of
+        self.assertEqual(nowait(session=session), expected_return_value)
+
+    @parameterized.expand([
+        (True, ),
+        (False, ),
+    ])
+    def test_with_row_locks(self, use_row_level_locking):
+        query = mock.Mock()
+        with mock.patch("airflow.utils.sqlalchemy.USE_ROW_LEVEL_LOCKING", use_row_level_locking):
+            returned = with_row_locks(query, of="of", nowait=True)
+
+        if use_row_level_locking:
+            query.with_for_update.assert_called_once_with(of="of", nowait=True)
+            self.assertEqual(returned, query.with_for_update.return_value)
+        else:
+            query.with_for_update.assert_not_called()
+            self.assertEqual(returned, query)
+
+    @parameterized.expand([
+        ("55P03", True, ),
+        ("40001", False, ),
+        (3572, True, ),
+        (1205, True, ),
+        (1213, False, ),
+    ])
+    def test_is_lock_not_available_error(self, error_code, expected):
+        pgcode = error_code if isinstance(error_code, str) else None
+        orig = mock.Mock(args=(error_code, "message"), pgcode=pgcode)
+        error = OperationalError("SELECT 1", {}, orig)
+        self.assertEqual(is_lock_not_available_error(error), expected)
+
     def tearDown(self):
         self.session.close()
         settings.engine.dispose()
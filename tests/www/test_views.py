@@ -652,9 +652,15 @@ class TestAirflowBaseViews(TestBase):
             conf={"abc": test_str},
         )
 
+        # The runs are no longer inlined in the page, only served as JSON by tree_data
         url = 'tree?dag_id=test_tree_view'
         resp = self.client.get(url, follow_redirects=True)
-        self.check_content_in_response(expected_text, resp)
+        self.check_content_not_in_response(expected_text, resp)
+        self.check_content_in_response('object/tree_data?dag_id=test_tree_view', resp)
+
+        resp = self.client.get('object/tree_data?dag_id=test_tree_view')
+        self.assertEqual(resp.mimetype, 'application/json')
+        self.assertEqual(len(json.loads(resp.data.decode('utf-8'))['runs']['run_id']), 1)
 
     def test_dag_details_trigger_origin_tree_view(self):
         dag = self.dagbag.dags['test_tree_view']
@@ -720,13 +726,98 @@ class TestAirflowBaseViews(TestBase):
     def test_tree(self):
         url = 'tree?dag_id=example_bash_operator'
         resp = self.client.get(url, follow_redirects=True)
-        self.check_content_in_response('runme_1', resp)
+        self.check_content_in_response('object/tree_data?dag_id=example_bash_operator', resp)
+        self.check_content_not_in_response('runme_1', resp)
+
+    def test_tree_root(self):
+        url = 'tree?dag_id=example_bash_operator&root=run_after_loop'
+        resp = self.client.get(url, follow_redirects=True)
+        self.check_content_in_response('task_regex=run_after_loop', resp)
+
+        resp = self.client.get('object/tree_data?dag_id=example_bash_operator&task_regex=run_after_loop')
+        data = json.loads(resp.data.decode('utf-8'))
+        self.assertEqual(set(data['tasks']['task_id']), {'run_after_loop', 'runme_0', 'runme_1', 'runme_2'})
 
     def test_tree_subdag(self):
         url = 'tree?dag_id=example_subdag_operator.section-1'
         resp = self.client.get(url, follow_redirects=True)
+        self.check_content_in_response('object/tree_data?dag_id=example_subdag_operator.section-1', resp)
+
+        resp = self.client.get('object/tree_data?dag_id=example_subdag_operator.section-1')
         self.check_content_in_response('section-1-task-1', resp)
 
+    def test_tree_data(self):
+        resp = self.client.get('object/tree_data?dag_id=example_bash_operator', follow_redirects=True)
+        self.assertEqual(resp.status_code, 200)
+        data = json.loads(resp.data.decode('utf-8'))
+
+        task_ids = data['tasks']['task_id']
+        self.assertEqual(set(task_ids), set(self.bash_dag.task_ids))
+        edges = {(task_ids[up], task_ids[down]) for up, down in data['edges']}
+        self.assertEqual(edges, {
+            (task.task_id, downstream_id)
+            for task in self.bash_dag.tasks for downstream_id in task.downstream_task_ids
+        })
+        self.assertEqual(data['truncated'], [])
+
+        self.assertEqual(data['runs']['run_id'], [self.bash_dagrun.run_id])
+        self.assertIsNone(data['next_base_date'])
+        self.assertEqual(len(data['instances']['state']), len(task_ids))
+        self.assertTrue(all(len(row) == 1 for row in data['instances']['state']))
+        self.assertEqual(
+            {data['states'][code] for row in data['instances']['state'] for code in row},
+            {None},
+        )
+
+    def test_tree_data_depth_and_root(self):
+        resp = self.client.get('object/tree_data?dag_id=example_bash_operator&depth=0')
+        data = json.loads(resp.data.decode('utf-8'))
+        roots = {task.task_id for task in self.bash_dag.roots}
+        self.assertEqual(set(data['tasks']['task_id']), roots)
+        self.assertEqual(data['edges'], [])
+        self.assertEqual(len(data['truncated']), len(roots))
+
+        resp = self.client.get('object/tree_data?dag_id=example_bash_operator&root=run_after_loop')
+        data = json.loads(resp.data.decode('utf-8'))
+        self.assertEqual(data['tasks']['task_id'], ['run_after_loop', 'run_this_last'])
+        self.assertEqual(data['edges'], [[0, 1]])
+
+        resp = self.client.get('object/tree_data?dag_id=example_bash_operator&root=missing')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_tree_data_paging(self):
+        older_dagrun = self.bash_dag.create_dagrun(
+            run_type=DagRunType.SCHEDULED,
+            execution_date=self.EXAMPLE_DAG_DEFAULT_DATE - timedelta(days=1),
+            start_date=timezone.utcnow(),
+            state=State.SUCCESS)
+
+        resp = self.client.get('object/tree_data?dag_id=example_bash_operator&num_runs=1')
+        data = json.loads(resp.data.decode('utf-8'))
+        self.assertEqual(data['runs']['run_id'], [self.bash_dagrun.run_id])
+        self.assertEqual(data['next_base_date'], older_dagrun.execution_date.isoformat())
+
+        resp = self.client.get('object/tree_data?dag_id=example_bash_operator&num_runs=1&base_date={}'
+                               .format(self.percent_encode(data['next_base_date'])))
+        data = json.loads(resp.data.decode('utf-8'))
+        self.assertEqual(data['runs']['run_id'], [older_dagrun.run_id])
+        self.assertIsNone(data['next_base_date'])
+
+    def test_tree_data_missing_dag(self):
+        resp = self.client.get('object/tree_data?dag_id=missing_dag')
+        self.assertEqual(resp.status_code, 404)
+
+    @parameterized.expand([
+        ('num_runs=0',),
+        ('num_runs=-1',),
+        ('num_runs=abc',),
+        ('depth=-1',),
+        ('base_date=abc',),
+    ])
+    def test_tree_data_invalid_arguments(self, args):
+        resp = self.client.get('object/tree_data?dag_id=example_bash_operator&' + args)
+        self.assertEqual(resp.status_code, 400)
+
     def test_duration(self):
         url = 'duration?days=30&dag_id=example_bash_operator'
         resp = self.client.get(url, follow_redirects=True)
@@ -2218,7 +2309,7 @@ class TestDagACLView(TestBase):
 
         url = 'tree?dag_id=example_bash_operator'
         resp = self.client.get(url, follow_redirects=True)
-        self.check_content_in_response('runme_1', resp)
+        self.check_content_in_response('object/tree_data?dag_id=example_bash_operator', resp)
 
     def test_log_success(self):
         self.logout()
@@ -2270,7 +2361,7 @@ class TestDagACLView(TestBase):
                    password='test_viewer')
         url = 'tree?dag_id=example_bash_operator'
         resp = self.client.get(url, follow_redirects=True)
-        self.check_content_in_response('runme_1', resp)
+        self.check_content_in_response('object/tree_data?dag_id=example_bash_operator', resp)
 
     def test_refresh_failure_for_viewer(self):
         # viewer role can't refresh